@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Usuario, EventoSismico, Noticia
+from .models import Usuario, EventoSismico, Noticia, Tarea, SuscripcionAlerta, EntregaAlerta
 from django.contrib.auth.admin import UserAdmin
 
 # Para personalizar cómo se muestra el modelo Usuario en el admin
@@ -23,4 +23,33 @@ class CustomUserAdmin(UserAdmin):
 
 admin.site.register(Usuario, CustomUserAdmin)
 admin.site.register(EventoSismico)
-admin.site.register(Noticia)
+
+
+# Los campos pre-renderizados se calculan al guardar (api/noticias.py)
+@admin.register(Noticia)
+class NoticiaAdmin(admin.ModelAdmin):
+    list_display = ['titulo', 'fecha_publicacion', 'minutos_lectura']
+    readonly_fields = ['contenido_html', 'extracto', 'palabras', 'minutos_lectura', 'version_render']
+
+
+# Cola de tareas en segundo plano (api/tareas.py): consulta de estados y errores
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'cola', 'nombre', 'estado', 'intentos', 'ejecutar_despues', 'fecha_creacion']
+    list_filter = ['estado', 'cola']
+    search_fields = ['nombre', 'clave_idempotencia']
+    readonly_fields = ['bloqueada_por', 'bloqueada_hasta', 'ultimo_error', 'fecha_creacion', 'fecha_fin']
+
+
+# Suscripciones a alertas y entregas emparejadas (api/alertas.py)
+@admin.register(SuscripcionAlerta)
+class SuscripcionAlertaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'usuario', 'nombre', 'magnitud_minima', 'radio_km', 'activa']
+    list_filter = ['activa']
+    raw_id_fields = ['usuario']
+
+
+@admin.register(EntregaAlerta)
+class EntregaAlertaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'usuario', 'evento', 'distancia_km', 'fecha_creacion', 'fecha_envio']
+    raw_id_fields = ['usuario', 'evento', 'suscripcion']
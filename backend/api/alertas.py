@@ -0,0 +1,229 @@
+# ========================================
+# ALERTAS POR SUSCRIPCIÓN - SEISMIC TRACKER
+# PROPÓSITO: Emparejar cada lote ingerido con los lugares guardados por los usuarios
+# ========================================
+
+"""
+Alertas de sismos cerca de los lugares guardados (SuscripcionAlerta).
+
+Índice por celdas:
+- La Tierra se divide en una rejilla de GRADOS_CELDA x GRADOS_CELDA grados
+- Cada suscripción activa tiene una fila en CeldaSuscripcion por cada celda
+  que toca su círculo (rectángulo envolvente conservador, con el umbral de
+  magnitud copiado para filtrar en el índice)
+
+Emparejamiento (tarea de la cola 'alertas', encolada tras cada ingesta):
+1. Los eventos del lote se agrupan por celda
+2. Una consulta por bloque de celdas trae las suscripciones de esas celdas con
+   umbral <= magnitud máxima del lote (índice celda_suscripcion_idx)
+3. Se comprueba magnitud y distancia exacta (haversine) solo para esos pares:
+   el coste es O(eventos x suscripciones cercanas), no O(eventos x suscripciones)
+4. Las entregas se insertan con unicidad (suscripción, evento): un evento
+   revisado que ya se alertó no genera otra alerta
+
+Envío: por cada usuario con entregas nuevas se encola (con un pequeño
+retraso para agrupar ingestas seguidas) una tarea que reserva todas sus
+entregas pendientes y las envía en un solo correo.
+"""
+
+import logging
+import math
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CeldaSuscripcion, EntregaAlerta, EventoSismico
+from .spatial import RADIO_TIERRA_KM
+from .tareas import tarea
+
+logger = logging.getLogger(__name__)
+
+_CONFIG = getattr(settings, 'ALERTAS', {})
+GRADOS_CELDA = _CONFIG.get('GRADOS_CELDA', 1.0)  # Lado de la celda de la rejilla en grados
+AGRUPAR_SEGUNDOS = _CONFIG.get('AGRUPAR_SEGUNDOS', 30)  # Espera antes de enviar, para agrupar ingestas
+MAX_POR_USUARIO = _CONFIG.get('MAX_POR_USUARIO', 10)  # Suscripciones por usuario
+REMITENTE = _CONFIG.get('REMITENTE', 'noreply@proyectosismologico.com')
+
+FILAS = int(math.ceil(180 / GRADOS_CELDA))
+COLUMNAS = int(math.ceil(360 / GRADOS_CELDA))
+KM_POR_GRADO = math.pi * RADIO_TIERRA_KM / 180
+CELDAS_POR_CONSULTA = 1000  # Por debajo del límite de 2100 parámetros de SQL Server
+
+# ========================================
+# GEOMETRÍA Y REJILLA
+# ========================================
+
+def distancia_km(lat1, lng1, lat2, lng2):
+    """Distancia de gran círculo (haversine)"""
+    fi1, fi2 = math.radians(lat1), math.radians(lat2)
+    dfi = fi2 - fi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dfi / 2) ** 2 + math.cos(fi1) * math.cos(fi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _fila(latitud):
+    return min(max(int((latitud + 90) // GRADOS_CELDA), 0), FILAS - 1)
+
+
+def _columna(longitud):
+    return int(((longitud + 180) % 360) // GRADOS_CELDA) % COLUMNAS
+
+
+def celda_de(latitud, longitud):
+    """Identificador de la celda que contiene el punto"""
+    return _fila(latitud) * COLUMNAS + _columna(longitud)
+
+
+def celdas_cubiertas(latitud, longitud, radio_km):
+    """Celdas que tocan el círculo (superconjunto: rectángulo envolvente en grados)"""
+    delta_lat = radio_km / KM_POR_GRADO
+    lat_min, lat_max = max(-90.0, latitud - delta_lat), min(90.0, latitud + delta_lat)
+    filas = range(_fila(lat_min), _fila(lat_max) + 1)
+
+    coseno = math.cos(math.radians(max(abs(lat_min), abs(lat_max))))
+    delta_lng = radio_km / (KM_POR_GRADO * coseno) if coseno > 1e-9 else 360.0
+    if delta_lng >= 180:
+        # El círculo abarca un polo o toda la franja de latitudes
+        columnas = range(COLUMNAS)
+    else:
+        inicio = int(math.floor((longitud - delta_lng + 180) / GRADOS_CELDA))
+        fin = int(math.floor((longitud + delta_lng + 180) / GRADOS_CELDA))
+        columnas = sorted({c % COLUMNAS for c in range(inicio, fin + 1)})
+    return [fila * COLUMNAS + columna for fila in filas for columna in columnas]
+
+# ========================================
+# MANTENIMIENTO DEL ÍNDICE
+# ========================================
+
+def indexar_suscripcion(suscripcion):
+    """Reemplaza las celdas de una suscripción (ninguna si está inactiva)"""
+    with transaction.atomic():
+        CeldaSuscripcion.objects.filter(suscripcion=suscripcion).delete()
+        if suscripcion.activa:
+            CeldaSuscripcion.objects.bulk_create([
+                CeldaSuscripcion(celda=celda, magnitud_minima=suscripcion.magnitud_minima, suscripcion=suscripcion)
+                for celda in celdas_cubiertas(suscripcion.latitud, suscripcion.longitud, suscripcion.radio_km)
+            ], batch_size=1000)
+
+# ========================================
+# EMPAREJAMIENTO
+# ========================================
+
+def emparejar(pks_eventos):
+    """
+    Crea las entregas de los eventos indicados y encola su envío.
+    Retorna el número de entregas nuevas.
+    """
+    eventos = list(
+        EventoSismico.objects.filter(pk__in=pks_eventos, magnitud__isnull=False)
+        .values_list('pk', 'latitud', 'longitud', 'magnitud')
+    )
+    if not eventos:
+        return 0
+
+    por_celda = defaultdict(list)
+    for evento in eventos:
+        por_celda[celda_de(evento[1], evento[2])].append(evento)
+    magnitud_maxima = max(evento[3] for evento in eventos)
+
+    candidatas = {}  # (suscripción, evento) -> (usuario, distancia)
+    celdas = list(por_celda)
+    for inicio in range(0, len(celdas), CELDAS_POR_CONSULTA):
+        filas = (
+            CeldaSuscripcion.objects
+            .filter(celda__in=celdas[inicio:inicio + CELDAS_POR_CONSULTA], magnitud_minima__lte=magnitud_maxima)
+            .values_list(
+                'celda', 'magnitud_minima', 'suscripcion_id', 'suscripcion__usuario_id',
+                'suscripcion__latitud', 'suscripcion__longitud', 'suscripcion__radio_km',
+            )
+        )
+        for celda, umbral, suscripcion_id, usuario_id, latitud, longitud, radio_km in filas:
+            for pk, lat_evento, lng_evento, magnitud in por_celda[celda]:
+                if magnitud < umbral:
+                    continue
+                distancia = distancia_km(latitud, longitud, lat_evento, lng_evento)
+                if distancia <= radio_km:
+                    candidatas[(suscripcion_id, pk)] = (usuario_id, distancia)
+    if not candidatas:
+        return 0
+
+    # Las revisiones de eventos ya alertados no generan entregas nuevas
+    existentes = set(
+        EntregaAlerta.objects.filter(
+            suscripcion_id__in={s for s, _ in candidatas}, evento_id__in={e for _, e in candidatas}
+        ).values_list('suscripcion_id', 'evento_id')
+    )
+    nuevas = [
+        EntregaAlerta(suscripcion_id=s, evento_id=e, usuario_id=usuario_id, distancia_km=round(distancia, 1))
+        for (s, e), (usuario_id, distancia) in candidatas.items() if (s, e) not in existentes
+    ]
+    EntregaAlerta.objects.bulk_create(nuevas, batch_size=500, ignore_conflicts=True)
+
+    for usuario_id in {entrega.usuario_id for entrega in nuevas}:
+        enviar_alertas_usuario.encolar(usuario_id=usuario_id, retraso=AGRUPAR_SEGUNDOS)
+    return len(nuevas)
+
+
+@tarea(cola='alertas', max_intentos=3)
+def emparejar_eventos(eventos):
+    """Tarea encolada tras cada ingesta (eventos nuevos y revisados)"""
+    creadas = emparejar(eventos)
+    if creadas:
+        logger.info("[ALERTAS] %s alertas emparejadas en un lote de %s eventos", creadas, len(eventos))
+    return creadas
+
+# ========================================
+# ENVÍO AGRUPADO POR USUARIO
+# ========================================
+
+def _linea(entrega):
+    evento = entrega.evento
+    fecha = timezone.localtime(evento.fecha_hora_evento).strftime('%d/%m/%Y %H:%M')
+    lugar = f" {evento.lugar_descripcion}" if evento.lugar_descripcion else ''
+    return f"- M{evento.magnitud:.1f}{lugar} ({fecha}), a {entrega.distancia_km:.0f} km de {entrega.suscripcion.nombre}"
+
+
+@tarea(cola='alertas', max_intentos=8)
+def enviar_alertas_usuario(usuario_id):
+    """
+    Reserva todas las entregas pendientes del usuario y las envía en un solo
+    correo. Dos tareas simultáneas del mismo usuario no envían la misma entrega.
+    """
+    lote = uuid.uuid4().hex
+    if not EntregaAlerta.objects.filter(usuario_id=usuario_id, lote='').update(lote=lote):
+        return 0  # Otra tarea ya las envió
+    reservadas = EntregaAlerta.objects.filter(lote=lote)
+    entregas = list(
+        reservadas.select_related('evento', 'suscripcion', 'usuario')
+        .order_by('-evento__magnitud', 'evento__fecha_hora_evento')
+    )
+    if not entregas:
+        # Solo había entregas de eventos ya archivados (api/tiering.py)
+        reservadas.update(fecha_envio=timezone.now())
+        return 0
+    usuario = entregas[0].usuario
+    if not usuario.is_active:
+        reservadas.update(fecha_envio=timezone.now())
+        return 0
+
+    try:
+        send_mail(
+            f"Alerta sísmica: {len(entregas)} sismo(s) cerca de tus lugares guardados",
+            f"Hola {usuario.first_name},\n\n"
+            f"Se registraron sismos que cumplen tus alertas:\n\n"
+            + "\n".join(_linea(entrega) for entrega in entregas)
+            + "\n\nPuedes modificar tus alertas desde tu perfil.",
+            REMITENTE,
+            [usuario.email],
+        )
+    except Exception:
+        # Se liberan para el reintento (o para la siguiente tarea del usuario)
+        reservadas.update(lote='')
+        raise
+    reservadas.update(fecha_envio=timezone.now())
+    return len(entregas)
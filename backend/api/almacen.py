@@ -0,0 +1,181 @@
+# ========================================
+# ALMACÉN DIRECCIONADO POR CONTENIDO - SEISMIC TRACKER
+# PROPÓSITO: Deduplicar archivos por hash y recolectar los que quedan sin uso
+# ========================================
+
+"""
+Almacén de archivos direccionados por contenido.
+
+Cada archivo se guarda una sola vez en 'contenido/<aa>/<bb>/<sha256>.<ext>'
+y se registra en ArchivoContenido con un conteo de referencias:
+
+- guardar_contenido(): suma una referencia con la fila bloqueada y después
+  escribe el archivo si no existe
+- liberar(): resta referencias; al llegar a cero se marca el momento
+- recolectar(): borra en lotes los archivos sin referencias tras un periodo
+  de gracia, con las filas bloqueadas; una subida idéntica simultánea espera
+  el bloqueo y reescribe el archivo si el recolector llegó a borrarlo
+
+Como la URL cambia si y solo si cambia el contenido, los archivos se sirven
+con Cache-Control immutable (ver la vista servir_archivo_contenido).
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ArchivoContenido
+
+logger = logging.getLogger(__name__)
+
+_CONFIG = getattr(settings, 'ALMACEN_CONTENIDO', {})
+DIRECTORIO = _CONFIG.get('DIRECTORIO', 'contenido')
+GRACIA_HORAS = _CONFIG.get('GRACIA_HORAS', 24)  # Horas sin referencias antes de borrar
+TAMANO_LOTE = _CONFIG.get('TAMANO_LOTE', 500)
+CACHE_INMUTABLE = 365 * 24 * 3600  # max-age (s) de los archivos servidos: nunca cambian bajo la misma URL
+
+# ========================================
+# RUTAS Y URLS
+# ========================================
+
+def ruta_para(sha256, extension):
+    return f'{DIRECTORIO}/{sha256[:2]}/{sha256[2:4]}/{sha256}.{extension}'
+
+
+def es_contenido(nombre):
+    """True si la ruta pertenece al almacén direccionado por contenido"""
+    return bool(nombre) and nombre.startswith(f'{DIRECTORIO}/')
+
+
+def url_contenido(nombre):
+    """URL relativa de un archivo: la vista inmutable si es del almacén, si no la del storage"""
+    if es_contenido(nombre):
+        return reverse('archivo_contenido', kwargs={'nombre': os.path.basename(nombre)})
+    return default_storage.url(nombre)
+
+# ========================================
+# ALTA Y BAJA DE REFERENCIAS
+# ========================================
+
+def _sumar_referencia(sha256, ruta, tamano_bytes):
+    """Suma una referencia con la fila bloqueada (la crea si no existe). Dentro de una transacción."""
+    pk = ArchivoContenido.objects.select_for_update().filter(sha256=sha256).values_list('pk', flat=True).first()
+    if pk is None:
+        try:
+            with transaction.atomic():
+                ArchivoContenido.objects.create(
+                    sha256=sha256,
+                    ruta=ruta,
+                    tipo_contenido=mimetypes.guess_type(ruta)[0] or 'application/octet-stream',
+                    tamano_bytes=tamano_bytes,
+                    referencias=1,
+                )
+            return
+        except IntegrityError:
+            # Creado en paralelo por otra subida idéntica: esperamos a su bloqueo
+            pk = ArchivoContenido.objects.select_for_update().get(sha256=sha256).pk
+    ArchivoContenido.objects.filter(pk=pk).update(referencias=F('referencias') + 1, sin_referencias_desde=None)
+
+
+def guardar_contenido(datos, extension):
+    """
+    Guarda los bytes (si no existen ya) y suma una referencia.
+    Retorna la ruta del archivo en el almacenamiento.
+    """
+    sha256 = hashlib.sha256(datos).hexdigest()
+    ruta = ruta_para(sha256, extension)
+
+    with transaction.atomic():
+        # Primero la referencia (fila bloqueada) y después el archivo: con el conteo
+        # ya en positivo el recolector no lo borra, y si lo acaba de borrar se reescribe
+        _sumar_referencia(sha256, ruta, len(datos))
+        if not default_storage.exists(ruta):
+            guardado = default_storage.save(ruta, ContentFile(datos))
+            if guardado != ruta:
+                # Otro proceso lo escribió a la vez y el storage renombró el nuestro
+                default_storage.delete(guardado)
+    return ruta
+
+
+def liberar(nombres):
+    """
+    Resta una referencia por aparición de cada ruta del almacén. Las rutas que
+    no pertenecen al almacén (fotos antiguas, subidas sin procesar) se borran
+    directamente. Retorna el número de referencias liberadas.
+    """
+    conteo = Counter(n for n in nombres if es_contenido(n))
+    for nombre in nombres:
+        if nombre and not es_contenido(nombre):
+            try:
+                default_storage.delete(nombre)
+            except Exception:
+                logger.exception("[ALMACEN] No se pudo borrar %s", nombre)
+
+    for nombre, veces in conteo.items():
+        ArchivoContenido.objects.filter(ruta=nombre).update(referencias=F('referencias') - veces)
+    if conteo:
+        ArchivoContenido.objects.filter(
+            ruta__in=list(conteo), referencias__lte=0, sin_referencias_desde__isnull=True
+        ).update(sin_referencias_desde=timezone.now())
+    return sum(conteo.values())
+
+# ========================================
+# RECOLECCIÓN DE HUÉRFANOS
+# ========================================
+
+def recolectar(gracia_horas=GRACIA_HORAS, tamano_lote=TAMANO_LOTE):
+    """Borra, por lotes, los archivos sin referencias desde hace más de gracia_horas"""
+    limite = timezone.now() - timedelta(hours=gracia_horas)
+    candidatos = ArchivoContenido.objects.filter(referencias__lte=0, sin_referencias_desde__lt=limite)
+    borrados = 0
+    ultimo_pk = 0
+    while True:
+        lote = list(
+            candidatos.filter(pk__gt=ultimo_pk).order_by('pk').values_list('pk', 'ruta')[:tamano_lote]
+        )
+        if not lote:
+            break
+        ultimo_pk = lote[-1][0]
+        with transaction.atomic():
+            # Se bloquean todas las candidatas y se decide con el conteo leído bajo el
+            # bloqueo: una subida idéntica pudo revivir el archivo, o lo hará después
+            # de esperar al bloqueo (y entonces lo reescribe)
+            bloqueadas = (
+                ArchivoContenido.objects.select_for_update()
+                .filter(pk__in=[pk for pk, _ in lote])
+                .values_list('pk', 'ruta', 'referencias', 'sin_referencias_desde')
+            )
+            eliminables = {
+                pk: ruta for pk, ruta, referencias, desde in bloqueadas
+                if referencias <= 0 and desde is not None and desde < limite
+            }
+            ArchivoContenido.objects.filter(pk__in=list(eliminables)).delete()
+            # Los archivos se borran con las filas aún bloqueadas: una subida que espera
+            # el bloqueo ya no encuentra el archivo y lo vuelve a escribir
+            for ruta in eliminables.values():
+                try:
+                    default_storage.delete(ruta)
+                    borrados += 1
+                except Exception:
+                    logger.exception("[ALMACEN] No se pudo borrar %s", ruta)
+    return borrados
+
+
+def estadisticas():
+    """Resumen del almacén: archivos, bytes y referencias (para diagnóstico)"""
+    return ArchivoContenido.objects.aggregate(
+        archivos=Count('pk'),
+        bytes=Sum('tamano_bytes'),
+        referencias=Sum('referencias'),
+    )
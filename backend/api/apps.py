@@ -8,4 +8,12 @@ class ApiConfig(AppConfig):
     def ready(self):
         # Importa las señales aquí para asegurarte de que se registren
         # cuando la aplicación se inicie.
-        import api.signals
\ No newline at end of file
+        import api.signals
+        # Módulos que registran tareas en segundo plano (api/tareas.py)
+        import api.fotos
+        import api.alertas
+
+        # El last_login se registra de forma diferida (api/ultimo_acceso.py):
+        # quitamos el receptor síncrono que django.contrib.auth conecta por defecto.
+        from django.contrib.auth.signals import user_logged_in
+        user_logged_in.disconnect(dispatch_uid='update_last_login')
\ No newline at end of file
@@ -0,0 +1,168 @@
+# ========================================
+# VISTAS ASÍNCRONAS - SEISMIC TRACKER
+# PROPÓSITO: Variantes async de los endpoints de lectura de sismos para ASGI
+# ========================================
+
+"""
+Endpoints de solo lectura implementados como vistas async de Django.
+
+Bajo asgi.py estas vistas no ocupan un hilo del pool mientras esperan a la
+base de datos: usan el ORM asíncrono (aiterator, acount, afirst) y la
+API asíncrona de la caché (aget, aset). La serialización se hace con los
+mismos serializers de DRF sobre instancias ya cargadas, por lo que no dispara
+consultas perezosas dentro del bucle de eventos.
+
+Endpoints:
+- GET /api/sismos/async/: Equivalente a GET /api/sismos/ (JWT requerido)
+- GET /api/sismos/async/public/: Equivalente a GET /api/sismos/public/
+- GET /api/sismos/async/diagnostics/: Equivalente a GET /api/sismos/diagnostics/
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .authentication import JWTAutenticacionCacheada
+from .filters import EventoSismicoFilter
+from .models import EventoSismico
+from .serializers import EventoSismicoSerializer
+from .snapshot import consultar_snapshot, ultimos_eventos
+from .tiering import hay_archivo, combinar_con_archivo, estadisticas_archivo
+
+# Segundos de caché para respuestas públicas (los pollers piden lo mismo cada pocos segundos)
+TTL_PUBLICO = 15
+CAMPOS_ORDEN = ['fecha_hora_evento', 'magnitud', 'profundidad']
+TAMANO_CHUNK = 2000
+
+# ========================================
+# UTILIDADES
+# ========================================
+
+def _autenticar(request):
+    """
+    Autenticación JWT solo con los claims del token (sin E/S): igual que
+    JWTAutenticacionCacheada en lecturas de vistas con autenticacion_por_claims.
+    Retorna un UsuarioToken o None.
+    """
+    autenticacion = JWTAutenticacionCacheada()
+    cabecera = autenticacion.get_header(request)
+    if cabecera is None:
+        return None
+    token_crudo = autenticacion.get_raw_token(cabecera)
+    if token_crudo is None:
+        return None
+    try:
+        return autenticacion.get_token_user(autenticacion.get_validated_token(token_crudo))
+    except (InvalidToken, TokenError):
+        return None
+
+
+def _no_autenticado():
+    return JsonResponse(
+        {"detail": "Las credenciales de autenticación no se proveyeron o son inválidas."},
+        status=401
+    )
+
+
+def _serializar(eventos):
+    return list(EventoSismicoSerializer(eventos, many=True).data)
+
+
+def _aplicar_busqueda_y_orden(queryset, parametros):
+    """Replica SearchFilter (lugar_descripcion) y OrderingFilter de EventoSismicoViewSet"""
+    busqueda = parametros.get('search', '')
+    for termino in busqueda.replace(',', ' ').split():
+        queryset = queryset.filter(Q(lugar_descripcion__icontains=termino))
+
+    ordering = parametros.get('ordering')
+    if ordering:
+        campos = [c.strip() for c in ordering.split(',') if c.strip().lstrip('-') in CAMPOS_ORDEN]
+        if campos:
+            queryset = queryset.order_by(*campos)
+    return queryset
+
+# ========================================
+# VISTA: Listado de sismos (async)
+# ========================================
+
+@require_GET
+async def sismos_async(request):
+    """
+    Variante async de EventoSismicoViewSet.list con los mismos filtros,
+    búsqueda, ordenamiento, snapshot y archivo frío.
+    """
+    if _autenticar(request) is None:
+        return _no_autenticado()
+
+    # Ruta rápida: snapshot mapeado en memoria (sin E/S de red ni BD)
+    eventos = consultar_snapshot(request.GET)
+    if eventos is not None:
+        return JsonResponse(_serializar(eventos), safe=False)
+
+    filtro = EventoSismicoFilter(
+        request.GET, queryset=EventoSismico.objects.all().order_by('-fecha_hora_evento')
+    )
+    if not filtro.is_valid():
+        return JsonResponse(filtro.errors, status=400)
+    queryset = _aplicar_busqueda_y_orden(filtro.qs, request.GET)
+
+    eventos = [evento async for evento in queryset.aiterator(chunk_size=TAMANO_CHUNK)]
+    if await sync_to_async(hay_archivo)():
+        eventos = await sync_to_async(combinar_con_archivo)(eventos, request.GET, CAMPOS_ORDEN)
+    return JsonResponse(_serializar(eventos), safe=False)
+
+# ========================================
+# VISTA: Sismos públicos (async)
+# ========================================
+
+@require_GET
+async def sismos_publicos_async(request):
+    """Variante async de PublicSismosView (10 sismos más recientes, sin autenticación)"""
+    clave = 'sismos:async:publicos'
+    datos = await cache.aget(clave)
+    if datos is None:
+        eventos = ultimos_eventos(10)
+        if eventos is None:
+            eventos = [e async for e in EventoSismico.objects.order_by('-fecha_hora_evento')[:10]]
+        datos = _serializar(eventos)
+        await cache.aset(clave, datos, TTL_PUBLICO)
+    return JsonResponse(datos, safe=False)
+
+# ========================================
+# VISTA: Diagnóstico rápido de sismos (async)
+# ========================================
+
+@require_GET
+async def sismos_diagnostics_async(request):
+    """Variante async de sismos_diagnostics (BD + archivo frío)"""
+    clave = 'sismos:async:diagnostics'
+    datos = await cache.aget(clave)
+    if datos is not None:
+        return JsonResponse(datos)
+
+    total = await EventoSismico.objects.acount()
+    first = await EventoSismico.objects.order_by('fecha_hora_evento').afirst()
+    last = await EventoSismico.objects.order_by('-fecha_hora_evento').afirst()
+
+    first_event = first.fecha_hora_evento if first else None
+    first_coords = {'lat': first.latitud, 'lng': first.longitud} if first else None
+
+    archivo = await sync_to_async(estadisticas_archivo)()
+    primero_archivo = archivo['primero']
+    if primero_archivo and (first_event is None or primero_archivo['fecha_hora_evento'] < first_event):
+        first_event = primero_archivo['fecha_hora_evento']
+        first_coords = {'lat': primero_archivo['latitud'], 'lng': primero_archivo['longitud']}
+
+    datos = {
+        'total': total + archivo['total'],
+        'total_archivo': archivo['total'],
+        'first_event': first_event.isoformat() if first_event else None,
+        'first_coords': first_coords,
+        'last_event': last.fecha_hora_evento.isoformat() if last else None,
+        'last_coords': {'lat': last.latitud, 'lng': last.longitud} if last else None,
+    }
+    await cache.aset(clave, datos, TTL_PUBLICO)
+    return JsonResponse(datos)
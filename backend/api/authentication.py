@@ -0,0 +1,204 @@
+# ========================================
+# AUTENTICACIÓN JWT - SEISMIC TRACKER
+# PROPÓSITO: Autenticación sin consulta a la BD para lecturas y caché de usuarios para el resto
+# ========================================
+
+"""
+Autenticación JWT con dos modos:
+
+1. Por claims: en peticiones seguras (GET/HEAD/OPTIONS) a vistas con
+   autenticacion_por_claims = True, el usuario se construye solo a partir de
+   los claims del token (username, email, tipo_usuario, first_name) que añade
+   MyTokenObtainPairSerializer.get_token. No se consulta la BD.
+2. Con caché: el resto de lecturas resuelve el Usuario a través de una caché
+   LRU con TTL en memoria. Las entradas se invalidan al guardar o borrar el
+   usuario (perfil, contraseña, is_active) y caducan tras TTL segundos, lo que
+   acota la desactualización entre procesos.
+3. Desde la BD: las peticiones no seguras (POST/PUT/PATCH/DELETE) siempre
+   leen el Usuario de la BD. Las vistas de perfil y contraseña guardan
+   request.user completo: con una copia de la caché escribirían de vuelta
+   columnas obsoletas (tipo_usuario, is_active o las fotos procesadas que
+   otro proceso cambió). La fila leída refresca la entrada de la caché.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.fields.files import FieldFile
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .metricas import registrar_cache
+
+_CONFIG = getattr(settings, 'AUTENTICACION_CACHE', {})
+MAX_ENTRADAS = _CONFIG.get('MAX_ENTRADAS', 10000)
+TTL = _CONFIG.get('TTL', 60)
+
+# ========================================
+# CLASE: UsuarioToken
+# ========================================
+
+class UsuarioToken(TokenUser):
+    """
+    Usuario sin representación en la BD respaldado por los claims del token.
+    Expone los atributos que usan los permisos del proyecto (p. ej. tipo_usuario).
+    """
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def tipo_usuario(self):
+        return self.token.get('tipo_usuario', '')
+
+    @cached_property
+    def first_name(self):
+        return self.token.get('first_name', '')
+
+# ========================================
+# CLASE: CacheUsuarios
+# ========================================
+
+class CacheUsuarios:
+    """
+    Caché LRU con TTL de filas de Usuario (seguro entre hilos).
+    Guarda valores de columnas, no instancias, para que cada petición
+    reciba su propia instancia y no comparta estado mutable.
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, ttl=TTL):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    @cached_property
+    def _campos(self):
+        return [f.attname for f in get_user_model()._meta.concrete_fields]
+
+    def obtener(self, pk):
+        """Retorna una instancia nueva de Usuario o None si no está (o caducó)"""
+        with self._lock:
+            entrada = self._datos.get(pk)
+            if entrada is None or entrada[0] < time.monotonic():
+                if entrada is not None:
+                    del self._datos[pk]
+                self.fallos += 1
+                registrar_cache('usuarios', False)
+                return None
+            self._datos.move_to_end(pk)
+            self.aciertos += 1
+            valores = entrada[1]
+        registrar_cache('usuarios', True)
+        return get_user_model().from_db('default', self._campos, valores)
+
+    def guardar(self, usuario):
+        valores = []
+        for campo in self._campos:
+            valor = getattr(usuario, campo)
+            valores.append(valor.name if isinstance(valor, FieldFile) else valor)
+        with self._lock:
+            self._datos[usuario.pk] = (time.monotonic() + self.ttl, tuple(valores))
+            self._datos.move_to_end(usuario.pk)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, *pks):
+        with self._lock:
+            for pk in pks:
+                if self._datos.pop(pk, None) is not None:
+                    self.invalidaciones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._datos),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'invalidaciones': self.invalidaciones,
+                'tasa_acierto': round(self.aciertos / consultas, 4) if consultas else None,
+            }
+
+
+cache_usuarios = CacheUsuarios()
+
+# ========================================
+# CLASE: JWTAutenticacionCacheada
+# ========================================
+
+class JWTAutenticacionCacheada(JWTAuthentication):
+    """
+    JWTAuthentication con modo por claims para lecturas y caché de usuarios.
+
+    Uso en vistas:
+        autenticacion_por_claims = True  # GET/HEAD/OPTIONS sin consulta a la BD
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        view = getattr(request, 'parser_context', {}).get('view')
+        if request.method not in SAFE_METHODS:
+            return self.get_user_bd(validated_token), validated_token
+        if getattr(view, 'autenticacion_por_claims', False):
+            return self.get_token_user(validated_token), validated_token
+
+        return self.get_user(validated_token), validated_token
+
+    def get_token_user(self, validated_token):
+        """Usuario respaldado solo por los claims del token"""
+        if jwt_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("El token no contiene una identificación de usuario reconocible")
+        return UsuarioToken(validated_token)
+
+    def get_user_bd(self, validated_token):
+        """Usuario leído de la BD (escrituras); refresca la entrada de la caché"""
+        usuario = super().get_user(validated_token)
+        cache_usuarios.guardar(usuario)
+        return usuario
+
+    def get_user(self, validated_token):
+        """Resuelve el usuario desde la caché; en caso de fallo consulta la BD y lo guarda"""
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("El token no contiene una identificación de usuario reconocible")
+
+        usuario = cache_usuarios.obtener(user_id)
+        if usuario is None:
+            usuario = super().get_user(validated_token)
+            cache_usuarios.guardar(usuario)
+            return usuario
+
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not usuario.is_active:
+            raise AuthenticationFailed("El usuario está inactivo", code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            jwt_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(usuario.password):
+            raise AuthenticationFailed("La contraseña del usuario ha cambiado", code="password_changed")
+        return usuario
@@ -0,0 +1,274 @@
+# ========================================
+# BENCHMARK DE EXTREMO A EXTREMO - SEISMIC TRACKER
+# PROPÓSITO: Medir API e ingesta con catálogos de distinto tamaño y detectar regresiones
+# ========================================
+
+"""
+Suite de benchmark (comando 'benchmark').
+
+1. Se trabaja sobre la base de datos de pruebas del alias 'default' (o sobre
+   un SQLite temporal con --sqlite): nunca sobre los datos reales
+2. Para cada tamaño (p. ej. 10k, 100k, 1M) se amplía el catálogo sintético
+   (api/sinteticos.py) hasta ese número de filas y se regenera el snapshot
+   en un directorio temporal
+3. Cada escenario se ejecuta con el cliente de pruebas de Django, pasando por
+   todo el stack de middleware, vistas y serializers: primero unas vueltas de
+   calentamiento y después N repeticiones cronometradas. Se guardan
+   percentiles, número de consultas SQL y filas devueltas
+4. El informe JSON puede compararse con uno anterior (línea base): un
+   escenario regresa si su p50 empeora más que el umbral o si hace más consultas
+
+Durante la medición se desactivan la limitación de tasa, el nivel frío
+(Parquet) y los logs de la API, para medir solo el trabajo del servidor.
+"""
+
+import logging
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .consultas import ContadorConsultas
+from .ingesta import ingerir_features
+from .models import EventoSismico, Usuario
+from .sinteticos import contar_sinteticos, generar_catalogo, insertar_catalogo
+from .snapshot import escribir_snapshot, lector_snapshot
+from .throttling import limitador
+
+PREFIJO = 'bench'
+PREFIJO_INGESTA = 'bench-ing'
+EVENTOS_INGESTA = 500  # Mitad nuevos, mitad revisiones de eventos existentes
+MARGEN_MS = 2.0  # Diferencias menores de p50 se consideran ruido
+LOGGERS_SILENCIADOS = ('api', 'api.views', 'django.request')
+
+# Peticiones que hacen los clientes reales (MapPage.js, MapPreview.js): ruta y parámetros
+ESCENARIOS_HTTP = {
+    'mapa': lambda ahora: ('/api/sismos/', {'magnitud__gte': 4.5}),
+    'mapa_fecha': lambda ahora: (
+        '/api/sismos/', {'magnitud__gte': 4.5, 'fecha_hora_evento__date': (ahora - timedelta(days=3)).date()}
+    ),
+    'sondeo': lambda ahora: ('/api/sismos/', {'since_date': (ahora - timedelta(hours=6)).isoformat()}),
+    'filtro_bbox': lambda ahora: ('/api/sismos/', {
+        'magnitud__gte': 3, 'since_date': (ahora - timedelta(days=7)).isoformat(),
+        'lat_min': 0, 'lat_max': 20, 'lng_min': -100, 'lng_max': -75,
+    }),
+    'busqueda': lambda ahora: ('/api/sismos/', {'magnitud__gte': 4, 'search': 'Chile'}),
+    'publico': lambda ahora: ('/api/sismos/public/', {}),
+    'diagnostico': lambda ahora: ('/api/sismos/diagnostics/', {}),
+}
+ESCENARIOS = tuple(ESCENARIOS_HTTP) + ('ingesta',)
+
+# ========================================
+# ENTORNO DE MEDICIÓN
+# ========================================
+
+@contextmanager
+def entorno_aislado(directorio_snapshot):
+    """Snapshot en un directorio propio, sin límites de tasa, sin nivel frío y sin logs de la API"""
+    limites, limitador.limites = limitador.limites, {}
+    directorio, lector_snapshot.directorio = lector_snapshot.directorio, Path(directorio_snapshot)
+    lector_snapshot._firma = None
+    niveles = {nombre: logging.getLogger(nombre).level for nombre in LOGGERS_SILENCIADOS}
+    for nombre in LOGGERS_SILENCIADOS:
+        logging.getLogger(nombre).setLevel(logging.ERROR)
+    try:
+        with mock.patch('api.views.hay_archivo', return_value=False), \
+                mock.patch('api.snapshot.hay_archivo', return_value=False):
+            yield
+    finally:
+        limitador.limites = limites
+        lector_snapshot.directorio = directorio
+        lector_snapshot._firma = None
+        for nombre, nivel in niveles.items():
+            logging.getLogger(nombre).setLevel(nivel)
+
+
+def _percentil(ordenados, p):
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+# ========================================
+# CLASE: Benchmark
+# ========================================
+
+class Benchmark:
+    """Siembra catálogos crecientes y cronometra los escenarios en cada tamaño"""
+
+    def __init__(self, repeticiones=20, calentamiento=2, semilla=0, escenarios=ESCENARIOS, salida=None):
+        self.repeticiones = repeticiones
+        self.calentamiento = calentamiento
+        self.semilla = semilla
+        self.escenarios = escenarios
+        self.salida = salida or (lambda mensaje: None)
+        self.ahora = timezone.now()
+        self.directorio_snapshot = tempfile.mkdtemp(prefix='benchmark-snapshot-')
+        self.cliente = None
+
+    # ----------------------------------------
+    # Preparación
+    # ----------------------------------------
+
+    def preparar_cliente(self):
+        usuario, _ = Usuario.objects.get_or_create(
+            username='benchmark', defaults={'email': 'benchmark@example.com'}
+        )
+        token = AccessToken.for_user(usuario)
+        self.cliente = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def sembrar_hasta(self, tamano):
+        """Amplía el catálogo sintético hasta 'tamano' filas (reutiliza las existentes)"""
+        actuales = contar_sinteticos(PREFIJO)
+        if actuales < tamano:
+            inicio = time.perf_counter()
+            # Cada ampliación usa su propia semilla derivada: mismo tamaño, mismo catálogo
+            columnas = generar_catalogo(tamano - actuales, semilla=(self.semilla, actuales), fin=self.ahora)
+            insertar_catalogo(columnas, prefijo=PREFIJO, desplazamiento=actuales)
+            self.salida(f"  Sembrados {tamano - actuales} eventos en {time.perf_counter() - inicio:.1f} s")
+        escribir_snapshot(directorio=self.directorio_snapshot)
+        lector_snapshot._firma = None
+
+    # ----------------------------------------
+    # Medición
+    # ----------------------------------------
+
+    def medir(self, operacion):
+        """Ejecuta la operación (que retorna el número de filas) y resume tiempos y consultas"""
+        for _ in range(self.calentamiento):
+            operacion()
+        tiempos = []
+        filas = None
+        for _ in range(self.repeticiones):
+            contador = ContadorConsultas()
+            with contador.contar():
+                inicio = time.perf_counter()
+                filas = operacion()
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+        consultas = contador.total
+        ordenados = sorted(tiempos)
+        return {
+            'p50_ms': round(_percentil(ordenados, 50), 2),
+            'p95_ms': round(_percentil(ordenados, 95), 2),
+            'min_ms': round(ordenados[0], 2),
+            'max_ms': round(ordenados[-1], 2),
+            'media_ms': round(statistics.fmean(ordenados), 2),
+            'consultas': consultas,
+            'filas': filas,
+        }
+
+    def peticion(self, ruta, parametros):
+        def operacion():
+            respuesta = self.cliente.get(ruta, parametros)
+            if respuesta.status_code != 200:
+                raise RuntimeError(f"{ruta} {parametros} respondió {respuesta.status_code}")
+            return len(respuesta.content)
+        # Las filas devueltas se cuentan una sola vez, fuera del cronómetro
+        resultado = self.medir(operacion)
+        datos = self.cliente.get(ruta, parametros).json()
+        resultado['filas'] = len(datos) if isinstance(datos, list) else 1
+        return resultado
+
+    def ingesta(self):
+        """Lotes de EVENTOS_INGESTA features: la mitad nuevas y la mitad revisiones"""
+        existentes = list(
+            EventoSismico.objects.filter(id_evento_usgs__startswith=PREFIJO)
+            .exclude(id_evento_usgs__startswith=PREFIJO_INGESTA)
+            .order_by('-fecha_hora_evento')
+            .values_list('id_evento_usgs', 'latitud', 'longitud', 'profundidad', 'magnitud')[:EVENTOS_INGESTA // 2]
+        )
+        vuelta = [0]
+
+        def feature(usgs_id, latitud, longitud, profundidad, magnitud, milisegundos):
+            return {
+                'id': usgs_id,
+                'properties': {'mag': magnitud, 'place': 'Benchmark', 'time': milisegundos, 'url': None},
+                'geometry': {'coordinates': [longitud, latitud, profundidad]},
+            }
+
+        def operacion():
+            vuelta[0] += 1
+            milisegundos = int(self.ahora.timestamp() * 1000)
+            features = [
+                feature(f'{PREFIJO_INGESTA}-{vuelta[0]}-{i}', 10.0, -85.0, 10.0, 4.0, milisegundos)
+                for i in range(EVENTOS_INGESTA - len(existentes))
+            ] + [
+                feature(usgs_id, latitud, longitud, profundidad, round(magnitud + 0.1 * (vuelta[0] % 2), 1), milisegundos)
+                for usgs_id, latitud, longitud, profundidad, magnitud in existentes
+            ]
+            return ingerir_features(features, notificar=False)['procesados']
+
+        try:
+            return self.medir(operacion)
+        finally:
+            EventoSismico.objects.filter(id_evento_usgs__startswith=PREFIJO_INGESTA).delete()
+
+    # ----------------------------------------
+    # Ejecución completa
+    # ----------------------------------------
+
+    def ejecutar_tamano(self, tamano):
+        self.salida(f"Catálogo de {tamano} eventos")
+        self.sembrar_hasta(tamano)
+        por_escenario = {}
+        for nombre in self.escenarios:
+            if nombre == 'ingesta':
+                resultado = self.ingesta()
+            else:
+                resultado = self.peticion(*ESCENARIOS_HTTP[nombre](self.ahora))
+            por_escenario[nombre] = resultado
+            self.salida(
+                f"  {nombre:<12} p50 {resultado['p50_ms']:>9.2f} ms | p95 {resultado['p95_ms']:>9.2f} ms | "
+                f"{resultado['consultas']} consultas | {resultado['filas']} filas"
+            )
+        return por_escenario
+
+    def ejecutar(self, tamanos):
+        resultados = {}
+        try:
+            with entorno_aislado(self.directorio_snapshot):
+                self.preparar_cliente()
+                for tamano in sorted(tamanos):
+                    resultados[str(tamano)] = self.ejecutar_tamano(tamano)
+        finally:
+            shutil.rmtree(self.directorio_snapshot, ignore_errors=True)
+        return {
+            'fecha': timezone.now().isoformat(),
+            'motor': connection.vendor,
+            'repeticiones': self.repeticiones,
+            'semilla': self.semilla,
+            'resultados': resultados,
+        }
+
+# ========================================
+# COMPARACIÓN CON LÍNEA BASE
+# ========================================
+
+def comparar(actual, base, umbral):
+    """
+    Regresiones de 'actual' frente a 'base' en los (tamaño, escenario) comunes.
+    Retorna una lista de descripciones (vacía si no hay regresiones).
+    """
+    regresiones = []
+    for tamano, escenarios in actual['resultados'].items():
+        for nombre, medida in escenarios.items():
+            anterior = base.get('resultados', {}).get(tamano, {}).get(nombre)
+            if anterior is None:
+                continue
+            p50, p50_base = medida['p50_ms'], anterior['p50_ms']
+            if p50 > p50_base * (1 + umbral) and p50 - p50_base > MARGEN_MS:
+                regresiones.append(
+                    f"{tamano}/{nombre}: p50 {p50_base} -> {p50} ms (+{(p50 / p50_base - 1) * 100:.0f}%)"
+                )
+            if medida['consultas'] > anterior['consultas']:
+                regresiones.append(
+                    f"{tamano}/{nombre}: consultas {anterior['consultas']} -> {medida['consultas']}"
+                )
+    return regresiones
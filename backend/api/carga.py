@@ -0,0 +1,190 @@
+# ========================================
+# PRUEBA DE CARGA CON CLIENTES SIMULADOS - SEISMIC TRACKER
+# PROPÓSITO: Reproducir el comportamiento de MapPage.js y NewsPanel.js con miles de usuarios
+# ========================================
+
+"""
+Simulación de clientes reales del mapa (comando load_test).
+
+Cada cliente virtual es una corrutina con su propia conexión keep-alive
+(api/http_bench.py) y repite lo que hace el frontend:
+1. Llega en un instante aleatorio dentro de la rampa (un sismo sentido hace
+   que miles de usuarios abran el mapa casi a la vez: tormenta de logins)
+2. login: POST /api/token/
+3. mapa_inicial: GET /api/sismos/?magnitud__gte=4.5 (MapPage.fetchSismos)
+4. noticias: GET /api/noticias/?page_size=10 (NewsPanel.fetchNews)
+5. Mientras dure la prueba:
+   - sondeo cada 60 s: GET /api/sismos/?since_date=<último evento>
+   - noticias cada 30 s
+   - refresco: si el access token expira (401), POST /api/token/refresh/ y
+     se repite la petición, como el interceptor de apiClient.js
+
+'acelerar' divide los intervalos (acelerar=10: sondeo cada 6 s) para ver el
+régimen estable en pruebas cortas. Cada escenario acumula latencias, códigos
+de estado y las consultas SQL que informa el servidor en X-DB-Queries.
+"""
+
+import asyncio
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+
+from .http_bench import ConexionHTTP, Medicion, consultas_de
+from .models import Usuario
+
+ESCENARIOS = ('login', 'mapa_inicial', 'noticias', 'sondeo', 'refresco')
+INTERVALO_SONDEO = 60  # MapPage.js
+INTERVALO_NOTICIAS = 30  # NewsPanel.js
+PREFIJO_USUARIOS = 'carga-'
+DOMINIO_USUARIOS = 'carga.invalid'
+ERRORES_RED = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError)
+
+# ========================================
+# USUARIOS DE PRUEBA
+# ========================================
+
+def crear_usuarios(cantidad, password):
+    """
+    Crea (si no existen) 'cantidad' visitantes de prueba con la misma contraseña.
+    Retorna la lista de credenciales (email, password).
+    """
+    emails = [f'{PREFIJO_USUARIOS}{i}@{DOMINIO_USUARIOS}' for i in range(cantidad)]
+    existentes = set(Usuario.objects.filter(email__in=emails).values_list('email', flat=True))
+    # Un solo hash para todos: el coste está en el login, no en la preparación
+    hash_password = make_password(password)
+    Usuario.objects.bulk_create([
+        Usuario(username=email.split('@')[0], email=email, password=hash_password, tipo_usuario='VISITANTE')
+        for email in emails if email not in existentes
+    ], batch_size=500)
+    return [(email, password) for email in emails]
+
+
+def borrar_usuarios():
+    """Elimina los usuarios creados por crear_usuarios. Retorna cuántos."""
+    borrados, _ = Usuario.objects.filter(email__endswith=f'@{DOMINIO_USUARIOS}').delete()
+    return borrados
+
+# ========================================
+# CLIENTE VIRTUAL
+# ========================================
+
+class ClienteMapa:
+    """Un usuario con el mapa abierto"""
+
+    def __init__(self, url_base, credenciales, mediciones, limite, acelerar=1.0):
+        self.conexion = ConexionHTTP(url_base)
+        self.email, self.password = credenciales
+        self.mediciones = mediciones
+        self.limite = limite
+        self.acelerar = acelerar
+        self.access = None
+        self.refresh = None
+        self.ultimo_evento = None
+
+    async def medir(self, escenario, metodo, ruta, params=None, cuerpo_json=None, autenticar=True):
+        """Ejecuta y registra una petición. Retorna la respuesta o None si no hubo respuesta."""
+        cabeceras = {'Authorization': f'Bearer {self.access}'} if autenticar and self.access else None
+        inicio = time.perf_counter()
+        try:
+            respuesta = await self.conexion.peticion(metodo, ruta, params, cuerpo_json, cabeceras)
+        except ERRORES_RED:
+            self.mediciones[escenario].registrar(time.perf_counter() - inicio, ok=False)
+            await self.conexion.cerrar()
+            return None
+        self.mediciones[escenario].registrar(
+            time.perf_counter() - inicio, respuesta.estado < 400,
+            estado=respuesta.estado, consultas=consultas_de(respuesta),
+        )
+        return respuesta
+
+    async def api(self, escenario, ruta, params=None):
+        """GET autenticado; ante un 401 refresca el token y repite una vez"""
+        respuesta = await self.medir(escenario, 'GET', ruta, params)
+        if respuesta is not None and respuesta.estado == 401 and self.refresh and await self.refrescar():
+            respuesta = await self.medir(escenario, 'GET', ruta, params)
+        return respuesta if respuesta is not None and respuesta.estado == 200 else None
+
+    async def login(self):
+        respuesta = await self.medir(
+            'login', 'POST', '/api/token/', cuerpo_json={'email': self.email, 'password': self.password},
+            autenticar=False,
+        )
+        if respuesta is None or respuesta.estado != 200:
+            return False
+        tokens = respuesta.json()
+        self.access, self.refresh = tokens['access'], tokens['refresh']
+        return True
+
+    async def refrescar(self):
+        respuesta = await self.medir(
+            'refresco', 'POST', '/api/token/refresh/', cuerpo_json={'refresh': self.refresh}, autenticar=False
+        )
+        if respuesta is None or respuesta.estado != 200:
+            return False
+        self.access = respuesta.json()['access']
+        return True
+
+    async def cargar_mapa(self):
+        respuesta = await self.api('mapa_inicial', '/api/sismos/', {'magnitud__gte': 4.5})
+        if respuesta is not None:
+            sismos = respuesta.json()
+            if sismos:
+                self.ultimo_evento = sismos[0]['fecha_hora_evento']
+
+    async def sondear(self):
+        # Como MapPage.js: sin un primer evento no se sondea
+        if not self.ultimo_evento:
+            return
+        respuesta = await self.api('sondeo', '/api/sismos/', {'since_date': self.ultimo_evento})
+        if respuesta is not None:
+            nuevos = respuesta.json()
+            if nuevos:
+                self.ultimo_evento = nuevos[0]['fecha_hora_evento']
+
+    async def ejecutar(self, llegada):
+        await asyncio.sleep(llegada)
+        try:
+            if time.perf_counter() >= self.limite or not await self.login():
+                return
+            await self.cargar_mapa()
+            await self.api('noticias', '/api/noticias/', {'page_size': 10})
+
+            # Los temporizadores del frontend arrancan al montar los componentes
+            ahora = time.perf_counter()
+            proximo_sondeo = ahora + INTERVALO_SONDEO / self.acelerar
+            proximas_noticias = ahora + INTERVALO_NOTICIAS / self.acelerar
+            while True:
+                siguiente = min(proximo_sondeo, proximas_noticias)
+                if siguiente >= self.limite:
+                    return
+                await asyncio.sleep(max(0.0, siguiente - time.perf_counter()))
+                if proximo_sondeo <= proximas_noticias:
+                    await self.sondear()
+                    proximo_sondeo += INTERVALO_SONDEO / self.acelerar
+                else:
+                    await self.api('noticias', '/api/noticias/', {'page_size': 10})
+                    proximas_noticias += INTERVALO_NOTICIAS / self.acelerar
+        finally:
+            await self.conexion.cerrar()
+
+
+async def simular(url_base, credenciales, clientes, duracion, rampa=10.0, acelerar=1.0, semilla=0):
+    """
+    Lanza 'clientes' usuarios que llegan durante 'rampa' segundos y usan el
+    mapa hasta completar 'duracion' segundos. Retorna el resumen por escenario.
+    """
+    mediciones = {escenario: Medicion(escenario) for escenario in ESCENARIOS}
+    limite = time.perf_counter() + duracion
+    # Llegadas reproducibles: misma semilla, misma tormenta
+    aleatorio = random.Random(semilla)
+    usuarios = [
+        ClienteMapa(url_base, credenciales[i % len(credenciales)], mediciones, limite, acelerar)
+        for i in range(clientes)
+    ]
+    await asyncio.gather(*(usuario.ejecutar(aleatorio.uniform(0, rampa)) for usuario in usuarios))
+    resumen = {}
+    for escenario, medicion in mediciones.items():
+        medicion.fin = time.perf_counter()
+        resumen[escenario] = medicion.resumen()
+    return resumen
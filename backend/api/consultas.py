@@ -0,0 +1,139 @@
+# ========================================
+# CONTADOR DE CONSULTAS - SEISMIC TRACKER
+# PROPÓSITO: Contar las consultas SQL de cada petición para pruebas de carga y benchmarks
+# ========================================
+
+"""
+Conteo de consultas SQL sin depender de DEBUG ni de connection.queries.
+
+- ContadorConsultas: cuenta consultas y tiempo en la BD
+  - contar(): execute_wrapper en las conexiones del hilo actual (benchmarks)
+  - en_contexto(): cuenta las consultas del contexto actual en cualquier
+    hilo. Bajo ASGI las vistas síncronas y el ORM asíncrono consultan desde
+    hilos de sync_to_async, que heredan las contextvars de la petición pero
+    no sus conexiones: un wrapper permanente (instalar_wrapper_global) lee
+    el contador de una contextvar
+- ContadorConsultasMiddleware: añade X-DB-Queries y X-DB-Time-Ms a cada
+  respuesta (WSGI y ASGI). Solo se activa con CONTADOR_CONSULTAS = True (lo
+  leen el comando load_test y http_bench); en otro caso Django lo descarta al arrancar
+"""
+
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_contadores = ContextVar('contadores_consultas', default=())
+
+# ========================================
+# WRAPPERS PERMANENTES
+# ========================================
+
+def _instalar(connection, wrapper):
+    # Al principio de la lista: execute_wrapper() retira siempre el último al salir
+    if wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, wrapper)
+
+
+def instalar_wrapper_global(wrapper):
+    """
+    Instala 'wrapper' en las conexiones ya abiertas del hilo actual y en todas
+    las que se abran después en cualquier hilo. Idempotente. El wrapper debe
+    ser barato cuando no tiene nada que hacer: se ejecuta en cada consulta.
+    """
+    for alias in connections:
+        _instalar(connections[alias], wrapper)
+    connection_created.connect(
+        lambda sender, connection, **kwargs: _instalar(connection, wrapper),
+        weak=False, dispatch_uid=f'wrapper_global:{wrapper.__module__}.{wrapper.__qualname__}',
+    )
+
+
+def _contar_en_contexto(execute, sql, params, many, context):
+    contadores = _contadores.get()
+    if not contadores:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracion = time.perf_counter() - inicio
+        for contador in contadores:
+            contador.total += 1
+            contador.segundos += duracion
+
+# ========================================
+# CONTADOR Y MIDDLEWARE
+# ========================================
+
+class ContadorConsultas:
+    """Acumula número de consultas y segundos en la BD"""
+
+    def __init__(self):
+        self.total = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total += 1
+            self.segundos += time.perf_counter() - inicio
+
+    def contar(self, *aliases):
+        """Contexto que instala el contador en las conexiones indicadas (todas por defecto) del hilo actual"""
+        pila = ExitStack()
+        for alias in aliases or connections:
+            pila.enter_context(connections[alias].execute_wrapper(self))
+        return pila
+
+    @contextmanager
+    def en_contexto(self):
+        """Cuenta las consultas del contexto actual desde cualquier hilo (se pueden anidar contadores)"""
+        instalar_wrapper_global(_contar_en_contexto)
+        token = _contadores.set(_contadores.get() + (self,))
+        try:
+            yield self
+        finally:
+            _contadores.reset(token)
+
+
+class ContadorConsultasMiddleware:
+    """Informa en cabeceras cuántas consultas hizo la petición y cuánto tardaron"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'CONTADOR_CONSULTAS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.es_asincrono = iscoroutinefunction(get_response)
+        if self.es_asincrono:
+            markcoroutinefunction(self)
+        instalar_wrapper_global(_contar_en_contexto)
+
+    def __call__(self, request):
+        if self.es_asincrono:
+            return self._llamar_async(request)
+        contador = ContadorConsultas()
+        with contador.en_contexto():
+            respuesta = self.get_response(request)
+        return self._cabeceras(respuesta, contador)
+
+    async def _llamar_async(self, request):
+        contador = ContadorConsultas()
+        with contador.en_contexto():
+            respuesta = await self.get_response(request)
+        return self._cabeceras(respuesta, contador)
+
+    def _cabeceras(self, respuesta, contador):
+        respuesta['X-DB-Queries'] = str(contador.total)
+        respuesta['X-DB-Time-Ms'] = f'{contador.segundos * 1000:.1f}'
+        return respuesta
@@ -0,0 +1,278 @@
+# ========================================
+# DECLUSTERING - SEISMIC TRACKER
+# PROPÓSITO: Detección de secuencias sísmicas (sismo principal / réplicas / fondo)
+# ========================================
+
+"""
+Motor de declustering basado en las ventanas de Gardner–Knopoff (1974).
+
+Algoritmo:
+1. Los eventos se procesan en orden de magnitud descendente
+2. Cada evento aún sin asignar se toma como candidato a sismo principal
+3. Los eventos posteriores dentro de su ventana espacio-temporal pasan a ser réplicas
+4. Un candidato sin réplicas se clasifica como sismicidad de fondo
+
+Indexación:
+- Los eventos se agrupan en una rejilla de celdas de TAMANO_CELDA grados
+- Cada celda mantiene sus eventos ordenados por tiempo
+- La búsqueda de réplicas solo visita las celdas que cubre la ventana de distancia
+  y usa búsqueda binaria sobre el tiempo, evitando la comparación de todos los pares
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Min, Q
+
+from .models import EventoSismico
+
+# ========================================
+# CONSTANTES
+# ========================================
+
+RADIO_TIERRA_KM = 6371.0
+KM_POR_GRADO = 111.2
+TAMANO_CELDA = 1.0  # Grados por celda de la rejilla espacial
+TAMANO_LOTE = 500  # Filas por lote en bulk_update
+MAGNITUD_MAXIMA = 10.0  # Cota física: la última banda de retroceso llega hasta aquí
+BANDA_MAGNITUD = 0.5  # Ancho de las bandas de magnitud al acotar el retroceso
+PKS_POR_CONSULTA = 1000  # pks por consulta IN (límite de parámetros de SQL Server)
+
+TipoSecuencia = EventoSismico.TipoSecuencia
+
+# ========================================
+# VENTANAS DE GARDNER–KNOPOFF
+# ========================================
+
+def ventana_gardner_knopoff(magnitud):
+    """
+    Devuelve la ventana (distancia_km, duración) para una magnitud dada
+    """
+    distancia_km = 10 ** (0.1238 * magnitud + 0.983)
+    if magnitud >= 6.5:
+        dias = 10 ** (0.032 * magnitud + 2.7389)
+    else:
+        dias = 10 ** (0.5409 * magnitud - 0.547)
+    return distancia_km, timedelta(days=dias)
+
+
+def distancia_km(lat1, lng1, lat2, lng2):
+    """Distancia de gran círculo (haversine) en kilómetros"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def celda_de(latitud, longitud):
+    """Celda (fila, columna) de la rejilla espacial para unas coordenadas"""
+    fila = int(math.floor((latitud + 90.0) / TAMANO_CELDA))
+    columna = int(math.floor((longitud + 180.0) / TAMANO_CELDA)) % int(360 / TAMANO_CELDA)
+    return fila, columna
+
+
+def celdas_en_radio(latitud, longitud, radio_km):
+    """
+    Enumera las celdas de la rejilla que intersecta un círculo de radio_km
+    alrededor de (latitud, longitud). Maneja el cruce del antimeridiano.
+    """
+    columnas_totales = int(360 / TAMANO_CELDA)
+    delta_lat = radio_km / KM_POR_GRADO
+    cos_lat = math.cos(math.radians(min(89.0, abs(latitud))))
+    delta_lng = radio_km / (KM_POR_GRADO * cos_lat)
+
+    fila_min, _ = celda_de(max(-90.0, latitud - delta_lat), longitud)
+    fila_max, _ = celda_de(min(89.999, latitud + delta_lat), longitud)
+
+    if delta_lng >= 180.0:
+        columnas = range(columnas_totales)
+    else:
+        col_min = int(math.floor((longitud - delta_lng + 180.0) / TAMANO_CELDA))
+        col_max = int(math.floor((longitud + delta_lng + 180.0) / TAMANO_CELDA))
+        columnas = {c % columnas_totales for c in range(col_min, col_max + 1)}
+
+    for fila in range(fila_min, fila_max + 1):
+        for columna in columnas:
+            yield fila, columna
+
+# ========================================
+# MOTOR DE DECLUSTERING
+# ========================================
+
+def clasificar_eventos(eventos, fijos=None):
+    """
+    Ejecuta el declustering sobre una lista de eventos en memoria.
+
+    Parámetros:
+    - eventos: lista de tuplas (pk, fecha_hora_evento, latitud, longitud, magnitud)
+    - fijos: conjunto de pks que ya pertenecen a una secuencia externa al lote
+      y que no deben reasignarse
+
+    Retorna:
+    - dict {pk: (tipo_secuencia, id_secuencia)}
+    """
+    fijos = fijos or set()
+
+    # Índice espacial: celda -> (tiempos ordenados, pks en el mismo orden)
+    por_celda = defaultdict(list)
+    datos = {}
+    for pk, fecha, lat, lng, mag in eventos:
+        datos[pk] = (fecha, lat, lng, mag)
+        por_celda[celda_de(lat, lng)].append((fecha, pk))
+
+    indice = {}
+    for celda, lista in por_celda.items():
+        lista.sort()
+        indice[celda] = ([f for f, _ in lista], [pk for _, pk in lista])
+
+    asignados = set(fijos)
+    resultado = {}
+
+    # Procesamos los eventos de mayor a menor magnitud (desempate por fecha)
+    orden = sorted(datos, key=lambda pk: (-datos[pk][3], datos[pk][0]))
+    for pk in orden:
+        if pk in asignados:
+            continue
+        asignados.add(pk)
+
+        fecha, lat, lng, mag = datos[pk]
+        radio_km, duracion = ventana_gardner_knopoff(mag)
+        fin = fecha + duracion
+
+        replicas = []
+        for celda in celdas_en_radio(lat, lng, radio_km):
+            if celda not in indice:
+                continue
+            tiempos, pks = indice[celda]
+            inicio_idx = bisect_right(tiempos, fecha)
+            fin_idx = bisect_left(tiempos, fin)
+            for candidato in pks[inicio_idx:fin_idx]:
+                if candidato in asignados:
+                    continue
+                _, c_lat, c_lng, _ = datos[candidato]
+                if distancia_km(lat, lng, c_lat, c_lng) <= radio_km:
+                    replicas.append(candidato)
+
+        if replicas:
+            resultado[pk] = (TipoSecuencia.PRINCIPAL, pk)
+            for replica in replicas:
+                asignados.add(replica)
+                resultado[replica] = (TipoSecuencia.REPLICA, pk)
+        else:
+            resultado[pk] = (TipoSecuencia.FONDO, None)
+
+    return resultado
+
+
+def _guardar_cambios(actuales, resultado):
+    """
+    Persiste solo las filas cuya clasificación cambió.
+    Retorna el número de eventos actualizados.
+    """
+    cambios = []
+    for pk, (tipo, id_secuencia) in resultado.items():
+        if actuales.get(pk) != (tipo, id_secuencia):
+            cambios.append(EventoSismico(pk=pk, tipo_secuencia=tipo, id_secuencia=id_secuencia))
+
+    if cambios:
+        EventoSismico.objects.bulk_update(
+            cambios, ['tipo_secuencia', 'id_secuencia'], batch_size=TAMANO_LOTE
+        )
+    return len(cambios)
+
+
+def recalcular_secuencias(desde=None):
+    """
+    Recalcula las secuencias para los eventos con fecha >= desde
+    (o para todo el catálogo si desde es None).
+
+    Los eventos del rango que ya pertenecen a una secuencia cuyo sismo
+    principal queda fuera del rango se mantienen sin cambios.
+
+    Retorna el número de eventos cuya clasificación cambió.
+    """
+    queryset = EventoSismico.objects.all()
+    if desde is not None:
+        queryset = queryset.filter(fecha_hora_evento__gte=desde)
+
+    filas = list(queryset.values_list(
+        'pk', 'fecha_hora_evento', 'latitud', 'longitud', 'magnitud',
+        'tipo_secuencia', 'id_secuencia'
+    ))
+    if not filas:
+        return 0
+
+    pks = {fila[0] for fila in filas}
+    actuales = {fila[0]: (fila[5], fila[6]) for fila in filas}
+    fijos = {
+        pk for pk, (_, id_secuencia) in actuales.items()
+        if id_secuencia is not None and id_secuencia not in pks
+    }
+
+    resultado = clasificar_eventos([fila[:5] for fila in filas], fijos=fijos)
+    return _guardar_cambios(actuales, resultado)
+
+
+def _duracion_maxima(magnitud_minima, magnitud_maxima):
+    """
+    Mayor duración de ventana para magnitudes en [magnitud_minima, magnitud_maxima).
+    La duración crece con la magnitud en cada tramo de Gardner–Knopoff, pero cae
+    un poco al pasar de 6.5, así que se mira justo por debajo del límite superior.
+    """
+    extremos = (magnitud_minima, magnitud_maxima, math.nextafter(magnitud_maxima, -math.inf))
+    return max(ventana_gardner_knopoff(m)[1] for m in extremos)
+
+
+def inicio_afectado(fecha_minima):
+    """
+    Fecha del evento más antiguo cuya ventana temporal alcanza fecha_minima
+    (o la propia fecha_minima si no hay ninguno).
+
+    Una sola consulta: por cada banda de magnitud solo cuentan los eventos
+    dentro de la ventana máxima de esa banda, de modo que el retroceso lo fijan
+    las magnitudes que de verdad hay cerca de los eventos nuevos y no la mayor
+    magnitud de todo el catálogo (usa el índice (magnitud, fecha)).
+    """
+    # Magnitudes negativas: ventanas más cortas que la de magnitud 0
+    filtro = Q(magnitud__lt=0, fecha_hora_evento__gte=fecha_minima - ventana_gardner_knopoff(0)[1])
+    inferior = 0.0
+    while inferior < MAGNITUD_MAXIMA:
+        superior = inferior + BANDA_MAGNITUD
+        if superior >= MAGNITUD_MAXIMA:
+            banda = Q(magnitud__gte=inferior)
+        else:
+            banda = Q(magnitud__gte=inferior, magnitud__lt=superior)
+        filtro |= banda & Q(fecha_hora_evento__gte=fecha_minima - _duracion_maxima(inferior, superior))
+        inferior = superior
+
+    anterior = EventoSismico.objects.filter(filtro, fecha_hora_evento__lt=fecha_minima).aggregate(
+        f=Min('fecha_hora_evento')
+    )['f']
+    return anterior or fecha_minima
+
+
+def actualizar_secuencias_incremental(pks):
+    """
+    Actualización incremental tras una ingesta (pks de eventos nuevos o revisados).
+
+    Solo se reclasifica la cola del catálogo que puede verse afectada por
+    esos eventos: desde el más antiguo de ellos menos lo que alcanzan las
+    ventanas de los sismos anteriores (inicio_afectado); ningún sismo
+    principal anterior a ese punto puede llegar a los eventos del lote.
+    """
+    if not pks:
+        return 0
+
+    pks = list(pks)
+    # Por tramos: SQL Server admite como mucho 2100 parámetros por consulta
+    fechas = [
+        EventoSismico.objects.filter(pk__in=pks[i:i + PKS_POR_CONSULTA]).aggregate(f=Min('fecha_hora_evento'))['f']
+        for i in range(0, len(pks), PKS_POR_CONSULTA)
+    ]
+    fecha_minima = min((fecha for fecha in fechas if fecha is not None), default=None)
+    if fecha_minima is None:
+        return 0
+    return recalcular_secuencias(desde=inicio_afectado(fecha_minima))
@@ -1,21 +1,55 @@
+from django.db.models import Q
 from django_filters import rest_framework as filters
-from .models import EventoSismico, Noticia
+from .models import EventoSismico, Noticia, Usuario
+from .noticias import buscar
 
 class EventoSismicoFilter(filters.FilterSet):
     # Creamos un filtro personalizado para buscar eventos a partir de una fecha y hora.
     # El nombre 'since_date' es el que usaremos en la URL (ej: /api/sismos/?since_date=...)
     since_date = filters.DateTimeFilter(field_name="fecha_hora_evento", lookup_expr='gte')
     fecha_hora_evento__date = filters.DateFilter(field_name='fecha_hora_evento', lookup_expr='date')
+    # Rectángulo geográfico (bbox) para limitar los eventos a la vista del mapa
+    lat_min = filters.NumberFilter(field_name='latitud', lookup_expr='gte')
+    lat_max = filters.NumberFilter(field_name='latitud', lookup_expr='lte')
+    lng_min = filters.NumberFilter(field_name='longitud', lookup_expr='gte')
+    lng_max = filters.NumberFilter(field_name='longitud', lookup_expr='lte')
     class Meta:
         model = EventoSismico
         fields = {
             'magnitud': ['exact', 'gte', 'lte'], # Mantenemos los filtros anteriores
+            'tipo_secuencia': ['exact'], # Ej: ?tipo_secuencia=PRINCIPAL
+            'id_secuencia': ['exact'], # Ej: ?id_secuencia=42
         }
 
 class NoticiaFilter(filters.FilterSet):
     # Filtro para obtener noticias publicadas después de una fecha y hora específicas
     published_after = filters.DateTimeFilter(field_name="fecha_publicacion", lookup_expr='gt') # 'gt' = greater than
+    # Búsqueda en título y contenido con el índice invertido (api/noticias.py), ej: ?search=alerta tsun
+    search = filters.CharFilter(method='filtrar_texto')
 
     class Meta:
         model = Noticia
-        fields = ['published_after']
\ No newline at end of file
+        fields = ['published_after']
+
+    def filtrar_texto(self, queryset, name, value):
+        return buscar(queryset, value)
+
+class UsuarioFilter(filters.FilterSet):
+    # Búsqueda por prefijo en email, nombre y apellido (usa índices, a diferencia de icontains).
+    # Con varios términos, cada uno debe ser prefijo de alguno de los campos (ej: ?search=ana gar)
+    search = filters.CharFilter(method='filtrar_prefijo')
+    registrado_desde = filters.DateTimeFilter(field_name='date_joined', lookup_expr='gte')
+    registrado_hasta = filters.DateTimeFilter(field_name='date_joined', lookup_expr='lte')
+
+    class Meta:
+        model = Usuario
+        fields = ['is_active']
+
+    def filtrar_prefijo(self, queryset, name, value):
+        for termino in value.split()[:5]:
+            queryset = queryset.filter(
+                Q(email__istartswith=termino)
+                | Q(first_name__istartswith=termino)
+                | Q(last_name__istartswith=termino)
+            )
+        return queryset
@@ -0,0 +1,167 @@
+# ========================================
+# FOTOS DE PERFIL - SEISMIC TRACKER
+# PROPÓSITO: Validación, procesamiento y limpieza de fotos fuera del ciclo petición/respuesta
+# ========================================
+
+"""
+Pipeline de fotos de perfil.
+
+1. En la petición solo se valida la subida (tamaño y formato) y se guarda el
+   archivo tal cual; la respuesta no espera al procesamiento
+2. Una tarea de la cola 'fotos' (api/tareas.py) procesa la imagen: aplica la orientación EXIF,
+   descarta todos los metadatos (EXIF/GPS), genera una versión maestra JPEG
+   acotada y recortes cuadrados WebP por tamaño (TAMANOS). Los resultados se
+   guardan en el almacén direccionado por contenido (api/almacen.py), de modo
+   que las imágenes idénticas comparten archivo
+3. El resultado se publica con un UPDATE condicional: si mientras tanto el
+   usuario subió otra foto, se liberan los archivos generados
+4. Los archivos reemplazados (original y versiones anteriores) se liberan en
+   otra tarea; los que quedan sin referencias los borra gc_archivos
+
+Mientras la foto no está procesada, url_foto() devuelve None: la subida
+original conserva sus metadatos (EXIF/GPS) y nunca se expone.
+"""
+
+import io
+import logging
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .almacen import guardar_contenido, liberar, url_contenido
+from .tareas import tarea
+
+logger = logging.getLogger(__name__)
+
+_CONFIG = getattr(settings, 'FOTOS_PERFIL', {})
+TAMANOS = _CONFIG.get('TAMANOS', {'sm': 64, 'md': 256, 'lg': 512})  # Lado en px de cada recorte WebP
+LADO_MAXIMO = _CONFIG.get('LADO_MAXIMO', 1024)  # Lado mayor de la versión maestra JPEG
+CALIDAD = _CONFIG.get('CALIDAD', 82)
+MAX_BYTES = _CONFIG.get('MAX_BYTES', 10 * 1024 * 1024)
+FORMATOS_PERMITIDOS = _CONFIG.get('FORMATOS_PERMITIDOS', ('JPEG', 'PNG', 'WEBP', 'GIF'))
+TAMANO_POR_DEFECTO = 'md'
+
+# ========================================
+# CONSULTA DE ARCHIVOS Y URLS
+# ========================================
+
+def archivos_foto(nombre, variantes):
+    """Todas las rutas de almacenamiento asociadas a una foto (original + variantes)"""
+    return [n for n in [nombre, *(variantes or {}).values()] if n]
+
+
+def url_foto(usuario, tamano=TAMANO_POR_DEFECTO):
+    """
+    URL relativa de la foto en el tamaño pedido ('sm', 'md', 'lg' u 'original').
+    Hasta que la foto está procesada devuelve None: ruta_fotografia aún es la
+    subida sin limpiar. Después, 'original' es la versión maestra JPEG.
+    """
+    variantes = usuario.fotografia_variantes or {}
+    if not usuario.ruta_fotografia or not variantes:
+        return None
+    nombre = usuario.ruta_fotografia.name if tamano == 'original' else variantes.get(tamano)
+    return url_contenido(nombre) if nombre else None
+
+# ========================================
+# VALIDACIÓN (EN LA PETICIÓN)
+# ========================================
+
+def validar_subida(archivo):
+    """
+    Comprueba tamaño y formato de una imagen subida. Retorna un mensaje de error o None.
+    El ImageField de Django ya verificó con Pillow que el archivo es una imagen.
+    """
+    if archivo.size > MAX_BYTES:
+        return f"La imagen no puede superar {MAX_BYTES // (1024 * 1024)} MB."
+    imagen = getattr(archivo, 'image', None)
+    if imagen is not None and imagen.format not in FORMATOS_PERMITIDOS:
+        return f"Formato no permitido. Usa uno de: {', '.join(FORMATOS_PERMITIDOS)}."
+    return None
+
+# ========================================
+# PROCESAMIENTO (EN SEGUNDO PLANO)
+# ========================================
+
+def _guardar(imagen, extension, formato, **opciones):
+    # Sin el parámetro exif, Pillow no escribe ningún metadato
+    buffer = io.BytesIO()
+    imagen.save(buffer, formato, **opciones)
+    return guardar_contenido(buffer.getvalue(), extension)
+
+
+def generar_versiones(nombre_original):
+    """Genera la versión maestra JPEG y las variantes WebP. Retorna (maestra, {tamaño: ruta})."""
+    with default_storage.open(nombre_original, 'rb') as archivo:
+        imagen = Image.open(archivo)
+        imagen.seek(0)  # GIF animados: solo el primer fotograma
+        imagen.load()
+    imagen = ImageOps.exif_transpose(imagen)
+    if imagen.mode not in ('RGB', 'RGBA'):
+        imagen = imagen.convert('RGBA' if 'transparency' in imagen.info or imagen.mode in ('LA', 'PA') else 'RGB')
+
+    maestra = imagen.copy()
+    maestra.thumbnail((LADO_MAXIMO, LADO_MAXIMO), Image.Resampling.LANCZOS)
+    if maestra.mode == 'RGBA':
+        fondo = Image.new('RGB', maestra.size, (255, 255, 255))
+        fondo.paste(maestra, mask=maestra.getchannel('A'))
+        maestra = fondo
+    nombre_maestra = _guardar(maestra, 'jpg', 'JPEG', quality=CALIDAD, optimize=True, progressive=True)
+
+    variantes = {}
+    for clave, lado in TAMANOS.items():
+        recorte = ImageOps.fit(imagen, (lado, lado), Image.Resampling.LANCZOS)
+        variantes[clave] = _guardar(recorte, 'webp', 'WEBP', quality=CALIDAD, method=4)
+    return nombre_maestra, variantes
+
+
+@tarea(cola='fotos', max_intentos=3)
+def procesar_foto(usuario_id, nombre_original):
+    """Procesa la foto subida y la publica si sigue siendo la foto actual del usuario"""
+    from .authentication import cache_usuarios
+    from .models import Usuario
+
+    actual = Usuario.objects.filter(pk=usuario_id, ruta_fotografia=nombre_original)
+    previas = actual.values_list('fotografia_variantes', flat=True).first() or {}
+    try:
+        nombre_maestra, variantes = generar_versiones(nombre_original)
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError):
+        # Imagen ilegible: no se publica una foto que no podemos limpiar de metadatos
+        logger.exception("[FOTOS] No se pudo procesar %s; se elimina", nombre_original)
+        if actual.update(ruta_fotografia=None, fotografia_variantes={}):
+            cache_usuarios.invalidar(usuario_id)
+            liberar(archivos_foto(nombre_original, previas))
+        return False
+
+    if actual.update(ruta_fotografia=nombre_maestra, fotografia_variantes=variantes):
+        cache_usuarios.invalidar(usuario_id)
+        liberar(archivos_foto(nombre_original, previas))
+        return True
+
+    # El usuario cambió de foto (o se eliminó) mientras procesábamos
+    liberar(archivos_foto(nombre_maestra, variantes))
+    return False
+
+
+def procesar_foto_en_segundo_plano(usuario_id, nombre_original):
+    """Encola el procesamiento (la tarea se confirma junto con la foto guardada)"""
+    procesar_foto.encolar(
+        usuario_id=usuario_id, nombre_original=nombre_original,
+        clave_idempotencia=f'foto:{usuario_id}:{nombre_original}',
+    )
+
+# ========================================
+# LIMPIEZA
+# ========================================
+
+@tarea(cola='fotos', max_intentos=5)
+def liberar_fotos(nombres):
+    """Libera las rutas indicadas (ver almacen.liberar)"""
+    return liberar(nombres)
+
+
+def liberar_fotos_en_segundo_plano(nombres):
+    """Encola la liberación de las fotos sin bloquear al llamador"""
+    nombres = [n for n in nombres if n]
+    if nombres:
+        liberar_fotos.encolar(nombres=nombres)
@@ -0,0 +1,219 @@
+# ========================================
+# CLIENTE HTTP DE CARGA - SEISMIC TRACKER
+# PROPÓSITO: Cliente HTTP/1.1 asíncrono mínimo para pruebas de carga sin dependencias externas
+# ========================================
+
+"""
+Cliente HTTP/1.1 sobre asyncio con conexiones persistentes (keep-alive).
+
+Permite simular miles de clientes concurrentes desde un solo proceso:
+cada cliente es una corrutina con su propia conexión TCP.
+"""
+
+import asyncio
+import json
+import time
+from collections import Counter
+try:
+    import resource  # Solo disponible en sistemas POSIX
+except ImportError:
+    resource = None
+from urllib.parse import urlsplit, urlencode
+
+
+def subir_limite_descriptores(clientes):
+    """Cada cliente mantiene una conexión abierta: sube el límite de descriptores si es posible"""
+    if resource is None:
+        return
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    objetivo = min(duro, max(blando, clientes * 2 + 64))
+    if objetivo > blando:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (objetivo, duro))
+
+
+class RespuestaHTTP:
+    """Respuesta mínima: código de estado, cabeceras (minúsculas) y cuerpo en bytes"""
+
+    def __init__(self, estado, cabeceras, cuerpo):
+        self.estado = estado
+        self.cabeceras = cabeceras
+        self.cuerpo = cuerpo
+
+    def json(self):
+        return json.loads(self.cuerpo.decode('utf-8'))
+
+
+class ConexionHTTP:
+    """Conexión keep-alive a un host; se reabre automáticamente si el servidor la cierra"""
+
+    def __init__(self, url_base, timeout=30):
+        partes = urlsplit(url_base)
+        self.host = partes.hostname
+        self.puerto = partes.port or 80
+        self.prefijo = partes.path.rstrip('/')
+        self.timeout = timeout
+        self._lector = None
+        self._escritor = None
+
+    async def _abrir(self):
+        self._lector, self._escritor = await asyncio.open_connection(self.host, self.puerto)
+
+    async def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            try:
+                await self._escritor.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self._lector = self._escritor = None
+
+    async def peticion(self, metodo, ruta, params=None, cuerpo_json=None, cabeceras=None):
+        """Envía una petición y devuelve RespuestaHTTP. Reintenta una vez si la conexión estaba cerrada."""
+        for intento in range(2):
+            if self._escritor is None:
+                await self._abrir()
+            try:
+                return await asyncio.wait_for(
+                    self._enviar(metodo, ruta, params, cuerpo_json, cabeceras or {}), self.timeout
+                )
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.cerrar()
+                if intento:
+                    raise
+
+    async def _enviar(self, metodo, ruta, params, cuerpo_json, cabeceras):
+        destino = self.prefijo + ruta
+        if params:
+            destino += '?' + urlencode(params)
+        cuerpo = json.dumps(cuerpo_json).encode('utf-8') if cuerpo_json is not None else b''
+
+        lineas = [f'{metodo} {destino} HTTP/1.1', f'Host: {self.host}:{self.puerto}', 'Connection: keep-alive']
+        if cuerpo:
+            lineas += ['Content-Type: application/json', f'Content-Length: {len(cuerpo)}']
+        lineas += [f'{k}: {v}' for k, v in cabeceras.items()]
+        self._escritor.write(('\r\n'.join(lineas) + '\r\n\r\n').encode('latin-1') + cuerpo)
+        await self._escritor.drain()
+
+        linea_estado = await self._lector.readuntil(b'\r\n')
+        estado = int(linea_estado.split()[1])
+        respuesta_cabeceras = {}
+        while True:
+            linea = await self._lector.readuntil(b'\r\n')
+            if linea == b'\r\n':
+                break
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            respuesta_cabeceras[nombre.strip().lower()] = valor.strip()
+
+        if respuesta_cabeceras.get('transfer-encoding', '').lower() == 'chunked':
+            partes = []
+            while True:
+                tamano = int((await self._lector.readuntil(b'\r\n')).split(b';')[0], 16)
+                if tamano == 0:
+                    await self._lector.readuntil(b'\r\n')
+                    break
+                partes.append(await self._lector.readexactly(tamano))
+                await self._lector.readexactly(2)
+            contenido = b''.join(partes)
+        elif 'content-length' in respuesta_cabeceras:
+            contenido = await self._lector.readexactly(int(respuesta_cabeceras['content-length']))
+        else:
+            contenido = await self._lector.read()
+            await self.cerrar()
+
+        if respuesta_cabeceras.get('connection', '').lower() == 'close':
+            await self.cerrar()
+        return RespuestaHTTP(estado, respuesta_cabeceras, contenido)
+
+# ========================================
+# ESTADÍSTICAS
+# ========================================
+
+def percentil(valores_ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not valores_ordenados:
+        return None
+    indice = min(len(valores_ordenados) - 1, max(0, int(round(p / 100 * len(valores_ordenados))) - 1))
+    return valores_ordenados[indice]
+
+
+class Medicion:
+    """Acumula latencias, errores, códigos de estado y consultas a la BD de un escenario"""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.latencias = []
+        self.errores = 0
+        self.estados = Counter()
+        self.consultas = []
+        self.inicio = time.perf_counter()
+        self.fin = None
+
+    def registrar(self, segundos, ok=True, estado=None, consultas=None):
+        self.latencias.append(segundos)
+        if not ok:
+            self.errores += 1
+        # 'estado' None = error de red o timeout (sin respuesta)
+        self.estados[str(estado) if estado is not None else 'sin_respuesta'] += 1
+        if consultas is not None:
+            self.consultas.append(consultas)
+
+    def resumen(self):
+        self.fin = self.fin or time.perf_counter()
+        ordenadas = sorted(self.latencias)
+        total = len(ordenadas)
+        duracion = self.fin - self.inicio
+        return {
+            'escenario': self.nombre,
+            'peticiones': total,
+            'errores': self.errores,
+            'tasa_error': round(self.errores / total, 4) if total else 0.0,
+            'rps': round(total / duracion, 1) if duracion else 0.0,
+            'p50_ms': round(percentil(ordenadas, 50) * 1000, 2) if total else None,
+            'p90_ms': round(percentil(ordenadas, 90) * 1000, 2) if total else None,
+            'p99_ms': round(percentil(ordenadas, 99) * 1000, 2) if total else None,
+            'max_ms': round(ordenadas[-1] * 1000, 2) if total else None,
+            'estados': dict(self.estados),
+            # Cabecera X-DB-Queries (solo si el servidor tiene CONTADOR_CONSULTAS activo)
+            'consultas_media': round(sum(self.consultas) / len(self.consultas), 2) if self.consultas else None,
+            'consultas_p95': percentil(sorted(self.consultas), 95) if self.consultas else None,
+            'consultas_max': max(self.consultas) if self.consultas else None,
+        }
+
+
+def consultas_de(respuesta):
+    """Consultas SQL que informó el servidor en X-DB-Queries, o None"""
+    valor = respuesta.cabeceras.get('x-db-queries')
+    return int(valor) if valor and valor.isdigit() else None
+
+
+async def martillar(url, clientes, duracion, cabeceras=None, nombre=None):
+    """
+    Lanza 'clientes' corrutinas que piden la misma URL en bucle durante 'duracion' segundos.
+    Retorna el resumen de Medicion.
+    """
+    partes = urlsplit(url)
+    base = f'{partes.scheme}://{partes.netloc}'
+    ruta = partes.path + (f'?{partes.query}' if partes.query else '')
+    medicion = Medicion(nombre or url)
+    limite = time.perf_counter() + duracion
+
+    async def cliente():
+        conexion = ConexionHTTP(base)
+        try:
+            while time.perf_counter() < limite:
+                inicio = time.perf_counter()
+                try:
+                    respuesta = await conexion.peticion('GET', ruta, cabeceras=cabeceras)
+                    medicion.registrar(
+                        time.perf_counter() - inicio, respuesta.estado < 400,
+                        estado=respuesta.estado, consultas=consultas_de(respuesta),
+                    )
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    medicion.registrar(time.perf_counter() - inicio, ok=False)
+                    await conexion.cerrar()
+        finally:
+            await conexion.cerrar()
+
+    await asyncio.gather(*(cliente() for _ in range(clientes)))
+    medicion.fin = time.perf_counter()
+    return medicion.resumen()
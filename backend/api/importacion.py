@@ -0,0 +1,194 @@
+# ========================================
+# IMPORTACIÓN MASIVA DE USUARIOS - SEISMIC TRACKER
+# PROPÓSITO: Alta de miles de cuentas sin pasar por el registro HTTP fila a fila
+# ========================================
+
+"""
+Importación de usuarios desde CSV o JSONL.
+
+Pasos por lote:
+1. Validación de formato con ImportacionUsuarioSerializer (sin consultas)
+2. Unicidad contra un único conjunto precargado de emails y usernames
+   (comparación sin distinguir mayúsculas, como la collation de SQL Server),
+   que también detecta duplicados dentro del propio archivo
+3. Hash de contraseñas en un pool de procesos (PBKDF2 es intensivo en CPU)
+4. Inserción con bulk_create en una transacción por lote
+
+Si un lote choca con una cuenta creada en paralelo (IntegrityError), se
+recargan los conflictos de ese lote, se rechazan y se reintenta el resto.
+"""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from .serializers import ImportacionUsuarioSerializer
+
+TAMANO_LOTE = 1000
+CAMPOS_OPCIONALES = ('password', 'telefono', 'fecha_nacimiento')
+
+# ========================================
+# LECTURA DE ARCHIVOS
+# ========================================
+
+def leer_filas(ruta, formato=None):
+    """Genera (número_de_línea, dict) desde un CSV con cabecera o un JSONL"""
+    formato = formato or ('jsonl' if ruta.lower().endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+        if formato == 'csv':
+            # La línea 1 es la cabecera
+            for numero, fila in enumerate(csv.DictReader(archivo), start=2):
+                yield numero, fila
+        else:
+            for numero, linea in enumerate(archivo, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    yield numero, json.loads(linea)
+                except json.JSONDecodeError as error:
+                    yield numero, error
+
+
+def _normalizar(fila):
+    """Las celdas vacías de los campos opcionales se tratan como ausentes"""
+    return {
+        clave: valor for clave, valor in fila.items()
+        if clave is not None and not (clave in CAMPOS_OPCIONALES and valor in ('', None))
+    }
+
+# ========================================
+# HASH EN PARALELO
+# ========================================
+
+def _inicializar_worker():
+    """Con el método 'spawn' (Windows/macOS) el proceso hijo debe configurar Django"""
+    django.setup()
+
+
+def _hashear(password):
+    # make_password(None) genera una contraseña inutilizable
+    return make_password(password or None)
+
+# ========================================
+# CLASE: ImportadorUsuarios
+# ========================================
+
+class ImportadorUsuarios:
+    """Importa usuarios por lotes y acumula el informe de creados y rechazados"""
+
+    def __init__(self, tipo_usuario=None, tamano_lote=TAMANO_LOTE, procesos=None, simular=False):
+        self.Usuario = get_user_model()
+        self.tipo_usuario = tipo_usuario or self.Usuario.TipoUsuario.VISITANTE
+        self.tamano_lote = tamano_lote
+        self.procesos = procesos or os.cpu_count() or 1
+        self.simular = simular
+        self.emails = set()
+        self.usernames = set()
+        self.leidos = 0
+        self.creados = 0
+        self.rechazos = []  # (línea, motivo)
+        self.segundos = 0.0
+
+    def precargar(self):
+        """Una consulta por columna para todos los emails y usernames existentes"""
+        self.emails = set(self.Usuario.objects.annotate(v=Lower('email')).values_list('v', flat=True))
+        self.usernames = set(self.Usuario.objects.annotate(v=Lower('username')).values_list('v', flat=True))
+
+    def importar(self, filas):
+        """Procesa un iterable de (línea, fila). Retorna el número de usuarios creados."""
+        inicio = time.perf_counter()
+        self.precargar()
+        with ProcessPoolExecutor(max_workers=self.procesos, initializer=_inicializar_worker) as pool:
+            lote = []
+            for numero, fila in filas:
+                self.leidos += 1
+                datos = self._validar(numero, fila)
+                if datos is not None:
+                    lote.append((numero, datos))
+                if len(lote) >= self.tamano_lote:
+                    self._procesar_lote(lote, pool)
+                    lote = []
+            if lote:
+                self._procesar_lote(lote, pool)
+        self.segundos = time.perf_counter() - inicio
+        return self.creados
+
+    def _validar(self, numero, fila):
+        if not isinstance(fila, dict):
+            self.rechazos.append((numero, f'Fila ilegible: {fila}'))
+            return None
+
+        serializer = ImportacionUsuarioSerializer(data=_normalizar(fila))
+        if not serializer.is_valid():
+            motivo = '; '.join(f'{campo}: {" ".join(map(str, errores))}' for campo, errores in serializer.errors.items())
+            self.rechazos.append((numero, motivo))
+            return None
+
+        datos = serializer.validated_data
+        email, username = datos['email'], datos['username'].lower()
+        if email in self.emails:
+            self.rechazos.append((numero, 'email: Este correo electrónico ya está registrado.'))
+            return None
+        if username in self.usernames:
+            self.rechazos.append((numero, 'username: Este nombre de usuario ya existe.'))
+            return None
+        # Se reservan ya para detectar duplicados dentro del propio archivo
+        self.emails.add(email)
+        self.usernames.add(username)
+        return datos
+
+    def _procesar_lote(self, lote, pool):
+        passwords = [datos.get('password') for _, datos in lote]
+        chunksize = max(1, len(passwords) // (self.procesos * 4))
+        hashes = list(pool.map(_hashear, passwords, chunksize=chunksize))
+
+        pendientes = []
+        for (numero, datos), hash_password in zip(lote, hashes):
+            datos = dict(datos, password=hash_password, tipo_usuario=self.tipo_usuario)
+            pendientes.append((numero, self.Usuario(**datos)))
+        self._insertar(pendientes)
+
+    def _insertar(self, pendientes):
+        if self.simular:
+            self.creados += len(pendientes)
+            return
+        try:
+            with transaction.atomic():
+                self.Usuario.objects.bulk_create([u for _, u in pendientes], batch_size=self.tamano_lote)
+        except IntegrityError:
+            # Alguien creó cuentas en paralelo: se rechazan los conflictos y se reintenta el resto
+            emails = [u.email for _, u in pendientes]
+            usernames = [u.username for _, u in pendientes]
+            existentes = self.Usuario.objects.filter(email__in=emails) | self.Usuario.objects.filter(username__in=usernames)
+            pares = list(existentes.values_list('email', 'username'))
+            emails_ocupados = {e.lower() for e, _ in pares}
+            usernames_ocupados = {u.lower() for _, u in pares}
+            restantes = []
+            for numero, usuario in pendientes:
+                if usuario.email.lower() in emails_ocupados or usuario.username.lower() in usernames_ocupados:
+                    self.rechazos.append((numero, 'Conflicto con una cuenta creada durante la importación.'))
+                else:
+                    restantes.append((numero, usuario))
+            if len(restantes) == len(pendientes):
+                raise
+            if restantes:
+                self._insertar(restantes)
+            return
+        self.creados += len(pendientes)
+
+    def informe(self):
+        return {
+            'leidos': self.leidos,
+            'creados': self.creados,
+            'rechazados': len(self.rechazos),
+            'segundos': round(self.segundos, 2),
+            'usuarios_por_segundo': round(self.creados / self.segundos, 1) if self.segundos else None,
+        }
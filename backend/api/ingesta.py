@@ -0,0 +1,176 @@
+# ========================================
+# INGESTA DE SISMOS - SEISMIC TRACKER
+# PROPÓSITO: Descarga del feed de USGS y guardado de eventos, reutilizable fuera del comando
+# ========================================
+
+"""
+Ingesta de eventos sísmicos en formato GeoJSON de USGS.
+
+- descargar_features(): consulta la API FDSN de USGS
+- ingerir_features(): crea o actualiza los eventos por id_evento_usgs,
+  registra las revisiones (RevisionEvento) y emite la señal
+  sismos_ingestados (secuencias, snapshot, alertas...)
+
+fetch_sismos usa ambas; el benchmark (api/benchmark.py) llama a
+ingerir_features con features sintéticas.
+
+eventos_por_usgs() resuelve muchos id_evento_usgs con consultas IN sobre el
+índice único, en bloques que respetan el límite de parámetros de SQL Server.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import requests
+from django.db import transaction
+from django.utils import timezone
+
+from .metricas import registrar_ingesta
+from .models import EventoSismico, RevisionEvento
+from .trazas import span
+
+logger = logging.getLogger(__name__)
+
+URL_USGS = "https://earthquake.usgs.gov/fdsnws/event/1/query"
+IDS_POR_CONSULTA = 1000  # Elementos de cada IN (SQL Server admite ~2100 parámetros por consulta)
+TAMANO_LOTE = 500  # Filas por INSERT/UPDATE masivo
+
+
+def eventos_por_usgs(ids_usgs, queryset=None):
+    """Diccionario id_evento_usgs -> EventoSismico de los ids que existen en la BD"""
+    # Sin ORDER BY: el orden del modelo obligaría a ordenar en memoria y aquí no importa
+    queryset = (EventoSismico.objects.all() if queryset is None else queryset).order_by()
+    ids_usgs = list(ids_usgs)
+    eventos = {}
+    for inicio in range(0, len(ids_usgs), IDS_POR_CONSULTA):
+        bloque = ids_usgs[inicio:inicio + IDS_POR_CONSULTA]
+        eventos.update((e.id_evento_usgs, e) for e in queryset.filter(id_evento_usgs__in=bloque))
+    return eventos
+
+
+def descargar_features(dias=30, magnitud_minima=4.5, timeout=30):
+    """Features GeoJSON de USGS de los últimos 'dias' días. Lanza requests.RequestException si falla."""
+    params = {
+        'format': 'geojson',
+        'starttime': f'now-{dias}days',
+        'minmagnitude': magnitud_minima,
+    }
+    with span('usgs.descarga', dias=dias, magnitud_minima=magnitud_minima) as actual:
+        response = requests.get(URL_USGS, params=params, timeout=timeout)
+        response.raise_for_status()  # Lanza un error para códigos de estado 4xx/5xx
+        if actual is not None:
+            actual.atributo('bytes', len(response.content))
+    with span('usgs.json'):
+        return response.json().get('features', [])
+
+
+def _campos_evento(feature):
+    """Campos del modelo a partir de una feature, o None si faltan datos clave"""
+    props = feature.get('properties') or {}
+    coordenadas = (feature.get('geometry') or {}).get('coordinates') or []
+    longitud = coordenadas[0] if len(coordenadas) > 0 else None
+    latitud = coordenadas[1] if len(coordenadas) > 1 else None
+    profundidad = coordenadas[2] if len(coordenadas) > 2 else None
+    # La API devuelve el tiempo en milisegundos desde la época
+    tiempo_epoch_ms = props.get('time')
+
+    if not all([feature.get('id'), props.get('mag'), tiempo_epoch_ms, profundidad, longitud, latitud]):
+        return None
+    return {
+        'latitud': latitud,
+        'longitud': longitud,
+        'magnitud': props.get('mag'),
+        'profundidad': profundidad,
+        'fecha_hora_evento': datetime.fromtimestamp(tiempo_epoch_ms / 1000.0, tz=dt_timezone.utc),
+        'lugar_descripcion': props.get('place'),
+        'url_usgs': props.get('url'),
+    }
+
+
+def _valor_json(valor):
+    return valor.isoformat() if isinstance(valor, datetime) else valor
+
+
+def ingerir_features(features, notificar=True):
+    """
+    Crea o actualiza los eventos de las features (clave: id_evento_usgs).
+
+    Los eventos existentes se leen en bloque y se comparan en memoria: solo
+    se escriben los nuevos (bulk_create) y los que cambiaron (bulk_update de
+    los campos modificados), y de cada cambio queda una RevisionEvento. Un
+    evento que USGS reenvía sin cambios no genera ninguna escritura.
+
+    Parámetros:
+    - notificar: emite sismos_ingestados con los pks nuevos y los que cambiaron
+
+    Retorna un resumen: procesados, nuevos, actualizados (solo con cambios),
+    sin_cambios (cuántos) y omitidos (ids sin datos clave).
+    """
+    from .signals import sismos_ingestados
+
+    inicio = time.perf_counter()
+    omitidos = []
+    with span('ingesta.guardar', features=len(features)) as actual:
+        # Si el feed repite un id, gana la última aparición
+        campos_por_id = {}
+        for feature in features:
+            campos = _campos_evento(feature)
+            if campos is None:
+                omitidos.append(feature.get('id'))
+                continue
+            campos_por_id[feature['id']] = campos
+
+        existentes = eventos_por_usgs(campos_por_id)
+        ahora = timezone.now()
+        creados, modificados, revisiones = [], [], []
+        campos_modificados = set()
+        for usgs_id, campos in campos_por_id.items():
+            evento = existentes.get(usgs_id)
+            if evento is None:
+                creados.append(EventoSismico(id_evento_usgs=usgs_id, **campos))
+                continue
+            cambios = {
+                campo: [_valor_json(getattr(evento, campo)), _valor_json(valor)]
+                for campo, valor in campos.items() if getattr(evento, campo) != valor
+            }
+            if not cambios:
+                continue
+            for campo in cambios:
+                setattr(evento, campo, campos[campo])
+            campos_modificados.update(cambios)
+            modificados.append(evento)
+            revisiones.append(RevisionEvento(evento=evento, fecha=ahora, cambios=cambios))
+
+        if creados or modificados:
+            with transaction.atomic():
+                EventoSismico.objects.bulk_create(creados, batch_size=TAMANO_LOTE)
+                if modificados:
+                    EventoSismico.objects.bulk_update(modificados, sorted(campos_modificados), batch_size=TAMANO_LOTE)
+                    RevisionEvento.objects.bulk_create(revisiones, batch_size=TAMANO_LOTE)
+        if creados and creados[0].pk is None:
+            # Motores sin RETURNING en inserciones masivas: los pks se leen después
+            insertados = eventos_por_usgs(e.id_evento_usgs for e in creados)
+            for evento in creados:
+                evento.pk = insertados[evento.id_evento_usgs].pk
+        if actual is not None:
+            actual.atributo('escrituras', len(creados) + len(modificados))
+
+    pks_nuevos = [e.pk for e in creados]
+    pks_actualizados = [e.pk for e in modificados]
+    sin_cambios = len(campos_por_id) - len(creados) - len(modificados)
+    registrar_ingesta(
+        time.perf_counter() - inicio, len(pks_nuevos), len(pks_actualizados), len(omitidos),
+        [e.fecha_hora_evento for e in creados], sin_cambios=sin_cambios,
+    )
+    if notificar:
+        # Procesos posteriores: secuencias, snapshot, índice de cercanía, alertas
+        with span('ingesta.notificar', nuevos=len(pks_nuevos), actualizados=len(pks_actualizados)):
+            sismos_ingestados.send(sender=EventoSismico, nuevos=pks_nuevos, actualizados=pks_actualizados)
+    return {
+        'procesados': len(campos_por_id),
+        'nuevos': pks_nuevos,
+        'actualizados': pks_actualizados,
+        'sin_cambios': sin_cambios,
+        'omitidos': omitidos,
+    }
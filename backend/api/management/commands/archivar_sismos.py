@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from api.tiering import archivar_eventos, EDAD_DIAS, TAMANO_LOTE
+
+
+class Command(BaseCommand):
+    help = 'Mueve los eventos sísmicos antiguos de la base de datos al archivo Parquet particionado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--edad-dias',
+            type=int,
+            default=EDAD_DIAS,
+            help='Antigüedad mínima (en días) de los eventos a archivar',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANO_LOTE,
+            help='Número de eventos por lote (cada lote se borra en una transacción corta)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Archivando eventos con más de {options['edad_dias']} días...")
+        total = archivar_eventos(edad_dias=options['edad_dias'], tamano_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'Proceso completado. {total} eventos archivados.'))
@@ -0,0 +1,52 @@
+import asyncio
+import json
+from django.core.management.base import BaseCommand
+from api.http_bench import martillar, subir_limite_descriptores
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el rendimiento de los endpoints de sismos síncronos (WSGI) y asíncronos (ASGI) '
+        'con N clientes concurrentes. Los servidores deben estar levantados previamente, p. ej.: '
+        'gunicorn sismic_api.wsgi -w 4 --threads 8 -b :8000 y '
+        'uvicorn sismic_api.asgi:application --workers 4 --port 8001'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', default='http://127.0.0.1:8000', help='URL base del servidor WSGI')
+        parser.add_argument('--asgi', default='http://127.0.0.1:8001', help='URL base del servidor ASGI')
+        parser.add_argument('--clientes', type=int, default=1000, help='Clientes concurrentes')
+        parser.add_argument('--duracion', type=float, default=20.0, help='Segundos por escenario')
+        parser.add_argument('--token', help='Access token JWT para los endpoints autenticados')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+
+    def handle(self, *args, **options):
+        subir_limite_descriptores(options['clientes'])
+
+        cabeceras = {'Authorization': f"Bearer {options['token']}"} if options['token'] else None
+        escenarios = [
+            ('publicos', '/api/sismos/public/', '/api/sismos/async/public/', None),
+            ('diagnostics', '/api/sismos/diagnostics/', '/api/sismos/async/diagnostics/', None),
+        ]
+        if cabeceras:
+            escenarios.append(
+                ('listado', '/api/sismos/?magnitud__gte=4.5', '/api/sismos/async/?magnitud__gte=4.5', cabeceras)
+            )
+
+        resultados = []
+        for nombre, ruta_sync, ruta_async, headers in escenarios:
+            for modo, url in (('wsgi', options['wsgi'] + ruta_sync), ('asgi', options['asgi'] + ruta_async)):
+                self.stdout.write(f"[{modo}] {nombre}: {options['clientes']} clientes durante {options['duracion']} s...")
+                resumen = asyncio.run(martillar(
+                    url, options['clientes'], options['duracion'], cabeceras=headers, nombre=f'{modo}:{nombre}'
+                ))
+                resultados.append(resumen)
+                self.stdout.write(
+                    f"  {resumen['rps']} req/s | p50 {resumen['p50_ms']} ms | "
+                    f"p99 {resumen['p99_ms']} ms | errores {resumen['errores']}/{resumen['peticiones']}"
+                )
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2)
+        self.stdout.write(self.style.SUCCESS('Benchmark completado.'))
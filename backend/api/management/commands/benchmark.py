@@ -0,0 +1,96 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api.benchmark import ESCENARIOS, Benchmark, comparar
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark de extremo a extremo de la API de sismos y de la ingesta con catálogos sintéticos '
+        'de distinto tamaño. Usa la base de datos de pruebas (SQL Server según settings) o un SQLite '
+        'aparte con --sqlite; nunca los datos reales. Con --base compara contra un resultado anterior '
+        'y termina con error si algún escenario empeora más que --umbral.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', default='10000,100000',
+                            help='Tamaños de catálogo separados por comas (p. ej. 10000,100000,1000000)')
+        parser.add_argument('--escenarios', default=','.join(ESCENARIOS),
+                            help=f"Escenarios a medir: {', '.join(ESCENARIOS)}")
+        parser.add_argument('--repeticiones', type=int, default=20, help='Repeticiones cronometradas por escenario')
+        parser.add_argument('--calentamiento', type=int, default=2, help='Repeticiones previas sin cronometrar')
+        parser.add_argument('--semilla', type=int, default=0, help='Semilla del catálogo sintético')
+        parser.add_argument('--sqlite', nargs='?', const=str(Path(settings.BASE_DIR) / 'var' / 'benchmark.sqlite3'),
+                            help='Usar un archivo SQLite en lugar de la base de datos configurada')
+        parser.add_argument('--conservar', action='store_true',
+                            help='Conservar la base de datos de pruebas (y su catálogo) para la siguiente ejecución')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--base', help='Resultado JSON anterior con el que comparar')
+        parser.add_argument('--umbral', type=float, default=0.25,
+                            help='Empeoramiento relativo del p50 tolerado frente a --base (0.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        try:
+            tamanos = [int(valor) for valor in options['tamanos'].split(',') if valor.strip()]
+        except ValueError:
+            raise CommandError('--tamanos debe ser una lista de enteros separados por comas')
+        escenarios = [nombre.strip() for nombre in options['escenarios'].split(',') if nombre.strip()]
+        desconocidos = set(escenarios) - set(ESCENARIOS)
+        if desconocidos:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+        base = None
+        if options['base']:
+            with open(options['base'], encoding='utf-8') as archivo:
+                base = json.load(archivo)
+
+        if options['sqlite']:
+            self._usar_sqlite(options['sqlite'])
+        conexion = connections['default']
+        nombre_original = conexion.settings_dict['NAME']
+        # Como en 'manage.py test': el cliente de pruebas usa el host 'testserver' (ALLOWED_HOSTS)
+        setup_test_environment()
+        self.stdout.write(f"Creando base de datos de pruebas ({conexion.vendor})...")
+        conexion.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['conservar'])
+        try:
+            informe = Benchmark(
+                repeticiones=options['repeticiones'],
+                calentamiento=options['calentamiento'],
+                semilla=options['semilla'],
+                escenarios=escenarios,
+                salida=self.stdout.write,
+            ).ejecutar(tamanos)
+        finally:
+            conexion.creation.destroy_test_db(nombre_original, verbosity=0, keepdb=options['conservar'])
+            teardown_test_environment()
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(informe, archivo, indent=2)
+            self.stdout.write(f"Resultados guardados en {options['salida']}")
+
+        if base is not None:
+            regresiones = comparar(informe, base, options['umbral'])
+            if regresiones:
+                for regresion in regresiones:
+                    self.stderr.write(self.style.ERROR(f"  {regresion}"))
+                raise CommandError(f"{len(regresiones)} regresiones frente a {options['base']}")
+            self.stdout.write(self.style.SUCCESS(f"Sin regresiones frente a {options['base']}"))
+
+    def _usar_sqlite(self, ruta):
+        """Reemplaza la conexión 'default' por un SQLite (la base de pruebas vive en 'ruta')"""
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        connections['default'].close()
+        actual = connections.settings['default']
+        connections.settings['default'] = {
+            **actual,
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ruta,
+            'OPTIONS': {},
+            'TEST': {**actual['TEST'], 'NAME': ruta},
+        }
+        connections['default'] = connections.create_connection('default')
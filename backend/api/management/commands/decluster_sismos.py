@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+from api.declustering import recalcular_secuencias
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las secuencias sísmicas (sismo principal / réplica / fondo) con ventanas de Gardner-Knopoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            help='Fecha ISO desde la cual reclasificar (por defecto, todo el catálogo)',
+        )
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['desde']:
+            desde = parse_datetime(options['desde'])
+            if desde is None:
+                self.stderr.write(self.style.ERROR(f"Fecha inválida: {options['desde']}"))
+                return
+
+        self.stdout.write("Recalculando secuencias sísmicas...")
+        cambios = recalcular_secuencias(desde=desde)
+        self.stdout.write(self.style.SUCCESS(f'Proceso completado. {cambios} eventos reclasificados.'))
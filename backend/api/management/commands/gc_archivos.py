@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from api.almacen import recolectar, estadisticas, GRACIA_HORAS, TAMANO_LOTE
+
+
+class Command(BaseCommand):
+    help = 'Borra en lotes los archivos direccionados por contenido que llevan tiempo sin referencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--gracia-horas',
+            type=int,
+            default=GRACIA_HORAS,
+            help='Horas mínimas sin referencias antes de borrar un archivo',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANO_LOTE,
+            help='Archivos por lote (cada lote se borra en una transacción corta)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Recolectando archivos sin referencias...")
+        borrados = recolectar(gracia_horas=options['gracia_horas'], tamano_lote=options['lote'])
+        resumen = estadisticas()
+        self.stdout.write(self.style.SUCCESS(
+            f"Proceso completado. {borrados} archivos borrados. En uso: {resumen['archivos']} archivos, "
+            f"{resumen['bytes'] or 0} bytes, {resumen['referencias'] or 0} referencias."
+        ))
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.series import invalidar_series
+from api.sinteticos import (
+    PREFIJO, TAMANO_LOTE, borrar_sinteticos, contar_sinteticos, generar_catalogo, insertar_catalogo,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un catálogo sintético de sismos para pruebas de carga: magnitudes de Gutenberg–Richter, '
+        'epicentros en los límites de placa, profundidades según el tipo de límite y réplicas (Omori-Utsu). '
+        'Es determinista por semilla. No emite la señal de ingesta; regenere luego el snapshot y las '
+        'secuencias con snapshot_sismos y decluster_sismos si hacen falta.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidad', type=int, default=1_000_000, help='Número de eventos a generar')
+        parser.add_argument('--semilla', type=int, default=0, help='Semilla del generador')
+        parser.add_argument('--dias', type=int, default=365, help='Días de catálogo anteriores a --fin')
+        parser.add_argument('--fin', help='Fecha ISO del final del catálogo (por defecto, ahora)')
+        parser.add_argument('--prefijo', default=PREFIJO, help='Prefijo de id_evento_usgs de los eventos sintéticos')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Eventos por bulk_create')
+        parser.add_argument('--borrar', action='store_true',
+                            help='Borrar antes los eventos sintéticos existentes con el mismo prefijo')
+
+    def handle(self, *args, **options):
+        fin = timezone.now()
+        if options['fin']:
+            fin = parse_datetime(options['fin'])
+            if fin is None:
+                self.stderr.write(self.style.ERROR(f"Fecha inválida: {options['fin']}"))
+                return
+            if timezone.is_naive(fin):
+                fin = timezone.make_aware(fin)
+
+        prefijo = options['prefijo']
+        existentes = contar_sinteticos(prefijo)
+        if options['borrar'] and existentes:
+            self.stdout.write(f"Borrando {existentes} eventos sintéticos '{prefijo}'...")
+            borrar_sinteticos(prefijo, tamano_lote=options['lote'])
+            existentes = 0
+
+        inicio = time.perf_counter()
+        self.stdout.write(f"Generando {options['cantidad']} eventos (semilla {options['semilla']})...")
+        # Al ampliar un catálogo la semilla se deriva de los ya existentes (como en api/benchmark.py):
+        # repetir la misma --semilla no vuelve a insertar los mismos eventos con otros ids
+        columnas = generar_catalogo(
+            options['cantidad'], semilla=(options['semilla'], existentes), dias=options['dias'], fin=fin
+        )
+        self.stdout.write(f"  Catálogo generado en {time.perf_counter() - inicio:.1f} s")
+
+        def progreso(hechos, total):
+            if hechos == total or hechos % (options['lote'] * 20) < options['lote']:
+                self.stdout.write(f"  {hechos}/{total} insertados ({time.perf_counter() - inicio:.0f} s)")
+
+        # Los ids continúan tras los sintéticos existentes: se puede ampliar un catálogo en varias pasadas
+        total = insertar_catalogo(
+            columnas, prefijo=prefijo, desplazamiento=existentes, tamano_lote=options['lote'], progreso=progreso
+        )
+        invalidar_series()  # Las inserciones masivas no emiten sismos_ingestados
+        self.stdout.write(self.style.SUCCESS(
+            f"Proceso completado. {total} eventos sintéticos insertados en {time.perf_counter() - inicio:.1f} s."
+        ))
@@ -0,0 +1,58 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from api.importacion import ImportadorUsuarios, leer_filas, TAMANO_LOTE
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa usuarios desde un archivo CSV (con cabecera) o JSONL. Columnas: email, username, '
+        'first_name, last_name y opcionalmente password, telefono y fecha_nacimiento (AAAA-MM-DD). '
+        'Sin password la cuenta queda con contraseña inutilizable (se activa vía restablecimiento).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV o JSONL')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], help='Formato (por defecto, según la extensión)')
+        parser.add_argument(
+            '--tipo-usuario',
+            choices=get_user_model().TipoUsuario.values,
+            default=get_user_model().TipoUsuario.VISITANTE,
+            help='Rol asignado a todas las cuentas importadas',
+        )
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por lote de hash e inserción')
+        parser.add_argument('--procesos', type=int, help='Procesos para el hash de contraseñas (por defecto, nº de CPUs)')
+        parser.add_argument('--rechazos', help='Archivo CSV donde guardar las filas rechazadas (línea, motivo)')
+        parser.add_argument('--simular', action='store_true', help='Valida y hashea sin insertar nada')
+
+    def handle(self, *args, **options):
+        importador = ImportadorUsuarios(
+            tipo_usuario=options['tipo_usuario'],
+            tamano_lote=options['lote'],
+            procesos=options['procesos'],
+            simular=options['simular'],
+        )
+        self.stdout.write(f"Importando usuarios desde {options['archivo']} con {importador.procesos} procesos...")
+        try:
+            importador.importar(leer_filas(options['archivo'], options['formato']))
+        except (OSError, UnicodeDecodeError) as error:
+            raise CommandError(f"No se pudo leer el archivo: {error}")
+
+        if options['rechazos'] and importador.rechazos:
+            with open(options['rechazos'], 'w', encoding='utf-8', newline='') as archivo:
+                escritor = csv.writer(archivo)
+                escritor.writerow(['linea', 'motivo'])
+                escritor.writerows(importador.rechazos)
+
+        for numero, motivo in importador.rechazos[:20]:
+            self.stderr.write(f"  Línea {numero}: {motivo}")
+        if len(importador.rechazos) > 20:
+            self.stderr.write(f"  ... y {len(importador.rechazos) - 20} rechazos más")
+
+        informe = importador.informe()
+        prefijo = '[SIMULACIÓN] ' if options['simular'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefijo}Proceso completado. {informe['creados']} usuarios creados, "
+            f"{informe['rechazados']} rechazados de {informe['leidos']} filas "
+            f"en {informe['segundos']} s ({informe['usuarios_por_segundo']} usuarios/s)."
+        ))
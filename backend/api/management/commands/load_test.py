@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.carga import ESCENARIOS, borrar_usuarios, crear_usuarios, simular
+from api.http_bench import subir_limite_descriptores
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga contra un servidor ya levantado: clientes virtuales que reproducen MapPage.js y '
+        'NewsPanel.js (login, carga inicial del mapa, sondeo cada 60 s y noticias cada 30 s). Informa '
+        'percentiles, tasa de error, códigos de estado y consultas SQL por escenario (estas últimas si '
+        'el servidor tiene CONTADOR_CONSULTAS activo). Los 429 reflejan la limitación de tasa configurada.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='URL base del servidor')
+        parser.add_argument('--clientes', type=int, default=500, help='Usuarios simultáneos')
+        parser.add_argument('--duracion', type=float, default=120.0, help='Segundos de prueba')
+        parser.add_argument('--rampa', type=float, default=10.0,
+                            help='Segundos en los que llegan todos los usuarios (0 = todos a la vez)')
+        parser.add_argument('--acelerar', type=float, default=1.0,
+                            help='Divide los intervalos de sondeo y noticias (10 = sondeo cada 6 s)')
+        parser.add_argument('--semilla', type=int, default=0, help='Semilla de los instantes de llegada')
+        parser.add_argument('--email', help='Email de un usuario existente (todos los clientes lo comparten)')
+        parser.add_argument('--password', help='Contraseña de --email o de los usuarios de --crear-usuarios')
+        parser.add_argument('--crear-usuarios', type=int, default=0,
+                            help='Crear N visitantes de prueba (en la BD de settings) y repartirlos entre los clientes')
+        parser.add_argument('--limpiar', action='store_true', help='Borrar al terminar los visitantes de prueba')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+
+    def handle(self, *args, **options):
+        if options['crear_usuarios']:
+            if not options['password']:
+                raise CommandError('--crear-usuarios requiere --password')
+            credenciales = crear_usuarios(options['crear_usuarios'], options['password'])
+            self.stdout.write(f"{len(credenciales)} usuarios de prueba listos")
+        elif options['email'] and options['password']:
+            credenciales = [(options['email'], options['password'])]
+        else:
+            raise CommandError('Indique --email y --password, o --crear-usuarios N y --password')
+
+        subir_limite_descriptores(options['clientes'])
+        self.stdout.write(
+            f"{options['clientes']} clientes contra {options['url']} durante {options['duracion']} s "
+            f"(rampa {options['rampa']} s, x{options['acelerar']})..."
+        )
+        try:
+            resumen = asyncio.run(simular(
+                options['url'], credenciales, options['clientes'], options['duracion'],
+                rampa=options['rampa'], acelerar=options['acelerar'], semilla=options['semilla'],
+            ))
+        finally:
+            if options['limpiar']:
+                self.stdout.write(f"{borrar_usuarios()} usuarios de prueba borrados")
+
+        for escenario in ESCENARIOS:
+            datos = resumen[escenario]
+            if not datos['peticiones']:
+                continue
+            consultas = (
+                f" | consultas media {datos['consultas_media']} p95 {datos['consultas_p95']}"
+                if datos['consultas_media'] is not None else ''
+            )
+            self.stdout.write(
+                f"  {escenario:<13} {datos['peticiones']:>7} pet. | p50 {datos['p50_ms']} ms | "
+                f"p90 {datos['p90_ms']} ms | p99 {datos['p99_ms']} ms | errores {datos['tasa_error'] * 100:.1f}%"
+                f"{consultas} | {datos['estados']}"
+            )
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump({'parametros': {
+                    clave: options[clave] for clave in ('url', 'clientes', 'duracion', 'rampa', 'acelerar', 'semilla')
+                }, 'resultados': resumen}, archivo, indent=2)
+            self.stdout.write(f"Resultados guardados en {options['salida']}")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from api.fotos import procesar_foto
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera las variantes (sin EXIF, redimensionadas y en WebP) de las fotos de perfil existentes '
+        'y las guarda en el almacén direccionado por contenido'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Reprocesa también las fotos que ya tienen variantes (p. ej. para migrarlas al almacén)',
+        )
+
+    def handle(self, *args, **options):
+        usuarios = get_user_model().objects.exclude(ruta_fotografia='').exclude(ruta_fotografia__isnull=True)
+        if not options['todas']:
+            usuarios = usuarios.filter(fotografia_variantes={})
+
+        pendientes = list(usuarios.values_list('pk', 'ruta_fotografia'))
+        self.stdout.write(f"Procesando {len(pendientes)} fotos de perfil...")
+        procesadas = sum(1 for pk, nombre in pendientes if procesar_foto(pk, nombre))
+        self.stdout.write(self.style.SUCCESS(
+            f'Proceso completado. {procesadas} fotos procesadas, {len(pendientes) - procesadas} omitidas.'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from api.noticias import invalidar_listado, reindexar_todas
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de noticias (tras migrar o cargar datos con loaddata)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=200,
+            help='Noticias leídas por consulta',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Indexando noticias...")
+        total = reindexar_todas(tamano_lote=options['lote'])
+        invalidar_listado()
+        self.stdout.write(self.style.SUCCESS(f"Proceso completado. {total} noticias indexadas."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from api.noticias import VERSION_RENDER, renderizar_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Sanea y pre-renderiza por lotes las noticias guardadas con una versión anterior del pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=200,
+            help='Noticias leídas y actualizadas por consulta',
+        )
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Reprocesa todas las noticias, no solo las pendientes',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Pre-renderizando noticias (versión {VERSION_RENDER})...")
+        total = renderizar_pendientes(tamano_lote=options['lote'], todas=options['todas'])
+        self.stdout.write(self.style.SUCCESS(f"Proceso completado. {total} noticias actualizadas."))
@@ -0,0 +1,51 @@
+import signal
+import time
+from django.core.management.base import BaseCommand, CommandError
+from api.tareas import Despachador, COLAS, purgar_completadas, recuperar_concesiones_vencidas
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta los trabajadores de la cola de tareas en segundo plano (api/tareas.py). '
+        'Pueden lanzarse varios procesos en paralelo; cada uno usa los hilos por cola de TAREAS["COLAS"].'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--colas',
+            nargs='+',
+            help='Colas a atender (por defecto, todas las de TAREAS["COLAS"]); admite cola:hilos',
+        )
+
+    def handle(self, *args, **options):
+        colas = dict(COLAS)
+        if options['colas']:
+            colas = {}
+            for valor in options['colas']:
+                nombre, _, hilos = valor.partition(':')
+                try:
+                    colas[nombre] = int(hilos) if hilos else COLAS.get(nombre, 1)
+                except ValueError:
+                    raise CommandError(f"Formato inválido: {valor} (usa cola o cola:hilos)")
+
+        despachador = Despachador(colas)
+        despachador.iniciar()
+        self.stdout.write(self.style.SUCCESS(
+            'Trabajadores iniciados: ' + ', '.join(f'{cola} ({hilos})' for cola, hilos in colas.items())
+        ))
+
+        detener = lambda *_: despachador.detenido.set()
+        signal.signal(signal.SIGINT, detener)
+        signal.signal(signal.SIGTERM, detener)
+
+        ultimo_mantenimiento = 0
+        while not despachador.detenido.is_set():
+            if time.monotonic() - ultimo_mantenimiento > 3600:
+                recuperar_concesiones_vencidas()
+                purgar_completadas()
+                ultimo_mantenimiento = time.monotonic()
+            despachador.detenido.wait(5)
+
+        self.stdout.write("Deteniendo trabajadores (se termina la tarea en curso)...")
+        despachador.detener()
+        self.stdout.write(self.style.SUCCESS(f'Trabajadores detenidos. Contadores: {despachador.contadores}'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from api.snapshot import escribir_snapshot, VENTANA_DIAS
+
+
+class Command(BaseCommand):
+    help = 'Regenera el snapshot columnar de eventos recientes compartido por los workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=VENTANA_DIAS,
+            help='Tamaño de la ventana de eventos recientes en días',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Generando snapshot de sismos...")
+        total = escribir_snapshot(ventana_dias=options['dias'])
+        self.stdout.write(self.style.SUCCESS(f'Snapshot publicado con {total} eventos.'))
@@ -0,0 +1,189 @@
+# ========================================
+# MÉTRICAS PROMETHEUS - SEISMIC TRACKER
+# PROPÓSITO: Exponer latencias, consultas, ingesta y cachés en /metrics, agregadas entre procesos
+# ========================================
+
+"""
+Métricas en formato Prometheus (prometheus_client).
+
+Recolección:
+- MetricasMiddleware: latencia por vista (view_name, no la URL: cardinalidad
+  acotada), consultas SQL y tiempo en la BD por petición
+- ingesta.ingerir_features: duración, eventos por tipo, hora de la última
+  ingesta y retraso de cada evento nuevo (desde que ocurrió hasta que entró)
+- Cachés y limitación de tasa: aciertos/fallos y peticiones rechazadas, en
+  el mismo punto donde ya se cuentan para estadisticas()
+
+Varios procesos (gunicorn/uvicorn con varios workers, run_workers):
+con METRICAS['DIRECTORIO_MULTIPROCESO'] cada proceso escribe sus valores en
+archivos mapeados en memoria de ese directorio y /metrics los agrega todos.
+El directorio debe vaciarse al arrancar el despliegue y el servidor debe
+avisar de los workers que terminan, p. ej. en gunicorn.conf.py:
+
+    def child_exit(server, worker):
+        from api.metricas import marcar_proceso_terminado
+        marcar_proceso_terminado(worker.pid)
+
+Incrementar una métrica es una escritura con cerrojo en memoria (sin E/S de
+red ni de BD); la agregación solo se paga al servir /metrics.
+"""
+
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+_CONFIG = getattr(settings, 'METRICAS', {})
+HABILITADAS = _CONFIG.get('HABILITADAS', True)
+DIRECTORIO = _CONFIG.get('DIRECTORIO_MULTIPROCESO')
+IPS_PERMITIDAS = _CONFIG.get('IPS_PERMITIDAS')  # None = cualquiera
+
+# prometheus_client decide el modo multiproceso al importarse: la variable debe existir antes
+if DIRECTORIO:
+    os.makedirs(DIRECTORIO, exist_ok=True)
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', str(DIRECTORIO))
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+from .consultas import ContadorConsultas  # noqa: E402
+
+# ========================================
+# DEFINICIÓN DE MÉTRICAS
+# ========================================
+
+DURACION_PETICION = Histogram(
+    'seismic_http_request_duration_seconds', 'Duración de las peticiones HTTP por vista',
+    ['metodo', 'vista', 'estado'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+CONSULTAS_PETICION = Histogram(
+    'seismic_db_queries_per_request', 'Consultas SQL por petición', ['vista'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DURACION_BD_PETICION = Histogram(
+    'seismic_db_duration_seconds', 'Tiempo total en la BD por petición', ['vista'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+DURACION_INGESTA = Histogram(
+    'seismic_ingesta_duration_seconds', 'Duración de cada ingesta de features',
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+EVENTOS_INGESTA = Counter(
+    'seismic_ingesta_eventos', 'Eventos procesados por la ingesta', ['tipo'],  # nuevo, actualizado, sin_cambios, omitido
+)
+ULTIMA_INGESTA = Gauge(
+    'seismic_ingesta_ultima_timestamp_seconds', 'Hora Unix de la última ingesta completada',
+    multiprocess_mode='max',
+)
+RETRASO_INGESTA = Histogram(
+    'seismic_ingesta_retraso_seconds', 'Tiempo desde que ocurre un evento hasta que se ingiere',
+    buckets=(60, 300, 600, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 7 * 86400),
+)
+CONSULTAS_CACHE = Counter(
+    'seismic_cache_consultas', 'Consultas a cachés internas', ['cache', 'resultado'],  # acierto, fallo
+)
+PETICIONES_LIMITADAS = Counter(
+    'seismic_throttling_peticiones', 'Peticiones evaluadas por la limitación de tasa', ['ambito', 'resultado'],
+)
+TAREAS = Counter(
+    'seismic_tareas', 'Tareas en segundo plano ejecutadas', ['cola', 'resultado'],  # completadas, reintentadas...
+)
+
+# ========================================
+# REGISTRO DESDE EL CÓDIGO DE LA APLICACIÓN
+# ========================================
+
+def registrar_cache(cache, acierto):
+    CONSULTAS_CACHE.labels(cache, 'acierto' if acierto else 'fallo').inc()
+
+
+def registrar_ingesta(duracion, nuevos, actualizados, omitidos, fechas_nuevos=(), sin_cambios=0):
+    """Duración, conteos y retraso de los eventos nuevos de una ingesta"""
+    DURACION_INGESTA.observe(duracion)
+    EVENTOS_INGESTA.labels('nuevo').inc(nuevos)
+    EVENTOS_INGESTA.labels('actualizado').inc(actualizados)
+    EVENTOS_INGESTA.labels('sin_cambios').inc(sin_cambios)
+    EVENTOS_INGESTA.labels('omitido').inc(omitidos)
+    ahora = time.time()
+    for fecha in fechas_nuevos:
+        RETRASO_INGESTA.observe(max(0.0, ahora - fecha.timestamp()))
+    ULTIMA_INGESTA.set(ahora)
+
+
+def marcar_proceso_terminado(pid):
+    """Limpia los gauges del proceso que terminó (hook child_exit del servidor)"""
+    if DIRECTORIO:
+        multiprocess.mark_process_dead(pid)
+
+
+def generar():
+    """Texto de exposición con las métricas de todos los procesos"""
+    if DIRECTORIO:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = REGISTRY
+    return generate_latest(registro)
+
+# ========================================
+# MIDDLEWARE
+# ========================================
+
+# Métodos con etiqueta propia; cualquier otro verbo cuenta como 'otro' (cardinalidad acotada)
+METODOS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+
+def _metodo(request):
+    return request.method if request.method in METODOS else 'otro'
+
+
+def _vista(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    return coincidencia.view_name if coincidencia else 'sin_ruta'
+
+
+class MetricasMiddleware:
+    """
+    Latencia y consultas por vista, en WSGI y en ASGI. Las consultas se
+    cuentan por contexto (ContadorConsultas.en_contexto), así que también se
+    miden las que hacen las vistas asíncronas desde hilos de sync_to_async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not HABILITADAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.es_asincrono = iscoroutinefunction(get_response)
+        if self.es_asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.es_asincrono:
+            return self._llamar_async(request)
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with contador.en_contexto():
+            respuesta = self.get_response(request)
+        self._observar(request, respuesta, time.perf_counter() - inicio, contador)
+        return respuesta
+
+    async def _llamar_async(self, request):
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with contador.en_contexto():
+            respuesta = await self.get_response(request)
+        self._observar(request, respuesta, time.perf_counter() - inicio, contador)
+        return respuesta
+
+    def _observar(self, request, respuesta, segundos, contador):
+        vista = _vista(request)
+        DURACION_PETICION.labels(_metodo(request), vista, respuesta.status_code).observe(segundos)
+        CONSULTAS_PETICION.labels(vista).observe(contador.total)
+        DURACION_BD_PETICION.labels(vista).observe(contador.segundos)
@@ -0,0 +1,110 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:16
+
+import api.utils
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_alter_usuario_ruta_fotografia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventosismico',
+            name='id_secuencia',
+            field=models.BigIntegerField(blank=True, db_index=True, help_text='ID del sismo principal de la secuencia (nulo para sismicidad de fondo)', null=True),
+        ),
+        migrations.AddField(
+            model_name='eventosismico',
+            name='tipo_secuencia',
+            field=models.CharField(choices=[('PRINCIPAL', 'Sismo principal'), ('REPLICA', 'Réplica'), ('FONDO', 'Fondo')], db_index=True, default='FONDO', help_text='Clasificación del evento dentro de su secuencia sísmica', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='eventosismico',
+            name='fecha_hora_evento',
+            field=models.DateTimeField(help_text='Fecha y hora UTC del evento sísmico'),
+        ),
+        migrations.AlterField(
+            model_name='eventosismico',
+            name='fecha_registro_db',
+            field=models.DateTimeField(auto_now_add=True, help_text='Fecha y hora de registro en la base de datos local'),
+        ),
+        migrations.AlterField(
+            model_name='eventosismico',
+            name='id_evento_usgs',
+            field=models.CharField(help_text='ID único del evento proporcionado por USGS', max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='eventosismico',
+            name='latitud',
+            field=models.FloatField(help_text='Latitud geográfica del epicentro'),
+        ),
+        migrations.AlterField(
+            model_name='eventosismico',
+            name='longitud',
+            field=models.FloatField(help_text='Longitud geográfica del epicentro'),
+        ),
+        migrations.AlterField(
+            model_name='eventosismico',
+            name='lugar_descripcion',
+            field=models.CharField(blank=True, help_text='Descripción del lugar donde ocurrió el sismo', max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='eventosismico',
+            name='magnitud',
+            field=models.FloatField(help_text='Magnitud del sismo en escala de momento (Mw)'),
+        ),
+        migrations.AlterField(
+            model_name='eventosismico',
+            name='profundidad',
+            field=models.FloatField(help_text='Profundidad del hipocentro en kilómetros'),
+        ),
+        migrations.AlterField(
+            model_name='eventosismico',
+            name='url_usgs',
+            field=models.URLField(blank=True, help_text='Enlace a la página de detalles en USGS', max_length=500, null=True),
+        ),
+        migrations.AlterField(
+            model_name='noticia',
+            name='contenido',
+            field=models.TextField(help_text='Contenido completo de la noticia'),
+        ),
+        migrations.AlterField(
+            model_name='noticia',
+            name='fecha_publicacion',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Fecha y hora de publicación de la noticia'),
+        ),
+        migrations.AlterField(
+            model_name='noticia',
+            name='titulo',
+            field=models.CharField(help_text='Título de la noticia o comunicado', max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='usuario',
+            name='email',
+            field=models.EmailField(help_text='Email único para autenticación', max_length=254, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='usuario',
+            name='fecha_nacimiento',
+            field=models.DateField(blank=True, help_text='Fecha de nacimiento para validaciones de edad', null=True),
+        ),
+        migrations.AlterField(
+            model_name='usuario',
+            name='ruta_fotografia',
+            field=models.ImageField(blank=True, help_text='Foto de perfil del usuario', max_length=255, null=True, upload_to=api.utils.get_unique_filename),
+        ),
+        migrations.AlterField(
+            model_name='usuario',
+            name='telefono',
+            field=models.CharField(blank=True, help_text='Número de teléfono del usuario', max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='usuario',
+            name='tipo_usuario',
+            field=models.CharField(choices=[('VISITANTE', 'Visitante'), ('ADMINISTRADOR', 'Administrador')], default='VISITANTE', help_text='Rol del usuario en el sistema', max_length=20),
+        ),
+    ]
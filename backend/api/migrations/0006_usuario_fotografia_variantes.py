@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_usuario_indices_admin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='fotografia_variantes',
+            field=models.JSONField(blank=True, default=dict, help_text="Rutas de las versiones redimensionadas de la foto (WebP) por tamaño, p. ej. {'sm': ..., 'md': ...}"),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_usuario_fotografia_variantes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoContenido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(help_text='Hash SHA-256 del contenido (hexadecimal)', max_length=64, unique=True)),
+                ('ruta', models.CharField(help_text='Ruta del archivo en el almacenamiento', max_length=255, unique=True)),
+                ('tipo_contenido', models.CharField(help_text='Tipo MIME del archivo', max_length=100)),
+                ('tamano_bytes', models.PositiveIntegerField(help_text='Tamaño del archivo en bytes')),
+                ('referencias', models.IntegerField(default=0, help_text='Número de referencias vivas al archivo')),
+                ('sin_referencias_desde', models.DateTimeField(blank=True, db_index=True, help_text='Momento en que el archivo quedó sin referencias (candidato a recolección)', null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, help_text='Fecha en que se guardó el archivo')),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_archivocontenido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cola', models.CharField(default='default', help_text='Cola a la que pertenece la tarea', max_length=50)),
+                ('nombre', models.CharField(help_text='Nombre registrado de la función a ejecutar', max_length=100)),
+                ('argumentos', models.JSONField(blank=True, default=dict, help_text='Argumentos (kwargs) de la función')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_CURSO', 'En curso'), ('COMPLETADA', 'Completada'), ('FALLIDA', 'Fallida')], default='PENDIENTE', help_text='Estado actual de la tarea', max_length=20)),
+                ('clave_idempotencia', models.CharField(blank=True, help_text='Clave única opcional para no encolar dos veces el mismo trabajo', max_length=200, null=True)),
+                ('intentos', models.PositiveIntegerField(default=0, help_text='Número de ejecuciones iniciadas')),
+                ('max_intentos', models.PositiveIntegerField(default=5, help_text='Intentos máximos antes de marcar la tarea como fallida')),
+                ('ejecutar_despues', models.DateTimeField(default=django.utils.timezone.now, help_text='La tarea no se ejecuta antes de este momento (retrasos y reintentos)')),
+                ('bloqueada_por', models.CharField(blank=True, help_text='Trabajador que ejecuta la tarea', max_length=100)),
+                ('bloqueada_hasta', models.DateTimeField(blank=True, help_text='Fin de la concesión del trabajador', null=True)),
+                ('ultimo_error', models.TextField(blank=True, help_text='Traza del último error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, help_text='Fecha en que se encoló la tarea')),
+                ('fecha_fin', models.DateTimeField(blank=True, help_text='Fecha en que la tarea terminó (completada o fallida)', null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'cola', 'ejecutar_despues'], name='tarea_pendientes_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tarea',
+            constraint=models.UniqueConstraint(condition=models.Q(('clave_idempotencia__isnull', False)), fields=('clave_idempotencia',), name='tarea_clave_idempotencia_unica'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_tarea'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoNoticia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(help_text='Término normalizado (minúsculas, sin tildes)', max_length=64)),
+                ('frecuencia', models.PositiveIntegerField(default=1, help_text='Apariciones del término en la noticia (el título cuenta doble)')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='noticia',
+            index=models.Index(fields=['fecha_publicacion', 'id'], name='noticia_fecha_idx'),
+        ),
+        migrations.AddField(
+            model_name='terminonoticia',
+            name='noticia',
+            field=models.ForeignKey(help_text='Noticia que contiene el término', on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='api.noticia'),
+        ),
+        migrations.AddConstraint(
+            model_name='terminonoticia',
+            constraint=models.UniqueConstraint(fields=('termino', 'noticia'), name='termino_noticia_unico'),
+        ),
+    ]
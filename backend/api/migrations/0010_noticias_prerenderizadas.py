@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_noticias_indices_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='noticia',
+            name='contenido_html',
+            field=models.TextField(blank=True, default='', help_text='HTML saneado listo para mostrar'),
+        ),
+        migrations.AddField(
+            model_name='noticia',
+            name='extracto',
+            field=models.CharField(blank=True, default='', help_text='Resumen en texto plano para los listados', max_length=400),
+        ),
+        migrations.AddField(
+            model_name='noticia',
+            name='minutos_lectura',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Tiempo estimado de lectura en minutos'),
+        ),
+        migrations.AddField(
+            model_name='noticia',
+            name='palabras',
+            field=models.PositiveIntegerField(default=0, help_text='Número de palabras del contenido'),
+        ),
+        migrations.AddField(
+            model_name='noticia',
+            name='version_render',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Versión del pipeline que generó los campos pre-renderizados (0 = pendiente)'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:58
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_noticias_prerenderizadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuscripcionAlerta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(help_text='Nombre del lugar (ej: Casa, Trabajo)', max_length=100)),
+                ('latitud', models.FloatField(help_text='Latitud del lugar en grados decimales', validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)])),
+                ('longitud', models.FloatField(help_text='Longitud del lugar en grados decimales', validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)])),
+                ('radio_km', models.FloatField(help_text='Distancia máxima del epicentro al lugar en kilómetros', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1000)])),
+                ('magnitud_minima', models.FloatField(help_text='Magnitud mínima que dispara la alerta', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)])),
+                ('activa', models.BooleanField(default=True, help_text='Las suscripciones inactivas no se indexan ni reciben alertas')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, help_text='Fecha de alta de la suscripción')),
+                ('usuario', models.ForeignKey(help_text='Usuario que recibe las alertas', on_delete=django.db.models.deletion.CASCADE, related_name='suscripciones_alerta', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CeldaSuscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('celda', models.IntegerField(help_text='Identificador de la celda de la rejilla (ver alertas.celda_de)')),
+                ('magnitud_minima', models.FloatField(help_text='Copia del umbral de la suscripción (filtrado en el índice)')),
+                ('suscripcion', models.ForeignKey(help_text='Suscripción que cubre la celda', on_delete=django.db.models.deletion.CASCADE, related_name='celdas', to='api.suscripcionalerta')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EntregaAlerta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distancia_km', models.FloatField(help_text='Distancia del epicentro al lugar en kilómetros')),
+                ('lote', models.CharField(blank=True, default='', help_text='Envío que reservó la entrega (vacío = pendiente)', max_length=32)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, help_text='Fecha en que se emparejó el evento')),
+                ('fecha_envio', models.DateTimeField(blank=True, help_text='Fecha en que se envió la alerta', null=True)),
+                ('evento', models.ForeignKey(help_text='Evento que disparó la alerta', on_delete=django.db.models.deletion.CASCADE, related_name='entregas_alerta', to='api.eventosismico')),
+                ('usuario', models.ForeignKey(help_text='Destinatario (copia de suscripcion.usuario para agrupar envíos)', on_delete=django.db.models.deletion.CASCADE, related_name='entregas_alerta', to=settings.AUTH_USER_MODEL)),
+                ('suscripcion', models.ForeignKey(help_text='Suscripción que se cumplió', on_delete=django.db.models.deletion.CASCADE, related_name='entregas', to='api.suscripcionalerta')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['usuario', 'lote'], name='entrega_pendientes_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='entregaalerta',
+            constraint=models.UniqueConstraint(fields=('suscripcion', 'evento'), name='entrega_alerta_unica'),
+        ),
+        migrations.AddIndex(
+            model_name='celdasuscripcion',
+            index=models.Index(fields=['celda', 'magnitud_minima'], name='celda_suscripcion_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_alertas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventosismico',
+            index=models.Index(fields=['fecha_hora_evento'], name='sismo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventosismico',
+            index=models.Index(fields=['magnitud', 'fecha_hora_evento'], name='sismo_magnitud_fecha_idx'),
+        ),
+    ]
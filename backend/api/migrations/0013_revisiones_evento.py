@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_sismos_indices_fecha_magnitud'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevisionEvento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(help_text='Fecha en que la ingesta detectó el cambio')),
+                ('cambios', models.JSONField(help_text='Campos modificados: {campo: [valor anterior, valor nuevo]}')),
+                ('evento', models.ForeignKey(help_text='Evento revisado', on_delete=django.db.models.deletion.CASCADE, related_name='revisiones', to='api.eventosismico')),
+            ],
+            options={
+                'ordering': ['fecha'],
+                'indexes': [models.Index(fields=['evento', 'fecha'], name='revision_evento_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_revisiones_evento'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='entregaalerta',
+            name='evento',
+            field=models.ForeignKey(db_constraint=False, help_text='Evento que disparó la alerta', on_delete=django.db.models.deletion.DO_NOTHING, related_name='entregas_alerta', to='api.eventosismico'),
+        ),
+        migrations.AlterField(
+            model_name='revisionevento',
+            name='evento',
+            field=models.ForeignKey(db_constraint=False, help_text='Evento revisado', on_delete=django.db.models.deletion.DO_NOTHING, related_name='revisiones', to='api.eventosismico'),
+        ),
+    ]
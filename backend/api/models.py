@@ -4,6 +4,7 @@
 # ========================================
 
 from django.db import models
+from django.core.validators import MinValueValidator, MaxValueValidator  # Rangos de coordenadas y umbrales
 from django.contrib.auth.models import AbstractUser  # Modelo de usuario personalizado
 from django.utils import timezone  # Utilidades de zona horaria
 from .utils import get_unique_filename  # Función auxiliar para nombres únicos de archivo
@@ -55,6 +56,12 @@ class Usuario(AbstractUser):
         max_length=255,
         help_text="Foto de perfil del usuario"
     )
+
+    fotografia_variantes = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Rutas de las versiones redimensionadas de la foto (WebP) por tamaño, p. ej. {'sm': ..., 'md': ...}"
+    )
     
     # ========================================
     # SISTEMA DE ROLES
@@ -89,6 +96,16 @@ class Usuario(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
+    class Meta(AbstractUser.Meta):
+        # Índices para el panel de administración: filtro por rol + orden keyset
+        # (campo, id) y búsqueda por prefijo en nombre y apellido (email ya es único)
+        indexes = [
+            models.Index(fields=['tipo_usuario', 'date_joined', 'id'], name='usuario_tipo_registro_idx'),
+            models.Index(fields=['tipo_usuario', 'last_login', 'id'], name='usuario_tipo_acceso_idx'),
+            models.Index(fields=['first_name'], name='usuario_nombre_idx'),
+            models.Index(fields=['last_name'], name='usuario_apellido_idx'),
+        ]
+
     def __str__(self):
         """Representación string del usuario mostrando su email"""
         return self.email
@@ -179,6 +196,36 @@ class EventoSismico(models.Model):
         help_text="Fecha y hora de registro en la base de datos local"
     )
 
+    # ========================================
+    # SECUENCIAS SÍSMICAS (DECLUSTERING)
+    # ========================================
+
+    class TipoSecuencia(models.TextChoices):
+        """
+        Clasificación del evento dentro de una secuencia sísmica
+        - PRINCIPAL: Sismo principal con al menos una réplica
+        - REPLICA: Evento dentro de la ventana de un sismo principal
+        - FONDO: Sismicidad de fondo (sin secuencia asociada)
+        """
+        PRINCIPAL = 'PRINCIPAL', 'Sismo principal'
+        REPLICA = 'REPLICA', 'Réplica'
+        FONDO = 'FONDO', 'Fondo'
+
+    tipo_secuencia = models.CharField(
+        max_length=20,
+        choices=TipoSecuencia.choices,
+        default=TipoSecuencia.FONDO,
+        db_index=True,
+        help_text="Clasificación del evento dentro de su secuencia sísmica"
+    )
+
+    id_secuencia = models.BigIntegerField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="ID del sismo principal de la secuencia (nulo para sismicidad de fondo)"
+    )
+
     def __str__(self):
         """
         Representación string del evento sísmico
@@ -190,8 +237,14 @@ class EventoSismico(models.Model):
         """
         Configuración del modelo:
         - Ordenamiento por fecha de evento descendente (más recientes primero)
+        - Índices para el orden por defecto, since_date y los filtros de magnitud
+          (protegidos por los tests de planes de consulta en api/tests.py)
         """
         ordering = ['-fecha_hora_evento']
+        indexes = [
+            models.Index(fields=['fecha_hora_evento'], name='sismo_fecha_idx'),
+            models.Index(fields=['magnitud', 'fecha_hora_evento'], name='sismo_magnitud_fecha_idx'),
+        ]
 
 # ========================================
 # MODELO: Noticia
@@ -230,6 +283,38 @@ class Noticia(models.Model):
         default=timezone.now,
         help_text="Fecha y hora de publicación de la noticia"
     )
+    
+    # ========================================
+    # CONTENIDO PRE-RENDERIZADO (se calcula al guardar, ver api/noticias.py)
+    # ========================================
+    
+    contenido_html = models.TextField(
+        blank=True,
+        default='',
+        help_text="HTML saneado listo para mostrar"
+    )
+    
+    extracto = models.CharField(
+        max_length=400,
+        blank=True,
+        default='',
+        help_text="Resumen en texto plano para los listados"
+    )
+    
+    palabras = models.PositiveIntegerField(
+        default=0,
+        help_text="Número de palabras del contenido"
+    )
+    
+    minutos_lectura = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Tiempo estimado de lectura en minutos"
+    )
+    
+    version_render = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Versión del pipeline que generó los campos pre-renderizados (0 = pendiente)"
+    )
 
     def __str__(self):
         """Representación string de la noticia mostrando su título"""
@@ -239,5 +324,452 @@ class Noticia(models.Model):
         """
         Configuración del modelo:
         - Ordenamiento por fecha de publicación descendente (más recientes primero)
+        - Índice (fecha, id) para el orden, published_after y la paginación keyset
         """
         ordering = ['-fecha_publicacion']
+        indexes = [
+            models.Index(fields=['fecha_publicacion', 'id'], name='noticia_fecha_idx'),
+        ]
+
+# ========================================
+# MODELO: TerminoNoticia
+# PROPÓSITO: Índice invertido para la búsqueda de noticias por texto
+# ========================================
+
+class TerminoNoticia(models.Model):
+    """
+    MODELO DE SOPORTE: TerminoNoticia
+    
+    Índice invertido (término -> noticia) mantenido al guardar cada noticia
+    (ver indexar() en api/noticias.py). Permite buscar en título y contenido con una
+    búsqueda por índice en lugar de recorrer los textos con LIKE '%...%'.
+    """
+    
+    termino = models.CharField(
+        max_length=64,
+        help_text="Término normalizado (minúsculas, sin tildes)"
+    )
+    
+    noticia = models.ForeignKey(
+        Noticia,
+        on_delete=models.CASCADE,
+        related_name='terminos',
+        help_text="Noticia que contiene el término"
+    )
+    
+    frecuencia = models.PositiveIntegerField(
+        default=1,
+        help_text="Apariciones del término en la noticia (el título cuenta doble)"
+    )
+
+    def __str__(self):
+        """Representación string del término y su noticia"""
+        return f"{self.termino} -> {self.noticia_id}"
+
+    class Meta:
+        """
+        Configuración del modelo:
+        - Un registro por (término, noticia); el índice único sirve también para buscar por término o prefijo
+        """
+        constraints = [
+            models.UniqueConstraint(fields=['termino', 'noticia'], name='termino_noticia_unico'),
+        ]
+
+# ========================================
+# MODELO: ArchivoContenido
+# PROPÓSITO: Archivos direccionados por contenido con conteo de referencias
+# ========================================
+
+class ArchivoContenido(models.Model):
+    """
+    MODELO DE SOPORTE: ArchivoContenido
+    
+    Registro de un archivo guardado bajo el hash SHA-256 de su contenido
+    (ver api/almacen.py). Las imágenes idénticas comparten un único archivo.
+    
+    Características:
+    - referencias: número de usos vivos (p. ej. fotos y variantes de usuarios)
+    - sin_referencias_desde: momento en que el conteo llegó a cero; el
+      recolector (gc_archivos) borra los archivos huérfanos tras un periodo de gracia
+    """
+    
+    sha256 = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="Hash SHA-256 del contenido (hexadecimal)"
+    )
+    
+    ruta = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text="Ruta del archivo en el almacenamiento"
+    )
+    
+    tipo_contenido = models.CharField(
+        max_length=100,
+        help_text="Tipo MIME del archivo"
+    )
+    
+    tamano_bytes = models.PositiveIntegerField(
+        help_text="Tamaño del archivo en bytes"
+    )
+    
+    referencias = models.IntegerField(
+        default=0,
+        help_text="Número de referencias vivas al archivo"
+    )
+    
+    sin_referencias_desde = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Momento en que el archivo quedó sin referencias (candidato a recolección)"
+    )
+    
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Fecha en que se guardó el archivo"
+    )
+
+    def __str__(self):
+        """Representación string del archivo mostrando su ruta y referencias"""
+        return f"{self.ruta} ({self.referencias} ref.)"
+
+# ========================================
+# MODELO: Tarea
+# PROPÓSITO: Cola de tareas en segundo plano respaldada por la base de datos
+# ========================================
+
+class Tarea(models.Model):
+    """
+    MODELO DE SOPORTE: Tarea
+    
+    Trabajo diferido ejecutado por los trabajadores de api/tareas.py
+    (comando run_workers o hilos locales en desarrollo).
+    
+    Características:
+    - cola: agrupa tareas con su propio límite de concurrencia
+    - clave_idempotencia: evita encolar dos veces el mismo trabajo
+    - intentos / ejecutar_despues: reintentos con retroceso exponencial
+    - bloqueada_hasta: concesión del trabajador; si vence, la tarea vuelve a la cola
+    """
+    
+    class Estado(models.TextChoices):
+        """Ciclo de vida de una tarea"""
+        PENDIENTE = 'PENDIENTE', 'Pendiente'
+        EN_CURSO = 'EN_CURSO', 'En curso'
+        COMPLETADA = 'COMPLETADA', 'Completada'
+        FALLIDA = 'FALLIDA', 'Fallida'
+
+    cola = models.CharField(
+        max_length=50,
+        default='default',
+        help_text="Cola a la que pertenece la tarea"
+    )
+    
+    nombre = models.CharField(
+        max_length=100,
+        help_text="Nombre registrado de la función a ejecutar"
+    )
+    
+    argumentos = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Argumentos (kwargs) de la función"
+    )
+    
+    estado = models.CharField(
+        max_length=20,
+        choices=Estado.choices,
+        default=Estado.PENDIENTE,
+        help_text="Estado actual de la tarea"
+    )
+    
+    clave_idempotencia = models.CharField(
+        max_length=200,
+        null=True,
+        blank=True,
+        help_text="Clave única opcional para no encolar dos veces el mismo trabajo"
+    )
+    
+    intentos = models.PositiveIntegerField(
+        default=0,
+        help_text="Número de ejecuciones iniciadas"
+    )
+    
+    max_intentos = models.PositiveIntegerField(
+        default=5,
+        help_text="Intentos máximos antes de marcar la tarea como fallida"
+    )
+    
+    ejecutar_despues = models.DateTimeField(
+        default=timezone.now,
+        help_text="La tarea no se ejecuta antes de este momento (retrasos y reintentos)"
+    )
+    
+    bloqueada_por = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Trabajador que ejecuta la tarea"
+    )
+    
+    bloqueada_hasta = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Fin de la concesión del trabajador"
+    )
+    
+    ultimo_error = models.TextField(
+        blank=True,
+        help_text="Traza del último error"
+    )
+    
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Fecha en que se encoló la tarea"
+    )
+    
+    fecha_fin = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Fecha en que la tarea terminó (completada o fallida)"
+    )
+
+    def __str__(self):
+        """Representación string de la tarea mostrando cola, nombre y estado"""
+        return f"[{self.cola}] {self.nombre} ({self.estado})"
+
+    class Meta:
+        """
+        Configuración del modelo:
+        - Índice para que los trabajadores tomen las tareas listas de cada cola
+        - Unicidad de la clave de idempotencia cuando se indica
+        """
+        indexes = [
+            models.Index(fields=['estado', 'cola', 'ejecutar_despues'], name='tarea_pendientes_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['clave_idempotencia'],
+                condition=models.Q(clave_idempotencia__isnull=False),
+                name='tarea_clave_idempotencia_unica',
+            ),
+        ]
+
+# ========================================
+# MODELO: SuscripcionAlerta
+# PROPÓSITO: Lugares guardados por el usuario para recibir alertas de sismos
+# ========================================
+
+class SuscripcionAlerta(models.Model):
+    """
+    MODELO DE SOPORTE: SuscripcionAlerta
+    
+    Alerta cuando un sismo de magnitud >= magnitud_minima ocurre a menos de
+    radio_km del lugar. El emparejamiento con cada ingesta usa el índice por
+    celdas CeldaSuscripcion (ver api/alertas.py).
+    """
+    
+    usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        related_name='suscripciones_alerta',
+        help_text="Usuario que recibe las alertas"
+    )
+    
+    nombre = models.CharField(
+        max_length=100,
+        help_text="Nombre del lugar (ej: Casa, Trabajo)"
+    )
+    
+    latitud = models.FloatField(
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+        help_text="Latitud del lugar en grados decimales"
+    )
+    
+    longitud = models.FloatField(
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+        help_text="Longitud del lugar en grados decimales"
+    )
+    
+    radio_km = models.FloatField(
+        validators=[MinValueValidator(1), MaxValueValidator(1000)],
+        help_text="Distancia máxima del epicentro al lugar en kilómetros"
+    )
+    
+    magnitud_minima = models.FloatField(
+        validators=[MinValueValidator(0), MaxValueValidator(10)],
+        help_text="Magnitud mínima que dispara la alerta"
+    )
+    
+    activa = models.BooleanField(
+        default=True,
+        help_text="Las suscripciones inactivas no se indexan ni reciben alertas"
+    )
+    
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Fecha de alta de la suscripción"
+    )
+
+    def __str__(self):
+        """Representación string de la suscripción mostrando usuario y lugar"""
+        return f"{self.usuario_id}: {self.nombre} (M{self.magnitud_minima}+, {self.radio_km} km)"
+
+# ========================================
+# MODELO: CeldaSuscripcion
+# PROPÓSITO: Índice espacial por celdas de las suscripciones activas
+# ========================================
+
+class CeldaSuscripcion(models.Model):
+    """
+    MODELO DE SOPORTE: CeldaSuscripcion
+    
+    Una fila por cada celda de la rejilla que cubre el círculo de una
+    suscripción activa. Cada evento solo se compara con las suscripciones de
+    su celda y umbral de magnitud, en lugar de con todas.
+    """
+    
+    celda = models.IntegerField(
+        help_text="Identificador de la celda de la rejilla (ver alertas.celda_de)"
+    )
+    
+    magnitud_minima = models.FloatField(
+        help_text="Copia del umbral de la suscripción (filtrado en el índice)"
+    )
+    
+    suscripcion = models.ForeignKey(
+        SuscripcionAlerta,
+        on_delete=models.CASCADE,
+        related_name='celdas',
+        help_text="Suscripción que cubre la celda"
+    )
+
+    class Meta:
+        """
+        Configuración del modelo:
+        - Índice (celda, magnitud) para obtener las suscripciones cercanas con umbral alcanzable
+        """
+        indexes = [
+            models.Index(fields=['celda', 'magnitud_minima'], name='celda_suscripcion_idx'),
+        ]
+
+# ========================================
+# MODELO: EntregaAlerta
+# PROPÓSITO: Alertas emparejadas pendientes o enviadas a cada usuario
+# ========================================
+
+class EntregaAlerta(models.Model):
+    """
+    MODELO DE SOPORTE: EntregaAlerta
+    
+    Un evento que cumplió una suscripción. La unicidad (suscripción, evento)
+    garantiza que las revisiones de un evento ya alertado no se vuelvan a
+    enviar. Las entregas se agrupan por usuario en un solo correo.
+    """
+    
+    suscripcion = models.ForeignKey(
+        SuscripcionAlerta,
+        on_delete=models.CASCADE,
+        related_name='entregas',
+        help_text="Suscripción que se cumplió"
+    )
+    
+    evento = models.ForeignKey(
+        EventoSismico,
+        on_delete=models.DO_NOTHING,  # Sobrevive al archivo frío (api/tiering.py)
+        db_constraint=False,
+        related_name='entregas_alerta',
+        help_text="Evento que disparó la alerta"
+    )
+    
+    usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        related_name='entregas_alerta',
+        help_text="Destinatario (copia de suscripcion.usuario para agrupar envíos)"
+    )
+    
+    distancia_km = models.FloatField(
+        help_text="Distancia del epicentro al lugar en kilómetros"
+    )
+    
+    lote = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        help_text="Envío que reservó la entrega (vacío = pendiente)"
+    )
+    
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Fecha en que se emparejó el evento"
+    )
+    
+    fecha_envio = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Fecha en que se envió la alerta"
+    )
+
+    def __str__(self):
+        """Representación string de la entrega mostrando suscripción y evento"""
+        return f"{self.suscripcion_id} -> {self.evento_id}"
+
+    class Meta:
+        """
+        Configuración del modelo:
+        - Una entrega por (suscripción, evento): deduplica los eventos revisados
+        - Índice para reservar las entregas pendientes de un usuario
+        """
+        constraints = [
+            models.UniqueConstraint(fields=['suscripcion', 'evento'], name='entrega_alerta_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['usuario', 'lote'], name='entrega_pendientes_idx'),
+        ]
+
+# ========================================
+# MODELO: RevisionEvento
+# PROPÓSITO: Historial de las revisiones de USGS sobre cada evento
+# ========================================
+
+class RevisionEvento(models.Model):
+    """
+    MODELO DE SOPORTE: RevisionEvento
+    
+    Una fila por cada ingesta que cambió algún campo de un evento ya
+    existente (USGS revisa magnitud, ubicación y profundidad durante días).
+    Solo se guardan los campos que cambiaron: {campo: [anterior, nuevo]}.
+    Las ingestas que no cambian nada no generan revisión ni escritura.
+    """
+    
+    evento = models.ForeignKey(
+        EventoSismico,
+        on_delete=models.DO_NOTHING,  # El historial se conserva al archivar el evento (api/tiering.py)
+        db_constraint=False,
+        related_name='revisiones',
+        help_text="Evento revisado"
+    )
+    
+    fecha = models.DateTimeField(
+        help_text="Fecha en que la ingesta detectó el cambio"
+    )
+    
+    cambios = models.JSONField(
+        help_text="Campos modificados: {campo: [valor anterior, valor nuevo]}"
+    )
+
+    def __str__(self):
+        """Representación string de la revisión mostrando evento, fecha y campos"""
+        return f"{self.evento_id} @ {self.fecha:%Y-%m-%d %H:%M:%S}: {', '.join(self.cambios)}"
+
+    class Meta:
+        """
+        Configuración del modelo:
+        - Índice (evento, fecha) para el historial de un evento en orden cronológico
+        """
+        ordering = ['fecha']
+        indexes = [
+            models.Index(fields=['evento', 'fecha'], name='revision_evento_fecha_idx'),
+        ]
@@ -0,0 +1,258 @@
+# ========================================
+# NOTICIAS - SEISMIC TRACKER
+# PROPÓSITO: Pre-renderizado, búsqueda indexada y caché del listado de noticias
+# ========================================
+
+"""
+Soporte del feed de noticias.
+
+Pre-renderizado (al guardar, receptor pre_save en signals.py):
+- El HTML del editor (TipTap) se sanea con nh3 contra una lista blanca de
+  etiquetas y atributos y se guarda en contenido_html
+- Se guardan también el extracto en texto plano, el número de palabras y el
+  tiempo de lectura; las lecturas solo sirven columnas ya calculadas
+- version_render identifica la versión del pipeline: al cambiar las reglas se
+  incrementa VERSION_RENDER y renderizar_noticias reprocesa las filas antiguas
+
+Lista: devuelve el extracto en lugar del contenido (que solo se envía en el
+detalle) y pagina por cursor (NoticiasPagination).
+
+Búsqueda:
+- Al guardar una noticia se tokenizan título y contenido (sin etiquetas HTML,
+  en minúsculas y sin tildes) y se reemplazan sus filas en TerminoNoticia
+- buscar() resuelve cada término de la consulta con el índice de
+  (termino, noticia): todos los términos deben aparecer y el último se trata
+  como prefijo, para que funcione mientras el usuario escribe
+- Es portable (SQL Server, PostgreSQL, SQLite) sin catálogos de texto
+  completo que configurar fuera de las migraciones
+
+Caché del listado:
+- Las respuestas de la lista se guardan en la caché de Django bajo una
+  clave que incluye un número de versión y la query string
+- Cualquier escritura de noticias (API o admin de Django) incrementa la
+  versión, de modo que las entradas anteriores dejan de usarse y expiran solas
+- Con una caché local al proceso (LocMem, la de por defecto) los demás
+  procesos ven la nueva versión como máximo tras TTL_LISTADO segundos; con
+  una caché compartida (Redis, Memcached) la invalidación es inmediata
+"""
+
+import hashlib
+import html
+import math
+import re
+import unicodedata
+from collections import Counter
+
+import nh3
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Noticia, TerminoNoticia
+
+_CONFIG = getattr(settings, 'NOTICIAS', {})
+TTL_LISTADO = _CONFIG.get('TTL_LISTADO', 60)  # Segundos que vive una respuesta de la lista en caché
+LONGITUD_EXTRACTO = _CONFIG.get('LONGITUD_EXTRACTO', 280)  # Caracteres del resumen en la lista
+PALABRAS_POR_MINUTO = _CONFIG.get('PALABRAS_POR_MINUTO', 200)
+VERSION_RENDER = 1  # Incrementar al cambiar las reglas de saneado o los campos derivados
+LONGITUD_MINIMA = 2  # Términos más cortos no se indexan
+LONGITUD_MAXIMA = 64  # max_length de TerminoNoticia.termino
+MAX_TERMINOS_CONSULTA = 6
+
+_ETIQUETA = re.compile(r'<\s*/?\s*([a-zA-Z0-9]*)[^>]*(?:>|$)')  # También una etiqueta cortada al final
+_PALABRA = re.compile(r'\w+')
+
+# Lo que produce el editor de NewsForm (StarterKit de TipTap); el resto se descarta
+ETIQUETAS_PERMITIDAS = {
+    'p', 'br', 'hr', 'strong', 'b', 'em', 'i', 's', 'u', 'code', 'pre', 'blockquote',
+    'ul', 'ol', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'a',
+}
+ATRIBUTOS_PERMITIDOS = {'a': {'href', 'title'}, 'ol': {'start'}}
+ESQUEMAS_URL = {'http', 'https', 'mailto'}
+# Etiquetas que separan palabras al pasar a texto plano
+ETIQUETAS_BLOQUE = {
+    'p', 'br', 'hr', 'div', 'pre', 'blockquote', 'ul', 'ol', 'li',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr', 'td', 'th',
+}
+
+# Palabras demasiado frecuentes para discriminar entre noticias
+PALABRAS_VACIAS = frozenset("""
+    a al algo como con de del el ella en entre era es esa ese esta este esto fue ha han hay la las le les
+    lo los mas me mi muy no nos o para pero por que se si sin sobre son su sus tambien te un una unas unos y ya
+""".split())
+
+# ========================================
+# TOKENIZACIÓN
+# ========================================
+
+def normalizar(texto):
+    """Minúsculas y sin tildes ni diacríticos ('Sismo en Pérez' -> 'sismo en perez')"""
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def _separador(coincidencia):
+    return ' ' if coincidencia.group(1).lower() in ETIQUETAS_BLOQUE else ''
+
+
+def texto_plano(contenido):
+    """Texto sin etiquetas HTML ni entidades ('<b>Vol</b>cán' -> 'Volcán')"""
+    return html.unescape(_ETIQUETA.sub(_separador, contenido or ''))
+
+
+def extracto(plano, longitud=LONGITUD_EXTRACTO):
+    """Resumen de un texto plano cortado en un límite de palabra"""
+    plano = ' '.join(plano.split())
+    if len(plano) <= longitud:
+        return plano
+    return plano[:longitud].rsplit(' ', 1)[0].rstrip('.,;:') + '…'
+
+
+def terminos(texto):
+    """Lista de términos indexables de un texto plano"""
+    return [
+        palabra[:LONGITUD_MAXIMA] for palabra in _PALABRA.findall(normalizar(texto))
+        if len(palabra) >= LONGITUD_MINIMA and palabra not in PALABRAS_VACIAS
+    ]
+
+# ========================================
+# PRE-RENDERIZADO
+# ========================================
+
+def sanear(contenido):
+    """HTML del editor limitado a la lista blanca; enlaces con rel noopener/nofollow"""
+    return nh3.clean(
+        contenido or '',
+        tags=ETIQUETAS_PERMITIDAS,
+        attributes=ATRIBUTOS_PERMITIDOS,
+        url_schemes=ESQUEMAS_URL,
+        link_rel='noopener noreferrer nofollow',
+    )
+
+
+def renderizar(contenido):
+    """Campos pre-renderizados de un contenido (diccionario con los nombres del modelo)"""
+    contenido_html = sanear(contenido)
+    plano = texto_plano(contenido_html)
+    palabras = len(plano.split())
+    return {
+        'contenido_html': contenido_html,
+        'extracto': extracto(plano),
+        'palabras': palabras,
+        'minutos_lectura': max(1, math.ceil(palabras / PALABRAS_POR_MINUTO)) if palabras else 0,
+        'version_render': VERSION_RENDER,
+    }
+
+
+def prerenderizar(noticia):
+    """Asigna a la instancia los campos pre-renderizados (sin guardar)"""
+    for campo, valor in renderizar(noticia.contenido).items():
+        setattr(noticia, campo, valor)
+
+
+def renderizar_pendientes(tamano_lote=200, todas=False):
+    """
+    Reprocesa por lotes las noticias renderizadas con una versión anterior del
+    pipeline (o todas). Cada lote se lee y se escribe con una consulta. Retorna
+    el número de noticias actualizadas.
+    """
+    pendientes = Noticia.objects.all() if todas else Noticia.objects.filter(version_render__lt=VERSION_RENDER)
+    campos = list(renderizar('').keys())
+    total = 0
+    ultimo_pk = 0
+    while True:
+        lote = list(pendientes.filter(pk__gt=ultimo_pk).order_by('pk').only('pk', 'contenido')[:tamano_lote])
+        if not lote:
+            break
+        for noticia in lote:
+            prerenderizar(noticia)
+        with transaction.atomic():
+            Noticia.objects.bulk_update(lote, campos)
+        total += len(lote)
+        ultimo_pk = lote[-1].pk
+    if total:
+        invalidar_listado()
+    return total
+
+# ========================================
+# MANTENIMIENTO DEL ÍNDICE
+# ========================================
+
+def indexar(noticia):
+    """Reemplaza los términos indexados de una noticia (el título cuenta doble)"""
+    frecuencias = Counter(terminos(noticia.titulo or '') * 2)
+    # Solo el texto visible (el saneado descarta, p. ej., el contenido de <script>)
+    frecuencias.update(terminos(texto_plano(noticia.contenido_html or sanear(noticia.contenido))))
+    with transaction.atomic():
+        TerminoNoticia.objects.filter(noticia=noticia).delete()
+        TerminoNoticia.objects.bulk_create([
+            TerminoNoticia(termino=termino, noticia=noticia, frecuencia=frecuencia)
+            for termino, frecuencia in frecuencias.items()
+        ])
+    return len(frecuencias)
+
+
+def reindexar_todas(tamano_lote=200):
+    """Reconstruye el índice de todas las noticias (tras cambiar la tokenización)"""
+    total = 0
+    ultimo_pk = 0
+    while True:
+        lote = list(
+            Noticia.objects.filter(pk__gt=ultimo_pk).order_by('pk').only('pk', 'titulo', 'contenido', 'contenido_html')[:tamano_lote]
+        )
+        if not lote:
+            return total
+        for noticia in lote:
+            indexar(noticia)
+        total += len(lote)
+        ultimo_pk = lote[-1].pk
+
+# ========================================
+# BÚSQUEDA
+# ========================================
+
+def buscar(queryset, consulta):
+    """
+    Filtra el queryset a las noticias que contienen todos los términos de la
+    consulta (el último, como prefijo). Una consulta sin términos útiles no filtra.
+    """
+    palabras = terminos(consulta)[:MAX_TERMINOS_CONSULTA]
+    if not palabras:
+        return queryset
+    *completas, ultima = palabras
+    for palabra in completas:
+        queryset = queryset.filter(
+            pk__in=TerminoNoticia.objects.filter(termino=palabra).values('noticia_id')
+        )
+    return queryset.filter(
+        pk__in=TerminoNoticia.objects.filter(termino__startswith=ultima).values('noticia_id')
+    )
+
+# ========================================
+# CACHÉ DEL LISTADO
+# ========================================
+
+_CLAVE_VERSION = 'noticias:version'
+
+
+def version_listado():
+    version = cache.get(_CLAVE_VERSION)
+    if version is None:
+        version = 1
+        cache.add(_CLAVE_VERSION, version, None)
+    return version
+
+
+def invalidar_listado():
+    """Hace obsoletas todas las respuestas de la lista en caché"""
+    try:
+        cache.incr(_CLAVE_VERSION)
+    except ValueError:
+        # La clave no existía (caché vacía o reiniciada)
+        cache.set(_CLAVE_VERSION, 2, None)
+
+
+def clave_listado(query_string):
+    """Clave de caché de una página de la lista para la versión actual"""
+    resumen = hashlib.sha1(query_string.encode()).hexdigest()
+    return f'noticias:lista:{version_listado()}:{resumen}'
@@ -0,0 +1,143 @@
+# ========================================
+# PAGINACIÓN - SEISMIC TRACKER
+# PROPÓSITO: Paginación keyset (por cursor) para listados grandes
+# ========================================
+
+"""
+Paginación keyset con desempate por id.
+
+A diferencia de la paginación por página/offset, cada página se obtiene con
+un WHERE sobre (campo, id) del último elemento de la anterior, de modo que el
+coste no crece con la profundidad y no hace falta un COUNT(*). El cursor es
+opaco (base64 de JSON) y admite campos nulos (p. ej. last_login), que se
+ordenan siempre al final.
+
+Respuesta:
+    {"next": "<url o null>", "results": [...]}
+"""
+
+import base64
+import json
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# ========================================
+# CLASE: KeysetPagination
+# ========================================
+
+class KeysetPagination(BasePagination):
+    """
+    Uso en vistas:
+        pagination_class = KeysetPagination (o una subclase con otros campos)
+        GET ...?ordering=-last_login&page_size=100&cursor=<opaco>
+    """
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    campos_orden = ['date_joined', 'last_login']
+    orden_por_defecto = '-date_joined'
+    campos_fecha = {'date_joined', 'last_login'}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.obtener_orden(request)
+        campo = self.ordering.lstrip('-')
+        descendente = self.ordering.startswith('-')
+        tamano = self.obtener_tamano(request)
+
+        # NULLS LAST solo en columnas anulables: en las demás el modificador impide
+        # que PostgreSQL y SQL Server lean el orden directamente del índice
+        nulos_al_final = queryset.model._meta.get_field(campo).null or None
+        expresion = F(campo).desc(nulls_last=nulos_al_final) if descendente else F(campo).asc(nulls_last=nulos_al_final)
+        orden_pk = '-pk' if descendente else 'pk'
+        queryset = queryset.order_by(expresion, orden_pk)
+
+        cursor = self.decodificar_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.condicion_siguiente(campo, descendente, *cursor))
+
+        # Se pide un elemento extra para saber si existe una página siguiente
+        elementos = list(queryset[:tamano + 1])
+        self.hay_siguiente = len(elementos) > tamano
+        elementos = elementos[:tamano]
+        self.ultimo = elementos[-1] if elementos else None
+        return elementos
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.hay_siguiente or self.ultimo is None:
+            return None
+        valor = getattr(self.ultimo, self.ordering.lstrip('-'))
+        if hasattr(valor, 'isoformat'):
+            valor = valor.isoformat()
+        cursor = base64.urlsafe_b64encode(json.dumps([valor, self.ultimo.pk]).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    # ----------------------------------------
+    # Utilidades
+    # ----------------------------------------
+
+    def obtener_orden(self, request):
+        orden = request.query_params.get(self.ordering_query_param, self.orden_por_defecto)
+        return orden if orden.lstrip('-') in self.campos_orden else self.orden_por_defecto
+
+    def obtener_tamano(self, request):
+        try:
+            tamano = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(tamano, self.max_page_size))
+
+    def decodificar_cursor(self, request):
+        crudo = request.query_params.get(self.cursor_query_param)
+        if not crudo:
+            return None
+        try:
+            valor, pk = json.loads(base64.urlsafe_b64decode(crudo.encode()).decode())
+            if valor is not None and self.ordering.lstrip('-') in self.campos_fecha:
+                valor = parse_datetime(valor)
+                if valor is None:
+                    raise ValueError
+            return valor, int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound("Cursor inválido.")
+
+    def condicion_siguiente(self, campo, descendente, valor, pk):
+        """Filas posteriores a (valor, pk) en el orden (campo NULLS LAST, pk)"""
+        mayor = 'lt' if descendente else 'gt'
+        if valor is None:
+            # Ya estamos en el tramo de nulos: solo queda avanzar por pk
+            return Q(**{f'{campo}__isnull': True, f'pk__{mayor}': pk})
+        return (
+            Q(**{f'{campo}__{mayor}': valor})
+            | Q(**{campo: valor, f'pk__{mayor}': pk})
+            | Q(**{f'{campo}__isnull': True})
+        )
+
+
+class NoticiasPagination(KeysetPagination):
+    """Feed de noticias: más recientes primero (índice noticia_fecha_idx)"""
+    page_size = 20
+    max_page_size = 100
+    campos_orden = ['fecha_publicacion']
+    orden_por_defecto = '-fecha_publicacion'
+    campos_fecha = {'fecha_publicacion'}
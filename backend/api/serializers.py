@@ -23,7 +23,9 @@ from django.contrib.auth.signals import user_logged_in  # Señales de Django
 # IMPORTACIONES LOCALES
 # ========================================
 
-from .models import Noticia, EventoSismico
+from .models import Noticia, EventoSismico, RevisionEvento, SuscripcionAlerta
+from .alertas import MAX_POR_USUARIO as MAX_SUSCRIPCIONES
+from .fotos import TAMANOS, url_foto, validar_subida
 
 # Obtener el modelo de usuario personalizado
 Usuario = get_user_model()
@@ -108,6 +110,8 @@ class RegistroUsuarioSerializer(serializers.ModelSerializer):
             'last_name': {'required': True},
             'email': {'required': True},
             'fecha_nacimiento': {'required': False},
+            # La subida sin procesar conserva EXIF/GPS: nunca se devuelve su URL
+            'ruta_fotografia': {'write_only': True},
         }
 
     def validate_username(self, value):
@@ -153,6 +157,37 @@ class RegistroUsuarioSerializer(serializers.ModelSerializer):
 
         return super().create(validated_data)
 
+# ========================================
+# SERIALIZER: Importación Masiva de Usuarios
+# ========================================
+
+class ImportacionUsuarioSerializer(serializers.Serializer):
+    """
+    Validación de una fila del comando import_users.
+
+    Aplica las mismas reglas de formato que RegistroUsuarioSerializer pero sin
+    consultas a la BD: la unicidad de email y username se comprueba contra
+    conjuntos precargados (ver api/importacion.py). La contraseña es opcional;
+    si falta, la cuenta se crea con contraseña inutilizable y el usuario debe
+    usar el restablecimiento de contraseña.
+    """
+    email = serializers.EmailField()
+    username = serializers.RegexField(
+        r'^[\w.@+-]+\Z', max_length=150,
+        error_messages={'invalid': "El nombre de usuario solo admite letras, números y @/./+/-/_."}
+    )
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    password = serializers.CharField(required=False, allow_blank=True, write_only=True)
+    telefono = serializers.CharField(
+        validators=[RegistroUsuarioSerializer.telefono_validator],
+        required=False, allow_blank=True, max_length=20
+    )
+    fecha_nacimiento = serializers.DateField(required=False, allow_null=True)
+
+    def validate_email(self, value):
+        return value.lower()  # Igual que en el registro: emails en minúsculas
+
 # ========================================
 # SERIALIZER: Token JWT Personalizado
 # ========================================
@@ -203,10 +238,8 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         # ========================================
         
         # Asegurar que se pase la URL (string) y no el objeto archivo
-        if user.ruta_fotografia:
-            token['ruta_fotografia'] = user.ruta_fotografia.url  # ¡Crucial usar .url!
-        else:
-            token['ruta_fotografia'] = None
+        # Se usa la variante de avatar (WebP 256 px) en lugar de la original
+        token['ruta_fotografia'] = url_foto(user)
 
         return token
 
@@ -249,42 +282,70 @@ class PerfilUsuarioSerializer(serializers.ModelSerializer):
     - first_name: Nombre (editable)
     - last_name: Apellidos (editable)
     - telefono: Número de teléfono (editable)
-    - ruta_fotografia: Archivo de imagen (editable)
-    - ruta_fotografia_url: URL absoluta de la imagen (calculado)
+    - ruta_fotografia: Archivo de imagen (solo escritura)
+    - ruta_fotografia_url: URL absoluta de la imagen en el tamaño pedido (calculado, None hasta procesarla)
+    - fotografia_urls: URLs absolutas de todos los tamaños disponibles (calculado)
     
     Características especiales:
     - URLs absolutas para acceso desde frontend
+    - Tamaño de la foto elegible con ?tamano=sm|md|lg|original (por defecto md)
+    - Validación de tamaño y formato de la imagen subida
     - Manejo opcional de campos de imagen
     - Protección de campos críticos (email, username)
     """
     
     ruta_fotografia_url = serializers.SerializerMethodField()
+    fotografia_urls = serializers.SerializerMethodField()
 
     class Meta:
         model = Usuario
         fields = (
             'id', 'email', 'username', 'first_name', 'last_name', 
-            'telefono', 'ruta_fotografia', 'ruta_fotografia_url'
+            'telefono', 'ruta_fotografia', 'ruta_fotografia_url', 'fotografia_urls'
         )
         read_only_fields = ('id', 'email', 'username')
         extra_kwargs = {
-            'ruta_fotografia': {'required': False, 'allow_null': True}
+            # Solo escritura: la subida sin procesar conserva EXIF/GPS; las URLs
+            # publicadas son ruta_fotografia_url y fotografia_urls
+            'ruta_fotografia': {'required': False, 'allow_null': True, 'write_only': True}
         }
 
+    def _absoluta(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request and url else url
+
     def get_ruta_fotografia_url(self, obj):
         """
         Método para generar URL absoluta de la foto de perfil
         Incluye el dominio completo para acceso desde frontend
         """
         request = self.context.get('request')
-        
-        if obj.ruta_fotografia and hasattr(obj.ruta_fotografia, 'url'):
-            if request:
-                return request.build_absolute_uri(obj.ruta_fotografia.url)
-            else:
-                return obj.ruta_fotografia.url
-        
-        return None
+        tamano = request.query_params.get('tamano', 'md') if request else 'md'
+        return self._absoluta(url_foto(obj, tamano))
+
+    def get_fotografia_urls(self, obj):
+        """URLs de la versión maestra y de cada variante (None hasta que la foto está procesada)"""
+        if not obj.fotografia_variantes:
+            return None
+        urls = {'original': self._absoluta(url_foto(obj, 'original'))}
+        for tamano in TAMANOS:
+            if tamano in obj.fotografia_variantes:
+                urls[tamano] = self._absoluta(url_foto(obj, tamano))
+        return urls
+
+    def validate_ruta_fotografia(self, value):
+        """Límite de tamaño y formatos permitidos (el procesamiento se hace en segundo plano)"""
+        if value:
+            error = validar_subida(value)
+            if error:
+                raise serializers.ValidationError(error)
+        return value
+
+    def update(self, instance, validated_data):
+        # Una foto nueva (o su eliminación) invalida las variantes de la anterior
+        if 'ruta_fotografia' in validated_data:
+            instance.fotografia_variantes = {}
+        return super().update(instance, validated_data)
 
 # ========================================
 # SERIALIZER: Noticias
@@ -304,19 +365,38 @@ class NoticiaSerializer(serializers.ModelSerializer):
     Campos incluidos:
     - id: Identificador único
     - titulo: Título de la noticia
-    - contenido: Contenido completo
+    - contenido: HTML del editor (solo escritura)
+    - contenido_html: HTML saneado al guardar, listo para mostrar (solo lectura)
+    - extracto, palabras, minutos_lectura: Calculados al guardar (solo lectura)
     - fecha_publicacion: Fecha automática (solo lectura)
     
     Características:
     - Fecha de publicación se establece automáticamente
     - Validación automática de campos requeridos
     - Soporte para contenido de texto enriquecido
+    - El HTML crudo nunca se devuelve: se sanea una vez al escribir (api/noticias.py)
     """
     
     class Meta:
         model = Noticia
-        fields = ['id', 'titulo', 'contenido', 'fecha_publicacion']
-        read_only_fields = ['fecha_publicacion']  # Fecha automática
+        fields = [
+            'id', 'titulo', 'contenido', 'contenido_html', 'extracto',
+            'palabras', 'minutos_lectura', 'fecha_publicacion',
+        ]
+        read_only_fields = ['contenido_html', 'extracto', 'palabras', 'minutos_lectura', 'fecha_publicacion']
+        extra_kwargs = {'contenido': {'write_only': True}}
+
+
+class NoticiaResumenSerializer(serializers.ModelSerializer):
+    """
+    Representación de la lista de noticias: extracto en texto plano en lugar
+    del contenido completo, que se obtiene en GET /api/noticias/{id}/.
+    Todos los campos se calcularon al guardar la noticia.
+    """
+
+    class Meta:
+        model = Noticia
+        fields = ['id', 'titulo', 'extracto', 'minutos_lectura', 'fecha_publicacion']
 
 # ========================================
 # SERIALIZER: Eventos Sísmicos
@@ -350,6 +430,17 @@ class EventoSismicoSerializer(serializers.ModelSerializer):
         model = EventoSismico
         fields = '__all__'  # Incluir todos los campos del modelo
 
+
+class RevisionEventoSerializer(serializers.ModelSerializer):
+    """
+    Una revisión de USGS sobre un evento: fecha y campos que cambiaron
+    ({campo: [anterior, nuevo]}).
+    """
+
+    class Meta:
+        model = RevisionEvento
+        fields = ['fecha', 'cambios']
+
 # ========================================
 # SERIALIZER: Gestión de Usuarios (Admin)
 # ========================================
@@ -372,6 +463,7 @@ class UserManagementSerializer(serializers.ModelSerializer):
     - last_name: Apellidos
     - date_joined: Fecha de registro
     - last_login: Último acceso
+    - is_active: Estado activo/inactivo
     
     Características:
     - Solo campos no sensibles
@@ -381,7 +473,20 @@ class UserManagementSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Usuario
-        fields = ['id', 'email', 'first_name', 'last_name', 'date_joined', 'last_login']
+        fields = ['id', 'email', 'first_name', 'last_name', 'date_joined', 'last_login', 'is_active']
+
+
+class AccionMasivaUsuariosSerializer(serializers.Serializer):
+    """
+    Cuerpo de las acciones masivas del panel de administración
+    (POST /api/admin/users/bulk-deactivate/ y /bulk-delete/).
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100000,
+        help_text="IDs de los usuarios visitantes afectados"
+    )
 
 # ========================================
 # SERIALIZER: Cambio de Contraseña
@@ -457,4 +562,27 @@ class PasswordChangeSerializer(serializers.Serializer):
         # Aquí se pueden añadir validaciones adicionales de fortaleza
         # como longitud mínima, complejidad, etc.
         
-        return data
\ No newline at end of file
+        return data
+# ========================================
+# SERIALIZER: Suscripciones a Alertas
+# ========================================
+
+class SuscripcionAlertaSerializer(serializers.ModelSerializer):
+    """
+    Lugar guardado del usuario autenticado para recibir alertas por correo.
+    Los rangos de coordenadas, radio y magnitud los validan los validadores del modelo.
+    """
+
+    class Meta:
+        model = SuscripcionAlerta
+        fields = ['id', 'nombre', 'latitud', 'longitud', 'radio_km', 'magnitud_minima', 'activa', 'fecha_creacion']
+        read_only_fields = ['fecha_creacion']
+
+    def validate(self, attrs):
+        if self.instance is None:
+            usuario = self.context['request'].user
+            if SuscripcionAlerta.objects.filter(usuario=usuario).count() >= MAX_SUSCRIPCIONES:
+                raise serializers.ValidationError(
+                    f"No puedes tener más de {MAX_SUSCRIPCIONES} lugares con alertas."
+                )
+        return attrs
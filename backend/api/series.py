@@ -0,0 +1,159 @@
+# ========================================
+# SERIE DE MAGNITUDES - SEISMIC TRACKER
+# PROPÓSITO: Magnitud frente al tiempo reducida a los puntos que un gráfico puede dibujar
+# ========================================
+
+"""
+Serie magnitud/tiempo para gráficos (GET /api/sismos/series/?points=N).
+
+Reducción (reducir_min_max):
+- El intervalo de tiempo se divide en N/2 cubetas de igual duración y de
+  cada cubeta se conservan el evento de menor y el de mayor magnitud
+- El máximo de cada cubeta siempre sobrevive: los sismos grandes no
+  desaparecen del gráfico, y el contorno de la nube de puntos se mantiene
+- Todo con numpy sobre dos arreglos (sin bucles de Python por evento); los
+  datos salen de una sola consulta values_list de fecha y magnitud, más el
+  archivo frío si lo hay
+
+Caché:
+- La respuesta se guarda bajo una clave con los filtros normalizados y la
+  versión de los datos; cada ingesta con cambios reales incrementa la
+  versión (receptor de sismos_ingestados en signals.py)
+- Como en las noticias, con una caché local al proceso los demás procesos
+  ven la nueva versión como máximo tras TTL segundos
+"""
+
+import hashlib
+from urllib.parse import urlencode
+
+import numpy as np
+import pyarrow as pa
+from django.conf import settings
+from django.core.cache import cache
+
+from .filters import EventoSismicoFilter
+from .models import EventoSismico
+from .tiering import consultar_archivo, hay_archivo
+
+_CONFIG = getattr(settings, 'SERIES', {})
+TTL = _CONFIG.get('TTL', 300)  # Segundos que vive una serie en caché
+PUNTOS_POR_DEFECTO = _CONFIG.get('PUNTOS_POR_DEFECTO', 1000)
+PUNTOS_MAXIMOS = _CONFIG.get('PUNTOS_MAXIMOS', 5000)
+PUNTOS_MINIMOS = 10
+
+# ========================================
+# REDUCCIÓN
+# ========================================
+
+def leer_puntos(valor):
+    """Valida el parámetro 'points'. Lanza ValueError con el mensaje para el cliente."""
+    if valor in (None, ''):
+        return PUNTOS_POR_DEFECTO
+    try:
+        puntos = int(valor)
+    except ValueError:
+        raise ValueError("'points' debe ser un entero.")
+    if not PUNTOS_MINIMOS <= puntos <= PUNTOS_MAXIMOS:
+        raise ValueError(f"'points' debe estar entre {PUNTOS_MINIMOS} y {PUNTOS_MAXIMOS}.")
+    return puntos
+
+
+def reducir_min_max(tiempos, magnitudes, puntos):
+    """
+    Reduce la serie a como mucho 'puntos' eventos (mínimo y máximo de
+    magnitud por cubeta de tiempo). Retorna (tiempos, magnitudes) en orden
+    cronológico.
+    """
+    orden = np.argsort(tiempos, kind='stable')
+    tiempos, magnitudes = tiempos[orden], magnitudes[orden]
+    if len(tiempos) <= puntos:
+        return tiempos, magnitudes
+
+    cubetas = max(1, puntos // 2)
+    relativos = tiempos - tiempos[0]
+    duracion = max(int(relativos[-1]), 1)
+    cubeta = np.minimum(relativos * cubetas // duracion, cubetas - 1)
+
+    # Orden por (cubeta, magnitud): el primero de cada cubeta es su mínimo y el último su máximo
+    por_cubeta = np.lexsort((magnitudes, cubeta))
+    cubeta_ordenada = cubeta[por_cubeta]
+    inicios = np.flatnonzero(np.r_[True, cubeta_ordenada[1:] != cubeta_ordenada[:-1]])
+    finales = np.r_[inicios[1:] - 1, len(cubeta_ordenada) - 1]
+    # Los índices ya están en orden cronológico: unique los ordena y quita los repetidos
+    seleccion = np.unique(np.concatenate([por_cubeta[inicios], por_cubeta[finales]]))
+    return tiempos[seleccion], magnitudes[seleccion]
+
+# ========================================
+# DATOS
+# ========================================
+
+def _columnas_bd(queryset):
+    """Milisegundos Unix y magnitudes de los eventos filtrados (una consulta, sin ORDER BY)"""
+    filas = list(queryset.order_by().values_list('fecha_hora_evento', 'magnitud'))
+    tiempos = np.fromiter((round(fecha.timestamp() * 1000) for fecha, _ in filas), dtype=np.int64, count=len(filas))
+    magnitudes = np.fromiter((magnitud for _, magnitud in filas), dtype=np.float64, count=len(filas))
+    return tiempos, magnitudes
+
+
+def _columnas_archivo(parametros):
+    """Las mismas columnas desde el archivo frío, ya como arreglos de numpy"""
+    filtro = EventoSismicoFilter(parametros, queryset=EventoSismico.objects.none())
+    filtro.is_valid()
+    tabla = consultar_archivo(
+        filtro.form.cleaned_data, busqueda=parametros.get('search'), columnas=['fecha_hora_evento', 'magnitud']
+    )
+    tiempos = tabla['fecha_hora_evento'].cast(pa.timestamp('ms', tz='UTC')).cast(pa.int64())
+    return tiempos.to_numpy(), tabla['magnitud'].to_numpy()
+
+
+def serie_magnitudes(queryset, parametros, puntos):
+    """
+    Serie reducida de los eventos del queryset (ya filtrado) y, si existe, del
+    archivo frío con los mismos filtros.
+
+    Retorna {'total', 'puntos', 'tiempos' (ms Unix), 'magnitudes'} en columnas.
+    """
+    tiempos, magnitudes = _columnas_bd(queryset)
+    if hay_archivo():
+        tiempos_archivo, magnitudes_archivo = _columnas_archivo(parametros)
+        tiempos = np.concatenate([tiempos, tiempos_archivo])
+        magnitudes = np.concatenate([magnitudes, magnitudes_archivo])
+
+    total = len(tiempos)
+    tiempos, magnitudes = reducir_min_max(tiempos, magnitudes, puntos)
+    return {
+        'total': total,
+        'puntos': len(tiempos),
+        'tiempos': tiempos.tolist(),
+        'magnitudes': magnitudes.tolist(),
+    }
+
+# ========================================
+# CACHÉ POR FILTROS Y VERSIÓN DE LOS DATOS
+# ========================================
+
+_CLAVE_VERSION = 'sismos:series:version'
+
+
+def version_datos():
+    version = cache.get(_CLAVE_VERSION)
+    if version is None:
+        version = 1
+        cache.add(_CLAVE_VERSION, version, None)
+    return version
+
+
+def invalidar_series():
+    """Hace obsoletas todas las series en caché (los eventos cambiaron)"""
+    try:
+        cache.incr(_CLAVE_VERSION)
+    except ValueError:
+        # La clave no existía (caché vacía o reiniciada)
+        cache.set(_CLAVE_VERSION, 2, None)
+
+
+def clave_serie(parametros):
+    """Clave de caché para los parámetros de la petición (en cualquier orden) y la versión actual"""
+    normalizados = urlencode(sorted((k, v) for k in parametros for v in parametros.getlist(k)))
+    resumen = hashlib.sha1(normalizados.encode()).hexdigest()
+    return f'sismos:series:{version_datos()}:{resumen}'
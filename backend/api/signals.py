@@ -1,30 +1,91 @@
 
 from django.contrib.auth.signals import user_logged_in
-from django.dispatch import receiver
+from django.dispatch import receiver, Signal
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.db import transaction
 from django.utils import timezone
-from .models import Usuario # Importa tu modelo de usuario personalizado
+from .models import Usuario, Noticia, SuscripcionAlerta # Importa tu modelo de usuario personalizado
 from django.urls import reverse
 from django_rest_passwordreset.signals import reset_password_token_created
 from django.core.mail import send_mail
+from .declustering import actualizar_secuencias_incremental
+from .spatial import indice_cercania
+from .snapshot import escribir_snapshot
+from .ultimo_acceso import registro_ultimo_acceso
+from .authentication import cache_usuarios
+from .tareas import tarea
+from .noticias import indexar, invalidar_listado, prerenderizar
+from .alertas import emparejar_eventos, indexar_suscripcion
+from .series import invalidar_series
+import logging
 
+logger = logging.getLogger(__name__)
+
+# Señal emitida por fetch_sismos al terminar una ingesta.
+# Argumentos: nuevos (lista de pks insertados), actualizados (pks con algún campo modificado)
+sismos_ingestados = Signal()
 
 
 @receiver(user_logged_in)
 def update_last_login(sender, request, user, **kwargs):
-    print(f"🔍 Tipo de user recibido en señal: {type(user)}")
-    # El modelo AbstractUser ya tiene un campo 'last_login' que Django
-    # actualiza automáticamente al usar las vistas de autenticación de Django.
-    # El TokenObtainPairView de SimpleJWT también dispara esta señal, por lo que
-    # Django debería manejar la actualización de 'last_login' por defecto.
+    """
+    Registra el acceso en el búfer write-behind en lugar de escribir en la BD.
+    El valor se actualiza en memoria para quien use esta misma instancia y se
+    vuelca en bloque por RegistroUltimoAcceso. El receptor equivalente de
+    django.contrib.auth se desconecta en ApiConfig.ready().
+    """
     user.last_login = timezone.now()
-    user.save(update_fields=['last_login'])
-    print(f"Señal de login recibida: Se actualizó last_login para el usuario {user.email}")
-    
+    registro_ultimo_acceso.registrar(user.pk, user.last_login)
+
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_usuario_cacheado(sender, instance, **kwargs):
+    """
+    Invalida la entrada del usuario en la caché de autenticación tras cambios
+    de perfil, contraseña o is_active (o su eliminación).
+    """
+    cache_usuarios.invalidar(instance.pk)
+
+
+@receiver(pre_save, sender=Noticia)
+def prerenderizar_noticia(sender, instance, update_fields=None, **kwargs):
+    """
+    Sanea el HTML y calcula extracto y metadatos de lectura al escribir, para
+    que las lecturas no procesen nada. También con loaddata (raw).
+    """
+    if update_fields is not None and 'contenido' not in update_fields:
+        return
+    prerenderizar(instance)
+
+
+@receiver(post_save, sender=Noticia)
+def indexar_noticia(sender, instance, raw=False, **kwargs):
+    """
+    Actualiza el índice de búsqueda de la noticia y hace obsoleta la caché
+    del listado (también para escrituras desde el admin de Django).
+    """
+    if raw:
+        return  # loaddata: el índice se reconstruye con reindex_noticias
+    indexar(instance)
+    transaction.on_commit(invalidar_listado)
+
+
+@receiver(post_delete, sender=Noticia)
+def invalidar_listado_noticias(sender, instance, **kwargs):
+    """Los términos se borran en cascada; solo queda invalidar la caché del listado"""
+    transaction.on_commit(invalidar_listado)
+
+
+@tarea(cola='correo', max_intentos=8)
+def enviar_correo(asunto, mensaje, remitente, destinatarios):
+    """Envía un correo fuera de la petición (un SMTP lento no bloquea al worker)"""
+    send_mail(asunto, mensaje, remitente, destinatarios)
+
+
 @receiver(reset_password_token_created)
 def password_reset_token_created(sender, instance, reset_password_token, *args, **kwargs):
     """
     Manejador para la señal que se dispara cuando se crea un token de reseteo.
-    Se encarga de enviar el correo electrónico al usuario.
+    Encola el envío del correo electrónico al usuario (api/tareas.py).
     """
     # Construimos el enlace que el usuario usará en el frontend
     # ¡IMPORTANTE! Asegúrate de que la URL del frontend sea la correcta.
@@ -39,16 +100,73 @@ def password_reset_token_created(sender, instance, reset_password_token, *args,
         f"Este token es válido por unas horas. Si no solicitaste esto, ignora este correo."
     )
 
-    send_mail(
+    enviar_correo.encolar(
         # Título del correo
-        "Restablecimiento de Contraseña para Proyecto Sismológico",
+        asunto="Restablecimiento de Contraseña para Proyecto Sismológico",
         # Mensaje
-        email_plaintext_message,
+        mensaje=email_plaintext_message,
         # From
-        "noreply@proyectosismologico.com",
+        remitente="noreply@proyectosismologico.com",
         # To
-        [reset_password_token.user.email]
+        destinatarios=[reset_password_token.user.email],
+        # Un mismo token nunca genera dos correos
+        clave_idempotencia=f'reset-password:{reset_password_token.pk}',
     )
-    print(f"\n--- CORREO DE RESETEO ENVIADO A {reset_password_token.user.email} ---")
-    print(f"--- TOKEN: {reset_password_token.key} ---")
-    print(f"--- Enlace: {reset_url} ---\n")
\ No newline at end of file
+    logger.info("[RESET] Correo de restablecimiento encolado para el usuario %s", reset_password_token.user.pk)
+
+
+@tarea(cola='ingesta', max_intentos=3)
+def postprocesar_ingesta(nuevos, actualizados=()):
+    """
+    Reclasifica de forma incremental las secuencias sísmicas afectadas por los
+    eventos recién insertados o revisados (una revisión puede cambiar fecha,
+    posición o magnitud) y después reescribe el snapshot columnar compartido
+    por los workers (ya con la clasificación actualizada).
+    """
+    cambios = actualizar_secuencias_incremental([*nuevos, *actualizados])
+    logger.info("[SECUENCIAS] %s eventos reclasificados tras la ingesta", cambios)
+    escribir_snapshot()
+
+
+@receiver(sismos_ingestados)
+def encolar_postproceso_ingesta(sender, nuevos, actualizados, **kwargs):
+    """Encola secuencias + snapshot en la cola 'ingesta' (un solo hilo: se aplican en orden)"""
+    # Una ingesta sin cambios reales no reescribe el snapshot
+    if nuevos or actualizados:
+        postprocesar_ingesta.encolar(nuevos=nuevos, actualizados=actualizados)
+
+
+@receiver(sismos_ingestados)
+def invalidar_series_ingesta(sender, nuevos, actualizados, **kwargs):
+    """Las series de magnitudes en caché dejan de usarse si la ingesta cambió algún evento"""
+    if nuevos or actualizados:
+        invalidar_series()
+
+
+@receiver(sismos_ingestados)
+def encolar_emparejamiento_alertas(sender, nuevos, actualizados, **kwargs):
+    """
+    Encola el emparejamiento del lote con las suscripciones a alertas. Los
+    eventos revisados también se emparejan (p. ej. si su magnitud subió);
+    los ya alertados no se repiten.
+    """
+    eventos = list(nuevos) + list(actualizados)
+    if eventos:
+        emparejar_eventos.encolar(eventos=eventos)
+
+
+@receiver(post_save, sender=SuscripcionAlerta)
+def indexar_suscripcion_alerta(sender, instance, **kwargs):
+    """Recalcula las celdas de la suscripción (las borradas se eliminan en cascada)"""
+    indexar_suscripcion(instance)
+
+
+@receiver(sismos_ingestados)
+def refrescar_indice_cercania(sender, nuevos, actualizados, **kwargs):
+    """
+    Adelanta el refresco del índice de cercanía de este proceso: los eventos
+    nuevos y la posición revisada de los actualizados entran por el búfer
+    delta (los demás procesos los recogen en su siguiente refresco).
+    """
+    if nuevos or actualizados:
+        indice_cercania.marcar_pendiente()
@@ -0,0 +1,352 @@
+# ========================================
+# CATÁLOGOS SINTÉTICOS - SEISMIC TRACKER
+# PROPÓSITO: Generar eventos sísmicos de prueba en volumen, de forma vectorizada y reproducible
+# ========================================
+
+"""
+Generación de catálogos sintéticos de EventoSismico.
+
+- generar_catalogo(): columnas NumPy para n eventos, deterministas por semilla.
+  Los eventos independientes se concentran en los límites de placa (tramos
+  de LIMITES_PLACA, con profundidades según el tipo de límite) y una fracción
+  pequeña es sismicidad de fondo repartida por la esfera. Cada evento puede
+  disparar réplicas: cantidad según su magnitud, tiempos según la ley de
+  Omori-Utsu y magnitudes de Gutenberg–Richter por debajo de la del principal
+- insertar_catalogo(): inserta las columnas con bulk_create por lotes, cada
+  lote en su propia transacción
+- borrar_sinteticos(): borra los eventos sintéticos (y sus revisiones y
+  entregas) por tramos de pk, sin cargar el catálogo en memoria
+
+Los id_evento_usgs llevan un prefijo ('sint' por defecto) para poder borrar
+o contar los eventos sintéticos sin tocar los reales.
+"""
+
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EntregaAlerta, EventoSismico, RevisionEvento
+from .spatial import RADIO_TIERRA_KM
+
+PREFIJO = 'sint'
+MAGNITUD_MINIMA = 2.5
+VALOR_B = 1.0  # Pendiente de Gutenberg–Richter (log10 N = a - b·M)
+MAGNITUD_MAXIMA = 9.5
+TAMANO_LOTE = 5000
+
+FRACCION_FONDO = 0.05  # Eventos independientes lejos de los límites de placa
+
+# Productividad de réplicas: k · 10^(alfa·(M - MAGNITUD_MINIMA)) réplicas esperadas por evento
+PRODUCTIVIDAD = 0.1
+ALFA_REPLICAS = 0.8
+# Ley de Omori-Utsu: tasa ∝ (c + t)^-p, con t en días
+OMORI_C = 0.05
+OMORI_P = 1.1
+DIAS_REPLICAS = 60
+
+KM_POR_GRADO = math.pi * RADIO_TIERRA_KM / 180
+
+# Límites de placa simplificados: (región, tipo, vértices (lat, lng)).
+# Las longitudes son continuas a lo largo del tramo (pueden salir de ±180).
+LIMITES_PLACA = (
+    ('México', 'subduccion', ((19.0, -105.0), (16.0, -98.0), (14.5, -93.0))),
+    ('Guatemala', 'subduccion', ((14.5, -93.0), (13.0, -90.0))),
+    ('El Salvador', 'subduccion', ((13.0, -90.0), (12.2, -87.8))),
+    ('Nicaragua', 'subduccion', ((12.2, -87.8), (10.8, -86.2))),
+    ('Costa Rica', 'subduccion', ((10.8, -86.2), (9.5, -85.0), (8.3, -83.0))),
+    ('Panamá', 'subduccion', ((8.3, -83.0), (7.3, -80.5))),
+    ('Colombia', 'subduccion', ((7.0, -78.0), (2.5, -79.2))),
+    ('Ecuador', 'subduccion', ((2.5, -79.2), (-3.0, -81.0))),
+    ('Perú', 'subduccion', ((-3.0, -81.0), (-10.0, -79.0), (-16.0, -75.0), (-18.0, -71.0))),
+    ('Chile', 'subduccion', ((-18.0, -71.0), (-25.0, -71.0), (-33.0, -72.0), (-40.0, -74.0), (-46.0, -76.0))),
+    ('Alaska', 'subduccion', ((60.0, -147.0), (57.0, -155.0), (54.0, -162.0), (51.5, -175.0), (51.0, -185.0))),
+    ('Kamchatka', 'subduccion', ((56.0, 163.0), (52.0, 160.0), (47.0, 153.0), (43.0, 147.0))),
+    ('Japón', 'subduccion', ((43.0, 147.0), (38.0, 143.0), (35.0, 141.0), (33.0, 137.0), (31.0, 132.0))),
+    ('Islas Marianas', 'subduccion', ((35.0, 141.0), (27.0, 143.0), (18.0, 147.0), (12.0, 144.0))),
+    ('Filipinas', 'subduccion', ((18.0, 122.0), (12.0, 126.0), (6.0, 127.0))),
+    ('Indonesia', 'subduccion', ((5.0, 94.0), (-2.0, 99.0), (-7.0, 106.0), (-9.0, 115.0), (-10.0, 122.0), (-8.0, 130.0))),
+    ('Vanuatu', 'subduccion', ((-6.0, 155.0), (-10.0, 162.0), (-15.0, 167.0), (-21.0, 170.0))),
+    ('Tonga', 'subduccion', ((-15.0, -173.0), (-22.0, -175.0), (-30.0, -177.0), (-37.0, -178.0))),
+    ('Nueva Zelanda', 'subduccion', ((-37.0, -178.0), (-42.0, -186.0), (-46.0, -194.0))),
+    ('Antillas Menores', 'subduccion', ((18.0, -64.0), (14.0, -60.0), (11.0, -61.0))),
+    ('California', 'transformante', ((40.5, -124.5), (37.0, -122.0), (34.0, -118.0), (32.0, -115.5))),
+    ('Caribe', 'transformante', ((15.5, -89.0), (19.0, -80.0), (19.5, -73.0))),
+    ('Turquía', 'transformante', ((40.7, 27.0), (40.8, 31.0), (40.0, 38.0), (39.0, 41.0))),
+    ('Irán', 'colision', ((37.0, 45.0), (33.0, 48.0), (28.0, 54.0), (26.0, 58.0))),
+    ('Himalaya', 'colision', ((34.0, 73.0), (30.0, 80.0), (27.0, 88.0), (28.0, 95.0))),
+    ('Dorsal Mesoatlántica', 'dorsal', (
+        (65.0, -18.0), (50.0, -29.0), (35.0, -35.0), (15.0, -46.0), (0.0, -20.0), (-20.0, -13.0), (-40.0, -16.0),
+        (-55.0, -3.0),
+    )),
+    ('Dorsal del Pacífico Oriental', 'dorsal', (
+        (20.0, -108.0), (10.0, -104.0), (0.0, -102.0), (-20.0, -113.0), (-35.0, -110.0), (-55.0, -120.0),
+    )),
+)
+
+# Por tipo de límite: actividad relativa por km y dispersión perpendicular (km)
+TIPOS_LIMITE = {
+    'subduccion': {'actividad': 1.0, 'dispersion_km': 60.0},
+    'transformante': {'actividad': 0.5, 'dispersion_km': 15.0},
+    'colision': {'actividad': 0.6, 'dispersion_km': 80.0},
+    'dorsal': {'actividad': 0.25, 'dispersion_km': 10.0},
+}
+
+LUGARES = tuple(region for region, _, _ in LIMITES_PLACA)
+RUMBOS = ('N', 'NE', 'E', 'SE', 'S', 'SO', 'O', 'NO')
+
+
+def _tramos():
+    """Tramos rectos de todos los límites: extremos, región, tipo y peso (actividad x longitud)"""
+    inicios, fines, regiones, tipos, pesos = [], [], [], [], []
+    nombres_tipo = list(TIPOS_LIMITE)
+    for region, (nombre_region, tipo, vertices) in enumerate(LIMITES_PLACA):
+        for (lat1, lng1), (lat2, lng2) in zip(vertices, vertices[1:]):
+            latitud_media = math.radians((lat1 + lat2) / 2)
+            longitud_km = KM_POR_GRADO * math.hypot(lat2 - lat1, (lng2 - lng1) * math.cos(latitud_media))
+            inicios.append((lat1, lng1))
+            fines.append((lat2, lng2))
+            regiones.append(region)
+            tipos.append(nombres_tipo.index(tipo))
+            pesos.append(TIPOS_LIMITE[tipo]['actividad'] * longitud_km)
+    pesos = np.array(pesos)
+    return np.array(inicios), np.array(fines), np.array(regiones), np.array(tipos), pesos / pesos.sum()
+
+
+_TRAMOS = _tramos()
+
+# ========================================
+# GENERACIÓN
+# ========================================
+
+def magnitudes_gutenberg_richter(rng, n, minima=MAGNITUD_MINIMA, valor_b=VALOR_B, maxima=MAGNITUD_MAXIMA):
+    """Magnitudes con distribución exponencial truncada (Gutenberg–Richter); 'maxima' puede ser un arreglo"""
+    beta = valor_b * math.log(10)
+    # Inversa de la CDF truncada: cada unidad de magnitud es 10^b veces menos frecuente
+    u = rng.random(n)
+    return minima - np.log(1 - u * (1 - np.exp(-beta * (np.asarray(maxima) - minima)))) / beta
+
+
+def profundidades_por_tipo(rng, tipos):
+    """Profundidades (km) según el tipo de límite de cada evento (-1 = fondo intraplaca)"""
+    n = len(tipos)
+    nombres_tipo = list(TIPOS_LIMITE)
+    # Corteza superficial por defecto (dorsales, fondo)
+    profundidades = rng.gamma(2.0, 4.0, n)
+
+    transformante = tipos == nombres_tipo.index('transformante')
+    profundidades[transformante] = rng.gamma(2.5, 4.0, transformante.sum())
+
+    colision = tipos == nombres_tipo.index('colision')
+    profundidades[colision] = rng.gamma(2.0, 10.0, colision.sum())
+
+    # Subducción: mayoría somera, parte intermedia y una cola profunda (zona de Wadati-Benioff)
+    subduccion = np.flatnonzero(tipos == nombres_tipo.index('subduccion'))
+    clase = rng.random(len(subduccion))
+    profundidades[subduccion] = np.where(
+        clase < 0.80, rng.gamma(2.0, 12.0, len(subduccion)),
+        np.where(
+            clase < 0.97,
+            np.minimum(70 + rng.exponential(60.0, len(subduccion)), 300),
+            rng.uniform(300, 650, len(subduccion)),
+        ),
+    )
+    return np.clip(profundidades, 0.5, 700)
+
+
+def _desplazar(rng, latitudes, longitudes, sigma_km):
+    """Dispersión gaussiana isotrópica de sigma_km alrededor de cada punto"""
+    n = len(latitudes)
+    latitudes = np.clip(latitudes + rng.normal(0, 1, n) * sigma_km / KM_POR_GRADO, -89.9, 89.9)
+    coseno = np.maximum(np.cos(np.radians(latitudes)), 0.05)
+    longitudes = longitudes + rng.normal(0, 1, n) * sigma_km / (KM_POR_GRADO * coseno)
+    return latitudes, (longitudes + 180) % 360 - 180
+
+
+def _region_mas_cercana(latitudes, longitudes, bloque=100_000):
+    """Índice de la región del vértice de límite más cercano (aproximación equirectangular)"""
+    vertices = np.array([v for _, _, vs in LIMITES_PLACA for v in vs])
+    region_vertice = np.array([r for r, (_, _, vs) in enumerate(LIMITES_PLACA) for _ in vs])
+    resultado = np.empty(len(latitudes), dtype=np.int64)
+    for inicio in range(0, len(latitudes), bloque):
+        lat = latitudes[inicio:inicio + bloque, None]
+        dlng = (longitudes[inicio:inicio + bloque, None] - vertices[None, :, 1] + 180) % 360 - 180
+        d2 = (lat - vertices[None, :, 0]) ** 2 + (dlng * np.cos(np.radians(lat))) ** 2
+        resultado[inicio:inicio + bloque] = region_vertice[np.argmin(d2, axis=1)]
+    return resultado
+
+
+def _independientes(rng, n, inicio_us, fin_us):
+    """Eventos independientes: en límites de placa y una fracción de fondo"""
+    inicios, fines, regiones_tramo, tipos_tramo, pesos = _TRAMOS
+    fondo = rng.random(n) < FRACCION_FONDO
+    n_fondo = int(fondo.sum())
+    n_limite = n - n_fondo
+
+    # En límites: tramo ponderado por actividad y longitud, punto uniforme sobre él y dispersión
+    tramo = rng.choice(len(pesos), size=n_limite, p=pesos)
+    f = rng.random(n_limite)
+    puntos = inicios[tramo] + (fines[tramo] - inicios[tramo]) * f[:, None]
+    sigma = np.array([TIPOS_LIMITE[t]['dispersion_km'] for t in TIPOS_LIMITE])[tipos_tramo[tramo]]
+    lat_limite, lng_limite = _desplazar(rng, puntos[:, 0], puntos[:, 1], sigma)
+
+    # Fondo: uniforme sobre la esfera (no en el rectángulo lat/lng)
+    lat_fondo = np.degrees(np.arcsin(rng.uniform(-1, 1, n_fondo)))
+    lng_fondo = rng.uniform(-180, 180, n_fondo)
+
+    latitudes = np.concatenate([lat_limite, lat_fondo])
+    longitudes = np.concatenate([lng_limite, lng_fondo])
+    tipos = np.concatenate([tipos_tramo[tramo], np.full(n_fondo, -1)])
+    regiones = np.concatenate([regiones_tramo[tramo], _region_mas_cercana(lat_fondo, lng_fondo)])
+    return {
+        'tiempos_us': rng.integers(inicio_us, fin_us, n),
+        'latitudes': latitudes,
+        'longitudes': longitudes,
+        'profundidades': profundidades_por_tipo(rng, tipos),
+        'magnitudes': magnitudes_gutenberg_richter(rng, n),
+        'lugares': regiones,
+    }
+
+
+def _tiempos_omori(rng, n, dias=DIAS_REPLICAS, c=OMORI_C, p=OMORI_P):
+    """Retrasos (días) de réplicas con la ley de Omori-Utsu truncada a 'dias'"""
+    u = rng.random(n)
+    q = 1 - p
+    return c * ((1 - u * (1 - (1 + dias / c) ** q)) ** (1 / q) - 1)
+
+
+def _replicas(rng, principales, fin_us, maximo):
+    """Una generación de réplicas para cada evento de 'principales'"""
+    magnitudes = principales['magnitudes']
+    esperadas = PRODUCTIVIDAD * 10 ** (ALFA_REPLICAS * (magnitudes - MAGNITUD_MINIMA))
+    cantidades = np.minimum(rng.poisson(esperadas), maximo)
+    padre = np.repeat(np.arange(len(magnitudes)), cantidades)
+    m = len(padre)
+
+    retrasos_us = (_tiempos_omori(rng, m) * 86400e6).astype(np.int64)
+    # Longitud de ruptura aproximada (km): las réplicas se reparten a lo largo de ella
+    ruptura_km = 10 ** (0.5 * magnitudes[padre] - 1.85)
+    latitudes, longitudes = _desplazar(
+        rng, principales['latitudes'][padre], principales['longitudes'][padre], np.maximum(ruptura_km / 2, 2.0)
+    )
+    replicas = {
+        'tiempos_us': principales['tiempos_us'][padre] + retrasos_us,
+        'latitudes': latitudes,
+        'longitudes': longitudes,
+        'profundidades': np.clip(principales['profundidades'][padre] + rng.normal(0, 5, m), 0.5, 700),
+        'magnitudes': magnitudes_gutenberg_richter(rng, m, maxima=magnitudes[padre]),
+        'lugares': principales['lugares'][padre],
+    }
+    # Las réplicas posteriores al final de la ventana no se generan
+    dentro = replicas['tiempos_us'] < fin_us
+    return {columna: valores[dentro] for columna, valores in replicas.items()}
+
+
+def generar_catalogo(n, semilla=0, dias=365, fin=None):
+    """
+    Columnas de n eventos repartidos en los 'dias' días anteriores a 'fin'
+    (por defecto, ahora). Retorna un dict de arreglos NumPy ordenados por tiempo.
+
+    Se generan n eventos independientes más sus réplicas y se submuestrea
+    uniformemente hasta n: la proporción de réplicas se conserva.
+    """
+    rng = np.random.default_rng(semilla)
+    fin = fin or timezone.now()
+    fin_us = int(fin.timestamp() * 1e6)
+    inicio_us = fin_us - int(dias * 86400e6)
+
+    principales = _independientes(rng, n, inicio_us, fin_us)
+    # Tope por secuencia para que un solo M9 no domine los catálogos pequeños
+    replicas = _replicas(rng, principales, fin_us, maximo=max(10, n // 50))
+    columnas = {columna: np.concatenate([principales[columna], replicas[columna]]) for columna in principales}
+
+    total = len(columnas['tiempos_us'])
+    elegidos = np.sort(rng.choice(total, size=n, replace=False)) if total > n else np.arange(total)
+    orden = elegidos[np.argsort(columnas['tiempos_us'][elegidos], kind='stable')]
+    return {
+        'tiempos_us': columnas['tiempos_us'][orden],
+        'latitudes': np.round(columnas['latitudes'][orden], 4),
+        'longitudes': np.round(columnas['longitudes'][orden], 4),
+        'profundidades': np.round(columnas['profundidades'][orden], 1),
+        'magnitudes': np.round(columnas['magnitudes'][orden], 1),
+        'lugares': columnas['lugares'][orden],
+        'distancias': rng.integers(1, 150, n),
+        'rumbos': rng.integers(0, len(RUMBOS), n),
+    }
+
+# ========================================
+# INSERCIÓN
+# ========================================
+
+EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _eventos(columnas, inicio, fin, prefijo, desplazamiento):
+    tiempos = columnas['tiempos_us'][inicio:fin].tolist()
+    latitudes = columnas['latitudes'][inicio:fin].tolist()
+    longitudes = columnas['longitudes'][inicio:fin].tolist()
+    profundidades = columnas['profundidades'][inicio:fin].tolist()
+    magnitudes = columnas['magnitudes'][inicio:fin].tolist()
+    lugares = columnas['lugares'][inicio:fin].tolist()
+    distancias = columnas['distancias'][inicio:fin].tolist()
+    rumbos = columnas['rumbos'][inicio:fin].tolist()
+    return [
+        EventoSismico(
+            id_evento_usgs=f'{prefijo}{desplazamiento + inicio + i:010d}',
+            latitud=latitudes[i],
+            longitud=longitudes[i],
+            profundidad=profundidades[i],
+            magnitud=magnitudes[i],
+            fecha_hora_evento=EPOCA + timedelta(microseconds=tiempos[i]),
+            lugar_descripcion=f'{distancias[i]} km al {RUMBOS[rumbos[i]]} de {LUGARES[lugares[i]]}',
+        )
+        for i in range(fin - inicio)
+    ]
+
+
+def insertar_catalogo(columnas, prefijo=PREFIJO, desplazamiento=0, tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Inserta las columnas generadas. 'desplazamiento' numera los ids a partir de
+    ese valor (para ampliar un catálogo existente). Retorna el número insertado.
+    """
+    total = len(columnas['tiempos_us'])
+    for inicio in range(0, total, tamano_lote):
+        fin = min(inicio + tamano_lote, total)
+        with transaction.atomic():
+            EventoSismico.objects.bulk_create(_eventos(columnas, inicio, fin, prefijo, desplazamiento))
+        if progreso:
+            progreso(fin, total)
+    return total
+
+
+def contar_sinteticos(prefijo=PREFIJO):
+    return EventoSismico.objects.filter(id_evento_usgs__startswith=prefijo).count()
+
+
+def borrar_sinteticos(prefijo=PREFIJO, tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Borra los eventos sintéticos con el prefijo dado por tramos consecutivos de
+    pk, cada tramo en su propia transacción: solo se leen los pks del tramo y los
+    DELETE filtran por rango. Las revisiones y entregas de esos eventos no se
+    borran en cascada (sobreviven al archivo frío), así que se borran aquí.
+    Retorna el número de eventos borrados.
+    """
+    sinteticos = EventoSismico.objects.filter(id_evento_usgs__startswith=prefijo).order_by('pk')
+    total = sinteticos.count()
+    borrados = 0
+    ultimo = None
+    while True:
+        tramo = sinteticos if ultimo is None else sinteticos.filter(pk__gt=ultimo)
+        pks = list(tramo.values_list('pk', flat=True)[:tamano_lote])
+        if not pks:
+            return borrados
+        ultimo = pks[-1]
+        rango = sinteticos.filter(pk__range=(pks[0], ultimo))
+        with transaction.atomic():
+            RevisionEvento.objects.filter(evento__in=rango).delete()
+            EntregaAlerta.objects.filter(evento__in=rango).delete()
+            borrados += rango.delete()[0]
+        if progreso:
+            progreso(borrados, total)
@@ -0,0 +1,319 @@
+# ========================================
+# SNAPSHOT COLUMNAR - SEISMIC TRACKER
+# PROPÓSITO: Copia de solo lectura de la ventana reciente de EventoSismico
+#            compartida entre workers mediante un archivo mapeado en memoria
+# ========================================
+
+"""
+Snapshot columnar de la ventana "caliente" de eventos sísmicos.
+
+Funcionamiento:
+1. La ingesta escribe los eventos recientes como un arreglo estructurado de
+   NumPy (.npy) en un archivo nuevo y después reemplaza de forma atómica un
+   manifiesto JSON que apunta a él (os.replace)
+2. Cada worker lee el manifiesto (un stat por consulta) y mapea el archivo con
+   np.load(mmap_mode='r'): todas las páginas se comparten vía caché del sistema
+   operativo, sin copia por proceso
+3. Los filtros de magnitud, tiempo, rectángulo geográfico y secuencia se evalúan
+   con máscaras vectorizadas; cualquier otro parámetro, o un rango temporal que
+   sale de la ventana, devuelve None y la vista consulta la base de datos
+
+Un snapshot solo responde consultas sin límite temporal si contiene todo el
+catálogo: ningún evento más antiguo en la BD ni en el archivo frío
+(api/tiering.py). Lo segundo se comprueba también al leer, porque el archivo
+puede crearse después de publicar el snapshot.
+"""
+
+import json
+import logging
+import os
+import threading
+import time as time_module
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from .filters import EventoSismicoFilter
+from .models import EventoSismico
+from .tiering import hay_archivo
+
+logger = logging.getLogger(__name__)
+
+# ========================================
+# CONFIGURACIÓN
+# ========================================
+
+_CONFIG = getattr(settings, 'SISMOS_SNAPSHOT', {})
+DIRECTORIO = Path(_CONFIG.get('DIRECTORIO', Path(settings.BASE_DIR) / 'var' / 'snapshot'))
+VENTANA_DIAS = _CONFIG.get('VENTANA_DIAS', 30)
+MANIFIESTO = 'manifiesto.json'
+
+# Parámetros de consulta que el snapshot sabe resolver
+PARAMETROS_SOPORTADOS = {
+    'magnitud', 'magnitud__gte', 'magnitud__lte', 'since_date', 'fecha_hora_evento__date',
+    'lat_min', 'lat_max', 'lng_min', 'lng_max', 'tipo_secuencia', 'id_secuencia', 'ordering',
+}
+ORDENAMIENTOS = {'fecha_hora_evento', 'magnitud', 'profundidad'}
+
+NULO_ENTERO = np.iinfo(np.int64).min
+EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# ========================================
+# CONVERSIÓN MODELO <-> COLUMNAS
+# ========================================
+
+def _campos():
+    return [f for f in EventoSismico._meta.concrete_fields]
+
+
+def _a_microsegundos(valor):
+    return (valor - EPOCA) // timedelta(microseconds=1)
+
+
+def _construir_arreglo(filas):
+    """
+    Convierte filas (tuplas en el orden de _campos()) en un arreglo estructurado.
+    Los textos se guardan como UTF-8 con el ancho exacto del valor más largo;
+    los campos nulables añaden una columna booleana '<campo>__nulo'.
+    """
+    campos = _campos()
+    columnas = []
+    dtype = []
+    for i, campo in enumerate(campos):
+        valores = [fila[i] for fila in filas]
+        nulos = np.array([v is None for v in valores], dtype=bool)
+
+        if isinstance(campo, models.DateTimeField):
+            datos = np.array([NULO_ENTERO if v is None else _a_microsegundos(v) for v in valores], dtype=np.int64)
+        elif isinstance(campo, models.FloatField):
+            datos = np.array([np.nan if v is None else v for v in valores], dtype=np.float64)
+        elif isinstance(campo, (models.IntegerField, models.AutoField)):
+            datos = np.array([NULO_ENTERO if v is None else v for v in valores], dtype=np.int64)
+        else:
+            codificados = [b'' if v is None else str(v).encode('utf-8') for v in valores]
+            ancho = max([len(c) for c in codificados] + [1])
+            datos = np.array(codificados, dtype=f'S{ancho}')
+
+        dtype.append((campo.attname, datos.dtype))
+        columnas.append(datos)
+        if campo.null:
+            dtype.append((f'{campo.attname}__nulo', np.bool_))
+            columnas.append(nulos)
+
+    arreglo = np.empty(len(filas), dtype=dtype)
+    for (nombre, _), datos in zip(dtype, columnas):
+        arreglo[nombre] = datos
+    return arreglo
+
+
+def _a_instancias(arreglo):
+    """Reconstruye instancias de EventoSismico (sin consultar la BD) a partir de filas del snapshot"""
+    campos = _campos()
+    nombres = [c.attname for c in campos]
+    columnas = []
+    for campo in campos:
+        datos = arreglo[campo.attname]
+        if isinstance(campo, models.DateTimeField):
+            valores = [EPOCA + timedelta(microseconds=int(v)) for v in datos]
+        elif isinstance(campo, models.FloatField):
+            valores = datos.tolist()
+        elif isinstance(campo, (models.IntegerField, models.AutoField)):
+            valores = datos.tolist()
+        else:
+            valores = [v.decode('utf-8') for v in datos.tolist()]
+        if campo.null:
+            nulos = arreglo[f'{campo.attname}__nulo'].tolist()
+            valores = [None if nulo else v for v, nulo in zip(valores, nulos)]
+        columnas.append(valores)
+
+    return [EventoSismico.from_db('default', nombres, fila) for fila in zip(*columnas)]
+
+# ========================================
+# ESCRITURA (INGESTA)
+# ========================================
+
+def escribir_snapshot(ventana_dias=VENTANA_DIAS, directorio=DIRECTORIO):
+    """
+    Regenera el snapshot con los eventos de los últimos ventana_dias días.
+    La publicación es atómica: los lectores ven el snapshot anterior o el nuevo, nunca uno parcial.
+    Retorna el número de eventos incluidos.
+    """
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    desde = timezone.now() - timedelta(days=ventana_dias)
+    nombres = [c.attname for c in _campos()]
+    filas = list(
+        EventoSismico.objects.filter(fecha_hora_evento__gte=desde)
+        .order_by('-fecha_hora_evento', '-pk')
+        .values_list(*nombres)
+    )
+    arreglo = _construir_arreglo(filas)
+
+    # ¿Contiene el catálogo completo? Entonces también puede responder consultas sin límite temporal
+    cubre_todo = not hay_archivo() and not EventoSismico.objects.filter(fecha_hora_evento__lt=desde).exists()
+
+    archivo = f'snapshot-{time_module.time_ns()}.npy'
+    with open(directorio / archivo, 'wb') as destino:
+        np.save(destino, arreglo, allow_pickle=False)
+        destino.flush()
+        os.fsync(destino.fileno())
+
+    manifiesto = {
+        'archivo': archivo,
+        'desde': desde.isoformat(),
+        'cubre_todo': cubre_todo,
+        'generado': timezone.now().isoformat(),
+        'total': len(filas),
+    }
+    temporal = directorio / f'{MANIFIESTO}.tmp'
+    temporal.write_text(json.dumps(manifiesto))
+    os.replace(temporal, directorio / MANIFIESTO)
+
+    _limpiar_antiguos(directorio, conservar=archivo)
+    logger.info("[SNAPSHOT] %s eventos publicados en %s", len(filas), archivo)
+    return len(filas)
+
+
+def _limpiar_antiguos(directorio, conservar):
+    """
+    Elimina snapshots anteriores. En POSIX un archivo mapeado sigue siendo válido tras
+    borrarlo; en Windows puede estar bloqueado y se reintenta en la siguiente escritura.
+    """
+    for ruta in directorio.glob('snapshot-*.npy'):
+        if ruta.name != conservar:
+            try:
+                ruta.unlink()
+            except OSError:
+                pass
+
+# ========================================
+# LECTURA (WORKERS)
+# ========================================
+
+class LectorSnapshot:
+    """Mantiene mapeado el snapshot vigente y lo recarga cuando cambia el manifiesto"""
+
+    def __init__(self, directorio=DIRECTORIO):
+        self.directorio = Path(directorio)
+        self._lock = threading.Lock()
+        self._firma = None
+        self._arreglo = None
+        self._meta = None
+
+    def obtener(self):
+        """Retorna (arreglo, meta) o (None, None) si no hay snapshot publicado"""
+        ruta = self.directorio / MANIFIESTO
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            return None, None
+
+        firma = (estado.st_mtime_ns, estado.st_size, estado.st_ino)
+        with self._lock:
+            if firma != self._firma:
+                try:
+                    meta = json.loads(ruta.read_text())
+                    arreglo = np.load(self.directorio / meta['archivo'], mmap_mode='r', allow_pickle=False)
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning("[SNAPSHOT] No se pudo cargar el snapshot: %s", e)
+                    return None, None
+                meta['desde'] = datetime.fromisoformat(meta['desde'])
+                self._arreglo, self._meta, self._firma = arreglo, meta, firma
+            return self._arreglo, self._meta
+
+
+lector_snapshot = LectorSnapshot()
+
+
+def _cubre_todo(meta):
+    """True si el snapshot tiene todo el catálogo (y no se ha archivado nada desde entonces)"""
+    return meta['cubre_todo'] and not hay_archivo()
+
+
+def consultar_snapshot(parametros):
+    """
+    Resuelve una consulta de listado de sismos desde el snapshot.
+
+    Parámetros:
+    - parametros: QueryDict de la petición
+
+    Retorna:
+    - Lista de instancias de EventoSismico, o None si la consulta debe ir a la base de datos
+    """
+    claves = {k for k, v in parametros.items() if v not in ('', None)}
+    if not claves <= PARAMETROS_SOPORTADOS:
+        return None
+
+    arreglo, meta = lector_snapshot.obtener()
+    if arreglo is None:
+        return None
+
+    # Reutilizamos el FilterSet para validar y convertir los valores exactamente igual que la BD
+    filtro = EventoSismicoFilter(parametros, queryset=EventoSismico.objects.none())
+    if not filtro.is_valid():
+        return None
+    datos = filtro.form.cleaned_data
+
+    # Límite inferior de tiempo solicitado; debe quedar dentro de la ventana del snapshot
+    inicio = datos.get('since_date')
+    fin = None
+    if datos.get('fecha_hora_evento__date'):
+        dia = timezone.make_aware(datetime.combine(datos['fecha_hora_evento__date'], time.min))
+        inicio = max(inicio, dia) if inicio else dia
+        fin = dia + timedelta(days=1)
+    if (inicio is None or inicio < meta['desde']) and not _cubre_todo(meta):
+        return None
+
+    mascara = np.ones(len(arreglo), dtype=bool)
+    tiempos = arreglo['fecha_hora_evento']
+    if inicio is not None:
+        mascara &= tiempos >= _a_microsegundos(inicio)
+    if fin is not None:
+        mascara &= tiempos < _a_microsegundos(fin)
+
+    comparaciones = {
+        'magnitud': ('magnitud', np.equal),
+        'magnitud__gte': ('magnitud', np.greater_equal),
+        'magnitud__lte': ('magnitud', np.less_equal),
+        'lat_min': ('latitud', np.greater_equal),
+        'lat_max': ('latitud', np.less_equal),
+        'lng_min': ('longitud', np.greater_equal),
+        'lng_max': ('longitud', np.less_equal),
+    }
+    for clave, (columna, operador) in comparaciones.items():
+        if datos.get(clave) is not None:
+            mascara &= operador(arreglo[columna], float(datos[clave]))
+
+    if datos.get('tipo_secuencia'):
+        mascara &= arreglo['tipo_secuencia'] == datos['tipo_secuencia'].encode('utf-8')
+    if datos.get('id_secuencia') is not None:
+        mascara &= ~arreglo['id_secuencia__nulo'] & (arreglo['id_secuencia'] == int(datos['id_secuencia']))
+
+    indices = np.flatnonzero(mascara)
+
+    # Ordenamiento: por defecto el del snapshot (fecha descendente)
+    ordering = parametros.get('ordering')
+    if ordering:
+        campo = ordering.lstrip('-')
+        if ',' in ordering or campo not in ORDENAMIENTOS:
+            return None
+        clave_orden = arreglo[campo][indices]
+        orden = np.argsort(clave_orden, kind='stable')
+        if ordering.startswith('-'):
+            orden = orden[::-1]
+        indices = indices[orden]
+
+    return _a_instancias(arreglo[indices])
+
+
+def ultimos_eventos(cantidad):
+    """Los 'cantidad' eventos más recientes desde el snapshot, o None si no es posible"""
+    arreglo, meta = lector_snapshot.obtener()
+    if arreglo is None or (len(arreglo) < cantidad and not _cubre_todo(meta)):
+        return None
+    return _a_instancias(arreglo[:cantidad])
@@ -0,0 +1,263 @@
+# ========================================
+# ÍNDICE ESPACIAL - SEISMIC TRACKER
+# PROPÓSITO: Búsqueda de los k eventos más cercanos a un punto ("sentido cerca de mí")
+# ========================================
+
+"""
+Índice en memoria de eventos recientes para consultas de vecinos más cercanos.
+
+Funcionamiento:
+1. Los epicentros se proyectan a coordenadas cartesianas sobre la esfera unidad,
+   donde la distancia euclidiana (cuerda) es monótona con la de gran círculo
+2. Se construye un árbol KD (scipy cKDTree) una sola vez por worker; la carga
+   de la BD y la construcción ocurren fuera del lock de consulta, que solo
+   protege el intercambio de arreglos (las consultas siguen con el estado
+   anterior mientras tanto)
+3. Los eventos ingeridos después de la construcción se acumulan en un búfer
+   delta que se recorre de forma vectorizada; al superar un umbral se
+   reconstruye el árbol completo
+4. El refresco incremental, como máximo una vez cada INTERVALO_REFRESCO
+   segundos, consulta los pks mayores al último indexado y las revisiones
+   (RevisionEvento) posteriores a la última vista: la posición anterior de
+   un evento revisado deja de ser vigente y la nueva entra en el delta. Así
+   también se enteran los procesos que no hicieron la ingesta
+5. descartar() retira pks que ya no están en la BD (archivados o borrados)
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from scipy.spatial import cKDTree
+
+from .models import EventoSismico, RevisionEvento
+
+RADIO_TIERRA_KM = 6371.0
+
+# ========================================
+# CONFIGURACIÓN
+# ========================================
+
+_CONFIG = getattr(settings, 'SISMOS_CERCANIA', {})
+VENTANA_DIAS = _CONFIG.get('VENTANA_DIAS', 365)  # Antigüedad máxima de los eventos indexados
+INTERVALO_REFRESCO = _CONFIG.get('INTERVALO_REFRESCO', 30)  # Segundos entre comprobaciones de nuevos eventos
+UMBRAL_RECONSTRUCCION = _CONFIG.get('UMBRAL_RECONSTRUCCION', 1000)  # Tamaño del delta que fuerza reconstrucción
+MARGEN_VECINOS = 10  # Vecinos extra por consulta para cubrir pks archivados o borrados
+INTENTOS_VECINOS = 3  # Consultas como máximo para reunir k vecinos existentes
+
+
+def a_esfera_unidad(latitudes, longitudes):
+    """Convierte latitudes/longitudes en grados a vectores (x, y, z) sobre la esfera unidad"""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lng = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)))
+
+
+def cuerda_a_km(cuerdas):
+    """Convierte distancias de cuerda en la esfera unidad a kilómetros de gran círculo"""
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.clip(np.asarray(cuerdas) / 2, 0.0, 1.0))
+
+# ========================================
+# CLASE: IndiceCercania
+# ========================================
+
+class IndiceCercania:
+    """
+    Árbol KD por worker con búfer delta para inserciones incrementales.
+    Todas las operaciones son seguras entre hilos.
+    """
+
+    def __init__(self, ventana_dias=VENTANA_DIAS, intervalo_refresco=INTERVALO_REFRESCO,
+                 umbral_reconstruccion=UMBRAL_RECONSTRUCCION):
+        self.ventana = timedelta(days=ventana_dias)
+        self.intervalo_refresco = intervalo_refresco
+        self.umbral_reconstruccion = umbral_reconstruccion
+        self._lock = threading.Lock()  # Estado del índice (intercambios breves)
+        self._lock_carga = threading.Lock()  # Un solo hilo construye o refresca a la vez
+        self._arbol = None
+        self._pks = np.empty(0, dtype=np.int64)
+        self._tiempos = np.empty(0, dtype=np.float64)
+        self._vigentes = np.empty(0, dtype=bool)
+        self._delta_xyz = np.empty((0, 3), dtype=np.float64)
+        self._delta_pks = np.empty(0, dtype=np.int64)
+        self._delta_tiempos = np.empty(0, dtype=np.float64)
+        self._ultimo_pk = 0
+        self._ultima_revision_pk = 0
+        self._ultima_revision = 0.0
+        self._invalido = True
+        self._construido = False
+
+    # ----------------------------------------
+    # Construcción y refresco
+    # ----------------------------------------
+
+    def _cargar(self, queryset):
+        filas = list(queryset.values_list('pk', 'latitud', 'longitud', 'fecha_hora_evento'))
+        pks = np.fromiter((f[0] for f in filas), dtype=np.int64, count=len(filas))
+        xyz = a_esfera_unidad([f[1] for f in filas], [f[2] for f in filas]).reshape(-1, 3)
+        tiempos = np.fromiter((f[3].timestamp() for f in filas), dtype=np.float64, count=len(filas))
+        return pks, xyz, tiempos
+
+    @staticmethod
+    def _marcas():
+        """Último pk de eventos y de revisiones (se leen antes de cargar: nada queda entre medias)"""
+        ultimo_pk = EventoSismico.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        ultima_revision_pk = RevisionEvento.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        return int(ultimo_pk), int(ultima_revision_pk)
+
+    def _construir(self):
+        """Carga la ventana y construye el árbol sin el lock de consulta; después intercambia el estado"""
+        with self._lock:
+            self._invalido = False  # Un invalidar() durante la construcción vuelve a ponerlo en True
+        try:
+            ultimo_pk, ultima_revision_pk = self._marcas()
+            desde = timezone.now() - self.ventana
+            pks, xyz, tiempos = self._cargar(
+                EventoSismico.objects.filter(pk__lte=ultimo_pk, fecha_hora_evento__gte=desde)
+            )
+            arbol = cKDTree(xyz) if len(pks) else None
+        except Exception:
+            self.invalidar()
+            raise
+
+        with self._lock:
+            self._arbol = arbol
+            self._pks, self._tiempos = pks, tiempos
+            self._vigentes = np.ones(len(pks), dtype=bool)
+            self._delta_xyz = np.empty((0, 3), dtype=np.float64)
+            self._delta_pks = np.empty(0, dtype=np.int64)
+            self._delta_tiempos = np.empty(0, dtype=np.float64)
+            self._ultimo_pk, self._ultima_revision_pk = ultimo_pk, ultima_revision_pk
+            self._ultima_revision = time.monotonic()
+            self._construido = True
+
+    def _refrescar(self):
+        """Añade al búfer delta los eventos nuevos y la posición actual de los revisados"""
+        with self._lock:
+            ultimo_pk, ultima_revision_pk = self._ultimo_pk, self._ultima_revision_pk
+        revisiones = list(
+            RevisionEvento.objects.filter(pk__gt=ultima_revision_pk).values_list('pk', 'evento_id')
+        )
+        revisados = sorted({evento_id for _, evento_id in revisiones if evento_id <= ultimo_pk})
+        desde = timezone.now() - self.ventana
+        pks, xyz, tiempos = self._cargar(EventoSismico.objects.filter(pk__gt=ultimo_pk, fecha_hora_evento__gte=desde))
+        if revisados:
+            actuales = self._cargar(EventoSismico.objects.filter(pk__in=revisados, fecha_hora_evento__gte=desde))
+            pks, xyz, tiempos = (np.concatenate(par) for par in zip((pks, xyz, tiempos), actuales))
+
+        with self._lock:
+            self._ultima_revision = time.monotonic()
+            if revisiones:
+                self._ultima_revision_pk = max(self._ultima_revision_pk, max(pk for pk, _ in revisiones))
+            if revisados:
+                self._retirar(np.asarray(revisados, dtype=np.int64))
+            if len(pks):
+                self._ultimo_pk = max(self._ultimo_pk, int(pks.max()))
+                self._delta_pks = np.concatenate((self._delta_pks, pks))
+                self._delta_xyz = np.concatenate((self._delta_xyz, xyz))
+                self._delta_tiempos = np.concatenate((self._delta_tiempos, tiempos))
+            if len(self._delta_pks) > self.umbral_reconstruccion:
+                self._invalido = True
+
+    def _retirar(self, pks):
+        """Deja de considerar esos pks (con el lock tomado): se marcan en el árbol y se quitan del delta"""
+        self._vigentes = self._vigentes & ~np.isin(self._pks, pks)
+        conservar = ~np.isin(self._delta_pks, pks)
+        self._delta_pks = self._delta_pks[conservar]
+        self._delta_xyz = self._delta_xyz[conservar]
+        self._delta_tiempos = self._delta_tiempos[conservar]
+
+    def _asegurar_actualizado(self):
+        with self._lock:
+            invalido = self._invalido
+            refrescar = time.monotonic() - self._ultima_revision >= self.intervalo_refresco
+            construido = self._construido
+        if not (invalido or refrescar):
+            return
+        # Si ya hay un índice, las demás consultas no esperan a la carga: usan el estado actual
+        if not self._lock_carga.acquire(blocking=not construido):
+            return
+        try:
+            if self._invalido:
+                self._construir()
+            elif time.monotonic() - self._ultima_revision >= self.intervalo_refresco:
+                self._refrescar()
+                if self._invalido:
+                    self._construir()
+        finally:
+            self._lock_carga.release()
+
+    def invalidar(self):
+        """Fuerza una reconstrucción completa en la próxima consulta"""
+        with self._lock:
+            self._invalido = True
+
+    def marcar_pendiente(self):
+        """Hace que la próxima consulta incorpore los eventos nuevos y revisados sin esperar el intervalo"""
+        with self._lock:
+            self._ultima_revision = 0.0
+
+    def descartar(self, pks):
+        """Retira pks que ya no existen en la BD (archivados o borrados) hasta la próxima reconstrucción"""
+        with self._lock:
+            self._retirar(np.asarray(list(pks), dtype=np.int64))
+
+    # ----------------------------------------
+    # Consulta
+    # ----------------------------------------
+
+    def consultar(self, latitud, longitud, k=10, desde=None):
+        """
+        Devuelve hasta k tuplas (pk, distancia_km) ordenadas por distancia.
+        Solo se consideran eventos dentro de la ventana y posteriores a 'desde'.
+        """
+        punto = a_esfera_unidad([latitud], [longitud])[0]
+        limite = (timezone.now() - self.ventana).timestamp()
+        if desde is not None:
+            limite = max(limite, desde.timestamp())
+
+        self._asegurar_actualizado()
+        with self._lock:
+            arbol, pks, tiempos, vigentes = self._arbol, self._pks, self._tiempos, self._vigentes
+            delta_xyz, delta_pks, delta_tiempos = self._delta_xyz, self._delta_pks, self._delta_tiempos
+
+        candidatos_pks = []
+        candidatos_dist = []
+
+        # Árbol principal: ampliamos k hasta reunir suficientes eventos vigentes que pasen el filtro temporal
+        if arbol is not None:
+            total = len(pks)
+            k_busqueda = min(total, max(k * 2, 16))
+            while True:
+                distancias, indices = arbol.query(punto, k=k_busqueda)
+                distancias = np.atleast_1d(distancias)
+                indices = np.atleast_1d(indices)
+                validos = (tiempos[indices] >= limite) & vigentes[indices]
+                if validos.sum() >= k or k_busqueda >= total:
+                    break
+                k_busqueda = min(total, k_busqueda * 4)
+            candidatos_pks.append(pks[indices[validos]])
+            candidatos_dist.append(distancias[validos])
+
+        # Búfer delta: recorrido vectorizado
+        if len(delta_pks):
+            validos = delta_tiempos >= limite
+            distancias = np.linalg.norm(delta_xyz[validos] - punto, axis=1)
+            candidatos_pks.append(delta_pks[validos])
+            candidatos_dist.append(distancias)
+
+        if not candidatos_pks:
+            return []
+
+        todos_pks = np.concatenate(candidatos_pks)
+        todas_dist = np.concatenate(candidatos_dist)
+        orden = np.argsort(todas_dist, kind='stable')[:k]
+        return list(zip(todos_pks[orden].tolist(), cuerda_a_km(todas_dist[orden]).tolist()))
+
+
+# Instancia única por worker (se construye de forma perezosa en la primera consulta)
+indice_cercania = IndiceCercania()
@@ -0,0 +1,350 @@
+# ========================================
+# COLA DE TAREAS EN SEGUNDO PLANO - SEISMIC TRACKER
+# PROPÓSITO: Sacar los efectos secundarios lentos de peticiones y señales sin un broker externo
+# ========================================
+
+"""
+Cola de tareas respaldada por la tabla Tarea.
+
+Uso:
+    @tarea(cola='correo', max_intentos=5)
+    def enviar_correo(asunto, mensaje, destinatarios): ...
+
+    enviar_correo.encolar(asunto=..., mensaje=..., destinatarios=[...],
+                          clave_idempotencia='reset:42')
+
+Funcionamiento:
+1. encolar() inserta la fila en la transacción en curso: si la petición hace
+   rollback, la tarea tampoco existe. Con clave_idempotencia, un segundo
+   encolado de la misma clave devuelve la tarea existente
+2. Los trabajadores toman tareas con un UPDATE condicional (portable a SQL
+   Server, PostgreSQL y SQLite, sin SELECT ... SKIP LOCKED) y una concesión
+   (bloqueada_hasta). Un hilo de latido por proceso renueva la concesión de
+   las tareas en curso cada CONCESION/3 segundos, así que una tarea larga no
+   se devuelve a la cola; si el proceso muere, deja de renovarse y vence
+3. En las colas de TAREAS['SERIALIZADAS'] solo se toma la tarea más antigua
+   sin terminar y solo si ninguna otra de la cola está en curso en ningún
+   proceso: se aplican de una en una y en orden aunque haya varios run_workers
+4. Un error reprograma la tarea con retroceso exponencial y jitter hasta
+   max_intentos; después queda FALLIDA con la traza en ultimo_error
+5. Cada cola tiene su propio número de hilos (TAREAS['COLAS']) por proceso
+
+Modos (TAREAS['MODO']):
+- 'bd': solo se encola; los ejecuta el comando run_workers (producción)
+- 'hilos': además, el propio proceso arranca trabajadores en hilos al primer
+  encolado (desarrollo, sin procesos extra). Al salir espera a que terminen
+  las tareas ya listas, para que comandos como fetch_sismos no las pierdan
+"""
+
+import atexit
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .metricas import TAREAS
+from .models import Tarea
+
+logger = logging.getLogger(__name__)
+
+_CONFIG = getattr(settings, 'TAREAS', {})
+MODO = _CONFIG.get('MODO', 'bd')
+COLAS = _CONFIG.get('COLAS', {'default': 2})  # Hilos por cola y proceso
+INTERVALO = _CONFIG.get('INTERVALO', 1.0)  # Segundos entre sondeos cuando no hay trabajo
+CONCESION = _CONFIG.get('CONCESION', 300)  # Segundos antes de considerar muerto a un trabajador
+RENOVACION = CONCESION / 3  # Cada cuánto renueva el latido las concesiones en curso
+SERIALIZADAS = frozenset(_CONFIG.get('SERIALIZADAS', ['ingesta']))  # Una sola tarea en curso entre procesos
+RETROCESO_BASE = _CONFIG.get('RETROCESO_BASE', 5)
+RETROCESO_MAXIMO = _CONFIG.get('RETROCESO_MAXIMO', 3600)
+RETENCION_DIAS = _CONFIG.get('RETENCION_DIAS', 7)
+
+_registro = {}
+
+# ========================================
+# REGISTRO Y ENCOLADO
+# ========================================
+
+class FuncionTarea:
+    """Envoltorio de una función registrada como tarea"""
+
+    def __init__(self, funcion, nombre, cola, max_intentos):
+        self.funcion = funcion
+        self.nombre = nombre
+        self.cola = cola
+        self.max_intentos = max_intentos
+
+    def __call__(self, *args, **kwargs):
+        return self.funcion(*args, **kwargs)
+
+    def encolar(self, clave_idempotencia=None, retraso=None, **argumentos):
+        return encolar(
+            self.nombre, argumentos, cola=self.cola, max_intentos=self.max_intentos,
+            clave_idempotencia=clave_idempotencia, retraso=retraso,
+        )
+
+
+def tarea(nombre=None, cola='default', max_intentos=5):
+    """Decorador que registra una función como tarea. Los argumentos deben ser serializables a JSON."""
+    def decorador(funcion):
+        envoltorio = FuncionTarea(funcion, nombre or f'{funcion.__module__}.{funcion.__name__}', cola, max_intentos)
+        _registro[envoltorio.nombre] = envoltorio
+        return envoltorio
+    return decorador
+
+
+def encolar(nombre, argumentos, cola='default', max_intentos=5, clave_idempotencia=None, retraso=None):
+    """Inserta una tarea (o devuelve la existente con la misma clave de idempotencia)"""
+    ejecutar_despues = timezone.now() + timedelta(seconds=retraso or 0)
+    try:
+        with transaction.atomic():
+            nueva = Tarea.objects.create(
+                cola=cola, nombre=nombre, argumentos=argumentos, max_intentos=max_intentos,
+                clave_idempotencia=clave_idempotencia, ejecutar_despues=ejecutar_despues,
+            )
+    except IntegrityError:
+        if clave_idempotencia is None:
+            raise
+        return Tarea.objects.get(clave_idempotencia=clave_idempotencia)
+
+    if MODO == 'hilos':
+        transaction.on_commit(despachador_local.despertar)
+    return nueva
+
+# ========================================
+# EJECUCIÓN
+# ========================================
+
+def _retroceso(intentos):
+    """Segundos hasta el siguiente intento: exponencial con jitter y tope"""
+    retraso = min(RETROCESO_BASE * 2 ** (intentos - 1), RETROCESO_MAXIMO)
+    return retraso * random.uniform(0.8, 1.2)
+
+
+class Trabajador(threading.Thread):
+    """Hilo que toma y ejecuta tareas de una cola"""
+
+    def __init__(self, cola, identificador, despachador):
+        super().__init__(name=f'tareas-{cola}', daemon=True)
+        self.cola = cola
+        self.identificador = identificador
+        self.despachador = despachador
+
+    def run(self):
+        while not self.despachador.detenido.is_set():
+            try:
+                ejecutada = self.ejecutar_siguiente()
+            except Exception:
+                logger.exception("[TAREAS] Error del trabajador de la cola %s", self.cola)
+                ejecutada = False
+            finally:
+                close_old_connections()
+            if not ejecutada:
+                if self.despachador.drenando:
+                    return
+                self.despachador.esperar_trabajo(INTERVALO)
+
+    def tomar(self):
+        """Reserva la siguiente tarea lista de la cola. Retorna la Tarea o None."""
+        ahora = timezone.now()
+        if self.cola in SERIALIZADAS:
+            candidatas = self.cabeza_serializada(ahora)
+        else:
+            candidatas = list(
+                Tarea.objects.filter(
+                    estado=Tarea.Estado.PENDIENTE, cola=self.cola, ejecutar_despues__lte=ahora
+                ).order_by('ejecutar_despues', 'pk').values_list('pk', flat=True)[:10]
+            )
+        for pk in candidatas:
+            tomada = Tarea.objects.filter(pk=pk, estado=Tarea.Estado.PENDIENTE).update(
+                estado=Tarea.Estado.EN_CURSO,
+                intentos=F('intentos') + 1,
+                bloqueada_por=self.identificador,
+                bloqueada_hasta=ahora + timedelta(seconds=CONCESION),
+            )
+            if tomada:
+                return Tarea.objects.get(pk=pk)
+        return None
+
+    def cabeza_serializada(self, ahora):
+        """
+        Cola serializada: la tarea más antigua sin terminar, si está lista y no
+        hay otra en curso. Dos procesos que la elijan a la vez compiten por el
+        mismo UPDATE condicional y solo uno la toma.
+        """
+        sin_terminar = Tarea.objects.filter(
+            cola=self.cola, estado__in=[Tarea.Estado.PENDIENTE, Tarea.Estado.EN_CURSO]
+        )
+        cabeza = sin_terminar.order_by('pk').values_list('pk', 'estado', 'ejecutar_despues').first()
+        if cabeza is None or cabeza[1] != Tarea.Estado.PENDIENTE or cabeza[2] > ahora:
+            return []
+        # Una tarea en curso con pk mayor (p. ej. encolada en una transacción que confirmó antes)
+        if sin_terminar.filter(estado=Tarea.Estado.EN_CURSO).exists():
+            return []
+        return [cabeza[0]]
+
+    def ejecutar_siguiente(self):
+        tarea_actual = self.tomar()
+        if tarea_actual is None:
+            return False
+
+        registrada = _registro.get(tarea_actual.nombre)
+        try:
+            if registrada is None:
+                raise LookupError(f"Tarea no registrada: {tarea_actual.nombre}")
+            registrada.funcion(**tarea_actual.argumentos)
+        except Exception:
+            self.registrar_fallo(tarea_actual, traceback.format_exc())
+        else:
+            Tarea.objects.filter(pk=tarea_actual.pk, bloqueada_por=self.identificador).update(
+                estado=Tarea.Estado.COMPLETADA, fecha_fin=timezone.now(), bloqueada_hasta=None, ultimo_error=''
+            )
+            self.despachador.contar(self.cola, 'completadas')
+        return True
+
+    def registrar_fallo(self, tarea_actual, traza):
+        mismo_trabajador = Tarea.objects.filter(pk=tarea_actual.pk, bloqueada_por=self.identificador)
+        if tarea_actual.intentos >= tarea_actual.max_intentos:
+            logger.error("[TAREAS] %s falló definitivamente tras %s intentos:\n%s",
+                         tarea_actual.nombre, tarea_actual.intentos, traza)
+            mismo_trabajador.update(
+                estado=Tarea.Estado.FALLIDA, fecha_fin=timezone.now(), bloqueada_hasta=None, ultimo_error=traza
+            )
+            self.despachador.contar(self.cola, 'fallidas')
+            return
+        retraso = _retroceso(tarea_actual.intentos)
+        logger.warning("[TAREAS] %s falló (intento %s/%s); reintento en %.0f s",
+                       tarea_actual.nombre, tarea_actual.intentos, tarea_actual.max_intentos, retraso)
+        mismo_trabajador.update(
+            estado=Tarea.Estado.PENDIENTE,
+            ejecutar_despues=timezone.now() + timedelta(seconds=retraso),
+            bloqueada_hasta=None,
+            ultimo_error=traza,
+        )
+        self.despachador.contar(self.cola, 'reintentadas')
+
+# ========================================
+# CLASE: Despachador
+# ========================================
+
+class Despachador:
+    """Conjunto de trabajadores de este proceso (uno o varios hilos por cola)"""
+
+    def __init__(self, colas=None):
+        self.colas = colas or COLAS
+        self.identificador_base = f'{socket.gethostname()}:{os.getpid()}'
+        self.detenido = threading.Event()
+        self._hay_trabajo = threading.Condition()
+        self.drenando = False
+        self.trabajadores = []
+        self._lock = threading.Lock()
+        self.contadores = {}
+
+    def iniciar(self):
+        with self._lock:
+            if self.trabajadores:
+                return
+            recuperar_concesiones_vencidas()
+            for cola, hilos in self.colas.items():
+                for indice in range(hilos):
+                    trabajador = Trabajador(cola, f'{self.identificador_base}:{cola}:{indice}', self)
+                    trabajador.start()
+                    self.trabajadores.append(trabajador)
+            threading.Thread(target=self._latir, name='tareas-latido', daemon=True).start()
+
+    def _latir(self):
+        """Renueva las concesiones de las tareas en curso del proceso y recupera las vencidas"""
+        while not self.detenido.wait(RENOVACION):
+            try:
+                renovar_concesiones(self.identificador_base)
+                recuperar_concesiones_vencidas()
+            except Exception:
+                logger.exception("[TAREAS] Error al renovar las concesiones")
+            finally:
+                close_old_connections()
+
+    def despertar(self):
+        self.iniciar()
+        with self._hay_trabajo:
+            self._hay_trabajo.notify_all()
+
+    def esperar_trabajo(self, segundos):
+        with self._hay_trabajo:
+            self._hay_trabajo.wait(segundos)
+
+    def detener(self, drenar=False, timeout=60):
+        """Detiene los trabajadores; con drenar=True antes ejecutan las tareas ya listas"""
+        self.drenando = drenar
+        if not drenar:
+            self.detenido.set()
+        self.despertar_todos()
+        for trabajador in self.trabajadores:
+            trabajador.join(timeout)
+        self.detenido.set()
+
+    def despertar_todos(self):
+        with self._hay_trabajo:
+            self._hay_trabajo.notify_all()
+
+    def contar(self, cola, clave):
+        with self._lock:
+            por_cola = self.contadores.setdefault(cola, {'completadas': 0, 'reintentadas': 0, 'fallidas': 0})
+            por_cola[clave] += 1
+        TAREAS.labels(cola, clave).inc()
+
+    def estadisticas(self):
+        with self._lock:
+            contadores = {cola: dict(valores) for cola, valores in self.contadores.items()}
+        return {
+            'modo': MODO,
+            'hilos': len(self.trabajadores),
+            'proceso': contadores,
+            'bd': {
+                f"{fila['cola']}:{fila['estado']}": fila['total']
+                for fila in Tarea.objects.exclude(estado=Tarea.Estado.COMPLETADA)
+                .values('cola', 'estado').annotate(total=Count('pk'))
+            },
+        }
+
+# ========================================
+# MANTENIMIENTO
+# ========================================
+
+def renovar_concesiones(identificador_base):
+    """Extiende la concesión de las tareas en curso de los trabajadores de un proceso"""
+    return Tarea.objects.filter(
+        estado=Tarea.Estado.EN_CURSO, bloqueada_por__startswith=f'{identificador_base}:'
+    ).update(bloqueada_hasta=timezone.now() + timedelta(seconds=CONCESION))
+
+
+def recuperar_concesiones_vencidas():
+    """Devuelve a la cola las tareas cuyo trabajador dejó de renovar la concesión"""
+    return Tarea.objects.filter(
+        estado=Tarea.Estado.EN_CURSO, bloqueada_hasta__lt=timezone.now()
+    ).update(estado=Tarea.Estado.PENDIENTE, bloqueada_hasta=None, bloqueada_por='')
+
+
+def purgar_completadas(dias=RETENCION_DIAS):
+    """Borra las tareas completadas hace más de 'dias' días (libera sus claves de idempotencia)"""
+    limite = timezone.now() - timedelta(days=dias)
+    borradas, _ = Tarea.objects.filter(estado=Tarea.Estado.COMPLETADA, fecha_fin__lt=limite).delete()
+    return borradas
+
+
+# Instancia única por proceso (trabajadores en hilos en modo 'hilos' y para run_workers)
+despachador_local = Despachador()
+
+
+def _drenar_al_salir():
+    if despachador_local.trabajadores:
+        despachador_local.detener(drenar=True)
+
+
+atexit.register(_drenar_al_salir)
@@ -1,3 +1,1159 @@
-from django.test import TestCase
+# ========================================
+# TESTS DE LA API - SEISMIC TRACKER
+# PROPÓSITO: Comportamiento de los endpoints y servicios, consultas SQL por endpoint y planes de consulta
+# ========================================
 
-# Create your tests here.
+"""
+Tests de la app api, agrupados por secciones.
+
+Consultas y planes (ConsultasPorEndpointTests):
+1. Número de consultas: cada caso (endpoint + parámetros) fija cuántas
+   consultas hace y se comprueba con varios tamaños de datos. Un N+1 cambia
+   el número al crecer los datos; un filtro o serializer nuevo que consulte
+   de más cambia el número fijado
+2. Planes de consulta: se pide el plan de las consultas que hace cada caso
+   (EXPLAIN QUERY PLAN en SQLite, EXPLAIN en PostgreSQL, SET SHOWPLAN_ALL en
+   SQL Server) y se falla si alguna tabla caliente se lee con un escaneo
+   completo (Seq Scan, Table Scan, Clustered Index Scan sin ORDERED) o se
+   ordena en memoria (Sort). Las excepciones legítimas (p. ej. búsqueda por
+   subcadena) se declaran en el propio caso o, si dependen del motor, en
+   EXCEPCIONES_POR_MOTOR. PostgreSQL penaliza Seq Scan y Sort para que con
+   tablas pequeñas solo aparezcan si no hay índice; SQL Server no tiene un
+   ajuste equivalente y con tan pocas filas puede preferir un escaneo, así que
+   un fallo allí debe confirmarse con datos de tamaño real
+
+El snapshot y el nivel frío se desactivan (api/benchmark.entorno_aislado)
+para que todas las lecturas lleguen a la base de datos.
+
+El resto de secciones cubren el comportamiento de cada servicio (caché de
+autenticación, ingesta y revisiones, series...), incluidos sus casos de
+carrera y de borde.
+
+Ejecución: python manage.py test api
+"""
+
+import hashlib
+import io
+import json
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from django.core.cache import cache
+from django.core import mail
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection, transaction
+from django.http import QueryDict
+from django.test import (
+    AsyncClient, Client, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import cache_usuarios
+from . import alertas, almacen
+from .benchmark import entorno_aislado
+from . import metricas, trazas
+from .consultas import ContadorConsultas
+from .declustering import actualizar_secuencias_incremental, clasificar_eventos, inicio_afectado
+from .ingesta import ingerir_features
+from .signals import encolar_postproceso_ingesta, postprocesar_ingesta
+from .spatial import IndiceCercania, indice_cercania
+from .tareas import Despachador, Trabajador, encolar, recuperar_concesiones_vencidas, renovar_concesiones, tarea
+from . import tiering
+from .models import (
+    ArchivoContenido, CeldaSuscripcion, EntregaAlerta, EventoSismico, Noticia, RevisionEvento, SuscripcionAlerta,
+    Tarea, Usuario,
+)
+from .serializers import MyTokenObtainPairSerializer
+from .series import reducir_min_max
+from .snapshot import MANIFIESTO, consultar_snapshot, escribir_snapshot
+from .sinteticos import borrar_sinteticos, contar_sinteticos, generar_catalogo, insertar_catalogo
+from .throttling import BucketsEnMemoria, limitador
+
+TAMANOS = (5, 60)  # Filas de cada tabla con las que se repite cada caso
+TABLAS_CALIENTES = ('api_eventosismico', 'api_revisionevento', 'api_noticia', 'api_terminonoticia', 'api_usuario')
+MOTORES_CON_PLAN = ('sqlite', 'postgresql', 'microsoft')
+
+# (nombre, rol, ruta, consultas, excepciones del plan)
+# Las rutas pueden usar {sismo} y {noticia} (pk de una fila existente), {usgs} (id_evento_usgs)
+# y {lote} (tres id_evento_usgs existentes y uno inexistente).
+# Excepciones: 'escaneo' (escaneo completo permitido), 'orden' (ordenación en memoria permitida)
+CASOS = (
+    # EventoSismicoViewSet: autorización por claims, sin consulta del usuario
+    ('sismos_mapa', 'visitante', '/api/sismos/?magnitud__gte=4.5', 2, ()),
+    ('sismos_mapa_fecha', 'visitante', '/api/sismos/?magnitud__gte=4.5&fecha_hora_evento__date={hoy}', 2, ()),
+    ('sismos_sondeo', 'visitante', '/api/sismos/?since_date={ayer}', 2, ()),
+    ('sismos_bbox', 'visitante', '/api/sismos/?since_date={ayer}&lat_min=0&lat_max=20&lng_min=-100&lng_max=-75', 2, ()),
+    ('sismos_orden_magnitud', 'visitante', '/api/sismos/?ordering=-magnitud', 2, ()),
+    # icontains sobre lugar_descripcion: ningún índice B-tree sirve para '%texto%'
+    ('sismos_busqueda', 'visitante', '/api/sismos/?search=Chile', 2, ('escaneo',)),
+    ('sismos_detalle', 'visitante', '/api/sismos/{sismo}/', 1, ()),
+    ('sismos_serie', 'visitante', '/api/sismos/series/?magnitud__gte=4.5&points=20', 1, ()),
+    ('sismos_serie_sondeo', 'visitante', '/api/sismos/series/?since_date={ayer}&points=20', 1, ()),
+    ('sismos_revisiones', 'visitante', '/api/sismos/{sismo}/revisions/', 2, ()),
+    ('sismos_usgs', 'visitante', '/api/sismos/usgs/{usgs}/', 1, ()),
+    ('sismos_lote', 'visitante', '/api/sismos/batch/?ids={lote}', 1, ()),
+    ('sismos_publicos', 'anonimo', '/api/sismos/public/', 1, ()),
+    ('sismos_diagnostico', 'anonimo', '/api/sismos/diagnostics/', 3, ()),
+    # NoticiaViewSet (caché del listado vaciada antes de cada petición)
+    ('noticias_lista', 'visitante', '/api/noticias/', 1, ()),
+    ('noticias_pagina', 'visitante', '/api/noticias/?page_size=10', 1, ()),
+    # Solo se ordenan las noticias que contienen los términos
+    ('noticias_busqueda', 'visitante', '/api/noticias/?search=sismo', 1, ('orden',)),
+    ('noticias_detalle', 'visitante', '/api/noticias/{noticia}/', 1, ()),
+    # UserManagementViewSet: usuario (caché de autenticación vacía) + página
+    ('usuarios_lista', 'admin', '/api/admin/users/', 2, ()),
+    ('usuarios_busqueda', 'admin', '/api/admin/users/?search=vis', 2, ()),
+    ('usuarios_activos', 'admin', '/api/admin/users/?is_active=true&ordering=-last_login', 2, ()),
+    ('usuarios_registro', 'admin', '/api/admin/users/?registrado_desde={ayer}&ordering=date_joined', 2, ()),
+)
+
+# Excepciones que solo valen para un motor
+EXCEPCIONES_POR_MOTOR = {
+    # PostgreSQL pone los nulos primero en DESC: 'last_login DESC NULLS LAST' no sale del índice
+    'postgresql': {'usuarios_activos': ('orden',)},
+}
+
+# ========================================
+# EXPLAIN POR MOTOR
+# ========================================
+
+def plan_de(sql, parametros=()):
+    """Líneas del plan de una consulta (None si el motor no está soportado)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parametros)
+            return [fila[-1] for fila in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            # Con tablas pequeñas PostgreSQL prefiere siempre Seq Scan y Sort: se
+            # penalizan para que solo aparezcan cuando no hay ningún índice utilizable
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+            cursor.execute(f'EXPLAIN {sql}', parametros)
+            return [fila[0] for fila in cursor.fetchall()]
+        if connection.vendor == 'microsoft':
+            # Con SHOWPLAN_ALL activo la consulta no se ejecuta: devuelve una fila por
+            # operador del plan estimado (PhysicalOp en la columna 4, Argument en la 6)
+            cursor.execute('SET SHOWPLAN_ALL ON')
+            try:
+                cursor.execute(sql, parametros)
+                filas = cursor.fetchall()
+            finally:
+                cursor.execute('SET SHOWPLAN_ALL OFF')
+            return [f'{fila[4]}: {fila[6] or ""}' for fila in filas if fila[4]]
+    return None
+
+
+def _tabla_caliente(texto):
+    return any(re.search(rf'\b{tabla}\b', texto) for tabla in TABLAS_CALIENTES)
+
+
+def problemas_del_plan(lineas):
+    """Escaneos completos de tablas calientes ('escaneo') y ordenaciones en memoria ('orden')"""
+    problemas = set()
+    for linea in lineas:
+        if connection.vendor == 'sqlite':
+            escaneo = re.match(r'\s*SCAN (\w+)\s*$', linea)  # 'SCAN t USING INDEX' recorre un índice: válido
+            if escaneo and escaneo.group(1) in TABLAS_CALIENTES:
+                problemas.add('escaneo')
+            if 'USE TEMP B-TREE FOR ORDER BY' in linea:
+                problemas.add('orden')
+        elif connection.vendor == 'microsoft':
+            operador, _, argumento = linea.partition(': ')
+            # Un Clustered Index Scan ORDERED recorre el índice en orden (p. ej. TOP n por pk): válido
+            completo = operador == 'Table Scan' or (operador == 'Clustered Index Scan' and 'ORDERED' not in argumento)
+            if completo and _tabla_caliente(argumento):
+                problemas.add('escaneo')
+            if operador in ('Sort', 'Top N Sort'):
+                problemas.add('orden')
+        else:
+            escaneo = re.search(r'Seq Scan on (\w+)', linea)
+            if escaneo and escaneo.group(1) in TABLAS_CALIENTES:
+                problemas.add('escaneo')
+            if re.match(r'\s*(->\s*)?(Incremental )?Sort\b', linea):
+                problemas.add('orden')
+    return problemas
+
+
+@contextmanager
+def consultas_ejecutadas():
+    """Recoge (sql, parámetros) de cada consulta, sin interpolar: se reutilizan para pedir su plan"""
+    consultas = []
+
+    def registrar(execute, sql, parametros, many, contexto):
+        consultas.append((sql, parametros))
+        return execute(sql, parametros, many, contexto)
+
+    with connection.execute_wrapper(registrar):
+        yield consultas
+
+# ========================================
+# TESTS
+# ========================================
+
+class ConsultasPorEndpointTests(TestCase):
+    """Número de consultas y planes de los endpoints de lectura"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_user(
+            username='admin-test', email='admin@test.invalid', password='x', tipo_usuario='ADMINISTRADOR'
+        )
+        cls.visitante = Usuario.objects.create_user(
+            username='visitante-test', email='visitante@test.invalid', password='x', tipo_usuario='VISITANTE'
+        )
+
+    def setUp(self):
+        self.clientes = {
+            'anonimo': Client(),
+            'visitante': Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.visitante)}'),
+            'admin': Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}'),
+        }
+        entorno = entorno_aislado(tempfile.mkdtemp(prefix='tests-snapshot-'))
+        entorno.__enter__()
+        self.addCleanup(entorno.__exit__, None, None, None)
+
+    def sembrar_hasta(self, tamano):
+        """Sismos, noticias y visitantes hasta 'tamano' filas de cada tipo"""
+        ahora = timezone.now()
+        actuales = contar_sinteticos('test')
+        if actuales < tamano:
+            columnas = generar_catalogo(tamano - actuales, semilla=actuales, dias=3, fin=ahora)
+            insertar_catalogo(columnas, prefijo='test', desplazamiento=actuales)
+
+        for i in range(Noticia.objects.count(), tamano):
+            # post_save prerenderiza e indexa la noticia para la búsqueda
+            Noticia.objects.create(
+                titulo=f'Noticia {i} sobre el sismo',
+                contenido=f'<p>Reporte número {i} del sismo y sus réplicas.</p>',
+            )
+
+        visitantes = Usuario.objects.filter(tipo_usuario='VISITANTE').count()
+        Usuario.objects.bulk_create([
+            Usuario(username=f'vis{i}', email=f'vis{i}@test.invalid', tipo_usuario='VISITANTE',
+                    last_login=ahora - timedelta(hours=i))
+            for i in range(visitantes, tamano)
+        ])
+
+    def ruta(self, plantilla):
+        ahora = timezone.now()
+        ids_usgs = list(EventoSismico.objects.values_list('id_evento_usgs', flat=True)[:3])
+        return plantilla.format(
+            sismo=EventoSismico.objects.values_list('pk', flat=True).first(),
+            usgs=ids_usgs[0],
+            lote=','.join(ids_usgs + ['no-existe']),
+            noticia=Noticia.objects.values_list('pk', flat=True).first(),
+            hoy=ahora.date().isoformat(),
+            ayer=(ahora - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        )
+
+    def pedir(self, rol, ruta):
+        """GET con cachés vacías: se miden siempre las consultas del caso frío"""
+        cache.clear()
+        cache_usuarios.limpiar()
+        respuesta = self.clientes[rol].get(ruta)
+        self.assertEqual(respuesta.status_code, 200, f'{ruta}: {respuesta.content[:200]}')
+        return respuesta
+
+    def test_numero_de_consultas_constante(self):
+        for tamano in TAMANOS:
+            self.sembrar_hasta(tamano)
+            for nombre, rol, plantilla, consultas, _ in CASOS:
+                with self.subTest(caso=nombre, tamano=tamano):
+                    ruta = self.ruta(plantilla)
+                    with self.assertNumQueries(consultas):
+                        self.pedir(rol, ruta)
+
+    def test_planes_sin_escaneos_ni_ordenaciones(self):
+        if connection.vendor not in MOTORES_CON_PLAN:
+            self.skipTest(f'EXPLAIN no soportado para {connection.vendor}')
+        self.sembrar_hasta(TAMANOS[-1])
+        for nombre, rol, plantilla, _, excepciones in CASOS:
+            with self.subTest(caso=nombre):
+                ruta = self.ruta(plantilla)
+                with consultas_ejecutadas() as consultas:
+                    self.pedir(rol, ruta)
+                for sql, parametros in consultas:
+                    if not sql.lstrip().upper().startswith('SELECT'):
+                        continue
+                    lineas = plan_de(sql, parametros)
+                    permitidos = set(excepciones) | set(EXCEPCIONES_POR_MOTOR.get(connection.vendor, {}).get(nombre, ()))
+                    problemas = problemas_del_plan(lineas) - permitidos
+                    self.assertFalse(
+                        problemas,
+                        f"{nombre}: {', '.join(sorted(problemas))}\n{sql}\n{parametros}\n" + '\n'.join(lineas),
+                    )
+
+    def test_planes_detectan_escaneo_sin_indice(self):
+        """El detector marca una consulta sin índice utilizable (control del propio harness)"""
+        if connection.vendor not in MOTORES_CON_PLAN:
+            self.skipTest(f'EXPLAIN no soportado para {connection.vendor}')
+        self.sembrar_hasta(TAMANOS[0])
+        consulta = EventoSismico.objects.filter(profundidad__gt=10).order_by('lugar_descripcion')
+        self.assertEqual(problemas_del_plan(plan_de(*consulta.query.sql_with_params())), {'escaneo', 'orden'})
+
+
+class EventosPorUsgsTests(TestCase):
+    """Detalle y lote por id_evento_usgs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = Usuario.objects.create_user(
+            username='visitante-test', email='visitante@test.invalid', password='x', tipo_usuario='VISITANTE'
+        )
+        cls.token = f'Bearer {AccessToken.for_user(usuario)}'
+        insertar_catalogo(generar_catalogo(5, semilla=1, dias=3, fin=timezone.now()), prefijo='test')
+        cls.ids = list(EventoSismico.objects.order_by('pk').values_list('id_evento_usgs', flat=True))
+
+    def setUp(self):
+        self.cliente = Client(HTTP_AUTHORIZATION=self.token)
+        entorno = entorno_aislado(tempfile.mkdtemp(prefix='tests-snapshot-'))
+        entorno.__enter__()
+        self.addCleanup(entorno.__exit__, None, None, None)
+
+    def test_detalle(self):
+        respuesta = self.cliente.get(f'/api/sismos/usgs/{self.ids[0]}/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['id_evento_usgs'], self.ids[0])
+        self.assertEqual(self.cliente.get('/api/sismos/usgs/no-existe/').status_code, 404)
+
+    def test_lote_conserva_orden_e_informa_faltantes(self):
+        pedidos = [self.ids[3], 'falta-1', self.ids[0], self.ids[3], 'falta-2']
+        for respuesta in (
+            self.cliente.get('/api/sismos/batch/', {'ids': ','.join(pedidos)}),
+            self.cliente.post('/api/sismos/batch/', {'ids': pedidos}, content_type='application/json'),
+        ):
+            self.assertEqual(respuesta.status_code, 200)
+            datos = respuesta.json()
+            self.assertEqual([e['id_evento_usgs'] for e in datos['eventos']], [self.ids[3], self.ids[0]])
+            self.assertEqual(datos['no_encontrados'], ['falta-1', 'falta-2'])
+
+    def test_lote_valida_ids(self):
+        self.assertEqual(self.cliente.get('/api/sismos/batch/?ids=,,').status_code, 400)
+        demasiados = ','.join(f'id{i}' for i in range(501))
+        self.assertEqual(self.cliente.get('/api/sismos/batch/', {'ids': demasiados}).status_code, 400)
+        respuesta = self.cliente.post('/api/sismos/batch/', {'ids': 'a,b'}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+
+
+def _feature(usgs_id, magnitud=5.0, profundidad=10.0, lugar='Costa de Chile'):
+    return {
+        'id': usgs_id,
+        'properties': {'mag': magnitud, 'place': lugar, 'time': 1_700_000_000_000, 'url': None},
+        'geometry': {'coordinates': [-71.5, -33.0, profundidad]},
+    }
+
+
+class RevisionesIngestaTests(TestCase):
+    """Ingesta que solo escribe cambios reales y guarda su historial"""
+
+    def test_reingesta_sin_cambios_no_escribe(self):
+        ingerir_features([_feature('rev1'), _feature('rev2')], notificar=False)
+        with CaptureQueriesContext(connection) as capturadas:
+            resumen = ingerir_features([_feature('rev1'), _feature('rev2')], notificar=False)
+        escrituras = [q['sql'] for q in capturadas.captured_queries if not q['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertEqual(escrituras, [])
+        self.assertEqual((resumen['nuevos'], resumen['actualizados'], resumen['sin_cambios']), ([], [], 2))
+        self.assertFalse(RevisionEvento.objects.exists())
+
+    def test_revision_registra_solo_campos_cambiados(self):
+        nuevos = ingerir_features([_feature('rev1'), _feature('rev2')], notificar=False)['nuevos']
+        resumen = ingerir_features([_feature('rev1', magnitud=5.3, profundidad=12.5), _feature('rev2')], notificar=False)
+        evento = EventoSismico.objects.get(id_evento_usgs='rev1')
+        self.assertEqual(resumen['actualizados'], [evento.pk])
+        self.assertIn(evento.pk, nuevos)
+        self.assertEqual((evento.magnitud, evento.profundidad), (5.3, 12.5))
+
+        usuario = Usuario.objects.create_user(
+            username='visitante-test', email='visitante@test.invalid', password='x', tipo_usuario='VISITANTE'
+        )
+        cliente = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(usuario)}')
+        datos = cliente.get(f'/api/sismos/{evento.pk}/revisions/').json()
+        self.assertEqual(len(datos['revisiones']), 1)
+        self.assertEqual(datos['revisiones'][0]['cambios'], {'magnitud': [5.0, 5.3], 'profundidad': [10.0, 12.5]})
+
+
+class SerieMagnitudesTests(TestCase):
+    """Reducción min/max por cubeta de la serie magnitud/tiempo"""
+
+    def test_reduccion_conserva_extremos_y_orden(self):
+        rng = np.random.default_rng(0)
+        tiempos = rng.integers(0, 10**10, 50_000)
+        magnitudes = rng.uniform(2.5, 6.0, 50_000)
+        magnitudes[123] = 9.1
+        reducidos, magnitudes_reducidas = reducir_min_max(tiempos, magnitudes, 500)
+        self.assertLessEqual(len(reducidos), 500)
+        self.assertTrue(np.all(np.diff(reducidos) >= 0))
+        self.assertIn(tiempos[123], reducidos)
+        self.assertEqual(magnitudes_reducidas.max(), 9.1)
+        self.assertEqual(magnitudes_reducidas.min(), magnitudes.min())
+
+    def test_serie_corta_sin_reducir(self):
+        tiempos, magnitudes = reducir_min_max(np.array([3, 1, 2]), np.array([5.0, 4.0, 6.0]), 100)
+        self.assertEqual(tiempos.tolist(), [1, 2, 3])
+        self.assertEqual(magnitudes.tolist(), [4.0, 6.0, 5.0])
+
+
+# ========================================
+# CACHÉ DE AUTENTICACIÓN
+# ========================================
+
+class AutenticacionCacheadaTests(TestCase):
+    """Lecturas desde la caché de usuarios; escrituras siempre con la fila de la BD"""
+
+    def setUp(self):
+        cache_usuarios.limpiar()
+        self.admin = Usuario.objects.create_user(
+            username='admin-test', email='admin@test.invalid', password='x', tipo_usuario='ADMINISTRADOR'
+        )
+        self.cliente = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def test_lectura_usa_la_cache(self):
+        self.assertEqual(self.cliente.get('/api/perfil/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cliente.get('/api/perfil/').status_code, 200)
+
+    def test_escritura_no_restaura_columnas_obsoletas(self):
+        self.cliente.get('/api/perfil/')  # El usuario queda en la caché
+        # Otro proceso lo degrada (sin señales en este proceso)
+        Usuario.objects.filter(pk=self.admin.pk).update(tipo_usuario='VISITANTE')
+        respuesta = self.cliente.patch('/api/perfil/', {'first_name': 'x'}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.admin.refresh_from_db()
+        self.assertEqual((self.admin.first_name, self.admin.tipo_usuario), ('x', 'VISITANTE'))
+
+    def test_escritura_de_usuario_desactivado_se_rechaza(self):
+        self.cliente.get('/api/perfil/')
+        Usuario.objects.filter(pk=self.admin.pk).update(tipo_usuario='VISITANTE', is_active=False)
+        respuesta = self.cliente.patch('/api/perfil/', {'first_name': 'x'}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 401)
+        self.admin.refresh_from_db()
+        self.assertEqual((self.admin.tipo_usuario, self.admin.is_active, self.admin.first_name), ('VISITANTE', False, ''))
+
+    def test_guardar_usuario_invalida_su_entrada(self):
+        self.cliente.get('/api/perfil/')
+        self.admin.first_name = 'Nuevo'
+        self.admin.save()
+        self.assertIsNone(cache_usuarios.obtener(self.admin.pk))
+
+
+# ========================================
+# CONTADOR DE CONSULTAS
+# ========================================
+
+@override_settings(CONTADOR_CONSULTAS=True)
+class ContadorConsultasTests(TestCase):
+    """X-DB-Queries en WSGI y en ASGI (consultas hechas desde hilos de sync_to_async)"""
+
+    def setUp(self):
+        cache.clear()
+        insertar_catalogo(generar_catalogo(5, semilla=2, dias=3, fin=timezone.now()), prefijo='test')
+
+    def test_cabeceras_en_vista_sincrona(self):
+        respuesta = Client().get('/api/sismos/diagnostics/')
+        self.assertEqual(respuesta['X-DB-Queries'], '3')
+        self.assertIn('X-DB-Time-Ms', respuesta)
+
+    async def test_cabeceras_en_vista_asincrona(self):
+        respuesta = await AsyncClient().get('/api/sismos/async/diagnostics/')
+        self.assertEqual(respuesta['X-DB-Queries'], '3')
+
+    def test_contadores_anidados(self):
+        externo, interno = ContadorConsultas(), ContadorConsultas()
+        with externo.en_contexto():
+            EventoSismico.objects.count()
+            with interno.en_contexto():
+                EventoSismico.objects.count()
+        self.assertEqual((externo.total, interno.total), (2, 1))
+
+
+# ========================================
+# LIMITACIÓN DE PETICIONES
+# ========================================
+
+class TokenBucketTests(TestCase):
+    """Cubetas de tokens en WSGI y ASGI (ráfaga de 2, rellenado casi nulo)"""
+
+    def setUp(self):
+        cache.clear()
+        parche = mock.patch.dict(limitador.limites, {'publico': (0.001, 2, 'ip')})
+        parche.start()
+        self.addCleanup(parche.stop)
+        limitador.backend._cubetas.clear()
+        self.addCleanup(limitador.backend._cubetas.clear)
+
+    def test_rechazo_en_vista_sincrona(self):
+        cliente = Client()
+        estados = [cliente.get('/api/sismos/public/').status_code for _ in range(3)]
+        self.assertEqual(estados, [200, 200, 429])
+        respuesta = cliente.get('/api/sismos/public/')
+        self.assertGreaterEqual(int(respuesta['Retry-After']), 1)
+
+    async def test_rechazo_en_vista_asincrona(self):
+        cliente = AsyncClient()
+        estados = [(await cliente.get('/api/sismos/async/public/')).status_code for _ in range(3)]
+        self.assertEqual(estados, [200, 200, 429])
+
+    def test_cubetas_separadas_por_ip(self):
+        for _ in range(2):
+            Client(REMOTE_ADDR='10.0.0.1').get('/api/sismos/public/')
+        self.assertEqual(Client(REMOTE_ADDR='10.0.0.1').get('/api/sismos/public/').status_code, 429)
+        self.assertEqual(Client(REMOTE_ADDR='10.0.0.2').get('/api/sismos/public/').status_code, 200)
+
+    def test_rellenado_con_el_tiempo(self):
+        cubetas = BucketsEnMemoria()
+        self.assertEqual(cubetas.consumir('k', 1, 1, 100.0), (True, 0))
+        permitido, espera = cubetas.consumir('k', 1, 1, 100.5)
+        self.assertFalse(permitido)
+        self.assertAlmostEqual(espera, 0.5)
+        self.assertTrue(cubetas.consumir('k', 1, 1, 101.5)[0])
+
+    @override_settings(DEBUG=True, CONTADOR_CONSULTAS=True)
+    def test_cadena_asgi_sin_adaptar(self):
+        # Con DEBUG, Django registra cada middleware que tiene que adaptar entre sync y async
+        with mock.patch('api.trazas.HABILITADAS', True), self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+
+# ========================================
+# TRAZAS
+# ========================================
+
+class TraceparentTests(TestCase):
+    """La bandera de muestreo entrante solo se respeta desde ORIGENES_CONFIABLES"""
+
+    TRACEPARENT = '00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01'
+
+    def setUp(self):
+        cache.clear()
+        for parche in (
+            mock.patch.object(trazas, 'HABILITADAS', True),
+            mock.patch.object(trazas, 'MUESTREO', 0),
+            mock.patch.object(trazas, 'ORIGENES_CONFIABLES', (trazas.ipaddress.ip_network('10.0.0.0/8'),)),
+            mock.patch.object(trazas.exportador, 'enviar'),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def _traza(self, ip):
+        respuesta = Client(REMOTE_ADDR=ip).get('/api/sismos/diagnostics/', headers={'traceparent': self.TRACEPARENT})
+        return respuesta.get('X-Trace-Id')
+
+    def test_origen_confiable_fuerza_el_muestreo(self):
+        self.assertEqual(self._traza('10.1.2.3'), '0af7651916cd43dd8448eb211c80319c')
+
+    def test_cliente_externo_no_fuerza_el_muestreo(self):
+        self.assertIsNone(self._traza('203.0.113.7'))
+
+    def test_cliente_externo_conserva_el_traza_id_si_se_muestrea(self):
+        with mock.patch.object(trazas, 'MUESTREO', 1):
+            self.assertEqual(self._traza('203.0.113.7'), '0af7651916cd43dd8448eb211c80319c')
+
+
+# ========================================
+# MÉTRICAS PROMETHEUS
+# ========================================
+
+class MetricasPrometheusTests(TestCase):
+
+    def test_ip_permitida_se_resuelve_tras_el_proxy(self):
+        with mock.patch.object(metricas, 'IPS_PERMITIDAS', ['127.0.0.1']), \
+                mock.patch.object(limitador, 'num_proxies', 1):
+            # El proxy local reenvía a un cliente externo: no debe heredar el permiso del proxy
+            externo = Client(REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.7').get('/metrics')
+            local = Client(REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='127.0.0.1').get('/metrics')
+        self.assertEqual(externo.status_code, 403)
+        self.assertEqual(local.status_code, 200)
+
+    def test_metodos_desconocidos_comparten_etiqueta(self):
+        for metodo in ('PROPFIND', 'XYZZY'):
+            Client().generic(metodo, '/api/sismos/public/')
+        texto = metricas.generar().decode()
+        self.assertIn('metodo="otro"', texto)
+        self.assertNotIn('metodo="XYZZY"', texto)
+
+
+# ========================================
+# DECLUSTERING
+# ========================================
+
+def _evento(usgs_id, fecha, magnitud, latitud=-33.0, longitud=-71.5):
+    return EventoSismico.objects.create(
+        id_evento_usgs=usgs_id, latitud=latitud, longitud=longitud, profundidad=10.0,
+        magnitud=magnitud, fecha_hora_evento=fecha,
+    )
+
+
+class DeclusteringTests(TestCase):
+    """Ventanas de Gardner–Knopoff y reclasificación incremental tras la ingesta"""
+
+    def setUp(self):
+        self.t0 = timezone.now() - timedelta(days=30)
+
+    def test_principal_replica_y_fondo(self):
+        eventos = [
+            (1, self.t0, -33.0, -71.5, 6.0),
+            (2, self.t0 + timedelta(days=1), -33.05, -71.5, 4.0),  # ~6 km, dentro de la ventana de M6
+            (3, self.t0 + timedelta(days=1), 35.0, 139.0, 4.0),  # Japón: fuera de la ventana
+            (4, self.t0 - timedelta(days=1), -33.05, -71.5, 4.0),  # Anterior al principal: no es réplica
+        ]
+        resultado = clasificar_eventos(eventos)
+        self.assertEqual(resultado[1], (EventoSismico.TipoSecuencia.PRINCIPAL, 1))
+        self.assertEqual(resultado[2], (EventoSismico.TipoSecuencia.REPLICA, 1))
+        self.assertEqual(resultado[3], (EventoSismico.TipoSecuencia.FONDO, None))
+        self.assertEqual(resultado[4], (EventoSismico.TipoSecuencia.FONDO, None))
+
+    def test_retroceso_acotado_por_magnitudes_cercanas(self):
+        # Un M8 de hace más de diez años ya no alcanza a nadie: no debe fijar el retroceso
+        _evento('viejo', self.t0 - timedelta(days=4000), 8.0)
+        pequeno = _evento('pequeno', self.t0 - timedelta(hours=12), 2.0)
+        self.assertEqual(inicio_afectado(self.t0), pequeno.fecha_hora_evento)
+
+    def test_retroceso_incluye_sismo_grande_en_ventana(self):
+        grande = _evento('grande', self.t0 - timedelta(days=400), 7.0)  # Ventana de ~920 días
+        _evento('pequeno', self.t0 - timedelta(hours=12), 2.0)
+        self.assertEqual(inicio_afectado(self.t0), grande.fecha_hora_evento)
+
+    def test_sin_eventos_anteriores(self):
+        self.assertEqual(inicio_afectado(self.t0), self.t0)
+
+    def test_evento_revisado_se_reclasifica(self):
+        principal = _evento('principal', self.t0, 6.0)
+        # Llegó lejos del principal; una revisión de USGS lo reubica dentro de su ventana
+        revisado = _evento('revisado', self.t0 + timedelta(days=1), 4.0, latitud=35.0, longitud=139.0)
+        actualizar_secuencias_incremental([principal.pk, revisado.pk])
+        revisado.refresh_from_db()
+        self.assertEqual(revisado.tipo_secuencia, EventoSismico.TipoSecuencia.FONDO)
+
+        EventoSismico.objects.filter(pk=revisado.pk).update(latitud=-33.05, longitud=-71.5)
+        actualizar_secuencias_incremental([revisado.pk])
+        revisado.refresh_from_db()
+        self.assertEqual((revisado.tipo_secuencia, revisado.id_secuencia), (EventoSismico.TipoSecuencia.REPLICA, principal.pk))
+
+    def test_postproceso_recibe_los_actualizados(self):
+        with mock.patch.object(postprocesar_ingesta, 'encolar') as encolar:
+            encolar_postproceso_ingesta(sender=EventoSismico, nuevos=[], actualizados=[7])
+        encolar.assert_called_once_with(nuevos=[], actualizados=[7])
+
+
+# ========================================
+# ARCHIVO FRÍO
+# ========================================
+
+class ArchivoFrioTests(TestCase):
+    """Archivado a Parquet, lecturas sin duplicados y dataset en caché"""
+
+    def setUp(self):
+        self.directorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        parche = mock.patch.object(tiering, 'logger')
+        self.logger = parche.start()
+        self.addCleanup(parche.stop)
+        ahora = timezone.now()
+        self.viejos = [_evento(f'viejo{i}', ahora - timedelta(days=200 + i), 3.0 + i) for i in range(4)]
+        self.reciente = _evento('reciente', ahora - timedelta(days=1), 4.0)
+
+    def _archivar(self):
+        return tiering.archivar_eventos(edad_dias=90, directorio=self.directorio)
+
+    def _listado(self, parametros='', **kwargs):
+        return tiering.combinar_con_archivo(
+            EventoSismico.objects.all(), QueryDict(parametros), ['fecha_hora_evento', 'magnitud'],
+            directorio=self.directorio, **kwargs
+        )
+
+    def test_archiva_y_combina_con_la_bd(self):
+        self.assertFalse(tiering.hay_archivo(self.directorio))
+        self.assertEqual(self._archivar(), 4)
+        self.assertEqual(list(EventoSismico.objects.all()), [self.reciente])
+        self.assertTrue(tiering.hay_archivo(self.directorio))
+        ids = [e.id_evento_usgs for e in self._listado()]
+        self.assertEqual(ids, ['reciente', 'viejo0', 'viejo1', 'viejo2', 'viejo3'])
+
+    def test_archivar_conserva_revisiones(self):
+        RevisionEvento.objects.create(evento=self.viejos[0], fecha=timezone.now(), cambios={'magnitud': [2.9, 3.0]})
+        self._archivar()
+        self.assertEqual(RevisionEvento.objects.filter(evento_id=self.viejos[0].pk).count(), 1)
+
+    def test_caida_entre_escritura_y_borrado_no_duplica(self):
+        # SystemExit no lo captura la limpieza: equivale a matar el proceso tras escribir el Parquet
+        with mock.patch('django.db.models.query.QuerySet.delete', side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                self._archivar()
+        self.assertEqual(EventoSismico.objects.count(), 5)
+        # Mientras tanto, los eventos están en ambos niveles y el listado no los repite
+        self.assertEqual(len(self._listado()), 5)
+
+        self._archivar()
+        self.assertEqual(len(list(self.directorio.glob('anio=*/mes=*/*.parquet'))), len(
+            {(e.fecha_hora_evento.year, e.fecha_hora_evento.month) for e in self.viejos}
+        ))
+        self.assertEqual(tiering._dataset(self.directorio).count_rows(), 4)
+
+    def test_duplicado_entre_archivos_se_lee_una_vez(self):
+        self._archivar()
+        # Copia de un archivo con otro nombre: los mismos eventos en dos archivos
+        original = next(self.directorio.glob('anio=*/mes=*/*.parquet'))
+        shutil.copy(original, original.with_name('part-copia.parquet'))
+        tiering._marcar_cambio(self.directorio)
+        self.assertEqual(len(self._listado()), 5)
+        encontrados = tiering.buscar_por_usgs(['viejo0', 'viejo3'], directorio=self.directorio)
+        self.assertEqual(sorted(e.id_evento_usgs for e in encontrados), ['viejo0', 'viejo3'])
+
+    def test_listado_limita_los_archivados_por_orden(self):
+        self._archivar()
+        ids = [e.id_evento_usgs for e in self._listado('ordering=-magnitud', limite=2)]
+        self.assertEqual(ids, ['viejo3', 'viejo2', 'reciente'])
+        self.logger.warning.assert_called_once()
+
+    def test_dataset_en_cache_hasta_que_cambia_el_archivo(self):
+        self._archivar()
+        dataset = tiering._dataset(self.directorio)
+        with mock.patch.object(Path, 'glob') as glob:
+            self.assertIs(tiering._dataset(self.directorio), dataset)
+        glob.assert_not_called()
+        tiering._marcar_cambio(self.directorio)
+        self.assertIsNot(tiering._dataset(self.directorio), dataset)
+
+    def test_listado_sin_limite_no_se_resuelve_desde_el_snapshot(self):
+        self._archivar()
+        directorio_snapshot = Path(tempfile.mkdtemp(prefix='tests-snapshot-'))
+        self.addCleanup(shutil.rmtree, directorio_snapshot, ignore_errors=True)
+        entorno = entorno_aislado(directorio_snapshot)
+        entorno.__enter__()
+        self.addCleanup(entorno.__exit__, None, None, None)
+
+        # El nivel frío de la prueba sustituye al configurado, en el snapshot y en la vista
+        hay_archivo = lambda: tiering.hay_archivo(self.directorio)  # noqa: E731
+        for parche in (
+            mock.patch('api.snapshot.hay_archivo', hay_archivo),
+            mock.patch('api.views.hay_archivo', hay_archivo),
+            mock.patch('api.views.combinar_con_archivo',
+                       partial(tiering.combinar_con_archivo, directorio=self.directorio)),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+        escribir_snapshot(ventana_dias=30, directorio=directorio_snapshot)
+        meta = json.loads((directorio_snapshot / MANIFIESTO).read_text())
+        self.assertFalse(meta['cubre_todo'])
+        usuario = Usuario.objects.create_user(username='frio', email='frio@test.invalid', password='x')
+        cliente = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(usuario)}')
+        ids = [e['id_evento_usgs'] for e in cliente.get('/api/sismos/').json()]
+        self.assertEqual(ids, ['reciente', 'viejo0', 'viejo1', 'viejo2', 'viejo3'])
+        # Con un límite dentro de la ventana, el snapshot sí responde
+        desde = (timezone.now() - timedelta(days=7)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.assertEqual([e.id_evento_usgs for e in consultar_snapshot(QueryDict(f'since_date={desde}'))], ['reciente'])
+
+
+# ========================================
+# ALMACÉN DIRECCIONADO POR CONTENIDO
+# ========================================
+
+class BorrarSinteticosTests(TestCase):
+    """Borrado por tramos de pk de los catálogos sintéticos"""
+
+    def test_borra_por_tramos_solo_el_prefijo(self):
+        insertar_catalogo(generar_catalogo(25, semilla=1, dias=3), prefijo='borr')
+        real = _evento('us-real', timezone.now(), 4.0)
+        sintetico = EventoSismico.objects.filter(id_evento_usgs__startswith='borr').first()
+        RevisionEvento.objects.create(evento=sintetico, fecha=timezone.now(), cambios={'magnitud': [2.0, 2.1]})
+        RevisionEvento.objects.create(evento=real, fecha=timezone.now(), cambios={'magnitud': [3.9, 4.0]})
+
+        avances = []
+        self.assertEqual(borrar_sinteticos('borr', tamano_lote=10, progreso=lambda h, t: avances.append((h, t))), 25)
+        self.assertEqual(avances, [(10, 25), (20, 25), (25, 25)])
+        self.assertEqual(list(EventoSismico.objects.values_list('pk', flat=True)), [real.pk])
+        self.assertEqual(list(RevisionEvento.objects.values_list('evento_id', flat=True)), [real.pk])
+
+    def test_ampliar_con_la_misma_semilla_no_duplica_eventos(self):
+        opciones = {
+            'cantidad': 10, 'semilla': 0, 'dias': 3, 'fin': '2026-01-01T00:00:00Z', 'prefijo': 'gen',
+            'stdout': io.StringIO(),
+        }
+        call_command('generate_sismos', **opciones)
+        call_command('generate_sismos', **opciones)
+        filas = EventoSismico.objects.values_list('latitud', 'longitud', 'fecha_hora_evento')
+        self.assertEqual(len(set(filas)), 20)
+        call_command('generate_sismos', borrar=True, **opciones)
+        self.assertEqual(contar_sinteticos('gen'), 10)
+
+
+class AlmacenContenidoTests(TestCase):
+    """Deduplicación por hash, conteo de referencias y recolección sin carreras"""
+
+    DATOS = b'imagen de prueba'
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = self.settings(MEDIA_ROOT=directorio)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _huerfano(self, ruta):
+        """Deja el archivo sin referencias desde antes del periodo de gracia"""
+        almacen.liberar([ruta])
+        ArchivoContenido.objects.filter(ruta=ruta).update(
+            sin_referencias_desde=timezone.now() - timedelta(hours=almacen.GRACIA_HORAS + 1)
+        )
+
+    def test_contenido_identico_se_guarda_una_vez(self):
+        ruta = almacen.guardar_contenido(self.DATOS, 'jpg')
+        self.assertEqual(almacen.guardar_contenido(self.DATOS, 'jpg'), ruta)
+        self.assertEqual(ArchivoContenido.objects.get(ruta=ruta).referencias, 2)
+        self.assertEqual(almacen.liberar([ruta]), 1)
+        self.assertEqual(almacen.recolectar(), 0)
+        self.assertTrue(default_storage.exists(ruta))
+
+    def test_recolecta_huerfanos_tras_la_gracia(self):
+        ruta = almacen.guardar_contenido(self.DATOS, 'jpg')
+        almacen.liberar([ruta])
+        self.assertEqual(almacen.recolectar(), 0)  # Aún dentro del periodo de gracia
+        ArchivoContenido.objects.filter(ruta=ruta).update(
+            sin_referencias_desde=timezone.now() - timedelta(hours=almacen.GRACIA_HORAS + 1)
+        )
+        self.assertEqual(almacen.recolectar(), 1)
+        self.assertFalse(default_storage.exists(ruta))
+        self.assertFalse(ArchivoContenido.objects.exists())
+
+    def test_recolector_a_mitad_de_una_subida_identica(self):
+        ruta = almacen.guardar_contenido(self.DATOS, 'jpg')
+        self._huerfano(ruta)
+        existe = default_storage.exists
+
+        def existe_y_recolecta(nombre):
+            # El recolector corre justo después de comprobar si el archivo existe
+            resultado = existe(nombre)
+            almacen.recolectar()
+            return resultado
+
+        with mock.patch.object(default_storage, 'exists', side_effect=existe_y_recolecta):
+            almacen.guardar_contenido(self.DATOS, 'jpg')
+        self.assertTrue(default_storage.exists(ruta))
+        self.assertEqual(ArchivoContenido.objects.get(ruta=ruta).referencias, 1)
+
+    def test_subida_tras_recolectar_reescribe_el_archivo(self):
+        ruta = almacen.guardar_contenido(self.DATOS, 'jpg')
+        self._huerfano(ruta)
+        almacen.recolectar()
+        self.assertEqual(almacen.guardar_contenido(self.DATOS, 'jpg'), ruta)
+        self.assertTrue(default_storage.exists(ruta))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class AlmacenConcurrenciaTests(TransactionTestCase):
+    """Recolector y subida idéntica en dos conexiones (necesita bloqueos de fila reales)"""
+
+    DATOS = AlmacenContenidoTests.DATOS
+    setUp = AlmacenContenidoTests.setUp
+    _huerfano = AlmacenContenidoTests._huerfano
+
+    def test_recolector_espera_a_la_subida_que_revive_el_archivo(self):
+        ruta = almacen.guardar_contenido(self.DATOS, 'jpg')
+        self._huerfano(ruta)
+        bloqueada = threading.Event()
+        errores = []
+
+        def subir():
+            try:
+                with transaction.atomic():
+                    # La subida bloquea la fila y sube el conteo; el recolector llega
+                    # antes de que confirme
+                    almacen._sumar_referencia(hashlib.sha256(self.DATOS).hexdigest(), ruta, len(self.DATOS))
+                    bloqueada.set()
+                    time.sleep(0.5)
+                    self.assertTrue(default_storage.exists(ruta))
+            except Exception as error:
+                errores.append(error)
+            finally:
+                bloqueada.set()
+                connection.close()
+
+        hilo = threading.Thread(target=subir)
+        hilo.start()
+        bloqueada.wait(5)
+        almacen.recolectar()
+        hilo.join(10)
+
+        self.assertEqual(errores, [])
+        self.assertEqual(ArchivoContenido.objects.get(ruta=ruta).referencias, 1)
+        self.assertTrue(default_storage.exists(ruta))
+
+
+class UrlFotoTests(TestCase):
+    """La subida sin procesar (con EXIF/GPS) nunca se publica"""
+
+    def setUp(self):
+        cache_usuarios.limpiar()
+        self.usuario = Usuario.objects.create_user(
+            username='foto-test', email='foto@test.invalid', password='x', ruta_fotografia='subida.jpg'
+        )
+        self.cliente = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.usuario)}')
+
+    def test_sin_variantes_no_hay_url(self):
+        datos = self.cliente.get('/api/perfil/').json()
+        self.assertIsNone(datos['ruta_fotografia_url'])
+        self.assertIsNone(datos['fotografia_urls'])
+        self.assertNotIn('ruta_fotografia', datos)
+        self.assertIsNone(MyTokenObtainPairSerializer.get_token(self.usuario)['ruta_fotografia'])
+
+    def test_procesada_publica_maestra_y_variantes(self):
+        Usuario.objects.filter(pk=self.usuario.pk).update(
+            ruta_fotografia='maestra.jpg', fotografia_variantes={'md': 'md.webp'}
+        )
+        cache_usuarios.limpiar()
+        datos = self.cliente.get('/api/perfil/').json()
+        self.assertTrue(datos['ruta_fotografia_url'].endswith('md.webp'))
+        self.assertEqual(set(datos['fotografia_urls']), {'original', 'md'})
+        self.assertTrue(datos['fotografia_urls']['original'].endswith('maestra.jpg'))
+
+
+# ========================================
+# COLA DE TAREAS
+# ========================================
+
+_ejecutadas = []
+
+
+@tarea(nombre='tests.anotar', max_intentos=2)
+def _anotar(valor, fallar=False):
+    if fallar:
+        raise ValueError(valor)
+    _ejecutadas.append(valor)
+
+
+class ColaTareasTests(TestCase):
+    """Toma, reintentos, concesiones renovadas y colas serializadas entre procesos"""
+
+    def setUp(self):
+        _ejecutadas.clear()
+        self.despachador = Despachador({})
+
+    def _trabajador(self, cola='default', proceso='host:1'):
+        return Trabajador(cola, f'{proceso}:{cola}:0', self.despachador)
+
+    def test_ejecuta_y_completa(self):
+        pendiente = encolar('tests.anotar', {'valor': 1})
+        self.assertTrue(self._trabajador().ejecutar_siguiente())
+        pendiente.refresh_from_db()
+        self.assertEqual((pendiente.estado, _ejecutadas), (Tarea.Estado.COMPLETADA, [1]))
+        self.assertFalse(self._trabajador().ejecutar_siguiente())
+
+    def test_reintento_y_fallo_definitivo(self):
+        pendiente = encolar('tests.anotar', {'valor': 1, 'fallar': True}, max_intentos=2)
+        with self.assertLogs('api.tareas', 'WARNING'):
+            self._trabajador().ejecutar_siguiente()
+        pendiente.refresh_from_db()
+        self.assertEqual((pendiente.estado, pendiente.intentos), (Tarea.Estado.PENDIENTE, 1))
+        self.assertGreater(pendiente.ejecutar_despues, timezone.now())
+
+        Tarea.objects.filter(pk=pendiente.pk).update(ejecutar_despues=timezone.now())
+        with self.assertLogs('api.tareas', 'ERROR'):
+            self._trabajador().ejecutar_siguiente()
+        pendiente.refresh_from_db()
+        self.assertEqual(pendiente.estado, Tarea.Estado.FALLIDA)
+        self.assertIn('ValueError', pendiente.ultimo_error)
+
+    def test_clave_de_idempotencia(self):
+        primera = encolar('tests.anotar', {'valor': 1}, clave_idempotencia='k')
+        self.assertEqual(encolar('tests.anotar', {'valor': 2}, clave_idempotencia='k').pk, primera.pk)
+
+    def test_latido_renueva_solo_las_concesiones_del_proceso(self):
+        propia = encolar('tests.anotar', {'valor': 1})
+        ajena = encolar('tests.anotar', {'valor': 2})
+        self._trabajador(proceso='host:1').tomar()
+        self._trabajador(proceso='host:2').tomar()
+        vencida = timezone.now() - timedelta(seconds=1)
+        Tarea.objects.update(bloqueada_hasta=vencida)
+
+        self.assertEqual(renovar_concesiones('host:1'), 1)
+        self.assertEqual(recuperar_concesiones_vencidas(), 1)
+        propia.refresh_from_db()
+        ajena.refresh_from_db()
+        self.assertEqual(propia.estado, Tarea.Estado.EN_CURSO)
+        self.assertGreater(propia.bloqueada_hasta, timezone.now())
+        self.assertEqual(ajena.estado, Tarea.Estado.PENDIENTE)
+
+    def test_cola_serializada_entre_procesos(self):
+        primera = encolar('tests.anotar', {'valor': 1}, cola='ingesta')
+        segunda = encolar('tests.anotar', {'valor': 2}, cola='ingesta')
+        proceso_a = self._trabajador('ingesta', 'host:1')
+        proceso_b = self._trabajador('ingesta', 'host:2')
+
+        self.assertEqual(proceso_a.tomar().pk, primera.pk)
+        self.assertIsNone(proceso_b.tomar())  # La segunda espera aunque esté lista
+
+        Tarea.objects.filter(pk=primera.pk).update(estado=Tarea.Estado.COMPLETADA)
+        self.assertEqual(proceso_b.tomar().pk, segunda.pk)
+
+    def test_cola_serializada_respeta_el_orden_de_los_reintentos(self):
+        primera = encolar('tests.anotar', {'valor': 1}, cola='ingesta', retraso=60)
+        encolar('tests.anotar', {'valor': 2}, cola='ingesta')
+        self.assertIsNone(self._trabajador('ingesta').tomar())
+        Tarea.objects.filter(pk=primera.pk).update(ejecutar_despues=timezone.now())
+        self.assertEqual(self._trabajador('ingesta').tomar().pk, primera.pk)
+
+
+# ========================================
+# ÍNDICE DE CERCANÍA
+# ========================================
+
+class IndiceCercaniaTests(TestCase):
+    """Refresco con eventos nuevos y revisados, descartes y carga fuera del lock"""
+
+    def setUp(self):
+        ahora = timezone.now()
+        # Cinco eventos en Chile y uno en Japón
+        self.chile = [
+            _evento(f'cl{i}', ahora - timedelta(days=i + 1), 4.0, latitud=-33.0 - i * 0.1) for i in range(5)
+        ]
+        self.japon = _evento('jp', ahora - timedelta(days=1), 5.0, latitud=35.0, longitud=139.0)
+        self.indice = IndiceCercania(intervalo_refresco=3600)
+
+    def _cercanos(self, latitud, longitud, k=3):
+        return [pk for pk, _ in self.indice.consultar(latitud, longitud, k=k)]
+
+    def test_evento_revisado_cambia_de_posicion(self):
+        self.assertEqual(self._cercanos(35.0, 139.0, k=1), [self.japon.pk])
+        # USGS reubica el evento de Japón en Chile
+        EventoSismico.objects.filter(pk=self.japon.pk).update(latitud=-20.0, longitud=-70.0)
+        RevisionEvento.objects.create(evento=self.japon, fecha=timezone.now(), cambios={'latitud': [35.0, -20.0]})
+        self.indice.marcar_pendiente()
+        self.assertEqual(self._cercanos(-20.0, -70.0, k=1), [self.japon.pk])
+        # Ni rastro de la posición anterior: una sola entrada, lejos de Japón
+        distancias = [d for pk, d in self.indice.consultar(35.0, 139.0, k=10) if pk == self.japon.pk]
+        self.assertEqual(len(distancias), 1)
+        self.assertGreater(distancias[0], 10000)
+
+    def test_eventos_nuevos_entran_por_el_delta(self):
+        self._cercanos(0, 0)
+        nuevo = _evento('nuevo', timezone.now(), 3.0, latitud=10.0, longitud=10.0)
+        self.indice.marcar_pendiente()
+        self.assertEqual(self._cercanos(10.0, 10.0, k=1), [nuevo.pk])
+
+    def test_descartados_no_vuelven(self):
+        self.assertEqual(self._cercanos(-33.0, -71.5, k=1), [self.chile[0].pk])
+        self.indice.descartar([self.chile[0].pk])
+        self.assertEqual(self._cercanos(-33.0, -71.5, k=1), [self.chile[1].pk])
+
+    def test_consulta_no_espera_a_una_carga_en_curso(self):
+        self._cercanos(0, 0)
+        self.indice.marcar_pendiente()
+        with self.indice._lock_carga:
+            # Otro hilo está refrescando: la consulta usa el estado actual sin bloquearse
+            self.assertEqual(len(self._cercanos(-33.0, -71.5)), 3)
+
+    def test_endpoint_completa_k_sin_los_archivados(self):
+        usuario = Usuario.objects.create_user(username='cerca', email='cerca@test.invalid', password='x')
+        cliente = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(usuario)}')
+        indice_cercania.invalidar()
+        self.addCleanup(indice_cercania.invalidar)
+        cliente.get('/api/sismos/nearest/', {'lat': -33.0, 'lng': -71.5, 'k': 3})
+        # Archivados después de construir el índice
+        EventoSismico.objects.filter(pk__in=[e.pk for e in self.chile[:3]]).delete()
+        respuesta = cliente.get('/api/sismos/nearest/', {'lat': -33.0, 'lng': -71.5, 'k': 3})
+        self.assertEqual([e['id_evento_usgs'] for e in respuesta.json()], ['cl3', 'cl4', 'jp'])
+
+
+# ========================================
+# ALERTAS POR SUSCRIPCIÓN
+# ========================================
+
+class AlertasTests(TestCase):
+    """Índice por celdas, emparejamiento por umbral y distancia, y envío agrupado"""
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            username='alertas', email='alertas@test.invalid', password='x', first_name='Ana'
+        )
+        self.ahora = timezone.now()
+
+    def _suscripcion(self, latitud=-33.45, longitud=-70.66, radio_km=100, magnitud_minima=4.0, activa=True):
+        # post_save la indexa (api/signals.py)
+        return SuscripcionAlerta.objects.create(
+            usuario=self.usuario, nombre='Casa', latitud=latitud, longitud=longitud,
+            radio_km=radio_km, magnitud_minima=magnitud_minima, activa=activa,
+        )
+
+    def _envios_encolados(self):
+        return Tarea.objects.filter(nombre=alertas.enviar_alertas_usuario.nombre).count()
+
+    def test_empareja_por_umbral_y_distancia(self):
+        suscripcion = self._suscripcion()
+        cerca = _evento('cerca', self.ahora, 5.0, latitud=-33.6, longitud=-70.7)
+        debil = _evento('debil', self.ahora, 3.5, latitud=-33.6, longitud=-70.7)
+        lejos = _evento('lejos', self.ahora, 6.5, latitud=-20.0, longitud=-70.0)
+
+        self.assertEqual(alertas.emparejar([cerca.pk, debil.pk, lejos.pk]), 1)
+        entrega = EntregaAlerta.objects.get()
+        self.assertEqual((entrega.suscripcion_id, entrega.evento_id, entrega.usuario_id),
+                         (suscripcion.pk, cerca.pk, self.usuario.pk))
+        self.assertEqual(self._envios_encolados(), 1)
+
+    def test_evento_revisado_no_se_alerta_dos_veces(self):
+        self._suscripcion()
+        evento = _evento('rev', self.ahora, 5.0, latitud=-33.6, longitud=-70.7)
+        self.assertEqual(alertas.emparejar([evento.pk]), 1)
+        self.assertEqual(alertas.emparejar([evento.pk]), 0)
+        self.assertEqual(EntregaAlerta.objects.count(), 1)
+
+    def test_circulo_que_cruza_el_antimeridiano(self):
+        self._suscripcion(latitud=0.0, longitud=179.9)
+        evento = _evento('fiyi', self.ahora, 5.0, latitud=0.0, longitud=-179.9)
+        self.assertEqual(alertas.emparejar([evento.pk]), 1)
+
+    def test_suscripcion_inactiva_no_se_indexa(self):
+        suscripcion = self._suscripcion(activa=False)
+        self.assertFalse(CeldaSuscripcion.objects.exists())
+        suscripcion.activa = True
+        suscripcion.save()
+        self.assertIn(alertas.celda_de(-33.45, -70.66),
+                      set(CeldaSuscripcion.objects.values_list('celda', flat=True)))
+        suscripcion.activa = False
+        suscripcion.save()
+        self.assertFalse(CeldaSuscripcion.objects.exists())
+
+    def test_envio_agrupado_en_un_correo(self):
+        self._suscripcion()
+        eventos = [_evento(f'e{i}', self.ahora, 4.0 + i, latitud=-33.6, longitud=-70.7) for i in range(2)]
+        alertas.emparejar([e.pk for e in eventos])
+
+        self.assertEqual(alertas.enviar_alertas_usuario(self.usuario.pk), 2)
+        self.assertEqual(len(mail.outbox), 1)
+        # La de mayor magnitud primero
+        self.assertLess(mail.outbox[0].body.index('M5.0'), mail.outbox[0].body.index('M4.0'))
+        self.assertFalse(EntregaAlerta.objects.filter(fecha_envio__isnull=True).exists())
+        self.assertEqual(alertas.enviar_alertas_usuario(self.usuario.pk), 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_fallo_del_correo_libera_las_entregas(self):
+        self._suscripcion()
+        alertas.emparejar([_evento('e', self.ahora, 5.0, latitud=-33.6, longitud=-70.7).pk])
+        with mock.patch.object(alertas, 'send_mail', side_effect=OSError('smtp')):
+            with self.assertRaises(OSError):
+                alertas.enviar_alertas_usuario(self.usuario.pk)
+        self.assertEqual(EntregaAlerta.objects.get().lote, '')
+        self.assertEqual(alertas.enviar_alertas_usuario(self.usuario.pk), 1)
+
+    def test_entregas_de_eventos_archivados_no_se_envian(self):
+        self._suscripcion()
+        evento = _evento('e', self.ahora, 5.0, latitud=-33.6, longitud=-70.7)
+        alertas.emparejar([evento.pk])
+        EventoSismico.objects.filter(pk=evento.pk).delete()  # Como al archivar (sin cascada)
+        self.assertEqual(alertas.enviar_alertas_usuario(self.usuario.pk), 0)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertIsNotNone(EntregaAlerta.objects.get().fecha_envio)
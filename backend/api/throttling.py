@@ -0,0 +1,224 @@
+# ========================================
+# LIMITACIÓN DE PETICIONES (THROTTLING) - SEISMIC TRACKER
+# PROPÓSITO: Cubetas de tokens por IP y por usuario antes de autenticar o consultar la BD
+# ========================================
+
+"""
+Limitación de tasa con cubetas de tokens (token bucket).
+
+Funcionamiento:
+1. TokenBucketMiddleware actúa en process_view: la URL ya está resuelta pero
+   todavía no se ha ejecutado la vista, así que un rechazo no paga
+   autenticación, hash de contraseñas ni consultas
+2. El ámbito (scope) de cada vista se toma del atributo 'throttle_bucket' de la
+   vista o, para vistas de terceros, de THROTTLING['VISTAS'] por nombre de URL
+3. Cada ámbito define su tasa, su ráfaga y la clave: 'ip', 'usuario' o
+   'usuario_o_ip'. El usuario se obtiene del JWT (solo verificación de firma,
+   sin BD)
+4. El estado de las cubetas vive en un backend intercambiable:
+   - 'memoria': diccionario local al proceso (no requiere Redis)
+   - 'cache': la caché de Django configurada (compartida si es Redis/Memcached;
+     lectura-modificación-escritura no atómica, por lo que el límite es aproximado)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .metricas import PETICIONES_LIMITADAS
+
+_CONFIG = getattr(settings, 'THROTTLING', {})
+
+UNIDADES = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parsear_tasa(tasa):
+    """Convierte '10/min' en tokens por segundo"""
+    cantidad, _, unidad = tasa.partition('/')
+    return int(cantidad) / UNIDADES[unidad.strip().lower()]
+
+# ========================================
+# BACKENDS DE ESTADO
+# ========================================
+
+class BucketsEnMemoria:
+    """Cubetas en memoria del proceso, acotadas por LRU (seguro entre hilos)"""
+
+    bloqueante = False  # Sin E/S: se puede consultar desde el bucle de eventos
+
+    def __init__(self, max_claves=100000):
+        self.max_claves = max_claves
+        self._cubetas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, clave, tasa, rafaga, ahora):
+        """Intenta consumir un token. Retorna (permitido, segundos_hasta_siguiente_token)."""
+        with self._lock:
+            tokens, ultimo = self._cubetas.get(clave, (rafaga, ahora))
+            tokens = min(rafaga, tokens + (ahora - ultimo) * tasa)
+            permitido = tokens >= 1
+            if permitido:
+                tokens -= 1
+            self._cubetas[clave] = (tokens, ahora)
+            self._cubetas.move_to_end(clave)
+            while len(self._cubetas) > self.max_claves:
+                self._cubetas.popitem(last=False)
+        return permitido, 0 if permitido else (1 - tokens) / tasa
+
+
+class BucketsEnCache:
+    """Cubetas guardadas en una caché de Django (p. ej. Redis compartido entre workers)"""
+
+    bloqueante = True  # E/S de red: bajo ASGI se consulta en un hilo
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def consumir(self, clave, tasa, rafaga, ahora):
+        clave = f'throttle:{clave}'
+        tokens, ultimo = self.cache.get(clave, (rafaga, ahora))
+        tokens = min(rafaga, tokens + (ahora - ultimo) * tasa)
+        permitido = tokens >= 1
+        if permitido:
+            tokens -= 1
+        # La entrada caduca cuando la cubeta ya se habría rellenado por completo
+        self.cache.set(clave, (tokens, ahora), timeout=int(rafaga / tasa) + 1)
+        return permitido, 0 if permitido else (1 - tokens) / tasa
+
+
+BACKENDS = {'memoria': BucketsEnMemoria, 'cache': BucketsEnCache}
+
+# ========================================
+# CLASE: LimitadorTokenBucket
+# ========================================
+
+class LimitadorTokenBucket:
+    """Aplica los límites configurados y lleva la cuenta de permitidas/rechazadas por ámbito"""
+
+    def __init__(self, config=_CONFIG):
+        self.limites = {
+            nombre: (parsear_tasa(limite['tasa']), limite.get('rafaga', 1), limite.get('clave', 'ip'))
+            for nombre, limite in config.get('LIMITES', {}).items()
+        }
+        self.vistas = config.get('VISTAS', {})
+        self.num_proxies = config.get('NUM_PROXIES')
+        self.backend = BACKENDS[config.get('BACKEND', 'memoria')]()
+        self._lock = threading.Lock()
+        self.permitidas = {}
+        self.rechazadas = {}
+
+    def ambito(self, request, view_func):
+        """Ámbito de la vista: atributo throttle_bucket o THROTTLING['VISTAS'][nombre_url]"""
+        clase = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        ambito = getattr(clase, 'throttle_bucket', None)
+        if ambito is None and request.resolver_match is not None:
+            ambito = self.vistas.get(request.resolver_match.view_name)
+        return ambito if ambito in self.limites else None
+
+    def ip(self, request):
+        """IP del cliente (considera X-Forwarded-For si se configuran proxies de confianza)"""
+        xff = request.META.get('HTTP_X_FORWARDED_FOR')
+        remote_addr = request.META.get('REMOTE_ADDR')
+        if self.num_proxies is not None and xff:
+            if self.num_proxies == 0:
+                return remote_addr
+            direcciones = [d.strip() for d in xff.split(',')]
+            return direcciones[-min(self.num_proxies, len(direcciones))]
+        return remote_addr
+
+    def usuario(self, request):
+        """ID de usuario del JWT (solo verificación de firma y expiración, sin BD)"""
+        cabecera = request.META.get(jwt_settings.AUTH_HEADER_NAME, '')
+        partes = cabecera.split()
+        if len(partes) != 2 or partes[0] not in jwt_settings.AUTH_HEADER_TYPES:
+            return None
+        try:
+            return AccessToken(partes[1]).get(jwt_settings.USER_ID_CLAIM)
+        except TokenError:
+            return None
+
+    def verificar(self, request, view_func):
+        """Retorna None si se permite la petición o los segundos de espera si se rechaza"""
+        ambito = self.ambito(request, view_func)
+        if ambito is None:
+            return None
+
+        tasa, rafaga, tipo_clave = self.limites[ambito]
+        identidad = None
+        if tipo_clave in ('usuario', 'usuario_o_ip'):
+            usuario = self.usuario(request)
+            identidad = f'u{usuario}' if usuario is not None else None
+        if identidad is None and tipo_clave in ('ip', 'usuario_o_ip'):
+            identidad = f'ip{self.ip(request)}'
+        if identidad is None:
+            return None
+
+        permitido, espera = self.backend.consumir(f'{ambito}:{identidad}', tasa, rafaga, time.time())
+        with self._lock:
+            contador = self.permitidas if permitido else self.rechazadas
+            contador[ambito] = contador.get(ambito, 0) + 1
+        PETICIONES_LIMITADAS.labels(ambito, 'permitida' if permitido else 'rechazada').inc()
+        return None if permitido else espera
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                ambito: {'permitidas': self.permitidas.get(ambito, 0), 'rechazadas': self.rechazadas.get(ambito, 0)}
+                for ambito in self.limites
+            }
+
+
+limitador = LimitadorTokenBucket()
+
+# ========================================
+# MIDDLEWARE
+# ========================================
+
+class TokenBucketMiddleware:
+    """
+    Rechaza con 429 las peticiones que agotan su cubeta, antes de ejecutar la
+    vista. Funciona en WSGI y en ASGI sin adaptar la cadena a hilos: bajo ASGI
+    process_view es una corrutina y solo el backend 'cache' sale a un hilo.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_asincrono = iscoroutinefunction(get_response)
+        if self.es_asincrono:
+            markcoroutinefunction(self)
+            # Django adapta process_view según sea o no corrutina
+            self.process_view = self._process_view_async
+
+    def __call__(self, request):
+        # En modo asíncrono get_response devuelve la corrutina que espera Django
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return self._rechazo(limitador.verificar(request, view_func))
+
+    async def _process_view_async(self, request, view_func, view_args, view_kwargs):
+        if limitador.backend.bloqueante:
+            espera = await sync_to_async(limitador.verificar)(request, view_func)
+        else:
+            espera = limitador.verificar(request, view_func)
+        return self._rechazo(espera)
+
+    def _rechazo(self, espera):
+        if espera is None:
+            return None
+        respuesta = JsonResponse(
+            {"detail": "Demasiadas peticiones. Inténtalo de nuevo más tarde."}, status=429
+        )
+        respuesta['Retry-After'] = str(max(1, int(espera + 0.999)))
+        return respuesta
@@ -0,0 +1,406 @@
+# ========================================
+# ARCHIVO HISTÓRICO - SEISMIC TRACKER
+# PROPÓSITO: Separación de eventos en nivel caliente (BD) y frío (Parquet en disco)
+# ========================================
+
+"""
+Archivo frío de eventos sísmicos en Parquet particionado.
+
+Estructura en disco (particionado estilo Hive):
+    <DIRECTORIO>/anio=2024/mes=03/part-<pk_primero>.parquet
+    <DIRECTORIO>/_version  (se toca tras cada cambio del archivo)
+
+Funcionamiento:
+1. archivar_eventos() mueve por lotes los eventos más antiguos que EDAD_DIAS:
+   escribe el lote en Parquet (archivo temporal oculto + os.replace) y después
+   lo borra de la BD en una transacción corta, sin bloqueos prolongados
+2. El nombre de cada archivo es el pk del primer evento de su partición en el
+   lote (orden fecha, pk). Si el proceso muere entre la escritura y el borrado,
+   los eventos siguen en la BD y el reintento empieza por las mismas filas, así
+   que sobrescribe el mismo archivo en lugar de duplicarlo
+3. Aun así, las lecturas se quedan con una sola fila por id_evento_usgs y
+   descartan las que el llamador ya tiene de la BD (caída en mitad de un lote,
+   o un evento reingerido después de archivarse)
+4. Las revisiones y entregas de alertas de los eventos archivados se quedan en
+   la BD: sus claves foráneas no propagan el borrado (DO_NOTHING, sin
+   restricción en la BD) y siguen apuntando al pk que conserva el Parquet
+5. El dataset (descubrimiento de archivos) se construye una vez por proceso y
+   se reutiliza mientras no cambie la fecha de modificación de _version
+6. Las consultas sobre el archivo podan particiones por año/mes, proyectan solo
+   las columnas necesarias y leen los archivos mapeados en memoria; un listado
+   sin paginar recibe como mucho MAXIMO_LISTADO eventos archivados, elegidos
+   por el ordenamiento pedido antes de leer el resto de columnas
+"""
+
+import logging
+import os
+import threading
+import time as reloj
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .filters import EventoSismicoFilter
+from .models import EventoSismico
+
+logger = logging.getLogger(__name__)
+
+# ========================================
+# CONFIGURACIÓN
+# ========================================
+
+_CONFIG = getattr(settings, 'SISMOS_ARCHIVO', {})
+DIRECTORIO = Path(_CONFIG.get('DIRECTORIO', Path(settings.BASE_DIR) / 'var' / 'archivo'))
+EDAD_DIAS = _CONFIG.get('EDAD_DIAS', 90)
+TAMANO_LOTE = _CONFIG.get('TAMANO_LOTE', 5000)
+MAXIMO_LISTADO = _CONFIG.get('MAXIMO_LISTADO', 10000)  # Eventos archivados por listado sin paginar
+MARCA_VERSION = '_version'  # Los nombres con '_' o '.' no forman parte del dataset
+CLAVES = ['id', 'id_evento_usgs']  # Columnas para quitar duplicados entre niveles y archivos
+
+PARTICIONES = ds.partitioning(pa.schema([('anio', pa.int32()), ('mes', pa.int32())]), flavor='hive')
+SISTEMA_ARCHIVOS = fs.LocalFileSystem(use_mmap=True)
+
+# ========================================
+# ESQUEMA
+# ========================================
+
+def _campos():
+    return list(EventoSismico._meta.concrete_fields)
+
+
+def esquema_arrow():
+    """Esquema Arrow equivalente a los campos concretos de EventoSismico"""
+    columnas = []
+    for campo in _campos():
+        if isinstance(campo, models.DateTimeField):
+            tipo = pa.timestamp('us', tz='UTC')
+        elif isinstance(campo, models.FloatField):
+            tipo = pa.float64()
+        elif isinstance(campo, (models.IntegerField, models.AutoField)):
+            tipo = pa.int64()
+        else:
+            tipo = pa.string()
+        columnas.append(pa.field(campo.attname, tipo, nullable=campo.null))
+    return pa.schema(columnas)
+
+
+# ========================================
+# DATASET EN CACHÉ
+# ========================================
+
+_datasets = {}  # directorio -> (firma de _version, dataset o None)
+_lock_datasets = threading.Lock()
+
+
+def _firma(directorio):
+    try:
+        return (Path(directorio) / MARCA_VERSION).stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _marcar_cambio(directorio):
+    """Toca _version para que todos los procesos vuelvan a descubrir los archivos"""
+    marca = Path(directorio) / MARCA_VERSION
+    marca.touch()
+    ahora = reloj.time_ns()
+    os.utime(marca, ns=(ahora, ahora))
+
+
+def _dataset(directorio=DIRECTORIO):
+    """Dataset del archivo frío (None si no hay archivos), reconstruido solo si cambió _version"""
+    clave = str(directorio)
+    firma = _firma(directorio)
+    en_cache = _datasets.get(clave)
+    if en_cache is not None and en_cache[0] == firma:
+        return en_cache[1]
+
+    with _lock_datasets:
+        dataset = None
+        if any(Path(directorio).glob('anio=*/mes=*/*.parquet')):
+            dataset = ds.dataset(
+                clave, format='parquet', partitioning=PARTICIONES,
+                schema=esquema_arrow().append(pa.field('anio', pa.int32())).append(pa.field('mes', pa.int32())),
+                filesystem=SISTEMA_ARCHIVOS,
+            )
+        _datasets[clave] = (firma, dataset)
+    return dataset
+
+
+def hay_archivo(directorio=DIRECTORIO):
+    """True si existe al menos un archivo Parquet en el archivo frío"""
+    return _dataset(directorio) is not None
+
+# ========================================
+# TRABAJO DE ARCHIVADO
+# ========================================
+
+def archivar_eventos(edad_dias=EDAD_DIAS, tamano_lote=TAMANO_LOTE, directorio=DIRECTORIO):
+    """
+    Mueve al archivo Parquet los eventos con fecha anterior a ahora - edad_dias.
+    Retorna el número de eventos archivados.
+    """
+    directorio = Path(directorio)
+    corte = timezone.now() - timedelta(days=edad_dias)
+    nombres = [c.attname for c in _campos()]
+    esquema = esquema_arrow()
+    total = 0
+
+    while True:
+        filas = list(
+            EventoSismico.objects.filter(fecha_hora_evento__lt=corte)
+            .order_by('fecha_hora_evento', 'pk')
+            .values(*nombres)[:tamano_lote]
+        )
+        if not filas:
+            break
+
+        # Agrupamos el lote por partición (año/mes UTC del evento)
+        por_particion = {}
+        for fila in filas:
+            fecha = fila['fecha_hora_evento'].astimezone(dt_timezone.utc)
+            por_particion.setdefault((fecha.year, fecha.month), []).append(fila)
+
+        escritos = []
+        try:
+            for (anio, mes), grupo in por_particion.items():
+                carpeta = directorio / f'anio={anio}' / f'mes={mes:02d}'
+                carpeta.mkdir(parents=True, exist_ok=True)
+                # Mismo primer evento, mismo archivo: un reintento sobrescribe en lugar de duplicar
+                destino = carpeta / f"part-{grupo[0]['id']}.parquet"
+                temporal = carpeta / f'.{destino.name}.tmp'
+                pq.write_table(pa.Table.from_pylist(grupo, schema=esquema), temporal)
+                os.replace(temporal, destino)
+                escritos.append(destino)
+
+            _marcar_cambio(directorio)
+
+            # Borrado en transacción corta: solo el lote recién escrito (sin cascadas)
+            with transaction.atomic():
+                EventoSismico.objects.filter(pk__in=[f['id'] for f in filas]).delete()
+        except Exception:
+            for ruta in escritos:
+                ruta.unlink(missing_ok=True)
+            _marcar_cambio(directorio)
+            raise
+
+        total += len(filas)
+        logger.info("[ARCHIVO] Lote de %s eventos archivado en %s particiones", len(filas), len(escritos))
+
+    return total
+
+# ========================================
+# CONSULTAS SOBRE EL ARCHIVO
+# ========================================
+
+def _expresion_particiones(inicio, fin):
+    """Expresión sobre anio/mes que descarta las particiones fuera del rango temporal"""
+    expresion = None
+    if inicio is not None:
+        inicio = inicio.astimezone(dt_timezone.utc)
+        expresion = (ds.field('anio') > inicio.year) | (
+            (ds.field('anio') == inicio.year) & (ds.field('mes') >= inicio.month)
+        )
+    if fin is not None:
+        fin = fin.astimezone(dt_timezone.utc)
+        limite = (ds.field('anio') < fin.year) | (
+            (ds.field('anio') == fin.year) & (ds.field('mes') <= fin.month)
+        )
+        expresion = limite if expresion is None else expresion & limite
+    return expresion
+
+
+def _expresion_filtros(datos):
+    """
+    Traduce los valores ya validados por EventoSismicoFilter (cleaned_data)
+    a una expresión de pyarrow.dataset. Retorna (expresion, inicio, fin).
+    """
+    inicio = datos.get('since_date')
+    fin = None
+    if datos.get('fecha_hora_evento__date'):
+        dia = timezone.make_aware(datetime.combine(datos['fecha_hora_evento__date'], time.min))
+        inicio = max(inicio, dia) if inicio else dia
+        fin = dia + timedelta(days=1)
+
+    condiciones = []
+    fecha = ds.field('fecha_hora_evento')
+    if inicio is not None:
+        condiciones.append(fecha >= pa.scalar(inicio, type=pa.timestamp('us', tz='UTC')))
+    if fin is not None:
+        condiciones.append(fecha < pa.scalar(fin, type=pa.timestamp('us', tz='UTC')))
+
+    comparaciones = {
+        'magnitud': ('magnitud', '__eq__'),
+        'magnitud__gte': ('magnitud', '__ge__'),
+        'magnitud__lte': ('magnitud', '__le__'),
+        'lat_min': ('latitud', '__ge__'),
+        'lat_max': ('latitud', '__le__'),
+        'lng_min': ('longitud', '__ge__'),
+        'lng_max': ('longitud', '__le__'),
+    }
+    for clave, (columna, operador) in comparaciones.items():
+        if datos.get(clave) is not None:
+            condiciones.append(getattr(ds.field(columna), operador)(float(datos[clave])))
+    if datos.get('tipo_secuencia'):
+        condiciones.append(ds.field('tipo_secuencia') == datos['tipo_secuencia'])
+    if datos.get('id_secuencia') is not None:
+        condiciones.append(ds.field('id_secuencia') == int(datos['id_secuencia']))
+
+    particiones = _expresion_particiones(inicio, fin)
+    if particiones is not None:
+        condiciones.append(particiones)
+
+    expresion = None
+    for condicion in condiciones:
+        expresion = condicion if expresion is None else expresion & condicion
+    return expresion, inicio, fin
+
+
+def _expresion_consulta(datos, busqueda=None):
+    """Filtros de la petición más la búsqueda por texto (?search=) como una sola expresión"""
+    expresion, _, _ = _expresion_filtros(datos)
+    if busqueda:
+        for termino in busqueda.replace(',', ' ').split():
+            expresion_busqueda = pc.match_substring(ds.field('lugar_descripcion'), termino, ignore_case=True)
+            expresion = expresion_busqueda if expresion is None else expresion & expresion_busqueda
+    return expresion
+
+
+def _sin_duplicados(tabla, excluir_usgs=()):
+    """
+    Una fila por id_evento_usgs (la de mayor pk) y ninguna de excluir_usgs
+    (los eventos que el llamador ya tiene de la BD). Cambia el orden de las filas.
+    """
+    if excluir_usgs:
+        excluidos = pa.array(list(excluir_usgs), pa.string())
+        tabla = tabla.filter(pc.invert(pc.is_in(tabla['id_evento_usgs'], value_set=excluidos)))
+    if tabla.num_rows < 2 or pc.count_distinct(tabla['id_evento_usgs']).as_py() == tabla.num_rows:
+        return tabla
+    tabla = tabla.sort_by([('id_evento_usgs', 'ascending'), ('id', 'descending')])
+    claves = tabla['id_evento_usgs'].combine_chunks()
+    primeros = pa.concat_arrays([pa.array([True]), pc.not_equal(claves[1:], claves[:-1])])
+    return tabla.filter(primeros)
+
+
+def consultar_archivo(datos, busqueda=None, columnas=None, directorio=DIRECTORIO, excluir_usgs=()):
+    """
+    Lee del archivo frío los eventos que cumplen los filtros.
+
+    Parámetros:
+    - datos: cleaned_data de EventoSismicoFilter
+    - busqueda: texto a buscar en lugar_descripcion (equivalente a ?search=)
+    - columnas: columnas a proyectar (por defecto, todas las del modelo)
+    - excluir_usgs: id_evento_usgs que ya vienen de la BD
+
+    Retorna:
+    - pyarrow.Table sin duplicados (vacía si no hay archivo)
+    """
+    columnas = columnas or [c.attname for c in _campos()]
+    dataset = _dataset(directorio)
+    if dataset is None:
+        return esquema_arrow().empty_table().select(columnas)
+
+    leidas = list(dict.fromkeys([*columnas, *CLAVES]))
+    tabla = dataset.to_table(columns=leidas, filter=_expresion_consulta(datos, busqueda))
+    return _sin_duplicados(tabla, excluir_usgs).select(columnas)
+
+
+def tabla_a_instancias(tabla):
+    """Convierte filas del archivo en instancias de EventoSismico sin tocar la BD"""
+    nombres = tabla.column_names
+    return [
+        EventoSismico.from_db('default', nombres, [fila[n] for n in nombres])
+        for fila in tabla.to_pylist()
+    ]
+
+
+def buscar_por_usgs(ids_usgs, directorio=DIRECTORIO):
+    """Eventos archivados con esos id_evento_usgs (sin poda de particiones: recorre todo el archivo)"""
+    dataset = _dataset(directorio)
+    if not ids_usgs or dataset is None:
+        return []
+    filtro = ds.field('id_evento_usgs').isin(list(ids_usgs))
+    columnas = [c.attname for c in _campos()]
+    return tabla_a_instancias(_sin_duplicados(dataset.to_table(columns=columnas, filter=filtro)))
+
+
+def combinar_con_archivo(eventos, parametros, campos_orden, directorio=DIRECTORIO, limite=MAXIMO_LISTADO):
+    """
+    Une eventos de la BD con los del archivo frío aplicando los mismos
+    filtros, búsqueda (?search=) y ordenamiento (?ordering=) de la petición.
+
+    Del archivo entran como mucho 'limite' eventos, los primeros según el
+    ordenamiento: se eligen leyendo solo las columnas de orden y únicamente
+    los elegidos se leen completos y se convierten en instancias.
+
+    Parámetros:
+    - eventos: lista de instancias ya filtradas en la BD
+    - parametros: QueryDict de la petición
+    - campos_orden: campos permitidos en ?ordering=
+    """
+    eventos = list(eventos)
+    ordering = parametros.get('ordering') or '-fecha_hora_evento'
+    campos = [c.strip() for c in ordering.split(',') if c.strip().lstrip('-') in campos_orden] or ['-fecha_hora_evento']
+
+    filtro = EventoSismicoFilter(parametros, queryset=EventoSismico.objects.none())
+    filtro.is_valid()
+    busqueda = parametros.get('search')
+    claves_orden = [(c.lstrip('-'), 'descending' if c.startswith('-') else 'ascending') for c in campos]
+    seleccion = consultar_archivo(
+        filtro.form.cleaned_data, busqueda=busqueda, directorio=directorio,
+        columnas=list(dict.fromkeys([*CLAVES, *(columna for columna, _ in claves_orden)])),
+        excluir_usgs={evento.id_evento_usgs for evento in eventos},
+    )
+    if seleccion.num_rows > limite:
+        logger.warning("[ARCHIVO] Listado sin paginar limitado a %s de %s eventos archivados", limite, seleccion.num_rows)
+        seleccion = seleccion.take(pc.select_k_unstable(seleccion, k=limite, sort_keys=claves_orden))
+
+    if seleccion.num_rows:
+        expresion = _expresion_consulta(filtro.form.cleaned_data, busqueda)
+        elegidos = ds.field('id').isin(seleccion['id'].combine_chunks())
+        tabla = _dataset(directorio).to_table(
+            columns=[c.attname for c in _campos()],
+            filter=elegidos if expresion is None else expresion & elegidos,
+        )
+        eventos += tabla_a_instancias(_sin_duplicados(tabla))
+
+    for campo in reversed(campos):
+        eventos.sort(key=lambda e: getattr(e, campo.lstrip('-')), reverse=campo.startswith('-'))
+    return eventos
+
+
+def estadisticas_archivo(directorio=DIRECTORIO):
+    """
+    Total de eventos y primer evento del archivo frío.
+    El total sale de los metadatos de los archivos y el primer evento solo
+    lee la columna de fecha de la partición más antigua.
+    """
+    dataset = _dataset(directorio)
+    if dataset is None:
+        return {'total': 0, 'primero': None}
+
+    total = dataset.count_rows()
+    carpetas = sorted(
+        Path(directorio).glob('anio=*/mes=*'),
+        key=lambda p: (int(p.parent.name.split('=')[1]), int(p.name.split('=')[1]))
+    )
+    primero = None
+    for carpeta in carpetas:
+        anio, mes = int(carpeta.parent.name.split('=')[1]), int(carpeta.name.split('=')[1])
+        tabla = dataset.to_table(
+            columns=['fecha_hora_evento', 'latitud', 'longitud'],
+            filter=(ds.field('anio') == anio) & (ds.field('mes') == mes),
+        )
+        if tabla.num_rows:
+            indice = pc.index(tabla['fecha_hora_evento'], pc.min(tabla['fecha_hora_evento'])).as_py()
+            primero = {k: v[0] for k, v in tabla.slice(indice, 1).to_pydict().items()}
+            break
+    return {'total': total, 'primero': primero}
@@ -0,0 +1,368 @@
+# ========================================
+# TRAZAS (SPANS) - SEISMIC TRACKER
+# PROPÓSITO: Saber en qué fase se va el tiempo de una petición o de una ingesta
+# ========================================
+
+"""
+Trazado ligero con spans propagados por contextvars (válido en hilos y en
+corrutinas).
+
+Uso:
+- iniciar_traza('fetch_sismos'): abre la raíz y decide el muestreo
+  (TRAZAS['MUESTREO']); TrazasMiddleware lo hace por cada petición y
+  continúa la traza si llega una cabecera W3C 'traceparent'. La bandera de
+  muestreo entrante solo se respeta si la petición viene de
+  TRAZAS['ORIGENES_CONFIABLES']; de cualquier otro cliente se conserva el
+  traza_id pero decide MUESTREO (un cliente no puede forzar el trazado)
+- with span('sismos.filtros', vista=...): span hijo del actual
+- VistaTrazada: mixin para ViewSets de DRF (initial, filtros, consulta y
+  serialización); el renderizado lo mide el middleware
+- Las consultas SQL de una traza muestreada se registran como spans 'db',
+  también las que corren en hilos de sync_to_async bajo ASGI (el span
+  actual viaja en la contextvar y el wrapper SQL está en todas las conexiones)
+
+Coste: con el trazado deshabilitado o la traza no muestreada, span() solo
+lee una variable de contexto y devuelve un contexto vacío compartido.
+
+Exportación (hilo en segundo plano, por lotes):
+- 'jsonl': una línea JSON por span en TRAZAS['ARCHIVO']
+- 'otlp': OTLP/HTTP JSON a TRAZAS['OTLP_URL'] (un colector de OpenTelemetry
+  o cualquier sustituto que acepte POST /v1/traces)
+"""
+
+import atexit
+import ipaddress
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .consultas import instalar_wrapper_global
+from .throttling import limitador
+
+logger = logging.getLogger(__name__)
+
+_CONFIG = getattr(settings, 'TRAZAS', {})
+HABILITADAS = _CONFIG.get('HABILITADAS', False)
+MUESTREO = _CONFIG.get('MUESTREO', 0.1)  # Fracción de trazas raíz que se registran
+EXPORTADOR = _CONFIG.get('EXPORTADOR', 'jsonl')
+ARCHIVO = Path(_CONFIG.get('ARCHIVO', Path(settings.BASE_DIR) / 'var' / 'trazas.jsonl'))
+OTLP_URL = _CONFIG.get('OTLP_URL', 'http://127.0.0.1:4318/v1/traces')
+TAMANO_LOTE = _CONFIG.get('TAMANO_LOTE', 256)
+# Redes cuya bandera de muestreo en 'traceparent' se respeta (gateways, servicios propios)
+ORIGENES_CONFIABLES = tuple(ipaddress.ip_network(red) for red in _CONFIG.get('ORIGENES_CONFIABLES', ()))
+SERVICIO = 'seismic-tracker'
+LONGITUD_SQL = 300  # Caracteres de SQL guardados en los spans 'db'
+
+_SIN_SPAN = nullcontext()
+_actual = ContextVar('span_actual', default=None)
+
+# ========================================
+# SPANS
+# ========================================
+
+class Span:
+    """Intervalo con nombre dentro de una traza"""
+
+    __slots__ = ('nombre', 'traza_id', 'span_id', 'padre_id', 'inicio_ns', 'fin_ns', 'atributos', 'error')
+
+    def __init__(self, nombre, traza_id, padre_id=None, atributos=None):
+        self.nombre = nombre
+        self.traza_id = traza_id
+        self.span_id = os.urandom(8).hex()
+        self.padre_id = padre_id
+        self.inicio_ns = time.time_ns()
+        self.fin_ns = None
+        self.atributos = atributos or {}
+        self.error = None
+
+    def atributo(self, clave, valor):
+        self.atributos[clave] = valor
+
+    def terminar(self):
+        self.fin_ns = time.time_ns()
+        exportador.enviar(self)
+
+    def como_dict(self):
+        return {
+            'nombre': self.nombre,
+            'traza_id': self.traza_id,
+            'span_id': self.span_id,
+            'padre_id': self.padre_id,
+            'inicio_ns': self.inicio_ns,
+            'duracion_ms': round((self.fin_ns - self.inicio_ns) / 1e6, 3),
+            'atributos': self.atributos,
+            'error': self.error,
+        }
+
+
+def span_actual():
+    return _actual.get()
+
+
+@contextmanager
+def _abrir(span):
+    token = _actual.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.error = f'{type(exc).__name__}: {exc}'
+        raise
+    finally:
+        _actual.reset(token)
+        span.terminar()
+
+
+def iniciar_traza(nombre, traza_id=None, padre_id=None, muestreada=None, **atributos):
+    """
+    Abre el span raíz. 'muestreada' fuerza la decisión (p. ej. la que viene
+    en 'traceparent'); si es None se decide con MUESTREO.
+    """
+    if not HABILITADAS:
+        return _SIN_SPAN
+    if muestreada is None:
+        muestreada = random.random() < MUESTREO
+    if not muestreada:
+        return _SIN_SPAN
+    return _abrir(Span(nombre, traza_id or os.urandom(16).hex(), padre_id, atributos))
+
+
+def span(nombre, **atributos):
+    """Span hijo del actual; sin traza activa no hace nada"""
+    padre = _actual.get()
+    if padre is None:
+        return _SIN_SPAN
+    return _abrir(Span(nombre, padre.traza_id, padre.span_id, atributos))
+
+# ========================================
+# EXPORTACIÓN
+# ========================================
+
+def _otlp(spans):
+    """Cuerpo OTLP/HTTP JSON (ExportTraceServiceRequest)"""
+    def valor(v):
+        if isinstance(v, bool):
+            return {'boolValue': v}
+        if isinstance(v, int):
+            return {'intValue': str(v)}
+        if isinstance(v, float):
+            return {'doubleValue': v}
+        return {'stringValue': str(v)}
+
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICIO}}]},
+        'scopeSpans': [{
+            'scope': {'name': 'api.trazas'},
+            'spans': [{
+                'traceId': s.traza_id,
+                'spanId': s.span_id,
+                'parentSpanId': s.padre_id or '',
+                'name': s.nombre,
+                'kind': 1,
+                'startTimeUnixNano': str(s.inicio_ns),
+                'endTimeUnixNano': str(s.fin_ns),
+                'attributes': [{'key': k, 'value': valor(v)} for k, v in s.atributos.items()],
+                'status': {'code': 2, 'message': s.error} if s.error else {},
+            } for s in spans],
+        }],
+    }]}
+
+
+class ExportadorSpans:
+    """Cola acotada + hilo que exporta por lotes; si la cola se llena, los spans se descartan"""
+
+    def __init__(self, tipo=EXPORTADOR, tamano_lote=TAMANO_LOTE):
+        self.tipo = tipo
+        self.tamano_lote = tamano_lote
+        self._cola = queue.Queue(maxsize=tamano_lote * 40)
+        self._hilo = None
+        self._lock = threading.Lock()
+        self.descartados = 0
+
+    def enviar(self, span):
+        if self._hilo is None:
+            self._arrancar()
+        try:
+            self._cola.put_nowait(span)
+        except queue.Full:
+            self.descartados += 1
+
+    def _arrancar(self):
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name='exportador-trazas', daemon=True)
+                self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            lote = [self._cola.get()]
+            while len(lote) < self.tamano_lote:
+                try:
+                    lote.append(self._cola.get(timeout=0.5))
+                except queue.Empty:
+                    break
+            self.exportar(lote)
+
+    def exportar(self, lote):
+        try:
+            if self.tipo == 'otlp':
+                peticion = urllib.request.Request(
+                    OTLP_URL, data=json.dumps(_otlp(lote)).encode('utf-8'),
+                    headers={'Content-Type': 'application/json'}, method='POST',
+                )
+                urllib.request.urlopen(peticion, timeout=5).close()
+            else:
+                ARCHIVO.parent.mkdir(parents=True, exist_ok=True)
+                with open(ARCHIVO, 'a', encoding='utf-8') as archivo:
+                    archivo.write(''.join(json.dumps(s.como_dict(), default=str) + '\n' for s in lote))
+        except Exception:
+            logger.exception("[TRAZAS] No se pudo exportar un lote de %s spans", len(lote))
+        finally:
+            for _ in lote:
+                self._cola.task_done()
+
+    def vaciar(self, timeout=5):
+        """Espera a que se exporten los spans pendientes (fin de comandos y del proceso)"""
+        if self._hilo is None:
+            return
+        limite = time.monotonic() + timeout
+        while self._cola.unfinished_tasks and time.monotonic() < limite:
+            time.sleep(0.05)
+
+
+exportador = ExportadorSpans()
+atexit.register(exportador.vaciar)
+
+# ========================================
+# CONSULTAS SQL COMO SPANS
+# ========================================
+
+def _span_consulta(execute, sql, params, many, context):
+    if _actual.get() is None:
+        return execute(sql, params, many, context)
+    with span('db', sql=sql[:LONGITUD_SQL], alias=context['connection'].alias):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def trazar_consultas():
+    """Registra cada consulta SQL como span 'db' mientras haya una traza activa (en cualquier hilo)"""
+    if HABILITADAS:
+        instalar_wrapper_global(_span_consulta)
+    yield
+
+# ========================================
+# MIDDLEWARE Y MIXIN DE DRF
+# ========================================
+
+def _traceparent(cabecera):
+    """(traza_id, padre_id, muestreada) de una cabecera W3C 'traceparent', o None si no es válida"""
+    partes = (cabecera or '').strip().split('-')
+    if len(partes) != 4 or len(partes[1]) != 32 or len(partes[2]) != 16 or len(partes[3]) != 2:
+        return None
+    try:
+        int(partes[1], 16), int(partes[2], 16)
+        banderas = int(partes[3], 16)
+    except ValueError:
+        return None
+    return partes[1], partes[2], bool(banderas & 1)
+
+
+def _origen_confiable(request):
+    """Si la IP del cliente (resuelta como en la limitación de tasa) está en ORIGENES_CONFIABLES"""
+    if not ORIGENES_CONFIABLES:
+        return False
+    try:
+        ip = ipaddress.ip_address(limitador.ip(request) or '')
+    except ValueError:
+        return False
+    return any(ip in red for red in ORIGENES_CONFIABLES)
+
+
+class TrazasMiddleware:
+    """Span raíz por petición, con sus consultas SQL y el renderizado de la respuesta (WSGI y ASGI)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not HABILITADAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.es_asincrono = iscoroutinefunction(get_response)
+        if self.es_asincrono:
+            markcoroutinefunction(self)
+        instalar_wrapper_global(_span_consulta)
+
+    def _traza(self, request):
+        traza_id, padre_id, muestreada = _traceparent(request.headers.get('traceparent')) or (None, None, None)
+        if muestreada is not None and not _origen_confiable(request):
+            muestreada = None  # Decide el muestreador local
+        return iniciar_traza('http', traza_id, padre_id, muestreada, metodo=request.method, ruta=request.path)
+
+    def __call__(self, request):
+        if self.es_asincrono:
+            return self._llamar_async(request)
+        with self._traza(request) as raiz:
+            respuesta = self.get_response(request)
+            return self._cerrar(request, respuesta, raiz)
+
+    async def _llamar_async(self, request):
+        with self._traza(request) as raiz:
+            respuesta = await self.get_response(request)
+            return self._cerrar(request, respuesta, raiz)
+
+    def _cerrar(self, request, respuesta, raiz):
+        if raiz is None:
+            return respuesta
+        coincidencia = getattr(request, 'resolver_match', None)
+        # Nombre por vista (no por URL) para poder agrupar las trazas
+        raiz.nombre = f"{request.method} {coincidencia.view_name if coincidencia else 'sin_ruta'}"
+        raiz.atributo('estado', respuesta.status_code)
+        respuesta['X-Trace-Id'] = raiz.traza_id
+        return respuesta
+
+    def process_template_response(self, request, response):
+        # Las respuestas de DRF se renderizan al salir de la vista: se miden aparte
+        padre = _actual.get()
+        if padre is not None:
+            renderizado = Span('renderizado', padre.traza_id, padre.span_id)
+            response.add_post_render_callback(lambda _: renderizado.terminar())
+        return response
+
+
+class VistaTrazada:
+    """Mixin para ViewSets de DRF: autenticación/permisos, filtros, consulta y serialización"""
+
+    def initial(self, request, *args, **kwargs):
+        with span('drf.initial', vista=type(self).__name__, accion=getattr(self, 'action', None) or ''):
+            return super().initial(request, *args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        with span('drf.filtros', parametros=','.join(sorted(self.request.query_params))):
+            return super().filter_queryset(queryset)
+
+    def paginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        with span('drf.consulta', paginada=True):
+            return super().paginate_queryset(queryset)
+
+    def serializar(self, instancias, **kwargs):
+        """Evalúa el queryset y serializa en spans separados (ORM frente a serializer)"""
+        if not isinstance(instancias, list):
+            with span('drf.consulta'):
+                instancias = list(instancias)
+        with span('drf.serializacion', filas=len(instancias)):
+            return self.get_serializer(instancias, many=True, **kwargs).data
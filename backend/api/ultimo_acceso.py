@@ -0,0 +1,128 @@
+# ========================================
+# REGISTRO DE ÚLTIMO ACCESO (WRITE-BEHIND) - SEISMIC TRACKER
+# PROPÓSITO: Sacar la escritura de last_login del camino crítico del login
+# ========================================
+
+"""
+Registro diferido de last_login.
+
+En lugar de ejecutar un UPDATE por cada login, los accesos se acumulan en
+memoria (un valor por usuario: el más reciente) y un hilo en segundo plano
+los vuelca con bulk_update cada INTERVALO segundos, cuando se acumulan
+MAX_PENDIENTES usuarios o al terminar el proceso.
+
+Contadores expuestos por estadisticas():
+- registrados: logins recibidos
+- coalescidos: logins absorbidos por otro pendiente del mismo usuario (escrituras evitadas)
+- escritos: filas actualizadas en la BD
+- vaciados: volcados ejecutados
+"""
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_CONFIG = getattr(settings, 'ULTIMO_ACCESO', {})
+INTERVALO = _CONFIG.get('INTERVALO', 10)  # Segundos entre volcados
+MAX_PENDIENTES = _CONFIG.get('MAX_PENDIENTES', 1000)  # Usuarios pendientes que fuerzan un volcado
+TAMANO_LOTE = 500
+
+# ========================================
+# CLASE: RegistroUltimoAcceso
+# ========================================
+
+class RegistroUltimoAcceso:
+    """Búfer de last_login con volcado periódico en bloque (seguro entre hilos)"""
+
+    def __init__(self, intervalo=INTERVALO, max_pendientes=MAX_PENDIENTES):
+        self.intervalo = intervalo
+        self.max_pendientes = max_pendientes
+        self._pendientes = {}
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo = None
+        self.registrados = 0
+        self.coalescidos = 0
+        self.escritos = 0
+        self.vaciados = 0
+
+    def registrar(self, usuario_id, momento=None):
+        """Anota un acceso; solo se conserva el más reciente por usuario"""
+        momento = momento or timezone.now()
+        with self._lock:
+            self.registrados += 1
+            anterior = self._pendientes.get(usuario_id)
+            if anterior is not None:
+                self.coalescidos += 1
+                momento = max(anterior, momento)
+            self._pendientes[usuario_id] = momento
+            lleno = len(self._pendientes) >= self.max_pendientes
+        self._asegurar_hilo()
+        if lleno:
+            self._despertar.set()
+
+    def vaciar(self):
+        """Escribe en la BD todos los accesos pendientes. Retorna el número de filas actualizadas."""
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, {}
+        if not pendientes:
+            return 0
+
+        Usuario = get_user_model()
+        usuarios = [Usuario(pk=pk, last_login=momento) for pk, momento in pendientes.items()]
+        try:
+            Usuario.objects.bulk_update(usuarios, ['last_login'], batch_size=TAMANO_LOTE)
+        except Exception:
+            # Devolvemos los accesos al búfer sin pisar otros más recientes
+            with self._lock:
+                for pk, momento in pendientes.items():
+                    actual = self._pendientes.get(pk)
+                    self._pendientes[pk] = max(actual, momento) if actual else momento
+            logger.exception("[ULTIMO_ACCESO] Error al volcar %s accesos; se reintentará", len(pendientes))
+            return 0
+
+        with self._lock:
+            self.escritos += len(usuarios)
+            self.vaciados += 1
+        return len(usuarios)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'registrados': self.registrados,
+                'coalescidos': self.coalescidos,
+                'escritos': self.escritos,
+                'vaciados': self.vaciados,
+                'pendientes': len(self._pendientes),
+            }
+
+    # ----------------------------------------
+    # Hilo de volcado
+    # ----------------------------------------
+
+    def _asegurar_hilo(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name='ultimo-acceso', daemon=True)
+                self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            close_old_connections()
+            self.vaciar()
+
+
+# Instancia única por proceso
+registro_ultimo_acceso = RegistroUltimoAcceso()
+atexit.register(registro_ultimo_acceso.vaciar)
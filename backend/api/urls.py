@@ -1,7 +1,9 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from .views import RegistroUsuarioView, PerfilUsuarioView, NoticiaViewSet, EventoSismicoViewSet, UserManagementViewSet, ChangePasswordView
-from .views import PublicSismosView, sismos_diagnostics
+from .views import SuscripcionAlertaViewSet
+from .views import PublicSismosView, sismos_diagnostics, estadisticas_runtime, servir_archivo_contenido
+from .async_views import sismos_async, sismos_publicos_async, sismos_diagnostics_async
 
 # Creamos un router
 router = DefaultRouter()
@@ -10,6 +12,7 @@ router = DefaultRouter()
 router.register(r'noticias', NoticiaViewSet, basename='noticia') # <-- REGISTRAR NUEVO VIEWSET
 router.register(r'sismos', EventoSismicoViewSet, basename='sismo') # <-- REGISTRAR NUEVO VIEWSET
 router.register(r'admin/users', UserManagementViewSet, basename='admin-user') # <-- REGISTRAR NUEVO VIEWSET
+router.register(r'alertas/suscripciones', SuscripcionAlertaViewSet, basename='suscripcion-alerta')
 
 # Nuestras URLs de la API ahora consisten en las del router y las que definimos manualmente
 urlpatterns = [
@@ -18,6 +21,13 @@ urlpatterns = [
     path('perfil/cambiar-password/', ChangePasswordView.as_view(), name='change_password'),
     path('sismos/public/', PublicSismosView.as_view(), name='sismos_publicos'),
     path('sismos/diagnostics/', sismos_diagnostics, name='sismos_diagnostics'),
+    # Variantes asíncronas de los endpoints de lectura (pensadas para servir bajo asgi.py)
+    path('sismos/async/', sismos_async, name='sismos_async'),
+    path('sismos/async/public/', sismos_publicos_async, name='sismos_publicos_async'),
+    path('sismos/async/diagnostics/', sismos_diagnostics_async, name='sismos_diagnostics_async'),
+    path('admin/estadisticas/', estadisticas_runtime, name='estadisticas_runtime'),
+    # Archivos inmutables direccionados por contenido (avatares): /api/archivos/<sha256>.<ext>
+    re_path(r'^archivos/(?P<nombre>[0-9a-f]{64}\.[a-z0-9]{1,5})$', servir_archivo_contenido, name='archivo_contenido'),
     # Incluimos las URLs generadas por el router
     path('', include(router.urls)),
 ]
@@ -18,14 +18,16 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 # ========================================
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
-import os
 
 # ========================================
 # IMPORTACIONES LOCALES
 # ========================================
 
-from .models import EventoSismico, Noticia
+from .models import EventoSismico, Noticia, RevisionEvento, SuscripcionAlerta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,12 +37,38 @@ from .serializers import (
     MyTokenObtainPairSerializer,
     PerfilUsuarioSerializer,
     NoticiaSerializer,
+    NoticiaResumenSerializer,
     UserManagementSerializer,
-    PasswordChangeSerializer
+    AccionMasivaUsuariosSerializer,
+    PasswordChangeSerializer,
+    SuscripcionAlertaSerializer,
+    RevisionEventoSerializer,
 )
 from .permissions import IsAdminUser
-from .filters import EventoSismicoFilter, NoticiaFilter
-from rest_framework.decorators import api_view, permission_classes
+from .filters import EventoSismicoFilter, NoticiaFilter, UsuarioFilter
+from .pagination import KeysetPagination, NoticiasPagination
+from .noticias import TTL_LISTADO, clave_listado
+from .fotos import archivos_foto, liberar_fotos_en_segundo_plano, procesar_foto_en_segundo_plano
+from .spatial import INTENTOS_VECINOS, MARGEN_VECINOS, indice_cercania
+from .snapshot import consultar_snapshot, ultimos_eventos
+from .tiering import hay_archivo, buscar_por_usgs, combinar_con_archivo, estadisticas_archivo
+from .ingesta import eventos_por_usgs
+from .series import TTL as TTL_SERIES, clave_serie, leer_puntos, serie_magnitudes
+from .ultimo_acceso import registro_ultimo_acceso
+from .authentication import cache_usuarios
+from .throttling import limitador
+from .tareas import despachador_local
+from .almacen import CACHE_INMUTABLE, ruta_para as ruta_contenido
+from . import metricas
+from .trazas import VistaTrazada, span
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+import mimetypes
+import time
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, action
 
 # Obtener el modelo de usuario personalizado
 Usuario = get_user_model()
@@ -82,6 +110,7 @@ class RegistroUsuarioView(generics.CreateAPIView):
     serializer_class = RegistroUsuarioSerializer
     authentication_classes = []  # No requiere autenticación
     permission_classes = [AllowAny]  # Acceso público
+    throttle_bucket = 'registro'  # Cubeta por IP (api/throttling.py)
 
     def create(self, request, *args, **kwargs):
         """
@@ -137,6 +166,7 @@ class MyTokenObtainPairView(TokenObtainPairView):
     - 401: Credenciales inválidas
     """
     serializer_class = MyTokenObtainPairSerializer
+    throttle_bucket = 'login'  # Cubeta por IP antes del hash PBKDF2 (api/throttling.py)
     authentication_classes = []
     permission_classes = [AllowAny]
 
@@ -168,7 +198,8 @@ class PerfilUsuarioView(generics.RetrieveUpdateAPIView):
     - ruta_fotografia: Foto de perfil
     
     Características especiales:
-    - Limpieza automática de fotos anteriores
+    - Procesamiento de la foto en segundo plano (sin EXIF, tamaños fijos, WebP)
+    - Limpieza en segundo plano de fotos anteriores y sus variantes
     - Validación de formato de teléfono
     - Manejo de archivos con nombres únicos
     
@@ -184,31 +215,28 @@ class PerfilUsuarioView(generics.RetrieveUpdateAPIView):
         """Retorna el usuario autenticado actual"""
         return self.request.user
 
-    def partial_update(self, request, *args, **kwargs):
+    def perform_update(self, serializer):
         """
-        Actualización parcial con limpieza de archivos antiguos
+        Guarda el perfil y, si cambió la foto, encola su procesamiento y
+        la limpieza de la foto anterior y sus variantes (ver api/fotos.py)
         """
-        instance = self.get_object()
-        old_photo = instance.ruta_fotografia  # Guarda referencia a foto anterior
-        
-        # Ejecuta la actualización estándar
-        response = super().partial_update(request, *args, **kwargs)
-        
-        # Recarga la instancia desde la base de datos
-        instance.refresh_from_db()
-        
-        # Limpia la foto anterior si se cambió por una nueva
-        if old_photo and instance.ruta_fotografia != old_photo:
-            if hasattr(old_photo, 'path') and os.path.exists(old_photo.path):
-                os.remove(old_photo.path)
-        
-        return response
+        instance = serializer.instance
+        foto_anterior = instance.ruta_fotografia.name if instance.ruta_fotografia else None
+        archivos_anteriores = archivos_foto(foto_anterior, instance.fotografia_variantes)
+
+        instance = serializer.save()
+
+        foto_nueva = instance.ruta_fotografia.name if instance.ruta_fotografia else None
+        if foto_nueva != foto_anterior:
+            liberar_fotos_en_segundo_plano(archivos_anteriores)
+            if foto_nueva:
+                procesar_foto_en_segundo_plano(instance.pk, foto_nueva)
 
 # ========================================
 # VIEWSET: Gestión de Noticias
 # ========================================
 
-class NoticiaViewSet(viewsets.ModelViewSet):
+class NoticiaViewSet(VistaTrazada, viewsets.ModelViewSet):
     """
     VIEWSET PRINCIPAL: NoticiaViewSet
     
@@ -229,13 +257,18 @@ class NoticiaViewSet(viewsets.ModelViewSet):
     - DELETE /api/noticias/{id}/: Eliminar noticia (solo administradores)
     
     Sistema de permisos:
-    - Lectura (list, retrieve): Usuarios autenticados
+    - Lectura (list, retrieve): Usuarios autenticados (autorizados por claims del token, sin consulta a la BD)
     - Escritura (create, update, delete): Solo administradores
     
     Filtros disponibles:
-    - Por fecha de publicación
-    - Por rango de fechas
-    - Búsqueda en título y contenido
+    - published_after: Noticias posteriores a una fecha
+    - search: Búsqueda en título y contenido (índice invertido, el último término como prefijo)
+    
+    Lista:
+    - Paginación por cursor: ?page_size=&cursor= -> {next, results}
+    - Cada elemento lleva un extracto en texto plano; el contenido completo solo en el detalle
+    - El HTML se sanea y pre-renderiza al escribir (contenido_html); las lecturas no lo procesan
+    - Respuestas en caché, invalidadas con cada escritura de noticias
     
     Respuestas:
     - 200: Operación exitosa
@@ -246,8 +279,36 @@ class NoticiaViewSet(viewsets.ModelViewSet):
     """
     queryset = Noticia.objects.all().order_by('-fecha_publicacion')
     serializer_class = NoticiaSerializer
+    autenticacion_por_claims = True  # Las lecturas se autorizan solo con el token
     filter_backends = [DjangoFilterBackend]
     filterset_class = NoticiaFilter
+    pagination_class = NoticiasPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # El extracto ya está calculado: los cuerpos completos no se leen
+            queryset = queryset.only('id', 'titulo', 'extracto', 'minutos_lectura', 'fecha_publicacion')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return NoticiaResumenSerializer
+        return NoticiaSerializer
+
+    def list(self, request, *args, **kwargs):
+        """
+        Lista paginada servida desde caché. La clave incluye la URL completa
+        (filtros, cursor, host de los enlaces) y la versión del listado, que
+        se incrementa con cada escritura de noticias (ver api/noticias.py).
+        """
+        clave = clave_listado(request.build_absolute_uri())
+        datos = cache.get(clave)
+        metricas.registrar_cache('noticias', datos is not None)
+        if datos is None:
+            datos = super().list(request, *args, **kwargs).data
+            cache.set(clave, datos, TTL_LISTADO)
+        return Response(datos)
 
     def get_permissions(self):
         """
@@ -266,7 +327,7 @@ class NoticiaViewSet(viewsets.ModelViewSet):
 # VIEWSET: Consulta de Eventos Sísmicos
 # ========================================
 
-class EventoSismicoViewSet(viewsets.ReadOnlyModelViewSet):
+class EventoSismicoViewSet(VistaTrazada, viewsets.ReadOnlyModelViewSet):
     """
     VIEWSET PRINCIPAL: EventoSismicoViewSet
     
@@ -282,10 +343,18 @@ class EventoSismicoViewSet(viewsets.ReadOnlyModelViewSet):
     Endpoints:
     - GET /api/sismos/: Listar eventos sísmicos
     - GET /api/sismos/{id}/: Obtener evento específico
+    - GET /api/sismos/{id}/sequence/: Secuencia sísmica a la que pertenece el evento
+    - GET /api/sismos/{id}/revisions/: Historial de revisiones de USGS del evento
+    - GET /api/sismos/nearest/?lat=&lng=&k=&since=: Eventos recientes más cercanos a un punto
+    - GET /api/sismos/usgs/{id_evento_usgs}/: Obtener evento por su ID de USGS
+    - GET /api/sismos/batch/?ids=a,b,c o POST {"ids": [...]}: Varios eventos por ID de USGS
+    - GET /api/sismos/series/?points=N&<filtros>: Magnitud frente al tiempo reducida para gráficos
     
     Filtros disponibles:
     - magnitud: Exacta, mayor o igual, menor o igual
     - fecha_hora_evento: Por fecha, mayor o igual, menor o igual
+    - tipo_secuencia: PRINCIPAL, REPLICA o FONDO
+    - id_secuencia: Eventos de una secuencia concreta
     - Búsqueda por texto en lugar_descripcion
     
     Ordenamiento disponible:
@@ -294,9 +363,11 @@ class EventoSismicoViewSet(viewsets.ReadOnlyModelViewSet):
     - profundidad
     
     Características:
-    - Solo usuarios autenticados pueden acceder
+    - Solo usuarios autenticados pueden acceder (autorizados por claims del token, sin consulta a la BD)
     - Datos ordenados por fecha (más recientes primero)
-    - Filtrado optimizado para consultas geográficas
+    - Filtrado optimizado para consultas geográficas (lat_min, lat_max, lng_min, lng_max)
+    - Las consultas sobre la ventana reciente se resuelven desde el snapshot compartido
+    - Los eventos archivados en Parquet (nivel frío) se incluyen de forma transparente
     
     Respuestas:
     - 200: Consulta exitosa
@@ -306,6 +377,7 @@ class EventoSismicoViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = EventoSismico.objects.all().order_by('-fecha_hora_evento')
     serializer_class = EventoSismicoSerializer
     permission_classes = [IsAuthenticated]
+    autenticacion_por_claims = True  # Solo lectura: no hace falta cargar el Usuario
 
     # Configuración de backends de filtrado
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -323,15 +395,35 @@ class EventoSismicoViewSet(viewsets.ReadOnlyModelViewSet):
     # Campos de ordenamiento
     ordering_fields = ['fecha_hora_evento', 'magnitud', 'profundidad']  # Ej: ?ordering=-magnitud
 
+    max_ids_lote = 500  # IDs de USGS por petición en /batch/
+
     # ----------------------------------------
     # Override list para añadir logging de depuración
     # ----------------------------------------
     def list(self, request, *args, **kwargs):
         params = request.query_params.dict()
         logger.info("[SISMOS][LIST] Parámetros recibidos: %s", params)
+
+        # Ruta rápida: ventana reciente desde el snapshot mapeado en memoria
+        if self.paginator is None:
+            with span('sismos.snapshot'):
+                eventos = consultar_snapshot(request.query_params)
+            metricas.registrar_cache('snapshot', eventos is not None)
+            if eventos is not None:
+                logger.info("[SISMOS][LIST] Resuelto desde snapshot: %s eventos", len(eventos))
+                return Response(self.serializar(eventos))
+
         queryset = self.filter_queryset(self.get_queryset())
 
-        total = queryset.count()
+        # Nivel frío: combinamos con los eventos archivados en Parquet
+        if self.paginator is None and hay_archivo():
+            with span('sismos.archivo'):
+                eventos = combinar_con_archivo(queryset, request.query_params, self.ordering_fields)
+            logger.info("[SISMOS][LIST] Total después de filtros (BD + archivo): %s", len(eventos))
+            return Response(self.serializar(eventos))
+
+        with span('sismos.conteo'):
+            total = queryset.count()
         logger.info("[SISMOS][LIST] Total después de filtros: %s", total)
         if total == 0:
             logger.warning("[SISMOS][LIST] Sin resultados para filtros: %s", params)
@@ -339,23 +431,207 @@ class EventoSismicoViewSet(viewsets.ReadOnlyModelViewSet):
         page = self.paginate_queryset(queryset)
         if page is not None:
             logger.info("[SISMOS][LIST] Paginado activo. Elementos página: %s", len(page))
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(self.serializar(page))
 
-        serializer = self.get_serializer(queryset, many=True)
+        datos = self.serializar(queryset)
         # Log de primeras coordenadas para confirmar datos
-        sample = serializer.data[:3]
+        sample = datos[:3]
         logger.debug("[SISMOS][LIST] Muestra de datos: %s", [
             { 'id': s.get('id_evento_usgs'), 'lat': s.get('latitud'), 'lng': s.get('longitud'), 'mag': s.get('magnitud') }
             for s in sample
         ])
-        return Response(serializer.data)
+        return Response(datos)
+
+    # ----------------------------------------
+    # Eventos más cercanos a un punto
+    # ----------------------------------------
+    @action(detail=False, methods=['get'], url_path='nearest')
+    def nearest(self, request):
+        """
+        Devuelve los k eventos recientes más cercanos a (lat, lng), ordenados
+        por distancia y con el campo adicional 'distancia_km'.
+        Se resuelve con el índice espacial en memoria del worker.
+        """
+        try:
+            lat = float(request.query_params['lat'])
+            lng = float(request.query_params['lng'])
+            k = int(request.query_params.get('k', 10))
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Los parámetros 'lat' y 'lng' son obligatorios y numéricos; 'k' debe ser entero."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180) or not (1 <= k <= 100):
+            return Response(
+                {"detail": "Coordenadas fuera de rango o 'k' fuera del intervalo 1-100."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        since = None
+        if request.query_params.get('since'):
+            since = parse_datetime(request.query_params['since'])
+            if since is None:
+                return Response({"detail": "Formato de 'since' inválido."}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        # Se piden vecinos de más: los pks que ya no están en la BD (archivados o borrados)
+        # se descartan del índice y, si aun así faltan, se vuelve a consultar
+        for _ in range(INTENTOS_VECINOS):
+            candidatos = indice_cercania.consultar(lat, lng, k=k + MARGEN_VECINOS, desde=since)
+            eventos = EventoSismico.objects.in_bulk([pk for pk, _ in candidatos])
+            vecinos = [(pk, distancia) for pk, distancia in candidatos if pk in eventos][:k]
+            faltantes = [pk for pk, _ in candidatos if pk not in eventos]
+            if not faltantes:
+                break
+            indice_cercania.descartar(faltantes)
+            if len(vecinos) == k:
+                break
+
+        resultado = []
+        for pk, distancia in vecinos:
+            datos = self.get_serializer(eventos[pk]).data
+            datos['distancia_km'] = round(distancia, 2)
+            resultado.append(datos)
+        return Response(resultado)
+
+    # ----------------------------------------
+    # Serie magnitud/tiempo para gráficos
+    # ----------------------------------------
+    @action(detail=False, methods=['get'], url_path='series')
+    def series(self, request):
+        """
+        Magnitud frente al tiempo de los eventos filtrados (mismos filtros que
+        el listado), reducida a 'points' puntos como máximo conservando el
+        mínimo y el máximo de cada intervalo (ver api/series.py).
+
+        Respuesta: {'total', 'puntos', 'tiempos' (ms Unix), 'magnitudes'}
+        """
+        try:
+            puntos = leer_puntos(request.query_params.get('points'))
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        clave = clave_serie(request.query_params)
+        datos = cache.get(clave)
+        metricas.registrar_cache('series', datos is not None)
+        if datos is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            with span('sismos.serie', puntos=puntos):
+                datos = serie_magnitudes(queryset, request.query_params, puntos)
+            cache.set(clave, datos, TTL_SERIES)
+        return Response(datos)
+
+    # ----------------------------------------
+    # Búsqueda por ID de USGS
+    # ----------------------------------------
+    @action(detail=False, methods=['get'], url_path=r'usgs/(?P<id_evento_usgs>[\w.-]+)')
+    def usgs(self, request, id_evento_usgs=None):
+        """
+        Devuelve el evento con ese id_evento_usgs (el que aparece en alertas y
+        enlaces de USGS). Busca en la BD por el índice único y, si no está,
+        en el archivo frío.
+        """
+        evento = eventos_por_usgs([id_evento_usgs]).get(id_evento_usgs)
+        if evento is None and hay_archivo():
+            evento = next(iter(buscar_por_usgs([id_evento_usgs])), None)
+        if evento is None:
+            raise Http404
+        return Response(self.get_serializer(evento).data)
+
+    @action(detail=False, methods=['get', 'post'], url_path='batch')
+    def batch(self, request):
+        """
+        Resuelve varios IDs de USGS de una vez: ?ids=a,b,c o un cuerpo
+        {"ids": ["a", "b", "c"]}. Una consulta IN por cada 1000 IDs sobre el
+        índice único; los que falten se buscan después en el archivo frío.
+
+        Respuesta: {'eventos': [...] en el orden pedido, 'no_encontrados': [...]}
+        """
+        if request.method == 'POST':
+            ids = request.data.get('ids') if isinstance(request.data, dict) else None
+            if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+                return Response({"detail": "El cuerpo debe ser {\"ids\": [lista de IDs de USGS]}."},
+                                status=status.HTTP_400_BAD_REQUEST)
+        else:
+            ids = request.query_params.get('ids', '').split(',')
+
+        # Sin vacíos ni repetidos, conservando el orden pedido
+        ids = list(dict.fromkeys(i.strip() for i in ids if i.strip()))
+        if not ids:
+            return Response({"detail": "Indica al menos un ID de USGS en 'ids'."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_ids_lote:
+            return Response(
+                {"detail": f"Máximo {self.max_ids_lote} IDs por petición; se recibieron {len(ids)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        eventos = eventos_por_usgs(ids)
+        faltantes = [i for i in ids if i not in eventos]
+        if faltantes and hay_archivo():
+            eventos.update((e.id_evento_usgs, e) for e in buscar_por_usgs(faltantes))
+
+        return Response({
+            'eventos': self.get_serializer([eventos[i] for i in ids if i in eventos], many=True).data,
+            'no_encontrados': [i for i in ids if i not in eventos],
+        })
+
+    # ----------------------------------------
+    # Historial de revisiones del evento
+    # ----------------------------------------
+    @action(detail=True, methods=['get'], url_path='revisions')
+    def revisions(self, request, pk=None):
+        """
+        Revisiones del evento en orden cronológico, cada una con los campos
+        que USGS cambió (valor anterior y nuevo). Un evento nunca revisado
+        devuelve una lista vacía; uno inexistente, 404.
+        """
+        evento = self.get_object()
+        revisiones = RevisionEvento.objects.filter(evento=evento).order_by('fecha')
+        return Response({
+            'evento': evento.pk,
+            'revisiones': RevisionEventoSerializer(revisiones, many=True).data,
+        })
+
+    # ----------------------------------------
+    # Secuencia sísmica del evento
+    # ----------------------------------------
+    @action(detail=True, methods=['get'], url_path='sequence')
+    def sequence(self, request, pk=None):
+        """
+        Devuelve el sismo principal y las réplicas de la secuencia del evento.
+        Un evento de fondo se devuelve como secuencia de un único elemento.
+        """
+        evento = self.get_object()
+        if evento.id_secuencia is None:
+            eventos = [evento]
+        else:
+            eventos = list(
+                EventoSismico.objects.filter(id_secuencia=evento.id_secuencia)
+                .order_by('fecha_hora_evento')
+            )
+
+        principal = next(
+            (e for e in eventos if e.tipo_secuencia == EventoSismico.TipoSecuencia.PRINCIPAL),
+            None
+        )
+        replicas = [e for e in eventos if e.tipo_secuencia == EventoSismico.TipoSecuencia.REPLICA]
+
+        return Response({
+            'id_secuencia': evento.id_secuencia,
+            'evento': self.get_serializer(evento).data,
+            'principal': self.get_serializer(principal).data if principal else None,
+            'replicas': self.get_serializer(replicas, many=True).data,
+            'total': len(eventos),
+        })
 
 # ========================================
 # VIEWSET: Gestión de Usuarios (Administradores)
 # ========================================
 
-class UserManagementViewSet(mixins.ListModelMixin,
+class UserManagementViewSet(VistaTrazada,
+                            mixins.ListModelMixin,
                             mixins.RetrieveModelMixin,
                             mixins.DestroyModelMixin,
                             viewsets.GenericViewSet):
@@ -367,13 +643,22 @@ class UserManagementViewSet(mixins.ListModelMixin,
     Funcionalidades:
     1. Listado de usuarios visitantes
     2. Visualización de detalles de usuario
-    3. Eliminación de usuarios visitantes
-    4. Acceso exclusivo para administradores
+    3. Eliminación de usuarios visitantes (individual o en lote)
+    4. Desactivación de usuarios en lote
+    5. Acceso exclusivo para administradores
     
     Endpoints:
-    - GET /api/admin/users/: Listar usuarios visitantes
+    - GET /api/admin/users/: Listar usuarios visitantes (paginación keyset)
     - GET /api/admin/users/{id}/: Obtener detalles de usuario
     - DELETE /api/admin/users/{id}/: Eliminar usuario visitante
+    - POST /api/admin/users/bulk-deactivate/: Desactivar usuarios en lote
+    - POST /api/admin/users/bulk-delete/: Eliminar usuarios en lote
+    
+    Parámetros del listado:
+    - ordering: date_joined, -date_joined (por defecto), last_login, -last_login
+    - search: Prefijo de email, nombre o apellido
+    - is_active, registrado_desde, registrado_hasta
+    - page_size (máx. 500) y cursor (tomado del enlace 'next')
     
     Restricciones:
     - Solo administradores pueden acceder
@@ -391,19 +676,113 @@ class UserManagementViewSet(mixins.ListModelMixin,
     
     Respuestas:
     - 200: Operación exitosa
+    - 400: Cuerpo inválido en acciones masivas
     - 401: Usuario no autenticado
     - 403: Usuario no es administrador
-    - 404: Usuario no encontrado
+    - 404: Usuario no encontrado o cursor inválido
     """
     serializer_class = UserManagementSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = UsuarioFilter
+
+    # Usuarios procesados por transacción en las acciones masivas
+    TAMANO_LOTE = 500
 
     def get_queryset(self):
         """
         Filtra para mostrar solo usuarios de tipo 'VISITANTE'
         Excluye administradores del listado
         """
-        return Usuario.objects.filter(tipo_usuario='VISITANTE')
+        return Usuario.objects.filter(tipo_usuario=Usuario.TipoUsuario.VISITANTE).only(
+            *UserManagementSerializer.Meta.fields
+        )
+
+    def perform_destroy(self, instance):
+        """Elimina el usuario y programa el borrado de su foto de perfil"""
+        foto = instance.ruta_fotografia.name if instance.ruta_fotografia else None
+        archivos = archivos_foto(foto, instance.fotografia_variantes)
+        instance.delete()
+        liberar_fotos_en_segundo_plano(archivos)
+
+    def _lotes_de_ids(self, request):
+        """Valida el cuerpo y genera los IDs en lotes de TAMANO_LOTE"""
+        serializer = AccionMasivaUsuariosSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = sorted(set(serializer.validated_data['ids']) - {request.user.pk})
+        for inicio in range(0, len(ids), self.TAMANO_LOTE):
+            yield ids[inicio:inicio + self.TAMANO_LOTE]
+
+    @action(detail=False, methods=['post'], url_path='bulk-deactivate')
+    def bulk_deactivate(self, request):
+        """
+        Desactiva en lotes los usuarios visitantes indicados en {"ids": [...]}.
+        update() no emite señales, por lo que se invalida la caché de autenticación a mano.
+        """
+        solicitados = desactivados = 0
+        visitantes = Usuario.objects.filter(tipo_usuario=Usuario.TipoUsuario.VISITANTE)
+        for lote in self._lotes_de_ids(request):
+            solicitados += len(lote)
+            desactivados += visitantes.filter(pk__in=lote, is_active=True).update(is_active=False)
+            cache_usuarios.invalidar(*lote)
+        return Response({'solicitados': solicitados, 'desactivados': desactivados})
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """
+        Elimina en lotes (una transacción corta por lote) los usuarios visitantes
+        indicados en {"ids": [...]}. Las fotos se borran en segundo plano.
+        """
+        solicitados = eliminados = 0
+        visitantes = Usuario.objects.filter(tipo_usuario=Usuario.TipoUsuario.VISITANTE)
+        for lote in self._lotes_de_ids(request):
+            solicitados += len(lote)
+            with transaction.atomic():
+                objetivo = visitantes.filter(pk__in=lote)
+                fotos = [
+                    archivo
+                    for nombre, variantes in objetivo.exclude(ruta_fotografia='').values_list(
+                        'ruta_fotografia', 'fotografia_variantes'
+                    )
+                    for archivo in archivos_foto(nombre, variantes)
+                ]
+                _, por_modelo = objetivo.delete()
+            eliminados += por_modelo.get(Usuario._meta.label, 0)
+            cache_usuarios.invalidar(*lote)
+            liberar_fotos_en_segundo_plano(fotos)
+        return Response({'solicitados': solicitados, 'eliminados': eliminados})
+
+# ========================================
+# VIEWSET: Suscripciones a Alertas
+# ========================================
+
+class SuscripcionAlertaViewSet(viewsets.ModelViewSet):
+    """
+    CRUD de los lugares con alerta del usuario autenticado.
+    
+    Endpoints:
+    - GET/POST /api/alertas/suscripciones/
+    - GET/PUT/PATCH/DELETE /api/alertas/suscripciones/{id}/
+    
+    Cada ingesta empareja los eventos nuevos y revisados con las suscripciones
+    activas mediante un índice por celdas, y las alertas se envían por correo
+    agrupadas por usuario (ver api/alertas.py).
+    
+    Respuestas:
+    - 200/201/204: Operación exitosa
+    - 400: Datos inválidos o límite de suscripciones alcanzado
+    - 401: Usuario no autenticado
+    - 404: La suscripción no existe o pertenece a otro usuario
+    """
+    serializer_class = SuscripcionAlertaSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return SuscripcionAlerta.objects.filter(usuario=self.request.user).order_by('id')
+
+    def perform_create(self, serializer):
+        serializer.save(usuario=self.request.user)
 
 # ========================================
 # VISTA: Cambio de Contraseña
@@ -508,22 +887,100 @@ class PublicSismosView(generics.ListAPIView):
     """
     queryset = EventoSismico.objects.order_by('-fecha_hora_evento')[:10]
     serializer_class = EventoSismicoSerializer
+    authentication_classes = []  # Público: no se resuelve el usuario
     permission_classes = [AllowAny]  # Acceso completamente público
+    throttle_bucket = 'publico'  # Cubeta por IP (api/throttling.py)
+
+    def get_queryset(self):
+        """Usa el snapshot compartido si está disponible; si no, consulta la base de datos"""
+        eventos = ultimos_eventos(10)
+        if eventos is not None:
+            return eventos
+        return super().get_queryset()
 
 # ========================================
 # VISTA: Diagnóstico rápido de sismos
 # ========================================
 @api_view(['GET'])
+@authentication_classes([])
 @permission_classes([AllowAny])
 def sismos_diagnostics(request):
-    """Devuelve métricas rápidas para depurar el endpoint de sismos."""
+    """Devuelve métricas rápidas para depurar el endpoint de sismos (BD + archivo frío)."""
     total = EventoSismico.objects.count()
     first = EventoSismico.objects.order_by('fecha_hora_evento').first()
     last = EventoSismico.objects.order_by('-fecha_hora_evento').first()
+
+    first_event = first.fecha_hora_evento if first else None
+    first_coords = {'lat': first.latitud, 'lng': first.longitud} if first else None
+
+    archivo = estadisticas_archivo()
+    primero_archivo = archivo['primero']
+    if primero_archivo and (first_event is None or primero_archivo['fecha_hora_evento'] < first_event):
+        first_event = primero_archivo['fecha_hora_evento']
+        first_coords = {'lat': primero_archivo['latitud'], 'lng': primero_archivo['longitud']}
+
     return Response({
-        'total': total,
-        'first_event': first.fecha_hora_evento.isoformat() if first else None,
-        'first_coords': {'lat': first.latitud, 'lng': first.longitud} if first else None,
+        'total': total + archivo['total'],
+        'total_archivo': archivo['total'],
+        'first_event': first_event.isoformat() if first_event else None,
+        'first_coords': first_coords,
         'last_event': last.fecha_hora_evento.isoformat() if last else None,
         'last_coords': {'lat': last.latitud, 'lng': last.longitud} if last else None,
-    })
\ No newline at end of file
+    })
+
+# ========================================
+# VISTA: Estadísticas internas (Administradores)
+# ========================================
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def estadisticas_runtime(request):
+    """Contadores en memoria de este proceso (p. ej. escrituras de last_login coalescidas)."""
+    return Response({
+        'ultimo_acceso': registro_ultimo_acceso.estadisticas(),
+        'cache_usuarios': cache_usuarios.estadisticas(),
+        'throttling': limitador.estadisticas(),
+        'tareas': despachador_local.estadisticas(),
+    })
+
+# ========================================
+# VISTA: Métricas Prometheus
+# ========================================
+@require_GET
+def metricas_prometheus(request):
+    """
+    Métricas de todos los procesos en formato de exposición de Prometheus
+    (api/metricas.py). Sin autenticación JWT: se restringe por IP con
+    METRICAS['IPS_PERMITIDAS']. La IP del cliente se resuelve como en la
+    limitación de tasa (THROTTLING['NUM_PROXIES']).
+    """
+    if metricas.IPS_PERMITIDAS is not None and limitador.ip(request) not in metricas.IPS_PERMITIDAS:
+        return HttpResponseForbidden()
+    return HttpResponse(metricas.generar(), content_type=metricas.CONTENT_TYPE_LATEST)
+
+# ========================================
+# VISTA: Archivos direccionados por contenido (avatares)
+# ========================================
+@require_GET
+def servir_archivo_contenido(request, nombre):
+    """
+    Sirve un archivo del almacén direccionado por contenido (api/almacen.py).
+
+    El nombre es el SHA-256 del contenido, por lo que el archivo nunca cambia
+    bajo la misma URL: se envía con Cache-Control immutable y caducidad de un
+    año, y el ETag (el propio hash) permite responder 304 sin leer el archivo.
+    """
+    sha256 = nombre.split('.', 1)[0]
+    etag = f'"{sha256}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        respuesta = HttpResponseNotModified()
+    else:
+        ruta = ruta_contenido(sha256, nombre.split('.', 1)[1])
+        try:
+            archivo = default_storage.open(ruta, 'rb')
+        except FileNotFoundError:
+            raise Http404("Archivo no encontrado")
+        respuesta = FileResponse(archivo, content_type=mimetypes.guess_type(nombre)[0])
+    respuesta['ETag'] = etag
+    respuesta['Cache-Control'] = f'public, max-age={CACHE_INMUTABLE}, immutable'
+    respuesta['Expires'] = http_date(time.time() + CACHE_INMUTABLE)
+    return respuesta
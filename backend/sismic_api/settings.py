@@ -46,7 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metricas.MetricasMiddleware',  # Primero: mide la petición completa (api/metricas.py)
+    'api.trazas.TrazasMiddleware',  # Span raíz por petición (solo con TRAZAS['HABILITADAS'])
     'django.middleware.security.SecurityMiddleware',
+    'api.consultas.ContadorConsultasMiddleware',  # Cabeceras X-DB-Queries (solo con CONTADOR_CONSULTAS)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Middleware para manejar CORS
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +57,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.throttling.TokenBucketMiddleware',  # Limitación de tasa antes de ejecutar la vista
 ]
 
 ROOT_URLCONF = 'sismic_api.urls'
@@ -145,7 +149,8 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media') # Directorio en el sistema de archi
 # Configuración de Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT con modo por claims para lecturas y caché de usuarios (api/authentication.py)
+        'api.authentication.JWTAutenticacionCacheada',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -168,6 +173,11 @@ LOGGING = {
         },
     },
     'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'api.views': {
             'handlers': ['console'],
             'level': 'INFO',
@@ -182,3 +192,130 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Snapshot columnar de eventos recientes compartido entre workers (api/snapshot.py)
+SISMOS_SNAPSHOT = {
+    'DIRECTORIO': os.path.join(BASE_DIR, 'var', 'snapshot'),
+    'VENTANA_DIAS': 30,
+}
+
+# Archivo histórico (nivel frío) de eventos en Parquet particionado (api/tiering.py)
+SISMOS_ARCHIVO = {
+    'DIRECTORIO': os.path.join(BASE_DIR, 'var', 'archivo'),
+    'EDAD_DIAS': 90,
+    'TAMANO_LOTE': 5000,
+    'MAXIMO_LISTADO': 10000,  # Eventos archivados como máximo en un listado sin paginar
+}
+
+# Registro diferido (write-behind) de last_login (api/ultimo_acceso.py)
+ULTIMO_ACCESO = {
+    'INTERVALO': 10,  # Segundos entre volcados a la base de datos
+    'MAX_PENDIENTES': 1000,  # Usuarios pendientes que fuerzan un volcado inmediato
+}
+
+# Caché LRU/TTL de usuarios para la autenticación JWT (api/authentication.py)
+AUTENTICACION_CACHE = {
+    'MAX_ENTRADAS': 10000,
+    'TTL': 60,  # Segundos máximos de desactualización entre procesos
+}
+
+# Limitación de tasa por cubetas de tokens (api/throttling.py)
+# 'tasa': reposición sostenida; 'rafaga': capacidad de la cubeta; 'clave': ip | usuario | usuario_o_ip
+THROTTLING = {
+    'BACKEND': 'memoria',  # 'memoria' (local al proceso) o 'cache' (caché de Django, p. ej. Redis)
+    'NUM_PROXIES': None,  # Proxies de confianza delante de Django para leer X-Forwarded-For
+    'LIMITES': {
+        'login': {'tasa': '10/min', 'rafaga': 5, 'clave': 'ip'},
+        'refresh': {'tasa': '30/min', 'rafaga': 10, 'clave': 'ip'},
+        'registro': {'tasa': '5/hour', 'rafaga': 3, 'clave': 'ip'},
+        'password_reset': {'tasa': '5/hour', 'rafaga': 3, 'clave': 'ip'},
+        'cambio_password': {'tasa': '5/hour', 'rafaga': 3, 'clave': 'usuario_o_ip'},
+        'publico': {'tasa': '2/s', 'rafaga': 20, 'clave': 'ip'},
+    },
+    # Vistas sin atributo throttle_bucket (de terceros o funciones), por nombre de URL
+    'VISTAS': {
+        'token_refresh': 'refresh',
+        'change_password': 'cambio_password',
+        'password_reset:reset-password-request': 'password_reset',
+        'password_reset:reset-password-confirm': 'password_reset',
+        'password_reset:reset-password-validate': 'password_reset',
+        'sismos_publicos_async': 'publico',
+    },
+}
+
+# Procesamiento de fotos de perfil en segundo plano (api/fotos.py)
+FOTOS_PERFIL = {
+    'TAMANOS': {'sm': 64, 'md': 256, 'lg': 512},  # Recortes cuadrados WebP (px)
+    'LADO_MAXIMO': 1024,  # Lado mayor de la versión maestra JPEG
+    'CALIDAD': 82,
+    'MAX_BYTES': 10 * 1024 * 1024,
+}
+
+# Almacén de archivos direccionados por contenido con conteo de referencias (api/almacen.py)
+ALMACEN_CONTENIDO = {
+    'DIRECTORIO': 'contenido',  # Prefijo dentro de MEDIA_ROOT / el storage configurado
+    'GRACIA_HORAS': 24,  # Horas sin referencias antes de que gc_archivos borre el archivo
+    'TAMANO_LOTE': 500,
+}
+
+# Cola de tareas en segundo plano respaldada por la BD (api/tareas.py)
+TAREAS = {
+    # 'hilos': el propio proceso ejecuta las tareas (desarrollo); 'bd': solo run_workers las ejecuta
+    'MODO': 'hilos' if DEBUG else 'bd',
+    'COLAS': {  # Hilos por cola y proceso
+        'default': 2,
+        'correo': 2,
+        'fotos': 2,
+        'ingesta': 1,  # Secuencias y snapshot deben aplicarse en orden
+        'alertas': 1,
+    },
+    'INTERVALO': 1.0,  # Segundos entre sondeos sin trabajo
+    'CONCESION': 300,  # Segundos antes de devolver a la cola una tarea de un trabajador caído
+    'SERIALIZADAS': ['ingesta'],  # Colas con una sola tarea en curso entre todos los procesos
+    'RETROCESO_BASE': 5,  # Reintentos: 5 s, 10 s, 20 s... hasta RETROCESO_MAXIMO
+    'RETROCESO_MAXIMO': 3600,
+    'RETENCION_DIAS': 7,  # Días que se conservan las tareas completadas
+}
+
+# Feed de noticias: extractos y caché del listado (api/noticias.py)
+NOTICIAS = {
+    'TTL_LISTADO': 60,  # Segundos en caché de cada página de la lista (tope de desfase entre procesos con LocMem)
+    'LONGITUD_EXTRACTO': 280,  # Caracteres del extracto en texto plano (máx. 399, ver Noticia.extracto)
+    'PALABRAS_POR_MINUTO': 200,  # Velocidad de lectura para minutos_lectura
+}
+
+# Alertas por suscripción a lugares guardados (api/alertas.py)
+ALERTAS = {
+    'GRADOS_CELDA': 1.0,  # Lado de la celda del índice espacial (~111 km de latitud)
+    'AGRUPAR_SEGUNDOS': 30,  # Retraso del envío para agrupar en un correo varias ingestas seguidas
+    'MAX_POR_USUARIO': 10,  # Suscripciones por usuario
+}
+
+# Cabeceras X-DB-Queries / X-DB-Time-Ms en cada respuesta (api/consultas.py).
+# Actívalo en el servidor sometido a load_test para ver las consultas por escenario.
+CONTADOR_CONSULTAS = DEBUG
+
+# Métricas Prometheus en /metrics (api/metricas.py)
+METRICAS = {
+    'HABILITADAS': True,
+    # Con varios procesos de servidor o run_workers: directorio compartido (vaciarlo al desplegar)
+    'DIRECTORIO_MULTIPROCESO': None if DEBUG else str(BASE_DIR / 'var' / 'metricas'),
+    'IPS_PERMITIDAS': None if DEBUG else ['127.0.0.1', '::1'],  # None = sin restricción
+}
+
+# Trazas con spans por fase: vistas, filtros, consultas, serialización, fetch_sismos (api/trazas.py)
+TRAZAS = {
+    'HABILITADAS': False,  # Deshabilitadas: el middleware no se instala y span() no hace nada
+    'MUESTREO': 0.1,  # Fracción de peticiones trazadas
+    'ORIGENES_CONFIABLES': [],  # Redes (CIDR) cuya bandera de muestreo en 'traceparent' se respeta
+    'EXPORTADOR': 'jsonl',  # 'jsonl' (ARCHIVO) u 'otlp' (OTLP/HTTP JSON a OTLP_URL)
+    'ARCHIVO': str(BASE_DIR / 'var' / 'trazas.jsonl'),
+    'OTLP_URL': 'http://127.0.0.1:4318/v1/traces',
+}
+
+# Serie magnitud/tiempo reducida para gráficos: /api/sismos/series/ (api/series.py)
+SERIES = {
+    'TTL': 300,  # Segundos en caché de cada serie (tope de desfase entre procesos con LocMem)
+    'PUNTOS_POR_DEFECTO': 1000,
+    'PUNTOS_MAXIMOS': 5000,
+}
@@ -5,7 +5,7 @@ from django.conf.urls.static import static # Importa las funciones para servir a
 
 # Importa la vista de refresco de simplejwt y nuestra vista de login personalizada
 from rest_framework_simplejwt.views import TokenRefreshView
-from api.views import MyTokenObtainPairView # <-- CAMBIO AQUÍ
+from api.views import MyTokenObtainPairView, metricas_prometheus # <-- CAMBIO AQUÍ
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -18,6 +18,9 @@ urlpatterns = [
     path('api/token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'), 
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/password_reset/', include('django_rest_passwordreset.urls', namespace='password_reset')),
+
+    # Métricas para Prometheus (restringidas por IP, ver METRICAS en settings)
+    path('metrics', metricas_prometheus, name='metricas'),
 ]
 
 if settings.DEBUG:
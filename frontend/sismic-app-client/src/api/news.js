@@ -1,7 +1,16 @@
 import apiClient from './apiClient';
 
-export const getNoticias = async (params = {}) => { // Asegúrate de que acepte params
-  const response = await apiClient.get('/noticias/', { params });
+// Lista paginada por cursor: { next, results } con un extracto por noticia
+export const getNoticias = async (nextUrl = null, params = {}) => {
+  const response = nextUrl
+    ? await apiClient.get(nextUrl)
+    : await apiClient.get('/noticias/', { params });
+  return response.data;
+};
+
+// Noticia completa (con el contenido)
+export const getNoticia = async (newsId) => {
+  const response = await apiClient.get(`/noticias/${newsId}/`);
   return response.data;
 };
 
@@ -16,8 +16,12 @@ export const updateProfile = async (formData) => {
   return response.data;
 };
 
-export const getVisitorUsers = async () => {
-    const response = await apiClient.get('/admin/users/');
+// Listado paginado por cursor: devuelve { next, results }.
+// Para la página siguiente se pasa la URL completa recibida en 'next'.
+export const getVisitorUsers = async (nextUrl = null, params = {}) => {
+    const response = nextUrl
+        ? await apiClient.get(nextUrl)
+        : await apiClient.get('/admin/users/', { params });
     return response.data;
 };
 
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import {
   getNoticias,
+  getNoticia,
   createNoticia,
   updateNoticia,
   deleteNoticia,
@@ -33,14 +34,17 @@ const MotionTableRow = motion(TableRow);
 
 const NewsManagement = () => {
   const [news, setNews] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null); // Cursor de la página siguiente
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [editingNews, setEditingNews] = useState(null); // null para crear, objeto para editar
 
   const fetchNews = async () => {
     try {
       const data = await getNoticias();
-      setNews(data);
+      setNews(data.results);
+      setNextUrl(data.next);
     } catch (error) {
       toast.error("No se pudieron cargar las noticias.");
     } finally {
@@ -48,6 +52,19 @@ const NewsManagement = () => {
     }
   };
 
+  const fetchMoreNews = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await getNoticias(nextUrl);
+      setNews((prev) => [...prev, ...data.results]);
+      setNextUrl(data.next);
+    } catch (error) {
+      toast.error("No se pudieron cargar más noticias.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchNews();
   }, []);
@@ -57,9 +74,16 @@ const NewsManagement = () => {
     setIsModalOpen(true);
   };
 
-  const handleEdit = (newsItem) => {
-    setEditingNews(newsItem);
-    setIsModalOpen(true);
+  const handleEdit = async (newsItem) => {
+    // La lista solo trae el extracto: se carga la noticia completa para editarla
+    try {
+      const noticia = await getNoticia(newsItem.id);
+      // El editor parte de la versión saneada (la API no devuelve el HTML crudo)
+      setEditingNews({ ...noticia, contenido: noticia.contenido_html });
+      setIsModalOpen(true);
+    } catch (error) {
+      toast.error("No se pudo cargar la noticia.");
+    }
   };
 
   const handleDelete = async (newsId) => {
@@ -237,6 +261,14 @@ const NewsManagement = () => {
         </Table>
       </TableContainer>
 
+      {nextUrl && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button variant="outlined" onClick={fetchMoreNews} disabled={loadingMore}>
+            {loadingMore ? <CircularProgress size={20} /> : "Cargar más"}
+          </Button>
+        </Box>
+      )}
+
       {isModalOpen && (
         <NewsForm
           initialData={editingNews}
@@ -15,6 +15,7 @@ import {
   Typography,
   CircularProgress,
   Box, // <-- agregado
+  Button,
 } from "@mui/material";
 import DeleteIcon from "@mui/icons-material/Delete";
 
@@ -24,12 +25,15 @@ const MotionTableRow = motion(TableRow);
 
 const UserManagement = () => {
   const [users, setUsers] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null); // Cursor de la página siguiente
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const fetchUsers = async () => {
     try {
       const data = await getVisitorUsers();
-      setUsers(data);
+      setUsers(data.results);
+      setNextUrl(data.next);
     } catch (error) {
       toast.error("No se pudieron cargar los usuarios.");
     } finally {
@@ -37,6 +41,19 @@ const UserManagement = () => {
     }
   };
 
+  const fetchMoreUsers = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await getVisitorUsers(nextUrl);
+      setUsers((prev) => [...prev, ...data.results]);
+      setNextUrl(data.next);
+    } catch (error) {
+      toast.error("No se pudieron cargar más usuarios.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchUsers();
   }, []);
@@ -188,6 +205,14 @@ const UserManagement = () => {
           </MotionTableBody>
         </Table>
       </TableContainer>
+
+      {nextUrl && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button variant="outlined" onClick={fetchMoreUsers} disabled={loadingMore}>
+            {loadingMore ? <CircularProgress size={20} /> : "Cargar más"}
+          </Button>
+        </Box>
+      )}
     </Box>
   );
 };
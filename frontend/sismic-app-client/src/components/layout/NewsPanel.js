@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback } from "react";
-import { getNoticias } from "../../api/news";
+import { getNoticia, getNoticias } from "../../api/news";
 import useInterval from "../../hooks/useInterval";
 import useAuthStore from "../../store/authStore";
 import {
@@ -32,13 +32,20 @@ const NewsPanel = () => {
   const { toggleNewsPanel } = useAuthStore();
   const [selectedNews, setSelectedNews] = useState(null);
 
-  const handleReadMore = (newsItem) => setSelectedNews(newsItem);
+  const handleReadMore = async (newsItem) => {
+    // La lista solo trae el extracto: el contenido completo se pide al abrir
+    try {
+      setSelectedNews(await getNoticia(newsItem.id));
+    } catch (error) {
+      console.error("Error al cargar la noticia:", error);
+    }
+  };
   const handleCloseModal = () => setSelectedNews(null);
 
   const fetchNews = useCallback(async () => {
     try {
-      const data = await getNoticias();
-      setNoticias(data.slice(0, 10));
+      const data = await getNoticias(null, { page_size: 10 });
+      setNoticias(data.results);
     } catch (error) {
       console.error("Error al cargar noticias:", error);
     } finally {
@@ -46,8 +53,6 @@ const NewsPanel = () => {
     }
   }, [loading]);
 
-  const TRUNCATE_LENGTH = 120;
-
   useEffect(() => {
     fetchNews();
   }, [fetchNews]);
@@ -183,21 +188,13 @@ const NewsPanel = () => {
                           </Typography>
                         }
                         secondary={
-                          <div
-                            className="news-content"
-                            style={{ color: "#b3e5fc" }}
-                            dangerouslySetInnerHTML={{
-                              __html:
-                                noticia.contenido.substring(0, TRUNCATE_LENGTH) +
-                                (noticia.contenido.length > TRUNCATE_LENGTH
-                                  ? "..."
-                                  : ""),
-                            }}
-                          />
+                          <div className="news-content" style={{ color: "#b3e5fc" }}>
+                            {noticia.extracto}
+                          </div>
                         }
                         secondaryTypographyProps={{ component: "div" }}
                       />
-                      {noticia.contenido.length > TRUNCATE_LENGTH && (
+                      {noticia.extracto.endsWith("…") && (
                         <Button
                           size="small"
                           onClick={() => handleReadMore(noticia)}
@@ -264,11 +261,14 @@ const NewsPanel = () => {
                   "es-CR",
                   { year: "numeric", month: "long", day: "numeric" }
                 )}
+                {selectedNews.minutos_lectura > 0 &&
+                  ` · ${selectedNews.minutos_lectura} min de lectura`}
               </Typography>
 
               <Box
                 className="news-content-full"
-                dangerouslySetInnerHTML={{ __html: selectedNews.contenido }}
+                // HTML saneado en el servidor al guardar la noticia
+                dangerouslySetInnerHTML={{ __html: selectedNews.contenido_html }}
               />
             </DialogContent>
 